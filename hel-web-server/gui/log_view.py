@@ -0,0 +1,255 @@
+from PyQt5.QtWidgets import (
+	QListView, QAbstractItemView, QWidget, QHBoxLayout, QLineEdit, QCheckBox, QComboBox, QLabel
+)
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer
+from PyQt5.QtGui import QColor
+
+import re
+import time
+
+from server_manager.log_buffer import LEVEL_INFO, LEVEL_WARNING, LEVEL_ERROR
+from server_manager.log_index import LogIndex, LiveFilter, LogQuery, ERROR_STREAMS
+from server_manager.config import LOG_FLUSH_INTERVAL_MS
+
+FILTER_DELAY_MS = 150 # ننتظر توقف الكتابة قبل تطبيق المرشح
+
+LEVEL_CHOICES = (("All levels", LEVEL_INFO), ("Warnings and errors", LEVEL_WARNING), ("Errors only", LEVEL_ERROR))
+STREAM_CHOICES = (("All output", None), ("stderr ([SERVER-ERR], [PHP-LOG])", ERROR_STREAMS), ("stdout ([SERVER], [PHP])", ("SERVER", "PHP")))
+
+LEVEL_COLORS = {
+	LEVEL_WARNING: QColor("#ffcc66"),
+	LEVEL_ERROR: QColor("#ff6666"),
+}
+
+
+class LogListModel(QAbstractListModel):
+	"""Read-only list model over a LogBuffer; rows are formatted only when painted.
+
+	With a LiveFilter set, rows map to the filter's matching sequence
+	numbers instead of the whole buffer.
+	"""
+
+	def __init__(self, log_buffer, parent=None):
+		super().__init__(parent)
+		self.log_buffer = log_buffer
+		self._first_seq = log_buffer.first_seq
+		self._count = 0
+		self.live_filter = None
+
+	def rowCount(self, parent=QModelIndex()):
+		if parent.isValid():
+			return 0
+		if self.live_filter is not None:
+			return len(self.live_filter.seqs)
+		return self._count
+
+	def _seq(self, row):
+		if self.live_filter is not None:
+			seqs = self.live_filter.seqs
+			return seqs[row] if row < len(seqs) else None
+		return self._first_seq + row
+
+	def data(self, index, role=Qt.DisplayRole):
+		if not index.isValid():
+			return None
+		seq = self._seq(index.row())
+		record = self.log_buffer.get(seq) if seq is not None else None
+		if record is None:
+			return None
+		timestamp, level, text = record
+		if role == Qt.DisplayRole:
+			return f"{time.strftime('[%H:%M:%S]', time.localtime(timestamp))} {text}"
+		if role == Qt.ForegroundRole:
+			return LEVEL_COLORS.get(level)
+		return None
+
+	def set_filter(self, live_filter):
+		"""Shows only the lines of ``live_filter`` (None shows everything)."""
+		self.beginResetModel()
+		self.live_filter = live_filter
+		self._first_seq, end = self.log_buffer.bounds()
+		self._count = end - self._first_seq
+		self.endResetModel()
+
+	def sync(self):
+		"""Applies lines added/evicted since the last sync as one batch of row changes."""
+		if self.live_filter is not None:
+			self._sync_filtered()
+			return
+		first, end = self.log_buffer.bounds()
+		old_end = self._first_seq + self._count
+		if first == self._first_seq and end == old_end:
+			return
+
+		if first >= old_end:
+			# تم استبدال كل الأسطر المعروضة (أو مسحها)، إعادة بناء كاملة أرخص
+			self.beginResetModel()
+			self._first_seq = first
+			self._count = end - first
+			self.endResetModel()
+			return
+
+		evicted = first - self._first_seq
+		if evicted > 0:
+			self.beginRemoveRows(QModelIndex(), 0, evicted - 1)
+			self._first_seq = first
+			self._count -= evicted
+			self.endRemoveRows()
+
+		added = end - old_end
+		if added > 0:
+			self.beginInsertRows(QModelIndex(), self._count, self._count + added - 1)
+			self._count += added
+			self.endInsertRows()
+
+	def _sync_filtered(self):
+		# Qt يتوقع الإعلان عن الصفوف قبل تعديل البيانات، لذلك نطبق التغييرات بأنفسنا
+		removed, added = self.live_filter.poll()
+		seqs = self.live_filter.seqs
+		if removed:
+			self.beginRemoveRows(QModelIndex(), 0, removed - 1)
+			del seqs[:removed]
+			self.endRemoveRows()
+		if added:
+			self.beginInsertRows(QModelIndex(), len(seqs), len(seqs) + len(added) - 1)
+			seqs.extend(added)
+			self.endInsertRows()
+
+
+class LogView(QListView):
+	"""Virtualized log view that pulls new lines from the buffer on a timer."""
+
+	def __init__(self, log_buffer, parent=None):
+		super().__init__(parent)
+		self.log_model = LogListModel(log_buffer, self)
+		self.setModel(self.log_model)
+		self.setUniformItemSizes(True)
+		self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+		self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+		# الفهرس يُبنى تدريجياً مع كل تحديث حتى يكون جاهزاً عند أول بحث
+		self.log_index = LogIndex(log_buffer)
+
+		self.flush_timer = QTimer(self)
+		self.flush_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+		self.flush_timer.timeout.connect(self.flush)
+		self.flush_timer.start()
+
+	def flush(self):
+		"""Shows buffered lines, keeping the view pinned to the bottom if it was there."""
+		scrollbar = self.verticalScrollBar()
+		at_bottom = scrollbar.value() >= scrollbar.maximum()
+		self.log_index.update()
+		self.log_model.sync()
+		if at_bottom:
+			self.scrollToBottom()
+
+	def set_query(self, query):
+		"""Filters the view with a LogQuery (None or an empty query shows every line)."""
+		live_filter = self.log_model.live_filter
+		if query is None or query.is_empty:
+			if live_filter is not None:
+				self.log_model.set_filter(None)
+		elif live_filter is None:
+			self.log_model.set_filter(LiveFilter(self.log_index, query))
+		else:
+			self.log_model.beginResetModel()
+			live_filter.set_query(query)
+			self.log_model.endResetModel()
+		self.scrollToBottom()
+
+	def match_count(self):
+		"""Returns (shown lines, retained lines)."""
+		total = len(self.log_model.log_buffer)
+		return self.log_model.rowCount(), total
+
+
+class LogFilterBar(QWidget):
+	"""Text/regex, level, output stream and backend filters for a LogView."""
+
+	def __init__(self, log_view, parent=None):
+		super().__init__(parent)
+		self.log_view = log_view
+		layout = QHBoxLayout(self)
+		layout.setContentsMargins(0, 0, 0, 0)
+
+		self.text_input = QLineEdit()
+		self.text_input.setPlaceholderText("Filter logs...")
+		self.text_input.setClearButtonEnabled(True)
+		layout.addWidget(self.text_input, 1)
+
+		self.regex_check = QCheckBox("Regex")
+		layout.addWidget(self.regex_check)
+
+		self.level_combo = QComboBox()
+		for label, level in LEVEL_CHOICES:
+			self.level_combo.addItem(label, level)
+		layout.addWidget(self.level_combo)
+
+		self.stream_combo = QComboBox()
+		for label, streams in STREAM_CHOICES:
+			self.stream_combo.addItem(label, streams)
+		layout.addWidget(self.stream_combo)
+
+		# قائمة الخوادم تظهر فقط عندما يحتوي السجل على وسوم خوادم (تشغيل Stack)
+		self.backend_combo = QComboBox()
+		self.backend_combo.addItem("All servers", None)
+		self.backend_combo.setVisible(False)
+		layout.addWidget(self.backend_combo)
+
+		self.count_label = QLabel()
+		layout.addWidget(self.count_label)
+
+		self.apply_timer = QTimer(self)
+		self.apply_timer.setSingleShot(True)
+		self.apply_timer.setInterval(FILTER_DELAY_MS)
+		self.apply_timer.timeout.connect(self.apply)
+
+		self.text_input.textChanged.connect(self.apply_timer.start)
+		self.regex_check.toggled.connect(self.apply)
+		self.level_combo.currentIndexChanged.connect(self.apply)
+		self.stream_combo.currentIndexChanged.connect(self.apply)
+		self.backend_combo.currentIndexChanged.connect(self.apply)
+
+		self.status_timer = QTimer(self)
+		self.status_timer.setInterval(500)
+		self.status_timer.timeout.connect(self.update_status)
+		self.status_timer.start()
+
+	def apply(self):
+		try:
+			query = LogQuery(
+				self.text_input.text(),
+				self.regex_check.isChecked(),
+				self.level_combo.currentData(),
+				self.stream_combo.currentData(),
+				self.backend_combo.currentData(),
+			)
+		except re.error as e:
+			self.text_input.setStyleSheet("border: 1px solid #dd4b39;")
+			self.text_input.setToolTip(f"Invalid regular expression: {e}")
+			return
+		self.text_input.setStyleSheet("")
+		self.text_input.setToolTip("")
+		self.log_view.set_query(query)
+		self.update_status()
+
+	def update_status(self):
+		"""Shows the match count and keeps the backend list in step with the log."""
+		backends = sorted(self.log_view.log_index.backends)
+		known = [self.backend_combo.itemData(i) for i in range(1, self.backend_combo.count())]
+		if backends != known:
+			current = self.backend_combo.currentData()
+			self.backend_combo.blockSignals(True)
+			self.backend_combo.clear()
+			self.backend_combo.addItem("All servers", None)
+			for name in backends:
+				self.backend_combo.addItem(name, name)
+			index = self.backend_combo.findData(current)
+			self.backend_combo.setCurrentIndex(max(index, 0))
+			self.backend_combo.blockSignals(False)
+			self.backend_combo.setVisible(bool(backends))
+			if current is not None and index < 0:
+				self.apply() # الخادم المختار لم يعد في السجل
+		shown, total = self.log_view.match_count()
+		filtered = self.log_view.log_model.live_filter is not None
+		self.count_label.setText(f"{shown} of {total}" if filtered else "")
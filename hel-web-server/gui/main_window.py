@@ -1,36 +1,47 @@
 from PyQt5.QtWidgets import (
 	QMainWindow, QApplication, QVBoxLayout, QWidget, QPushButton, QLabel,
-	QHBoxLayout, QFileDialog, QMessageBox, QLineEdit,
-	QTextEdit, QComboBox, QGroupBox, QFormLayout, QAction
+	QHBoxLayout, QFileDialog, QMessageBox, QLineEdit, QSpinBox,
+	QComboBox, QGroupBox, QFormLayout, QAction, QCheckBox
 )
 from PyQt5.QtGui import QIcon, QPixmap, QDesktopServices, QIntValidator
 from PyQt5.QtCore import Qt, QSize, QUrl, pyqtSignal, QThread
 
 import os
 import sys
-import socket
-import time # 👈🏻 تم إصلاح الخطأ NameError: name 'time' is not defined
+import html
+import threading
 from PyQt5.QtGui import QIntValidator 
 
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from server_manager.web_server import WebServer, ServerStopper, ServerStarter
-from server_manager.config import DEFAULT_PORT, SERVER_TYPES
+from server_manager.web_server import WebServer
+from server_manager.config import DEFAULT_PORT, SERVER_TYPES, LOG_RETENTION, DEFAULT_WORKERS, HTTP_CACHE_ENABLED
+from server_manager.log_buffer import LogBuffer
+from server_manager.supervisor import Supervisor
+from server_manager.ports import port_owners, is_port_free, find_free_port
+from gui.log_view import LogView, LogFilterBar
+from gui.server_workers import ServerSignals, ServerStarter, ServerStopper
+from gui.metrics_view import MetricsWindow
+from gui.resource_view import ResourcePanel
 
 # تعريف المسار المطلق المتوقع للأيقونة بعد التثبيت
 INSTALLED_ICON_PATH = "/usr/share/icons/hicolor/256x256/apps/hel-web-server.png"
 
 class MainWindow(QMainWindow):
-	log_signal = pyqtSignal(str)
-
 	def __init__(self):
 		super().__init__()
 		self.setWindowTitle("Hel-Web-Server")
-		self.setFixedSize(700, 600)
+		self.setFixedSize(700, 640)
 
 		self.set_window_icon()
 
-		self.server = WebServer(port=DEFAULT_PORT, log_signal=self.log_signal)
+		# السجلات تُجمع في مخزن دائري ويتم عرضها دفعة واحدة كل فترة بدلاً من سطر بسطر
+		self.log_buffer = LogBuffer(LOG_RETENTION)
+		self.server = WebServer(port=DEFAULT_PORT, log_signal=self.log_buffer)
+		self.server_signals = ServerSignals(self.server)
+		# مشرف لتشغيل عدة مشاريع معاً من ملف Stack
+		self.supervisor = Supervisor(log=self.log_buffer.append)
+		self.metrics_window = None
 		self.selected_folder = os.getcwd()
 		self.current_port = DEFAULT_PORT
 		self.is_server_running = False
@@ -39,8 +50,8 @@ class MainWindow(QMainWindow):
 		self.setup_connections()
 		self.update_status_display(False) 
 		
-		self.server.log_signal.connect(self.update_logs)
-		self.server.server_started.connect(self.update_status_display)
+		self.server_signals.server_started.connect(self.update_status_display)
+		self.server_signals.addresses_changed.connect(self.update_addresses)
 		
 		self.populate_server_types()
 
@@ -81,9 +92,21 @@ class MainWindow(QMainWindow):
 
 		self.server_type_combo = QComboBox() 
 
+		self.workers_input = QSpinBox()
+		self.workers_input.setRange(1, 64)
+		self.workers_input.setValue(DEFAULT_WORKERS)
+		self.workers_input.setFixedWidth(100)
+		self.workers_input.setToolTip("Worker processes for multi-process server types")
+
 		settings_layout.addRow(QLabel("Project Folder:"), folder_layout)
 		settings_layout.addRow(QLabel("Port:"), self.port_input)
 		settings_layout.addRow(QLabel("Server Type:"), self.server_type_combo)
+		self.cache_checkbox = QCheckBox("HTTP cache in front of Flask/Django")
+		self.cache_checkbox.setChecked(HTTP_CACHE_ENABLED)
+		self.cache_checkbox.setToolTip("The backend moves to an internal port and a caching proxy takes the chosen one")
+
+		settings_layout.addRow(QLabel("Workers:"), self.workers_input)
+		settings_layout.addRow(QLabel("Cache:"), self.cache_checkbox)
 
 		self.start_button = QPushButton("Start Server")
 		self.stop_button = QPushButton("Stop Server")
@@ -104,17 +127,22 @@ class MainWindow(QMainWindow):
 		
 		self.address_label = QLabel("N/A")
 		self.address_label.setOpenExternalLinks(True)
+		self.address_label.setWordWrap(True)
 
 		status_layout.addRow(QLabel("Status:"), self.status_indicator)
 		status_layout.addRow(QLabel("Address:"), self.address_label)
+		# استهلاك المعالج والذاكرة والملفات المفتوحة لعمليات الخادم الحالي
+		self.resource_panel = ResourcePanel(self.server.name)
+		status_layout.addRow(QLabel("Resources:"), self.resource_panel)
 
 		status_group.setLayout(status_layout)
 
 		# 3. السجلات
 		logs_group = QGroupBox("Server Logs")
 		logs_layout = QVBoxLayout()
-		self.log_display = QTextEdit()
-		self.log_display.setReadOnly(True)
+		self.log_display = LogView(self.log_buffer)
+		self.log_filter_bar = LogFilterBar(self.log_display)
+		logs_layout.addWidget(self.log_filter_bar)
 		logs_layout.addWidget(self.log_display)
 		logs_group.setLayout(logs_layout)
 		
@@ -191,11 +219,17 @@ class MainWindow(QMainWindow):
 			QMessageBox.critical(self, "Error", "Please select a valid folder and server type.")
 			return
 
-		self.log_display.clear()
+		# نفحص المنفذ قبل التشغيل ونقترح منفذاً متاحاً بدلاً من فشل التشغيل
+		if not is_port_free(port):
+			port = self._choose_free_port(port)
+			if port is None:
+				return
+
+		self.log_buffer.clear()
 		self.update_logs(f"Starting server in thread... Project: {project_path}, Port: {port}, Type: {server_type_name}")
 
 		self.thread = QThread()
-		self.worker = ServerStarter(self.server, project_path, port, server_type_id)
+		self.worker = ServerStarter(self.server, project_path, port, server_type_id, self.workers_input.value(), self.cache_checkbox.isChecked())
 		
 		self.worker.moveToThread(self.thread)
 		self.thread.started.connect(self.worker.start_server)
@@ -246,9 +280,8 @@ class MainWindow(QMainWindow):
 	# ----------------------------------------------------------------------
 
 	def update_logs(self, message):
-		"""Appends a new message to the log display."""
-		timestamp = time.strftime("[%H:%M:%S]")
-		self.log_display.append(f"{timestamp} {message}")
+		"""Queues a message for the log display (shown on the next flush)."""
+		self.log_buffer.append(message)
 		
 	def update_status_display(self, started):
 		"""Updates the status indicator and address labels."""
@@ -262,29 +295,59 @@ class MainWindow(QMainWindow):
 			self.status_indicator.setText("Running")
 			self.status_indicator.setStyleSheet("color: green; font-weight: bold;")
 			
-			addresses = self.server.get_local_and_ip_addresses()
-			address_html = "<br>".join([f'<a href="{addr}">{addr}</a>' for addr in addresses])
-			self.address_label.setText(address_html)
-			self.update_logs(f"Server is LIVE at: {addresses[0]}")
+			# العناوين تأتي من ذاكرة مؤقتة تُحدّث عند تغير الواجهات، دون أي استعلام DNS
+			addresses = self.update_addresses()
+			if addresses:
+				self.update_logs(f"Server is LIVE at: {addresses[0]}")
 		else:
 			self.status_indicator.setText("Stopped")
 			self.status_indicator.setStyleSheet("color: red; font-weight: bold;")
 			self.address_label.setText("N/A")
 			
+	def update_addresses(self, *args):
+		"""Shows a link for every local address; also called when interfaces change."""
+		if not self.is_server_running:
+			return []
+		addresses = self.server.get_local_and_ip_addresses()
+		self.address_label.setText("&nbsp; ".join(f'<a href="{addr}">{addr}</a>' for addr in addresses))
+		return addresses
+
 	# ----------------------------------------------------------------------
 	# Helper Methods (Menus, Validators, etc.)
 	# ----------------------------------------------------------------------
 	
 	def create_menus(self):
-		"""Creates the application menu bar (File, Help)."""
+		"""Creates the application menu bar (File, View, Help)."""
 		menu_bar = self.menuBar()
 
 		# File Menu
 		file_menu = menu_bar.addMenu("File")
+		reload_action = QAction("Reload Server", self)
+		reload_action.setShortcut("Ctrl+R")
+		reload_action.triggered.connect(self.reload_server)
+		file_menu.addAction(reload_action)
+		file_menu.addSeparator()
+
+		start_stack_action = QAction("Start Stack...", self)
+		start_stack_action.triggered.connect(self.start_stack)
+		file_menu.addAction(start_stack_action)
+
+		stop_stack_action = QAction("Stop Stack", self)
+		stop_stack_action.triggered.connect(self.stop_stack)
+		file_menu.addAction(stop_stack_action)
+		file_menu.addSeparator()
+
 		exit_action = QAction("Exit", self)
 		exit_action.triggered.connect(self.close)
 		file_menu.addAction(exit_action)
 
+		# View Menu
+		view_menu = menu_bar.addMenu("View")
+		metrics_action = QAction("Request Metrics", self)
+		metrics_action.setShortcut("Ctrl+M")
+		metrics_action.triggered.connect(self.show_metrics)
+		view_menu.addAction(metrics_action)
+
 		# Help Menu
 		help_menu = menu_bar.addMenu("Help")
 		help_action = QAction("Help", self)
@@ -307,12 +370,17 @@ class MainWindow(QMainWindow):
 			<li><b>Port:</b> Specify the port number (e.g., 8000) for the server to listen on.</li>
 			<li><b>Server Type:</b> Choose the appropriate server type for your project:
 				<ul>
-					<li>Static Files (Python http.server): For HTML, CSS, JavaScript.</li>
+					<li>Static Files (Built-in async server): For HTML, CSS, JavaScript.</li>
 					<li>Flask Application: For simple Python web apps (requires <code>app.py</code>).</li>
+					<li>Flask Application (Prefork WSGI): Serves <code>app</code> from <code>app.py</code> with several worker processes for load testing.</li>
+					<li>Flask Application (Warm threaded host): Serves <code>app</code> from one warm process with a thread pool; code changes re-import only your project's modules instead of restarting Python.</li>
 					<li>Django Application: For Django projects (requires <code>manage.py</code>).</li>
-					<li>PHP Built-in Server: For PHP projects (requires PHP CLI in PATH).</li>
+					<li>Django Application (ASGI): Serves the project's <code>asgi.py</code> with several worker processes, without runserver's autoreloader.</li>
+					<li>PHP Built-in Server: For PHP projects (requires PHP CLI in PATH). Uses several workers when <b>Workers</b> is above 1 (PHP 7.4+).</li>
+					<li>PHP FastCGI (php-cgi pool): Runs PHP scripts in parallel on a pool of <code>php-cgi</code> processes (requires php-cgi in PATH).</li>
 				</ul>
 			</li>
+			<li><b>Workers:</b> Number of worker processes used by multi-process server types.</li>
 		</ul>
 		
 		<h4>2. Actions:</h4>
@@ -324,11 +392,22 @@ class MainWindow(QMainWindow):
 		<h4>3. Server Status:</h4>
 		<ul>
 			<li><b>Status:</b> Shows whether the server is running or stopped.</li>
-			<li><b>Address:</b> Displays the local address and network IP address as clickable links.</li>
+			<li><b>Address:</b> Displays a clickable link for every local IPv4 address the server listens on (updated when network interfaces change).</li>
 		</ul>
 		
 		<h4>4. Server Logs:</h4>
-		<p>This area displays messages and errors from the server.</p>
+		<p>This area displays messages and errors from the server. The filter bar above it narrows the lines by text (or a regular expression with <b>Regex</b>), severity, output stream (stderr is <code>[SERVER-ERR]</code>/<code>[PHP-LOG]</code>) and, when a stack is running, server; the results keep updating as new lines arrive. It is cleared on every start, but all output is also kept on disk across restarts: <code>hel-web-server logs --since 1h -l error</code> searches it by time, server and severity.</p>
+
+		<h4>5. Stacks:</h4>
+		<p><b>File &gt; Start Stack...</b> starts several projects at once from a JSON file (a list of <code>name</code>, <code>path</code>, <code>port</code>, <code>type</code>, optional <code>workers</code>). See <code>test-files/stack.json</code>.</p>
+		<p>With a <code>proxy_port</code>, the whole stack is also reachable through one front port: <code>http://&lt;name&gt;.localhost:&lt;proxy_port&gt;/</code>, or by the <code>hosts</code>/<code>prefix</code> set on each server.</p>
+		<p><b>Command line:</b> <code>hel-web-server run PATH -t TYPE -p PORT</code> serves a project without the GUI; <code>start</code>, <code>stop</code>, <code>status</code> and <code>tail -f</code> manage servers in a background daemon (see <code>hel-web-server --help</code>).</p>
+		<p><b>File &gt; Reload Server</b> (Ctrl+R) restarts the backend without downtime: prefork WSGI/ASGI and PHP FastCGI modes start a new generation on the same socket before the old one drains. Other modes are stopped and started again.</p>
+		<p>Saving a <code>.py</code> file in the project reloads the server automatically (Django/Flask's own reloaders are turned off). PHP re-reads scripts on every request, so the FastCGI pool is only restarted when <code>php.ini</code> or <code>.user.ini</code> changes; other files only refresh caches.</p>
+		<p>With <b>Cache</b> checked, Flask and Django run behind an HTTP cache on the chosen port (the backend itself listens on an internal loopback port, so the app sees every client as 127.0.0.1). Pages whose responses allow it (<code>Cache-Control: max-age</code>, <code>Expires</code>, or an <code>ETag</code> to revalidate) are answered from memory, or from disk once memory is full; <code>Vary</code> keeps separate copies and <code>no-store</code>/<code>private</code>/<code>Set-Cookie</code> responses are never stored. Simultaneous requests for the same uncached page share one backend call, and any change in the project empties the cache.</p>
+		<p>For Django, <code>STATIC_URL</code> and <code>MEDIA_URL</code> are read from the project's <code>settings.py</code> and served directly from <code>STATICFILES_DIRS</code>, the apps' <code>static</code> folders, <code>STATIC_ROOT</code> and <code>MEDIA_ROOT</code> (with ETags and precompressed files, like the static server); only the other URLs reach runserver.</p>
+		<p><b>View &gt; Request Metrics</b> (Ctrl+M) shows requests, req/s, status codes and p50/p95/p99 latency per server and per path, with JSON export. Latency is measured for the built-in engines and the stack's front proxy; other servers are counted from their access logs.</p>
+		<p><b>Resources</b> under Server Status plots the server's CPU, memory (RSS) and open files over the last two minutes, summed over its processes and their children (the built-in engines run inside this window's process). A warning is logged when CPU stays high, memory grows past its limit or open files approach <code>ulimit -n</code>.</p>
 		
 		<p><b>Important:</b> If the server does not start, ensure dependencies are installed and the port is free.</p>
 		"""
@@ -344,8 +423,86 @@ class MainWindow(QMainWindow):
 		QMessageBox.information(self, "Hel-Web-Server About", about_text)
 		
 		
+	def start_stack(self):
+		"""Loads a JSON stack file and starts all of its servers in parallel."""
+		path, _ = QFileDialog.getOpenFileName(self, "Open Stack File", self.selected_folder, "Stack files (*.json)")
+		if not path:
+			return
+
+		supervisor = Supervisor(log=self.log_buffer.append)
+		try:
+			instances = supervisor.load_stack(path)
+		except (OSError, ValueError, KeyError) as e:
+			QMessageBox.critical(self, "Stack Error", f"Could not load stack file: {e}")
+			return
+		previous, self.supervisor = self.supervisor, supervisor
+
+		self.update_logs(f"Starting stack '{os.path.basename(path)}' with {len(instances)} servers...")
+		# إيقاف المجموعة السابقة قد يستغرق ثوانٍ، فلا يتم في خيط الواجهة
+		threading.Thread(target=self._run_stack, args=(previous, supervisor), daemon=True).start()
+
+	def _run_stack(self, previous, supervisor):
+		"""Runs on a background thread; only touches the thread-safe log buffer."""
+		previous.stop_all()
+		results = supervisor.start_all()
+		for instance in supervisor.instances.values():
+			state = "LIVE" if results.get(instance.name) else "FAILED"
+			self.log_buffer.append(f"[{instance.name}] {state} on port {instance.port} ({instance.server_type_id})")
+		if supervisor.proxy_port:
+			try:
+				supervisor.start_proxy()
+				self.log_buffer.append(f"[proxy] LIVE on port {supervisor.proxy_port}")
+			except (OSError, ValueError) as e:
+				self.log_buffer.append(f"[proxy] FAILED: {e}")
+
+	def stop_stack(self):
+		"""Stops every server started from a stack file."""
+		if not self.supervisor.instances:
+			QMessageBox.warning(self, "Warning", "No stack is running.")
+			return
+		self.update_logs("Stopping stack...")
+		threading.Thread(target=self.supervisor.stop_all, daemon=True).start()
+
+	def show_metrics(self):
+		"""Opens the live request metrics window."""
+		if self.metrics_window is None:
+			self.metrics_window = MetricsWindow(self)
+		self.metrics_window.show()
+		self.metrics_window.raise_()
+
+	def reload_server(self):
+		"""Reloads the running server in the background without closing its port."""
+		if not self.is_server_running:
+			QMessageBox.warning(self, "Warning", "Server is not running.")
+			return
+		threading.Thread(target=self.server.reload, daemon=True).start()
+
+	def _choose_free_port(self, port):
+		"""Asks whether to use the nearest free port instead of a busy one; returns it or None."""
+		owners = port_owners(port)
+		holder = "<br>".join(html.escape(owner.describe()) for owner in owners) or "another socket"
+		free = find_free_port(port + 1)
+		if free is None:
+			QMessageBox.critical(self, "Port In Use", f"Port {port} is used by:<br>{holder}<br><br>No free port was found nearby.")
+			return None
+		answer = QMessageBox.question(
+			self, "Port In Use",
+			f"Port {port} is used by:<br>{holder}<br><br>Start on port {free} instead?",
+			QMessageBox.Yes | QMessageBox.No
+		)
+		if answer != QMessageBox.Yes:
+			return None
+		self.port_input.setText(str(free))
+		return free
+
 	def kill_current_port(self):
 		port = self.current_port
-		confirm = QMessageBox.question(self, "Confirm", f"Kill process on port {port}?", QMessageBox.Yes | QMessageBox.No)
+		owners = port_owners(port)
+		if not owners:
+			QMessageBox.information(self, "Kill Port", f"No process is listening on port {port}.")
+			return
+		holder = "<br>".join(html.escape(owner.describe()) for owner in owners)
+		confirm = QMessageBox.question(self, "Confirm", f"Port {port} is used by:<br>{holder}<br><br>Kill these processes?", QMessageBox.Yes | QMessageBox.No)
 		if confirm == QMessageBox.Yes:
-			self.server.kill_port_process(port)
+			# الانتظار حتى تنتهي العمليات قد يستغرق ثوانٍ، فلا نوقف الواجهة
+			threading.Thread(target=self.server.kill_port_process, args=(port,), daemon=True).start()
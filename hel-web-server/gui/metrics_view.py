@@ -0,0 +1,106 @@
+from PyQt5.QtWidgets import (
+	QWidget, QVBoxLayout, QHBoxLayout, QTreeWidget, QTreeWidgetItem, QPushButton,
+	QLabel, QFileDialog, QMessageBox, QHeaderView
+)
+from PyQt5.QtCore import Qt, QTimer
+
+from server_manager.metrics import get_metrics
+
+METRICS_REFRESH_MS = 1000
+
+COLUMNS = ("Backend / Path", "Requests", "RPS", "2xx", "3xx", "4xx", "5xx", "p50 ms", "p95 ms", "p99 ms")
+
+
+def _status_classes(statuses):
+	classes = [0, 0, 0, 0]
+	for code, count in statuses.items():
+		index = int(code) // 100 - 2
+		if 0 <= index < 4:
+			classes[index] += count
+	return classes
+
+
+def _row(label, summary):
+	timed = summary["timed"]
+	latency = [f"{summary[key]:.1f}" if timed else "-" for key in ("p50_ms", "p95_ms", "p99_ms")]
+	return [label, str(summary["requests"]), f"{summary['rps']:.1f}"] + [str(c) for c in _status_classes(summary["statuses"])] + latency
+
+
+class MetricsWindow(QWidget):
+	"""Live per-backend and per-path request statistics from the shared metrics registry."""
+
+	def __init__(self, parent=None):
+		super().__init__(parent, Qt.Window)
+		self.setWindowTitle("Request Metrics")
+		self.resize(820, 420)
+		self.metrics = get_metrics()
+		self._expanded = set()
+
+		layout = QVBoxLayout(self)
+		self.tree = QTreeWidget()
+		self.tree.setColumnCount(len(COLUMNS))
+		self.tree.setHeaderLabels(COLUMNS)
+		self.tree.setUniformRowHeights(True)
+		self.tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+		layout.addWidget(self.tree)
+
+		bottom = QHBoxLayout()
+		self.summary_label = QLabel("No requests yet.")
+		bottom.addWidget(self.summary_label)
+		bottom.addStretch()
+		reset_button = QPushButton("Reset")
+		reset_button.clicked.connect(self.reset)
+		bottom.addWidget(reset_button)
+		export_button = QPushButton("Export JSON...")
+		export_button.clicked.connect(self.export_json)
+		bottom.addWidget(export_button)
+		layout.addLayout(bottom)
+
+		self.timer = QTimer(self)
+		self.timer.timeout.connect(self.refresh)
+		self.timer.start(METRICS_REFRESH_MS)
+		self.refresh()
+
+	def refresh(self):
+		if not self.isVisible():
+			return
+		# نحتفظ بالعناصر المفتوحة حتى لا تنغلق مع كل تحديث
+		for i in range(self.tree.topLevelItemCount()):
+			item = self.tree.topLevelItem(i)
+			if item.isExpanded():
+				self._expanded.add(item.text(0))
+			else:
+				self._expanded.discard(item.text(0))
+
+		snapshot = self.metrics.snapshot()
+		self.tree.clear()
+		total_requests = total_rps = 0
+		for name, backend in sorted(snapshot["backends"].items()):
+			item = QTreeWidgetItem(_row(name, backend))
+			paths = sorted(backend["paths"].items(), key=lambda entry: entry[1]["requests"], reverse=True)
+			for path, summary in paths:
+				item.addChild(QTreeWidgetItem(_row(path, summary)))
+			self.tree.addTopLevelItem(item)
+			item.setExpanded(name in self._expanded)
+			total_requests += backend["requests"]
+			total_rps += backend["rps"]
+		if snapshot["backends"]:
+			self.summary_label.setText(f"{total_requests} requests, {total_rps:.1f} req/s (last 10 s)")
+
+	def reset(self):
+		self.metrics.reset()
+		self.summary_label.setText("No requests yet.")
+		self.refresh()
+
+	def export_json(self):
+		path, _ = QFileDialog.getSaveFileName(self, "Export Metrics", "metrics.json", "JSON files (*.json)")
+		if not path:
+			return
+		try:
+			self.metrics.export_json(path)
+		except OSError as e:
+			QMessageBox.critical(self, "Export Error", f"Could not write {path}: {e}")
+
+	def showEvent(self, event):
+		super().showEvent(event)
+		self.refresh()
@@ -0,0 +1,87 @@
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QLabel, QSizePolicy
+from PyQt5.QtCore import QTimer, QPointF
+from PyQt5.QtGui import QPainter, QColor, QPen, QPolygonF
+
+from server_manager.config import SAMPLE_INTERVAL
+from server_manager.proc_sampler import get_sampler
+
+# (السلسلة، مفتاح التنبيه، العنوان، تنسيق القيمة، أصغر حد أعلى للرسم، اللون)
+PANELS = (
+	("cpu", "cpu", "CPU", "{:.0f}%", 100.0, "#3c8dbc"),
+	("rss_mb", "rss", "RSS", "{:.0f} MB", 64.0, "#00a65a"),
+	("fds", "fds", "FDs", "{:.0f}", 64.0, "#f39c12"),
+)
+ALERT_STYLE = "color: #dd4b39; font-weight: bold;"
+
+
+class Sparkline(QWidget):
+	"""Small line chart of a list of values, scaled to max(values, floor)."""
+
+	def __init__(self, color, floor=1.0, parent=None):
+		super().__init__(parent)
+		self.color = QColor(color)
+		self.floor = floor
+		self.values = []
+		self.setMinimumSize(90, 22)
+		self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+
+	def set_values(self, values):
+		self.values = values
+		self.update()
+
+	def paintEvent(self, event):
+		painter = QPainter(self)
+		painter.fillRect(self.rect(), self.palette().base())
+		if len(self.values) < 2:
+			return
+		width, height = self.width() - 1, self.height() - 2
+		top = max(max(self.values), self.floor)
+		step = width / (len(self.values) - 1)
+		points = QPolygonF([
+			QPointF(i * step, 1 + height - value / top * height)
+			for i, value in enumerate(self.values)
+		])
+		painter.setRenderHint(QPainter.Antialiasing)
+		painter.setPen(QPen(self.color, 1.5))
+		painter.drawPolyline(points)
+
+
+class ResourcePanel(QWidget):
+	"""CPU, RSS and open-file sparklines for one server, read from the shared process sampler."""
+
+	def __init__(self, name, parent=None):
+		super().__init__(parent)
+		self.name = name
+		self.sampler = get_sampler()
+		layout = QHBoxLayout(self)
+		layout.setContentsMargins(0, 0, 0, 0)
+		self.charts = {}
+		for key, alert, title, fmt, floor, color in PANELS:
+			column = QVBoxLayout()
+			column.setSpacing(0)
+			label = QLabel(f"{title}: -")
+			chart = Sparkline(color, floor)
+			column.addWidget(label)
+			column.addWidget(chart)
+			layout.addLayout(column)
+			self.charts[key] = (label, chart, alert, title, fmt)
+
+		self.timer = QTimer(self)
+		self.timer.timeout.connect(self.refresh)
+		self.timer.start(int(SAMPLE_INTERVAL * 1000))
+
+	def refresh(self):
+		group = self.sampler.get(self.name)
+		for key, (label, chart, alert, title, fmt) in self.charts.items():
+			if group is None or not group.pids:
+				label.setText(f"{title}: -")
+				chart.set_values([])
+				continue
+			ring = group.series[key]
+			text = f"{title}: {fmt.format(ring.last())}"
+			if key == "fds" and group.fd_limit:
+				# الحد لكل عملية: مع عدة عمليات نعرض أكثرها استخداماً
+				text += f" / {group.fd_limit}" if len(group.pids) == 1 else f" (max {group.fd_peak} / {group.fd_limit})"
+			label.setText(text)
+			label.setStyleSheet(ALERT_STYLE if alert in group.alerts else "")
+			chart.set_values(ring.values())
@@ -0,0 +1,59 @@
+# gui/server_workers.py
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from server_manager.interfaces import get_address_monitor
+
+
+class ServerSignals(QObject):
+	"""Re-emits a WebServer's plain signals as Qt signals.
+
+	WebServer callbacks run on whichever thread started or stopped the
+	server; going through a pyqtSignal queues them onto the GUI thread.
+	``addresses_changed`` relays the shared address monitor the same way.
+	"""
+	server_started = pyqtSignal(bool)
+	addresses_changed = pyqtSignal(list)
+
+	def __init__(self, server):
+		super().__init__()
+		server.server_started.connect(self.server_started.emit)
+		get_address_monitor().changed.connect(self.addresses_changed.emit)
+
+
+# Workers for QThreads (دوال مساعدة لـ PyQt5)
+class ServerStarter(QObject):
+	finished = pyqtSignal(bool)
+	error = pyqtSignal(str)
+
+	def __init__(self, server_instance, project_path, port, server_type_id, workers=None, cache=None):
+		super().__init__()
+		self.server_instance = server_instance
+		self.project_path = project_path
+		self.port = port
+		self.server_type_id = server_type_id
+		self.workers = workers
+		self.cache = cache
+
+	def start_server(self):
+		try:
+			success = self.server_instance.start(self.project_path, self.port, self.server_type_id, self.workers, self.cache)
+			self.finished.emit(success)
+		except Exception as e:
+			self.error.emit(f"Failed to start server: {e}")
+			self.finished.emit(False)
+
+class ServerStopper(QObject):
+	finished = pyqtSignal()
+	error = pyqtSignal(str)
+
+	def __init__(self, server_instance):
+		super().__init__()
+		self.server_instance = server_instance
+
+	def stop_server(self):
+		try:
+			self.server_instance.stop()
+			self.finished.emit()
+		except Exception as e:
+			self.error.emit(f"Failed to stop server: {e}")
+			self.finished.emit()
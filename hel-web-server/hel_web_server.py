@@ -1,9 +1,15 @@
 import sys
 import os
-from PyQt5.QtWidgets import QApplication
-from gui.main_window import MainWindow
+from server_manager.cli import COMMANDS, main as cli_main
 
 if __name__ == "__main__":
+    # الأوامر النصية (run/start/stop/status/tail...) لا تحتاج إلى PyQt5 إطلاقاً
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS + ("-h", "--help", "--socket"):
+        sys.exit(cli_main(sys.argv[1:]))
+
+    from PyQt5.QtWidgets import QApplication
+    from gui.main_window import MainWindow
+
     app = QApplication(sys.argv)
     
     # Load Helwan Style (QSS)
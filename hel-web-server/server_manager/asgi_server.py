@@ -0,0 +1,225 @@
+# server_manager/asgi_server.py
+"""Prefork asyncio HTTP/1.1 server for ASGI applications.
+
+Run as ``python -m server_manager.asgi_server --app auto`` from a Django
+project folder to serve the project's ``asgi.py`` without runserver and
+without its autoreloader.
+"""
+import argparse
+import asyncio
+import glob
+import importlib
+import os
+import re
+import signal
+import socket
+import sys
+import traceback
+
+from .config import DEFAULT_WORKERS
+from .http_util import BadRequest, PayloadTooLarge, read_request, read_body, response_head, access_log_line
+from .prefork import PreforkMaster
+
+KEEPALIVE_TIMEOUT = 15
+GRACEFUL_TIMEOUT = 10
+STREAM_LIMIT = 64 * 1024
+
+_SETTINGS_RE = re.compile(r"""DJANGO_SETTINGS_MODULE['"]\s*,\s*['"]([\w.]+)['"]""")
+
+
+def find_django_asgi_app(project_path):
+	"""Returns 'package.asgi:application' for a Django project folder, or None."""
+	manage = os.path.join(project_path, "manage.py")
+	if os.path.exists(manage):
+		with open(manage, encoding="utf-8") as f:
+			match = _SETTINGS_RE.search(f.read())
+		if match:
+			package = match.group(1).rsplit(".", 1)[0]
+			if os.path.exists(os.path.join(project_path, *package.split("."), "asgi.py")):
+				return f"{package}.asgi:application"
+	# بديل: أول مجلد يحتوي على asgi.py
+	for path in sorted(glob.glob(os.path.join(project_path, "*", "asgi.py"))):
+		return f"{os.path.basename(os.path.dirname(path))}.asgi:application"
+	return None
+
+
+def load_app(spec):
+	"""Imports ``module:attribute`` from the current directory."""
+	if spec == "auto":
+		spec = find_django_asgi_app(os.getcwd())
+		if spec is None:
+			raise RuntimeError("Could not find an asgi.py module in the project folder")
+	module_name, _, attr = spec.partition(":")
+	if os.getcwd() not in sys.path:
+		sys.path.insert(0, os.getcwd())
+	module = importlib.import_module(module_name)
+	return getattr(module, attr or "application")
+
+
+class ASGIWorker:
+	"""Serves an ASGI application on one event loop."""
+
+	def __init__(self, sock, app):
+		self.sock = sock
+		self.app = app
+		self.server_addr = sock.getsockname()[:2]
+		self.connections = set()
+		self.busy = set() # الاتصالات التي تعالج طلباً الآن
+
+	async def serve(self):
+		loop = asyncio.get_running_loop()
+		stop = loop.create_future()
+		loop.add_signal_handler(signal.SIGTERM, lambda: stop.done() or stop.set_result(None))
+		self.sock.setblocking(False)
+		server = await asyncio.start_server(self.handle_connection, sock=self.sock, limit=STREAM_LIMIT)
+		await stop
+
+		# إيقاف لطيف: لا اتصالات جديدة، وننتظر انتهاء الطلبات الجارية
+		server.close()
+		deadline = loop.time() + GRACEFUL_TIMEOUT
+		while self.busy and loop.time() < deadline:
+			await asyncio.sleep(0.05)
+		for task in list(self.connections):
+			task.cancel()
+		await asyncio.gather(*self.connections, return_exceptions=True)
+
+	async def handle_connection(self, reader, writer):
+		task = asyncio.current_task()
+		self.connections.add(task)
+		sock = writer.get_extra_info("socket")
+		if sock is not None:
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		peer = writer.get_extra_info("peername") or ("-", 0)
+		try:
+			while True:
+				try:
+					request = await asyncio.wait_for(read_request(reader), KEEPALIVE_TIMEOUT)
+				except asyncio.TimeoutError:
+					break
+				except BadRequest:
+					writer.write(response_head(400, [("Content-Length", "0"), ("Connection", "close")]))
+					await writer.drain()
+					break
+				if request is None:
+					break
+				self.busy.add(task)
+				try:
+					try:
+						body = await read_body(reader, request)
+					except PayloadTooLarge:
+						writer.write(response_head(413, [("Content-Length", "0"), ("Connection", "close")]))
+						await writer.drain()
+						break
+					keep_alive = await self.run_app(request, body, peer, writer)
+				finally:
+					self.busy.discard(task)
+				if not keep_alive:
+					break
+		except (OSError, asyncio.IncompleteReadError, BadRequest, asyncio.CancelledError):
+			pass
+		finally:
+			self.connections.discard(task)
+			writer.close()
+
+	async def run_app(self, request, body, peer, writer):
+		"""Runs one HTTP request through the ASGI app; returns whether to keep the connection."""
+		raw_path, _, query = request.target.partition("?")
+		scope = {
+			"type": "http",
+			"asgi": {"version": "3.0", "spec_version": "2.3"},
+			"http_version": request.version.split("/", 1)[1],
+			"method": request.method,
+			"scheme": "http",
+			"path": request.path,
+			"raw_path": raw_path.encode("latin-1"),
+			"query_string": query.encode("latin-1"),
+			"root_path": "",
+			"headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in request.raw_headers],
+			"client": peer[:2],
+			"server": self.server_addr,
+		}
+		keep_alive = request.keep_alive
+		state = {"status": None, "chunked": False, "done": False, "size": 0}
+		response_done = asyncio.Event()
+		body_sent = False
+
+		async def receive():
+			nonlocal body_sent
+			if not body_sent:
+				body_sent = True
+				return {"type": "http.request", "body": body, "more_body": False}
+			await response_done.wait()
+			return {"type": "http.disconnect"}
+
+		async def send(message):
+			nonlocal keep_alive
+			if message["type"] == "http.response.start":
+				state["status"] = message["status"]
+				headers = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in message.get("headers", [])]
+				names = {name.lower() for name, _ in headers}
+				if "content-length" not in names and state["status"] not in (204, 304) and request.method != "HEAD":
+					if request.version == "HTTP/1.1":
+						headers.append(("Transfer-Encoding", "chunked"))
+						state["chunked"] = True
+					else:
+						keep_alive = False
+				if not keep_alive:
+					headers.append(("Connection", "close"))
+				writer.write(response_head(state["status"], headers))
+			elif message["type"] == "http.response.body":
+				data = message.get("body", b"")
+				more = message.get("more_body", False)
+				if request.method != "HEAD":
+					if state["chunked"]:
+						if data:
+							writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+						if not more:
+							writer.write(b"0\r\n\r\n")
+					elif data:
+						writer.write(data)
+				state["size"] += len(data)
+				await writer.drain()
+				if not more:
+					state["done"] = True
+					response_done.set()
+
+		try:
+			await self.app(scope, receive, send)
+		except Exception:
+			traceback.print_exc()
+			if state["status"] is None:
+				writer.write(response_head(500, [("Content-Length", "0"), ("Connection", "close")]))
+				state["status"] = 500
+			keep_alive = False
+		finally:
+			response_done.set()
+
+		if not state["done"]:
+			keep_alive = False
+		await writer.drain()
+		print(access_log_line(peer[0], f"{request.method} {request.target} {request.version}", state["status"], state["size"]), file=sys.stderr)
+		return keep_alive
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Prefork ASGI server used by Hel-Web-Server")
+	parser.add_argument("--app", default="auto", help="module:attribute of the ASGI application, or 'auto' for Django projects")
+	parser.add_argument("--host", default="0.0.0.0")
+	parser.add_argument("--port", type=int, default=8000)
+	parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+	parser.add_argument("--fd", type=int, default=None, help="inherited listening socket")
+	parser.add_argument("--ready-fd", type=int, default=None, help="pipe written to once the workers are running")
+	args = parser.parse_args(argv)
+
+	# التحميل المسبق في العملية الرئيسية قبل fork لتظهر الأخطاء مبكراً
+	app = load_app(args.app)
+
+	def worker_main(sock, index):
+		asyncio.run(ASGIWorker(sock, app).serve())
+
+	master = PreforkMaster(args.host, args.port, args.workers, worker_main, fd=args.fd, name="asgi", ready_fd=args.ready_fd)
+	return master.run()
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,178 @@
+# server_manager/benchmark.py
+"""Benchmark suite: starts every server type on its bundled test project and loads it.
+
+Run as ``python -m server_manager.benchmark`` (or ``hel-web-server
+benchmark``). Results are written as JSON under BENCHMARK_DIR and compared
+with the previous run (or ``--baseline``); the exit code is 1 when a
+regression beyond ``--tolerance`` is found.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+
+from .config import SERVER_TYPES, BENCHMARK_DIR
+from .loadgen import LoadGenerator, RequestSpec
+from .ports import ephemeral_port
+
+# المشروع التجريبي المناسب لكل نوع خادم داخل مجلد test-files
+BENCH_PROJECTS = {
+	"http.server": "static_test",
+	"flask": "flask_app_test",
+	"flask_prefork": "flask_app_test",
+	"flask_warm": "flask_app_test",
+	"django": "test_django_project",
+	"django_asgi": "test_django_project",
+	"php_server": "php_test_project",
+	"php_fastcgi": "php_test_project",
+}
+
+# تغيرات أصغر من هذا الحد في زمن الاستجابة تعتبر ضجيجاً وليست تراجعاً
+LATENCY_NOISE_MS = 0.5
+
+
+class _QuietLog:
+	"""Keeps the last few server log lines to explain failed starts."""
+
+	def __init__(self):
+		self.lines = []
+
+	def emit(self, message):
+		self.lines = (self.lines + [message])[-5:]
+
+
+def default_test_files():
+	package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+	return os.path.normpath(os.path.join(package_root, "..", "test-files"))
+
+
+def run_one(server_type_id, project_path, mix, concurrency, duration, warmup, workers=None, keep_alive=True):
+	"""Benchmarks one server type; returns a result dict (with ``error`` if it could not start)."""
+	from .web_server import WebServer
+	log = _QuietLog()
+	port = ephemeral_port()
+	server = WebServer(port=port, log_signal=log, name=f"bench-{server_type_id}")
+	# لا نريد إعادة تحميل تلقائية أثناء القياس
+	server.auto_reload = False
+	try:
+		if not server.start(project_path, port, server_type_id, workers):
+			return {"error": " | ".join(log.lines[-2:]) or "server did not start"}
+		if warmup > 0:
+			LoadGenerator("127.0.0.1", port, mix, concurrency, warmup, keep_alive).run()
+		result = LoadGenerator("127.0.0.1", port, mix, concurrency, duration, keep_alive).run()
+		return result.to_dict()
+	finally:
+		server.stop()
+
+
+def run_suite(test_files, types=None, mix=None, concurrency=16, duration=5.0, warmup=1.0, workers=None, keep_alive=True, progress=None):
+	"""Runs every requested server type; returns the full results document."""
+	mix = mix or [RequestSpec("/")]
+	types = types or list(SERVER_TYPES.values())
+	results = {}
+	for server_type_id in types:
+		project = os.path.join(test_files, BENCH_PROJECTS[server_type_id])
+		if progress:
+			progress(f"{server_type_id}: {os.path.basename(project)} ...")
+		results[server_type_id] = run_one(server_type_id, project, mix, concurrency, duration, warmup, workers, keep_alive)
+		if progress:
+			progress(f"{server_type_id}: {summarize(results[server_type_id])}")
+	return {
+		"version": 1,
+		"timestamp": time.time(),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"cpu_count": os.cpu_count(),
+		"settings": {
+			"concurrency": concurrency,
+			"duration": duration,
+			"warmup": warmup,
+			"workers": workers,
+			"keep_alive": keep_alive,
+			"mix": [f"{s.method} {s.path} {s.weight}" for s in mix],
+		},
+		"results": results,
+	}
+
+
+def summarize(result):
+	if "error" in result:
+		return f"skipped ({result['error']})"
+	return (
+		f"{result['rps']:.0f} req/s, p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, "
+		f"{result['errors']} errors"
+	)
+
+
+def compare(baseline, current, tolerance=0.10):
+	"""Returns a list of regression messages between two results documents."""
+	regressions = []
+	for server_type_id, now in current["results"].items():
+		before = baseline.get("results", {}).get(server_type_id)
+		if not before or "error" in before or "error" in now:
+			continue
+		if now["rps"] < before["rps"] * (1 - tolerance):
+			regressions.append(f"{server_type_id}: throughput {before['rps']:.0f} -> {now['rps']:.0f} req/s")
+		for key in ("p50_ms", "p99_ms"):
+			if now[key] > before[key] * (1 + tolerance) and now[key] - before[key] > LATENCY_NOISE_MS:
+				regressions.append(f"{server_type_id}: {key[:-3]} {before[key]:.2f} -> {now[key]:.2f} ms")
+		if now["errors"] > before["errors"]:
+			regressions.append(f"{server_type_id}: errors {before['errors']} -> {now['errors']}")
+	return regressions
+
+
+def latest_result(directory, exclude=None):
+	files = sorted(f for f in glob.glob(os.path.join(directory, "bench-*.json")) if f != exclude)
+	return files[-1] if files else None
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(prog="hel-web-server benchmark", description="Benchmark every server type on the bundled test projects")
+	parser.add_argument("--test-files", default=default_test_files(), help="folder with the bundled test projects")
+	parser.add_argument("-t", "--type", action="append", choices=list(BENCH_PROJECTS), help="server type to run (repeatable; default all)")
+	parser.add_argument("-c", "--concurrency", type=int, default=16)
+	parser.add_argument("-d", "--duration", type=float, default=5.0)
+	parser.add_argument("--warmup", type=float, default=1.0)
+	parser.add_argument("-w", "--workers", type=int, default=None)
+	parser.add_argument("--no-keepalive", action="store_true")
+	parser.add_argument("-r", "--request", action="append", help="request mix entry '[METHOD] PATH [WEIGHT]' (repeatable)")
+	parser.add_argument("-o", "--output", help="results file (default: a new file in the benchmark folder)")
+	parser.add_argument("--baseline", help="results file to compare with (default: the previous run)")
+	parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown before reporting a regression")
+	args = parser.parse_args(argv)
+
+	mix = [RequestSpec.parse(r) for r in args.request] if args.request else None
+	document = run_suite(
+		args.test_files, args.type, mix, args.concurrency, args.duration, args.warmup,
+		args.workers, not args.no_keepalive, progress=print
+	)
+
+	output = args.output or os.path.join(BENCHMARK_DIR, time.strftime("bench-%Y%m%d-%H%M%S.json"))
+	os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+	with open(output, "w", encoding="utf-8") as f:
+		json.dump(document, f, indent=2)
+	print(f"Results written to {output}")
+
+	baseline_path = args.baseline or latest_result(BENCHMARK_DIR, exclude=output)
+	if not baseline_path:
+		return 0
+	with open(baseline_path, encoding="utf-8") as f:
+		baseline = json.load(f)
+	if baseline.get("settings") != document["settings"]:
+		print(f"Not comparing with {baseline_path}: it was run with different settings")
+		return 0
+	regressions = compare(baseline, document, args.tolerance)
+	if regressions:
+		print(f"Regressions compared with {baseline_path}:")
+		for message in regressions:
+			print(f"  {message}")
+		return 1
+	print(f"No regressions compared with {baseline_path}")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
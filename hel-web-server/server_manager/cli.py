@@ -0,0 +1,522 @@
+# server_manager/cli.py
+"""Command line front end: ``hel-web-server <command>``.
+
+``run`` serves one project in the foreground. ``start``, ``stop``,
+``reload``, ``status``, ``tail``, ``metrics`` and ``shutdown`` talk to a background daemon over a
+Unix socket; the daemon is spawned on first use. ``logs`` queries the
+persistent log store, ``port`` shows (or kills)
+who listens on a port, ``bench`` loads a URL and ``benchmark`` runs the
+benchmark suite. Nothing here imports Qt.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+
+from .config import DEFAULT_PORT, SERVER_TYPES, LOG_RETENTION, CONTROL_SOCKET, DAEMON_LOG
+from .log_buffer import LogBuffer, LEVEL_NAMES
+from .metrics import get_metrics
+
+COMMANDS = ("run", "daemon", "start", "stop", "reload", "status", "tail", "metrics", "shutdown", "logs", "port", "bench", "benchmark")
+
+CLIENT_TIMEOUT = 120 # بدء Django قد يستغرق عدة ثوانٍ
+DAEMON_START_TIMEOUT = 5
+TAIL_INTERVAL = 0.5
+
+
+class _PrintLog:
+	"""Log sink that writes each message to stdout."""
+
+	def emit(self, message):
+		print(message, flush=True)
+
+
+# ----------------------------------------------------------------------
+# Daemon
+# ----------------------------------------------------------------------
+
+class Daemon:
+	"""Owns a Supervisor and answers JSON requests on the control socket."""
+
+	def __init__(self, socket_path=CONTROL_SOCKET):
+		from .supervisor import Supervisor
+		self.socket_path = socket_path
+		self.logs = LogBuffer(LOG_RETENTION) # سجل مجمع لكل الخوادم
+		self.supervisor = Supervisor(log=self.logs.append)
+		self.server = None
+
+	def serve(self):
+		os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+		if os.path.exists(self.socket_path):
+			if _connect(self.socket_path) is not None:
+				raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+			os.unlink(self.socket_path)
+
+		daemon = self
+
+		class Handler(socketserver.StreamRequestHandler):
+			def handle(self):
+				line = self.rfile.readline()
+				if not line:
+					return
+				try:
+					reply = daemon.dispatch(json.loads(line))
+				except Exception as e:
+					reply = {"ok": False, "error": str(e)}
+				self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+		socketserver.ThreadingUnixStreamServer.daemon_threads = True
+		self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+		os.chmod(self.socket_path, 0o600)
+		signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=self.shutdown).start())
+		self.logs.append(f"hel-web-server daemon {os.getpid()} listening on {self.socket_path}")
+		try:
+			self.server.serve_forever()
+		finally:
+			self.supervisor.stop_all()
+			self.server.server_close()
+			if os.path.exists(self.socket_path):
+				os.unlink(self.socket_path)
+
+	def shutdown(self):
+		self.supervisor.stop_all()
+		self.server.shutdown()
+
+	def dispatch(self, request):
+		command = request.get("cmd")
+		supervisor = self.supervisor
+
+		if command == "ping":
+			return {"ok": True, "pid": os.getpid()}
+
+		if command == "start":
+			name = request["name"]
+			if request.get("path"):
+				if name in supervisor.instances:
+					supervisor.remove(name)
+				supervisor.add(name, request["path"], int(request["port"]), request["type"], request.get("workers"), cache=request.get("cache"))
+			elif name not in supervisor.instances:
+				return {"ok": False, "error": f"No server named '{name}'"}
+			return {"ok": supervisor.start(name)}
+
+		if command == "stack":
+			instances = supervisor.load_stack(request["path"])
+			results = supervisor.start_all([i.name for i in instances])
+			if supervisor.proxy_port and supervisor.proxy is None:
+				supervisor.start_proxy()
+			return {"ok": all(results.values()), "results": results}
+
+		if command == "stop":
+			names = request.get("names") or None
+			supervisor.stop_all(names)
+			return {"ok": True}
+
+		if command == "reload":
+			results = supervisor.reload_all(request.get("names") or None)
+			return {"ok": all(results.values()), "results": results}
+
+		if command == "status":
+			return {
+				"ok": True,
+				"servers": supervisor.status(),
+				"proxy": supervisor.proxy_port if supervisor.proxy else None,
+				"resources": supervisor.resources(),
+				"caches": supervisor.caches(),
+			}
+
+		if command == "tail":
+			name = request.get("name")
+			if name and name not in supervisor.instances:
+				return {"ok": False, "error": f"No server named '{name}'"}
+			logs = supervisor.get(name).logs if name else self.logs
+			since = request.get("since")
+			first, end = logs.bounds()
+			if since is None:
+				since = max(first, end - int(request.get("lines", 50)))
+			lines = logs.snapshot(since)
+			# السطر التالي بعد آخر ما أُرسل فعلاً، لا يُفقد ما أُضيف بعد اللقطة
+			return {"ok": True, "lines": lines, "next": lines[-1][0] + 1 if lines else max(since, first)}
+
+		if command == "metrics":
+			return {"ok": True, "metrics": get_metrics().snapshot()}
+
+		if command == "shutdown":
+			threading.Thread(target=self.shutdown).start()
+			return {"ok": True}
+
+		return {"ok": False, "error": f"Unknown command: {command}"}
+
+
+# ----------------------------------------------------------------------
+# Client
+# ----------------------------------------------------------------------
+
+def _connect(socket_path):
+	sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	try:
+		sock.connect(socket_path)
+		return sock
+	except OSError:
+		sock.close()
+		return None
+
+
+def request(payload, socket_path=CONTROL_SOCKET, spawn=True):
+	"""Sends one request to the daemon (starting it if needed) and returns its reply."""
+	sock = _connect(socket_path)
+	if sock is None:
+		if not spawn:
+			raise ConnectionError("hel-web-server daemon is not running")
+		sock = _spawn_daemon(socket_path)
+	with sock:
+		sock.settimeout(CLIENT_TIMEOUT)
+		sock.sendall(json.dumps(payload).encode() + b"\n")
+		reply = sock.makefile("rb").readline()
+	if not reply:
+		raise ConnectionError("hel-web-server daemon closed the connection")
+	return json.loads(reply)
+
+
+def _spawn_daemon(socket_path):
+	package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+	env = os.environ.copy()
+	env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+	env["PYTHONUNBUFFERED"] = "1"
+	os.makedirs(os.path.dirname(DAEMON_LOG), exist_ok=True)
+	with open(DAEMON_LOG, "ab") as log:
+		subprocess.Popen(
+			[sys.executable, "-m", "server_manager.cli", "--socket", socket_path, "daemon"],
+			cwd=package_root,
+			stdin=subprocess.DEVNULL,
+			stdout=log,
+			stderr=log,
+			env=env,
+			start_new_session=True
+		)
+	deadline = time.monotonic() + DAEMON_START_TIMEOUT
+	delay = 0.005
+	while time.monotonic() < deadline:
+		sock = _connect(socket_path)
+		if sock is not None:
+			return sock
+		time.sleep(delay)
+		delay = min(delay * 2, 0.25)
+	raise ConnectionError(f"hel-web-server daemon did not start; see {DAEMON_LOG}")
+
+
+def _server_type(value):
+	if value in SERVER_TYPES.values():
+		return value
+	raise argparse.ArgumentTypeError(f"unknown type '{value}' (choose from {', '.join(SERVER_TYPES.values())})")
+
+
+def _print_lines(lines):
+	for seq, timestamp, level, text in lines:
+		stamp = time.strftime("%H:%M:%S", time.localtime(timestamp))
+		print(f"{stamp} {LEVEL_NAMES[level]:<7} {text}", flush=True)
+
+
+# ----------------------------------------------------------------------
+# Commands
+# ----------------------------------------------------------------------
+
+def cmd_run(args):
+	from .web_server import WebServer
+	server = WebServer(port=args.port, log_signal=_PrintLog())
+	if not server.start(os.path.abspath(args.path), args.port, args.type, args.workers, args.cache):
+		return 1
+	for url in server.get_local_and_ip_addresses():
+		print(f"Serving on {url}", flush=True)
+	stop = threading.Event()
+	signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+	signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+	# SIGHUP يعيد تحميل الخادم دون إغلاق المنفذ، كما في خوادم يونكس التقليدية
+	signal.signal(signal.SIGHUP, lambda signum, frame: threading.Thread(target=server.reload).start())
+	while not stop.is_set() and server.is_running():
+		stop.wait(1)
+	server.stop()
+	return 0
+
+
+def cmd_daemon(args):
+	Daemon(args.socket).serve()
+	return 0
+
+
+def cmd_start(args):
+	if args.stack:
+		reply = request({"cmd": "stack", "path": os.path.abspath(args.stack)}, args.socket)
+		for name, ok in reply.get("results", {}).items():
+			print(f"{name}: {'LIVE' if ok else 'FAILED'}")
+	else:
+		if args.name is None:
+			print("start: a server name or --stack is required", file=sys.stderr)
+			return 2
+		payload = {"cmd": "start", "name": args.name}
+		if args.path:
+			payload.update(path=os.path.abspath(args.path), port=args.port, type=args.type, workers=args.workers, cache=args.cache)
+		reply = request(payload, args.socket)
+		print(f"{args.name}: {'LIVE' if reply.get('ok') else 'FAILED'}")
+	if reply.get("error"):
+		print(reply["error"], file=sys.stderr)
+	return 0 if reply.get("ok") else 1
+
+
+def cmd_stop(args):
+	reply = request({"cmd": "stop", "names": args.names}, args.socket, spawn=False)
+	return 0 if reply.get("ok") else 1
+
+
+def cmd_reload(args):
+	reply = request({"cmd": "reload", "names": args.names}, args.socket, spawn=False)
+	for name, ok in reply.get("results", {}).items():
+		print(f"{name}: {'reloaded' if ok else 'FAILED'}")
+	return 0 if reply.get("ok") else 1
+
+
+def cmd_status(args):
+	try:
+		reply = request({"cmd": "status"}, args.socket, spawn=False)
+	except ConnectionError as e:
+		print(e)
+		return 3
+	if args.json:
+		print(json.dumps(reply))
+		return 0
+	resources = reply.get("resources", {})
+	caches = reply.get("caches", {})
+	for name, type_id, port, running in reply["servers"]:
+		line = f"{name:<16} {type_id:<14} {port:>5}  {'running' if running else 'stopped'}"
+		sample = resources.get(name)
+		if running and sample:
+			line += f"  cpu {sample['cpu']:5.1f}%  rss {sample['rss_mb']:7.1f} MB  fds {sample['fds']:.0f}"
+		cache = caches.get(name)
+		if running and cache:
+			line += f"  cache {cache['hits'] + cache['collapsed']}/{cache['misses']} hit/miss"
+		print(line)
+	if reply.get("proxy"):
+		print(f"{'(front proxy)':<16} {'':<14} {reply['proxy']:>5}  running")
+	return 0
+
+
+def cmd_tail(args):
+	reply = request({"cmd": "tail", "name": args.name, "lines": args.lines}, args.socket, spawn=False)
+	if not reply.get("ok"):
+		print(reply.get("error"), file=sys.stderr)
+		return 1
+	_print_lines(reply["lines"])
+	try:
+		while args.follow:
+			time.sleep(TAIL_INTERVAL)
+			reply = request({"cmd": "tail", "name": args.name, "since": reply["next"]}, args.socket, spawn=False)
+			_print_lines(reply["lines"])
+	except KeyboardInterrupt:
+		pass
+	return 0
+
+
+def cmd_metrics(args):
+	metrics = request({"cmd": "metrics"}, args.socket, spawn=False)["metrics"]
+	if args.json:
+		print(json.dumps(metrics, indent=2))
+		return 0
+	print(f"{'backend / path':<32} {'reqs':>8} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+	for name, backend in sorted(metrics["backends"].items()):
+		rows = [(name, backend)] + [("  " + path, summary) for path, summary in sorted(backend["paths"].items(), key=lambda e: -e[1]["requests"])[:args.paths]]
+		for label, s in rows:
+			latency = "".join(f" {s[key]:>8.1f}" if s["timed"] else f" {'-':>8}" for key in ("p50_ms", "p95_ms", "p99_ms"))
+			print(f"{label[:32]:<32} {s['requests']:>8} {s['rps']:>7.1f}{latency}")
+	return 0
+
+
+def cmd_shutdown(args):
+	try:
+		request({"cmd": "shutdown"}, args.socket, spawn=False)
+	except ConnectionError:
+		pass
+	return 0
+
+
+def _parse_time(value):
+	"""Accepts seconds ago with a unit ('90s', '15m', '2h', '1d') or a local 'YYYY-MM-DD[ HH:MM[:SS]]'."""
+	units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+	if value[-1:] in units and value[:-1].replace(".", "", 1).isdigit():
+		return time.time() - float(value[:-1]) * units[value[-1]]
+	for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+		try:
+			return time.mktime(time.strptime(value, fmt))
+		except ValueError:
+			pass
+	raise argparse.ArgumentTypeError(f"invalid time '{value}'")
+
+
+def cmd_logs(args):
+	from .log_store import get_log_store
+	store = get_log_store()
+	if args.list_backends:
+		print("\n".join(store.backends()))
+		return 0
+	records = store.query(args.since, args.until, args.backend, LEVEL_NAMES.index(args.level.upper()), args.grep, args.lines)
+	for timestamp, level, backend, text in records:
+		if args.json:
+			print(json.dumps({"time": timestamp, "level": LEVEL_NAMES[level], "backend": backend, "text": text}))
+		else:
+			stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+			print(f"[{stamp}] {LEVEL_NAMES[level]:<7} {backend}: {text}")
+	return 0
+
+
+def cmd_port(args):
+	from .ports import port_owners, find_free_port, kill_port_owners
+	if args.free:
+		free = find_free_port(args.port)
+		print(free if free else f"No free port in {args.port}+")
+		return 0 if free else 1
+	if args.kill:
+		killed, failed = kill_port_owners(args.port)
+		for owner in killed:
+			print(f"stopped {owner.describe()}")
+		for owner in failed:
+			print(f"cannot stop {owner.describe()}")
+		return 1 if failed else 0
+	owners = port_owners(args.port)
+	if args.json:
+		print(json.dumps([owner.to_dict() for owner in owners]))
+		return 0
+	if not owners:
+		print(f"Nothing is listening on port {args.port}")
+	for owner in owners:
+		print(owner.describe())
+	return 0
+
+
+def cmd_bench(args):
+	from urllib.parse import urlsplit
+	from .loadgen import LoadGenerator, RequestSpec
+	url = urlsplit(args.url if "//" in args.url else "http://" + args.url)
+	path = url.path or "/"
+	if url.query:
+		path += "?" + url.query
+	mix = [RequestSpec.parse(r) for r in args.request] if args.request else [RequestSpec(path)]
+	generator = LoadGenerator(
+		url.hostname, url.port or 80, mix, args.concurrency, args.duration,
+		keep_alive=not args.no_keepalive, host_header=url.netloc
+	)
+	result = generator.run().to_dict()
+	if args.json:
+		print(json.dumps(result, indent=2))
+		return 0
+	print(f"{result['requests']} requests in {result['elapsed']:.1f} s over {result['connections']} connections, {result['errors']} errors")
+	print(f"{result['rps']:.1f} req/s, {result['bytes'] / result['elapsed'] / 1024:.0f} KiB/s" if result["elapsed"] else "")
+	print("latency ms: " + ", ".join(f"{key[:-3]} {result[key]:.2f}" for key in ("p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms")))
+	print("status: " + ", ".join(f"{code}: {count}" for code, count in result["statuses"].items()))
+	return 0
+
+
+def build_parser():
+	parser = argparse.ArgumentParser(prog="hel-web-server", description="Hel-Web-Server command line interface (run without arguments for the GUI)")
+	parser.add_argument("--socket", default=CONTROL_SOCKET, help="daemon control socket")
+	sub = parser.add_subparsers(dest="command", required=True)
+
+	def add_server_options(p):
+		p.add_argument("-t", "--type", type=_server_type, default="http.server", help="server type id")
+		p.add_argument("-p", "--port", type=int, default=DEFAULT_PORT)
+		p.add_argument("-w", "--workers", type=int, default=None)
+		p.add_argument("--cache", action=argparse.BooleanOptionalAction, default=None,
+			help="put an HTTP cache in front of Flask/Django (off by default)")
+
+	p = sub.add_parser("run", help="serve one project in the foreground")
+	p.add_argument("path", nargs="?", default=".")
+	add_server_options(p)
+	p.set_defaults(func=cmd_run)
+
+	p = sub.add_parser("daemon", help="run the background daemon in the foreground")
+	p.set_defaults(func=cmd_daemon)
+
+	p = sub.add_parser("start", help="start a named server (or a stack file) in the daemon")
+	p.add_argument("name", nargs="?")
+	p.add_argument("path", nargs="?")
+	p.add_argument("--stack", help="JSON stack file")
+	add_server_options(p)
+	p.set_defaults(func=cmd_start)
+
+	p = sub.add_parser("stop", help="stop named servers (all if none given)")
+	p.add_argument("names", nargs="*")
+	p.set_defaults(func=cmd_stop)
+
+	p = sub.add_parser("reload", help="reload named servers (all if none given) without closing their ports")
+	p.add_argument("names", nargs="*")
+	p.set_defaults(func=cmd_reload)
+
+	p = sub.add_parser("status", help="list servers managed by the daemon")
+	p.add_argument("--json", action="store_true")
+	p.set_defaults(func=cmd_status)
+
+	p = sub.add_parser("tail", help="print a server's log (the daemon log if no name)")
+	p.add_argument("name", nargs="?")
+	p.add_argument("-n", "--lines", type=int, default=50)
+	p.add_argument("-f", "--follow", action="store_true")
+	p.set_defaults(func=cmd_tail)
+
+	p = sub.add_parser("metrics", help="print request counts and latency percentiles")
+	p.add_argument("--json", action="store_true", help="machine-readable output")
+	p.add_argument("--paths", type=int, default=10, help="busiest paths to show per backend")
+	p.set_defaults(func=cmd_metrics)
+
+	p = sub.add_parser("shutdown", help="stop every server and the daemon")
+	p.set_defaults(func=cmd_shutdown)
+
+	p = sub.add_parser("logs", help="query the persistent log store (all servers, across restarts)")
+	p.add_argument("--since", type=_parse_time, help="'15m', '2h', '1d' ago or 'YYYY-MM-DD HH:MM'")
+	p.add_argument("--until", type=_parse_time)
+	p.add_argument("-b", "--backend", action="append", help="server name (repeatable)")
+	p.add_argument("-l", "--level", choices=["info", "warning", "error"], default="info", help="minimum severity")
+	p.add_argument("-g", "--grep", help="only lines containing this text")
+	p.add_argument("-n", "--lines", type=int, default=200, help="newest lines to print (0 for all)")
+	p.add_argument("--json", action="store_true")
+	p.add_argument("--list-backends", action="store_true")
+	p.set_defaults(func=cmd_logs)
+
+	p = sub.add_parser("port", help="show which processes listen on a port")
+	p.add_argument("port", type=int)
+	group = p.add_mutually_exclusive_group()
+	group.add_argument("--kill", action="store_true", help="terminate them")
+	group.add_argument("--free", action="store_true", help="print the first free port from PORT upwards")
+	group.add_argument("--json", action="store_true")
+	p.set_defaults(func=cmd_port)
+
+	p = sub.add_parser("bench", help="load-test a URL")
+	p.add_argument("url")
+	p.add_argument("-c", "--concurrency", type=int, default=16)
+	p.add_argument("-d", "--duration", type=float, default=10.0)
+	p.add_argument("--no-keepalive", action="store_true")
+	p.add_argument("-r", "--request", action="append", help="request mix entry '[METHOD] PATH [WEIGHT]' (repeatable)")
+	p.add_argument("--json", action="store_true")
+	p.set_defaults(func=cmd_bench)
+
+	# يُعالج في main() مباشرة لأن للمجموعة خياراتها الخاصة
+	sub.add_parser("benchmark", help="run the benchmark suite (see 'benchmark --help')", add_help=False)
+	return parser
+
+
+def main(argv=None):
+	argv = sys.argv[1:] if argv is None else argv
+	if argv[:1] == ["benchmark"]:
+		from .benchmark import main as benchmark_main
+		return benchmark_main(argv[1:])
+	args = build_parser().parse_args(argv)
+	try:
+		return args.func(args)
+	except ConnectionError as e:
+		print(e, file=sys.stderr)
+		return 3
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -1,12 +1,113 @@
 # server_manager/config.py
+import os
+
 DEFAULT_PORT = 8000
 
 # أنواع الخوادم المدعومة.
 # المفتاح هو الاسم المعروض في الواجهة، والقيمة هي المعرف الداخلي
 # أو أي بيانات تعريف إضافية تحتاجها للتمييز بينها.
 SERVER_TYPES = {
-    "Static Files (Python http.server)": "http.server",
+    "Static Files (Built-in async server)": "http.server",
     "Flask Application": "flask",
+    "Flask Application (Prefork WSGI)": "flask_prefork",
+    "Flask Application (Warm threaded host)": "flask_warm",
     "Django Application": "django",
+    "Django Application (ASGI)": "django_asgi",
     "PHP Built-in Server": "php_server",
+    "PHP FastCGI (php-cgi pool)": "php_fastcgi",
+}
+
+# مهلة انتظار جاهزية الخادم (بالثواني).
+# خوادم Django قد تحتاج وقتاً أطول بسبب فحوصات النظام عند الإقلاع.
+DEFAULT_READY_TIMEOUT = 15
+READY_TIMEOUTS = {
+    "django": 30,
+    "django_asgi": 30,
+}
+
+# مسار HTTP اختياري يُطلب بعد أن يقبل المنفذ الاتصالات.
+# أي رد HTTP (حتى 404 أو 500) يعني أن التطبيق قد حُمّل ويخدم الطلبات.
+# القيمة None تعني الاكتفاء بفحص المنفذ فقط.
+# الخادم الثابت يعمل داخل العملية نفسها ولا يحتاج فحصاً.
+HEALTH_PATHS = {
+    "flask": "/",
+    "flask_prefork": "/",
+    "flask_warm": "/",
+    "django": "/",
+    "django_asgi": "/",
+    "php_server": None,
+    "php_fastcgi": None,
 }
+
+# الحد الأقصى لعدد أسطر السجلات المحفوظة في الذاكرة،
+# وفترة تحديث عرض السجلات في الواجهة (بالملي ثانية).
+LOG_RETENTION = 20000
+LOG_FLUSH_INTERVAL_MS = 100
+LOG_PUMP_QUEUE = 100000 # أقصى عدد أسطر تنتظر التوزيع قبل إسقاط الجديد منها
+
+# ذاكرة التخزين المؤقت لخادم الملفات الثابتة (بالبايت).
+# الملفات الأكبر من الحد الفردي تُرسل عبر sendfile مع حفظ بياناتها الوصفية فقط.
+STATIC_CACHE_MAX_BYTES = 64 * 1024 * 1024
+STATIC_CACHE_MAX_FILE_BYTES = 1024 * 1024
+STATIC_CACHE_MAX_ENTRIES = 10000 # المدخلات الوصفية (ملفات كبيرة) لا تُحسب في حد البايتات
+
+# مجلد التخزين المؤقت العام للبرنامج (يتبع معيار XDG)
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "hel-web-server")
+
+# الضغط المسبق للملفات الثابتة (gzip دائماً، و brotli إذا كانت الحزمة مثبتة)
+PRECOMPRESS_DIR = os.path.join(CACHE_DIR, "precompressed")
+PRECOMPRESS_WORKERS = min(4, os.cpu_count() or 1)
+PRECOMPRESS_MIN_BYTES = 1024
+PRECOMPRESS_MAX_BYTES = 32 * 1024 * 1024
+PRECOMPRESS_CACHE_BYTES = 256 * 1024 * 1024 # تُحذف أقدم النسخ المضغوطة (لكل المشاريع) بعد هذا الحد
+
+# عدد العمليات والخيوط لكل عامل في أوضاع الإنتاج متعددة العمليات
+DEFAULT_WORKERS = os.cpu_count() or 1
+WSGI_THREADS = 8
+
+# مقبس التحكم الخاص بخدمة hel-web-server في الخلفية (الواجهة النصية)
+RUNTIME_DIR = os.environ.get("XDG_RUNTIME_DIR") or CACHE_DIR
+CONTROL_SOCKET = os.path.join(RUNTIME_DIR, f"hel-web-server-{os.getuid()}.sock")
+DAEMON_LOG = os.path.join(CACHE_DIR, "daemon.log")
+
+# إعادة التحميل التلقائي عند تغير ملفات المشروع (inotify بدلاً من مراقبة Django/Flask الدورية)
+AUTO_RELOAD = True
+RELOAD_DEBOUNCE = 0.15 # ثوانٍ من الهدوء قبل معالجة دفعة التغييرات
+RELOAD_MAX_DELAY = 1.0
+RELOAD_CODE_EXTENSIONS = {".py", ".php"}
+
+# نتائج مجموعة قياس الأداء (لمقارنة التشغيلات عبر الزمن)
+BENCHMARK_DIR = os.path.join(CACHE_DIR, "benchmarks")
+
+# أخذ عينات المعالج والذاكرة والملفات المفتوحة لعمليات الخوادم من /proc
+SAMPLE_INTERVAL = 1.0 # ثوانٍ بين العينات
+SAMPLE_HISTORY = 120 # عدد العينات المحفوظة لكل مقياس (دقيقتان)
+ALERT_CPU_PERCENT = 90 # نسبة لكل العمليات معاً (قد تتجاوز 100 مع عدة أنوية)
+ALERT_CPU_SAMPLES = 10 # عدد العينات المتتالية فوق الحد قبل التنبيه
+ALERT_RSS_MB = 1024
+ALERT_FD_FRACTION = 0.8 # من الحد الأقصى للملفات المفتوحة (ulimit -n)
+
+# عدد المنافذ التي تُفحص بعد المنفذ المطلوب عند البحث عن منفذ متاح
+PORT_SEARCH_SPAN = 100
+
+# أرشيف السجلات الدائم: مقاطع مضغوطة على دفعات مع فهرس زمني لكل مقطع
+LOG_STORE_ENABLED = True
+LOG_STORE_DIR = os.path.join(os.environ.get("XDG_STATE_HOME", os.path.expanduser("~/.local/state")), "hel-web-server", "logs")
+LOG_BLOCK_BYTES = 64 * 1024 # حجم الدفعة قبل ضغطها وكتابتها
+LOG_BLOCK_SECONDS = 1.0 # أقصى تأخير قبل كتابة دفعة غير مكتملة
+LOG_SEGMENT_BYTES = 4 * 1024 * 1024 # حجم المقطع المضغوط قبل الانتقال إلى مقطع جديد
+LOG_STORE_MAX_BYTES = 64 * 1024 * 1024 # تُحذف أقدم المقاطع بعد هذا الحد
+LOG_STORE_QUEUE = 100000 # أقصى عدد أسطر تنتظر الكتابة قبل إسقاط الجديد منها
+
+# ذاكرة HTTP مؤقتة أمام خوادم Flask/Django: تحترم Cache-Control و Vary و ETag و Expires.
+# عند تفعيلها يعمل الخادم الخلفي على منفذ داخلي ويستقبل الوكيل الأمامي الطلبات على المنفذ المختار.
+# معطلة افتراضياً: تُفعّل من الواجهة أو بالخيار --cache لأوامر run و start.
+HTTP_CACHE_ENABLED = False
+HTTP_CACHE_TYPES = ("flask", "django")
+HTTP_CACHE_MAX_BYTES = 32 * 1024 * 1024
+HTTP_CACHE_MAX_OBJECT_BYTES = 1024 * 1024 # الاستجابات الأكبر تُمرر دون تخزين
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http") # None لتعطيل الطبقة الثانية على القرص
+HTTP_CACHE_DISK_BYTES = 256 * 1024 * 1024
+
+# خدمة STATIC_URL و MEDIA_URL لمشاريع Django مباشرة بمحرك الملفات الثابتة (تُقرأ من settings.py)
+DJANGO_SERVE_STATIC = True
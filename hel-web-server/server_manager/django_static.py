@@ -0,0 +1,317 @@
+# server_manager/django_static.py
+"""Serves a Django project's static and media files in front of runserver.
+
+The settings module named in manage.py is read with ``ast`` (never
+imported, so no Django is needed in the manager): simple top-level
+assignments such as ``BASE_DIR / "static"`` or ``os.path.join(...)`` are
+evaluated and anything else is ignored. STATIC_URL maps to the same
+directories the staticfiles finders search (STATICFILES_DIRS, then each
+installed app's ``static`` folder, then STATIC_ROOT) and MEDIA_URL to
+MEDIA_ROOT. DjangoGateway serves those prefixes with the static engine
+(sendfile, ETags, precompressed variants) and forwards every other
+request to runserver through the front proxy code.
+"""
+import ast
+import importlib.machinery
+import os
+import re
+import sys
+from pathlib import Path
+
+from .static_server import StaticServer
+from .http_util import access_log_line
+from .precompress import PrecompressStore
+from .front_proxy import FrontProxy, request_body
+
+SETTINGS_NAMES = ("STATIC_URL", "STATIC_ROOT", "STATICFILES_DIRS", "MEDIA_URL", "MEDIA_ROOT", "INSTALLED_APPS")
+_SETTINGS_MODULE_RE = re.compile(r"""DJANGO_SETTINGS_MODULE['"]\s*,\s*['"]([\w.]+)['"]""")
+
+# الدوال المسموح بتقييمها في ملف الإعدادات
+_FUNCTIONS = {
+	"Path": Path, "pathlib.Path": Path, "str": str,
+	"os.path.join": os.path.join, "os.path.dirname": os.path.dirname, "os.path.abspath": os.path.abspath,
+	"os.path.realpath": os.path.realpath, "os.path.normpath": os.path.normpath,
+	"os.path.expanduser": os.path.expanduser, "os.getenv": os.getenv, "os.environ.get": os.environ.get,
+}
+_PATH_METHODS = ("resolve", "absolute", "expanduser", "joinpath")
+
+
+class _Unknown(Exception):
+	"""An expression the settings reader does not evaluate."""
+
+
+def _dotted(node):
+	if isinstance(node, ast.Name):
+		return node.id
+	if isinstance(node, ast.Attribute):
+		base = _dotted(node.value)
+		return base and f"{base}.{node.attr}"
+	return None
+
+
+def _evaluate(node, names):
+	if isinstance(node, ast.Constant):
+		return node.value
+	if isinstance(node, ast.Name):
+		if node.id in names:
+			return names[node.id]
+		raise _Unknown(node.id)
+	if isinstance(node, (ast.List, ast.Tuple)):
+		values = [_evaluate(element, names) for element in node.elts]
+		return values if isinstance(node, ast.List) else tuple(values)
+	if isinstance(node, ast.JoinedStr):
+		return "".join(
+			str(_evaluate(part.value, names)) if isinstance(part, ast.FormattedValue) else part.value
+			for part in node.values
+		)
+	if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Div, ast.Add)):
+		left, right = _evaluate(node.left, names), _evaluate(node.right, names)
+		try:
+			return left / right if isinstance(node.op, ast.Div) else left + right
+		except TypeError:
+			raise _Unknown("operands")
+	if isinstance(node, ast.Attribute):
+		value = _evaluate(node.value, names)
+		if isinstance(value, Path) and node.attr in ("parent", "name"):
+			return getattr(value, node.attr)
+		raise _Unknown(node.attr)
+	if isinstance(node, ast.Call) and not node.keywords:
+		name = _dotted(node.func)
+		args = [_evaluate(arg, names) for arg in node.args]
+		if name in _FUNCTIONS:
+			return _FUNCTIONS[name](*args)
+		if isinstance(node.func, ast.Attribute) and node.func.attr in _PATH_METHODS:
+			value = _evaluate(node.func.value, names)
+			if isinstance(value, Path):
+				return getattr(value, node.func.attr)(*args)
+	raise _Unknown(type(node).__name__)
+
+
+def _read_module(path, names, seen):
+	"""Evaluates the simple top-level assignments of one settings file into ``names``."""
+	if path in seen:
+		return
+	seen.add(path)
+	try:
+		with open(path, encoding="utf-8") as f:
+			tree = ast.parse(f.read(), path)
+	except (OSError, SyntaxError, ValueError):
+		return
+	names["__file__"] = path
+	for statement in tree.body:
+		if isinstance(statement, ast.ImportFrom) and statement.level and any(a.name == "*" for a in statement.names):
+			# إعدادات مقسمة: from .base import *
+			base = Path(path).parent
+			for _ in range(statement.level - 1):
+				base = base.parent
+			target = base.joinpath(*(statement.module or "__init__").split("."))
+			_read_module(str(target.with_suffix(".py")) if target.with_suffix(".py").exists() else str(target / "__init__.py"), names, seen)
+			names["__file__"] = path
+			continue
+		targets, value = [], None
+		if isinstance(statement, ast.Assign):
+			targets, value = statement.targets, statement.value
+		elif isinstance(statement, ast.AnnAssign) and statement.value is not None:
+			targets, value = [statement.target], statement.value
+		elif isinstance(statement, ast.AugAssign) and isinstance(statement.op, ast.Add):
+			targets, value = [statement.target], ast.BinOp(statement.target, ast.Add(), statement.value)
+		targets = [t.id for t in targets if isinstance(t, ast.Name)]
+		if not targets:
+			continue
+		try:
+			result = _evaluate(value, names)
+		except (_Unknown, TypeError, ValueError):
+			for target in targets:
+				names.pop(target, None) # قيمة لا نعرفها أفضل من قيمة قديمة خاطئة
+			continue
+		for target in targets:
+			names[target] = result
+
+
+def find_settings_file(project_path):
+	"""Returns the settings module file named by DJANGO_SETTINGS_MODULE (environment, then manage.py)."""
+	module = os.environ.get("DJANGO_SETTINGS_MODULE")
+	if not module:
+		try:
+			with open(os.path.join(project_path, "manage.py"), encoding="utf-8") as f:
+				match = _SETTINGS_MODULE_RE.search(f.read())
+		except OSError:
+			return None
+		if match is None:
+			return None
+		module = match.group(1)
+	base = os.path.join(project_path, *module.split("."))
+	for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+		if os.path.isfile(candidate):
+			return candidate
+	return None
+
+
+def read_settings(project_path):
+	"""Returns {name: value} for the static/media settings that could be evaluated, or None."""
+	path = find_settings_file(project_path)
+	if path is None:
+		return None
+	names = {"os": os, "Path": Path}
+	_read_module(path, names, set())
+	return {name: names[name] for name in SETTINGS_NAMES if name in names}
+
+
+def _package_dir(module, search_path):
+	"""Finds the directory of an installed app's package without importing it."""
+	parts = [part for part in module.split(".") if not part[:1].isupper()] # بدون اسم صنف AppConfig
+	path, spec = search_path, None
+	for part in parts:
+		if path is None:
+			return None
+		spec = importlib.machinery.PathFinder.find_spec(part, path)
+		if spec is None:
+			return None
+		path = list(spec.submodule_search_locations) if spec.submodule_search_locations is not None else None
+	if path:
+		return path[0]
+	# "polls.apps" وحدة وليست حزمة: مجلد التطبيق هو مجلدها
+	return os.path.dirname(spec.origin) if spec is not None and spec.origin else None
+
+
+def _url_prefix(url):
+	"""'static/' -> '/static/'; None for empty, root or absolute (CDN) URLs."""
+	if not isinstance(url, str) or "://" in url or url.startswith("//"):
+		return None
+	prefix = "/" + url.strip("/") + "/"
+	return prefix if prefix != "//" else None
+
+
+class StaticMount:
+	"""A URL prefix served from the first of several directories holding the file."""
+	__slots__ = ("prefix", "directories")
+
+	def __init__(self, prefix, directories):
+		self.prefix = prefix
+		self.directories = [os.path.realpath(d) for d in directories]
+
+
+def static_mounts(project_path, settings=None):
+	"""Returns the StaticMounts for a Django project, longest prefix first (empty if none apply)."""
+	if settings is None:
+		settings = read_settings(project_path)
+	if not settings:
+		return []
+
+	def resolve(directory):
+		# المسارات النسبية تُحسب من مجلد المشروع، والروابط الرمزية تُحل ليطابقها translate_path
+		return os.path.realpath(os.path.join(project_path, os.path.expanduser(str(directory))))
+
+	mounts = []
+	static_prefix = _url_prefix(settings.get("STATIC_URL"))
+	if static_prefix is not None:
+		directories = []
+		for entry in settings.get("STATICFILES_DIRS") or ():
+			if isinstance(entry, (list, tuple)) and len(entry) == 2:
+				# (بادئة، مجلد): الملفات تظهر تحت STATIC_URL/بادئة/
+				mounts.append(StaticMount(static_prefix + str(entry[0]).strip("/") + "/", [resolve(entry[1])]))
+			else:
+				directories.append(resolve(entry))
+		apps = settings.get("INSTALLED_APPS") or ()
+		if "django.contrib.staticfiles" in apps:
+			search_path = [project_path] + sys.path
+			for app in apps:
+				if not isinstance(app, str):
+					continue
+				package = _package_dir(app, search_path)
+				if package is not None and os.path.isdir(os.path.join(package, "static")):
+					directories.append(os.path.join(package, "static"))
+		if settings.get("STATIC_ROOT"):
+			directories.append(resolve(settings["STATIC_ROOT"]))
+		directories = [d for d in directories if os.path.isdir(d)]
+		if directories:
+			mounts.append(StaticMount(static_prefix, directories))
+	media_prefix = _url_prefix(settings.get("MEDIA_URL"))
+	media_root = settings.get("MEDIA_ROOT")
+	if media_prefix is not None and media_root and media_prefix != static_prefix:
+		mounts.append(StaticMount(media_prefix, [resolve(media_root)]))
+	return sorted(mounts, key=lambda mount: len(mount.prefix), reverse=True)
+
+
+class DjangoGateway(StaticServer):
+	"""Serves static/media mounts itself and forwards everything else to runserver.
+
+	``route`` is a front_proxy Route to the backend (with an optional HTTP
+	cache); forwarded requests use the proxy's pooled upstream connections.
+	A file missing from every directory of a mount is forwarded too, so
+	custom finders and views under STATIC_URL still answer. Only requests
+	served from the mounts are logged: runserver logs the rest itself, so
+	``proxy_log`` receives the forwarded requests' lines to filter.
+	"""
+	access_log = False
+
+	def __init__(self, root, port, route, mounts, host="0.0.0.0", log=None, proxy_log=None):
+		super().__init__(root, port, host=host, log=log)
+		self.route = route
+		self.mounts = list(mounts)
+		self.proxy = FrontProxy(port, [route], host=host, log=proxy_log)
+		roots = [d for mount in self.mounts for d in mount.directories if os.path.isdir(d)]
+		self.precompressed = PrecompressStore(self.root, log=self.log, roots=roots)
+
+	def _run(self, sock, started):
+		# الوكيل لا يشغل حلقته الخاصة هنا: يعمل داخل حلقة هذا الخادم
+		self.proxy.loop = self.loop
+		super()._run(sock, started)
+
+	def _watch_root(self):
+		super()._watch_root()
+		if self._watcher is None:
+			return
+		for mount in self.mounts:
+			for directory in mount.directories:
+				if directory != self.root and not directory.startswith(self.root + os.sep) and os.path.isdir(directory):
+					# ما لا يمكن مراقبته يبقى متحققاً منه بـ stat في ذاكرة الملفات
+					self._watcher.add_tree(directory)
+
+	def stop(self):
+		if self.loop is not None and self.is_running():
+			self.loop.call_soon_threadsafe(self.proxy.close_pools)
+		super().stop()
+
+	def mount_for(self, url_path):
+		for mount in self.mounts:
+			if url_path.startswith(mount.prefix):
+				return mount
+		return None
+
+	def translate_path(self, url_path):
+		mount = self.mount_for(url_path)
+		if mount is None or "\0" in url_path:
+			return None
+		parts = [p for p in url_path[len(mount.prefix):].split("/") if p and p not in (".", "..")]
+		for directory in mount.directories:
+			fs_path = os.path.realpath(os.path.join(directory, *parts))
+			if fs_path.startswith(directory + os.sep) and os.path.isfile(fs_path):
+				return fs_path
+		return None
+
+	async def _read_body(self, reader, request):
+		# الطلبات الديناميكية تُمرر بجسمها إلى runserver (الأجسام الكبيرة تُبث دون تخزين)
+		return await request_body(reader, request)
+
+	async def _not_found(self, writer, request, keep_alive):
+		# لا شيء أُرسل بعد: _respond يمرر الطلب إلى runserver
+		return None, 0
+
+	async def _respond(self, writer, request, keep_alive):
+		peer = writer.get_extra_info("peername") or ("-", 0)
+		status, still_open = None, keep_alive
+		if self.mount_for(request.path) is not None and request.method in ("GET", "HEAD"):
+			status, size = await super()._respond(writer, request, keep_alive)
+			if status is not None:
+				self.log(access_log_line(peer[0], f"{request.method} {request.target} {request.version}", status, size))
+		if status is None:
+			status, size, still_open, outcome = await self.proxy.forward(self.route, request, writer, peer, False, keep_alive)
+			# نفس سطر FrontProxy.handle، ويختار proxy_log ما لم يسجله runserver (ردود الذاكرة)
+			suffix = f" -> {self.route.name}" + (f" ({outcome})" if outcome else "")
+			self.proxy.log(access_log_line(peer[0], f"{request.method} {request.target} {request.version}", status, size) + suffix)
+		still_open = await self.proxy.finish_body(request, still_open)
+		if keep_alive and not still_open:
+			# جسم رد بلا طول معروف لعميل HTTP/1.0، أو جسم طلب لم يُقرأ كاملاً: ننهي الاتصال
+			writer.close()
+		return status, size
@@ -0,0 +1,30 @@
+# server_manager/events.py
+import threading
+
+
+class Signal:
+	"""Minimal callback list with the connect()/emit() API of a Qt signal.
+
+	Callbacks run synchronously on the emitting thread, so GUI front ends
+	must hop to their own thread themselves (see gui/server_workers.py).
+	"""
+
+	def __init__(self):
+		self._callbacks = []
+		self._lock = threading.Lock()
+
+	def connect(self, callback):
+		with self._lock:
+			self._callbacks = self._callbacks + [callback]
+
+	def disconnect(self, callback=None):
+		with self._lock:
+			if callback is None:
+				self._callbacks = []
+			else:
+				self._callbacks = [c for c in self._callbacks if c != callback]
+
+	def emit(self, *args):
+		# نسخة ثابتة من القائمة، فلا حاجة للقفل أثناء الاستدعاء
+		for callback in self._callbacks:
+			callback(*args)
@@ -0,0 +1,467 @@
+# server_manager/fastcgi.py
+import asyncio
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import time
+from http import HTTPStatus
+
+from .http_util import SERVER_NAME, MAX_HEADER_BYTES, response_head, read_body, chain_chunks
+from .static_server import StaticServer
+from .front_proxy import IDEMPOTENT_METHODS
+
+# ثوابت بروتوكول FastCGI
+FCGI_VERSION = 1
+FCGI_BEGIN_REQUEST = 1
+FCGI_END_REQUEST = 3
+FCGI_PARAMS = 4
+FCGI_STDIN = 5
+FCGI_STDOUT = 6
+FCGI_STDERR = 7
+FCGI_RESPONDER = 1
+FCGI_KEEP_CONN = 1
+FCGI_MAX_CONTENT = 65535
+FCGI_REQUEST_ID = 1
+
+# أقصى مدة لانتظار انتهاء الطلبات الجارية على مجموعة php-cgi القديمة عند إعادة التحميل
+DRAIN_TIMEOUT = 20
+
+_HEADER = struct.Struct("!BBHHBx")
+
+
+def _record(record_type, content=b"", request_id=FCGI_REQUEST_ID):
+	padding = -len(content) % 8
+	return _HEADER.pack(FCGI_VERSION, record_type, request_id, len(content), padding) + content + b"\0" * padding
+
+
+def _stream_records(record_type, data):
+	"""Splits data into FastCGI records, followed by the empty end-of-stream record."""
+	parts = [_record(record_type, data[i:i + FCGI_MAX_CONTENT]) for i in range(0, len(data), FCGI_MAX_CONTENT)]
+	parts.append(_record(record_type))
+	return b"".join(parts)
+
+
+def _encode_length(n):
+	return bytes([n]) if n < 128 else struct.pack("!I", n | 0x80000000)
+
+
+def encode_params(params):
+	out = bytearray()
+	for name, value in params.items():
+		name_bytes = name.encode("latin-1")
+		value_bytes = value.encode("latin-1", "replace") if isinstance(value, str) else value
+		out += _encode_length(len(name_bytes)) + _encode_length(len(value_bytes)) + name_bytes + value_bytes
+	return bytes(out)
+
+
+class _Slot:
+	"""One php-cgi process socket and its persistent connection, if open."""
+	__slots__ = ("path", "reader", "writer")
+
+	def __init__(self, path):
+		self.path = path
+		self.reader = None
+		self.writer = None
+
+	async def connect(self):
+		if self.writer is None or self.writer.is_closing():
+			self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+
+	def close(self):
+		if self.writer is not None:
+			self.writer.close()
+		self.reader = self.writer = None
+
+
+class FastCGIResponse:
+	"""The php-cgi output of one request, read record by record from its slot.
+
+	``head`` holds FCGI_STDOUT up to the end of the CGI header block (plus
+	whatever body arrived with it); ``complete`` tells whether
+	FCGI_END_REQUEST was already seen. FCGI_STDERR is collected in
+	``stderr``. The php-cgi process stays taken until release() (body
+	fully read) or discard().
+	"""
+
+	def __init__(self, pool, slot):
+		self.pool = pool
+		self.slot = slot
+		self.head = b""
+		self.complete = False
+		self.stderr = []
+
+	async def _next_stdout(self):
+		"""Returns the next FCGI_STDOUT content, or None once the request has ended."""
+		reader = self.slot.reader
+		while not self.complete:
+			header = await reader.readexactly(_HEADER.size)
+			_, record_type, _, length, padding = _HEADER.unpack(header)
+			content = await reader.readexactly(length + padding)
+			content = content[:length]
+			if record_type == FCGI_STDOUT and content:
+				return content
+			if record_type == FCGI_STDERR:
+				self.stderr.append(content)
+			elif record_type == FCGI_END_REQUEST:
+				self.complete = True
+		return None
+
+	async def read_head(self, limit=MAX_HEADER_BYTES):
+		"""Reads FCGI_STDOUT until the blank line that ends the CGI head (or the end of the output)."""
+		head = b""
+		while b"\r\n\r\n" not in head and b"\n\n" not in head:
+			if len(head) > limit:
+				raise ValueError("CGI response head too large")
+			content = await self._next_stdout()
+			if content is None:
+				break
+			head += content
+		self.head = head
+
+	async def iter_body(self):
+		"""Yields the rest of FCGI_STDOUT as php-cgi writes it."""
+		while True:
+			content = await self._next_stdout()
+			if content is None:
+				return
+			yield content
+
+	def release(self):
+		self.pool._slots.put_nowait(self.slot)
+
+	def discard(self):
+		self.slot.close() # رد لم يُقرأ كاملاً يفسد الاتصال للطلب التالي
+		self.release()
+
+
+class FastCGIPool:
+	"""Hands out persistent FastCGI connections, one per php-cgi process.
+
+	Each php-cgi process serves one connection at a time, so the pool is a
+	queue of slots: a request waits for a free process, reuses its open
+	(FCGI_KEEP_CONN) connection and returns it once its response was read.
+	"""
+
+	def __init__(self, socket_paths):
+		self.socket_paths = socket_paths
+		self._slots = None
+
+	def _ensure_queue(self):
+		if self._slots is None:
+			self._slots = asyncio.Queue()
+			for path in self.socket_paths:
+				self._slots.put_nowait(_Slot(path))
+
+	async def request(self, params, body):
+		"""Sends one request and reads its CGI head; returns a FastCGIResponse.
+
+		The caller streams the body from it and must release() or discard() it.
+		"""
+		self._ensure_queue()
+		slot = await self._slots.get()
+		try:
+			for attempt in range(2):
+				reused = slot.writer is not None and not slot.writer.is_closing()
+				sent = False
+				try:
+					await slot.connect()
+					await self._send(slot, params, body)
+					sent = True
+					response = FastCGIResponse(self, slot)
+					await response.read_head()
+					return response
+				except (OSError, asyncio.IncompleteReadError):
+					# الاتصال الدائم قد يُغلق من جهة php-cgi، نعيد المحاولة مرة واحدة،
+					# إلا لطلب غير متكرر الأثر ربما نفذه السكربت قبل انقطاع الاتصال
+					slot.close()
+					if attempt or not reused or (sent and params.get("REQUEST_METHOD") not in IDEMPOTENT_METHODS):
+						raise
+				except BaseException:
+					slot.close() # رد لم يُقرأ كاملاً يفسد الاتصال للطلب التالي
+					raise
+		except BaseException:
+			self._slots.put_nowait(slot)
+			raise
+
+	async def _send(self, slot, params, body):
+		begin = struct.pack("!HB5x", FCGI_RESPONDER, FCGI_KEEP_CONN)
+		slot.writer.write(
+			_record(FCGI_BEGIN_REQUEST, begin)
+			+ _stream_records(FCGI_PARAMS, encode_params(params))
+			+ _stream_records(FCGI_STDIN, body)
+		)
+		await slot.writer.drain()
+
+	async def drain(self, timeout):
+		"""Waits until every slot is back in the queue, i.e. no request is in flight."""
+		if self._slots is None:
+			return
+		deadline = asyncio.get_running_loop().time() + timeout
+		while self._slots.qsize() < len(self.socket_paths) and asyncio.get_running_loop().time() < deadline:
+			await asyncio.sleep(0.05)
+
+	def close(self):
+		if self._slots is not None:
+			while not self._slots.empty():
+				self._slots.get_nowait().close()
+
+
+def parse_cgi_response(output):
+	"""Splits CGI output into (status, headers, body)."""
+	# الرأس ينتهي عند أول سطر فارغ، وقد يكون الجسم نفسه محتوياً على \r\n\r\n
+	crlf, lf = output.find(b"\r\n\r\n"), output.find(b"\n\n")
+	if crlf != -1 and (lf == -1 or crlf < lf):
+		head, body = output[:crlf], output[crlf + 4:]
+	else:
+		head, _, body = output.partition(b"\n\n")
+	status = 200
+	headers = []
+	for line in head.decode("latin-1").splitlines():
+		name, _, value = line.partition(":")
+		value = value.strip()
+		if name.lower() == "status":
+			try:
+				status = int(value.split()[0])
+				HTTPStatus(status)
+			except (IndexError, ValueError):
+				raise ValueError(f"invalid Status header {value!r}")
+		elif name:
+			headers.append((name, value))
+	if not any(name.lower() == "content-type" for name, _ in headers):
+		headers.append(("Content-Type", "text/html; charset=UTF-8"))
+	return status, headers, body
+
+
+class FastCGIGateway(StaticServer):
+	"""Serves a PHP project: .php scripts go to a php-cgi pool, everything else is static.
+
+	Like ``php -S``, a missing path falls back to the root index.php so
+	front-controller apps keep working.
+	"""
+
+	def __init__(self, root, port, socket_paths, host="0.0.0.0", log=None, php_log=None):
+		super().__init__(root, port, host=host, log=log)
+		self.pool = FastCGIPool(socket_paths)
+		self.php_log = php_log or self.log
+
+	def stop(self):
+		if self.loop is not None and self.is_running():
+			self.loop.call_soon_threadsafe(self.pool.close)
+		super().stop()
+
+	def replace_pool(self, socket_paths, timeout=DRAIN_TIMEOUT):
+		"""Sends new requests to another php-cgi pool and waits for the old one to go idle.
+
+		Called from outside the event loop thread (used for reloads).
+		"""
+		async def swap():
+			old, self.pool = self.pool, FastCGIPool(socket_paths)
+			await old.drain(timeout)
+			old.close()
+
+		asyncio.run_coroutine_threadsafe(swap(), self.loop).result(timeout + 5)
+
+	async def _read_body(self, reader, request):
+		# php-cgi يقرأ الجسم من FCGI_STDIN بطول معلن، لذلك نجمعه أولاً
+		return await read_body(reader, request)
+
+	async def _respond(self, writer, request, keep_alive):
+		script, path_info = self._resolve_script(request.path)
+		if script is None:
+			return await super()._respond(writer, request, keep_alive)
+
+		params = self._cgi_params(request, writer, script, path_info, request.body)
+		try:
+			response = await self.pool.request(params, request.body)
+		except (OSError, asyncio.IncompleteReadError) as e:
+			self.php_log(f"FastCGI error: {e}")
+			return await self._send_error(writer, request, 502, keep_alive)
+		except ValueError as e:
+			self.php_log(f"Malformed php-cgi response: {e}")
+			return await self._send_error(writer, request, 502, keep_alive)
+
+		try:
+			return await self._relay(writer, request, response, keep_alive)
+		except BaseException:
+			response.discard()
+			raise
+		finally:
+			for line in b"".join(response.stderr).decode("utf-8", "replace").splitlines():
+				if line.strip():
+					self.php_log(line)
+
+	async def _relay(self, writer, request, response, keep_alive):
+		"""Sends php-cgi's response to the client as its FCGI_STDOUT records arrive.
+
+		Output that was complete with its head gets a Content-Length; longer
+		output keeps PHP's own Content-Length or is sent chunked (closed after
+		the body for HTTP/1.0 clients).
+		"""
+		try:
+			status, headers, content = parse_cgi_response(response.head)
+		except ValueError as e:
+			self.php_log(f"Malformed php-cgi response: {e}")
+			response.discard()
+			return await self._send_error(writer, request, 502, keep_alive)
+		headers = [(n, v) for n, v in headers if n.lower() not in ("connection", "transfer-encoding")]
+		length = next((v for n, v in headers if n.lower() == "content-length"), None)
+		send_body = request.method != "HEAD" and status not in (204, 304)
+
+		if response.complete:
+			headers = [(n, v) for n, v in headers if n.lower() != "content-length"]
+			headers.append(("Content-Length", str(len(content))))
+			writer.write(response_head(status, self._base_headers(keep_alive, request) + headers))
+			if request.method != "HEAD":
+				writer.write(content)
+			await writer.drain()
+			response.release()
+			return status, len(content)
+
+		chunked = False
+		if length is not None and length.isdigit():
+			length = int(length)
+		else:
+			length = None
+			headers = [(n, v) for n, v in headers if n.lower() != "content-length"]
+			if send_body and request.version == "HTTP/1.1":
+				headers.append(("Transfer-Encoding", "chunked"))
+				chunked = True
+			elif send_body:
+				keep_alive = False
+		writer.write(response_head(status, self._base_headers(keep_alive, request) + headers))
+
+		size = 0
+		pending = [content] if content else []
+		async for data in chain_chunks(pending, response.iter_body()):
+			if not send_body:
+				continue # نقرأ بقية المخرجات لتحرير عملية php-cgi فقط
+			if length is not None:
+				# لا نرسل أكثر مما أعلنه PHP حتى لا يفسد الاتصال
+				data = data[:length - size]
+				if not data:
+					continue
+			size += len(data)
+			writer.write(b"%x\r\n%s\r\n" % (len(data), data) if chunked else data)
+			await writer.drain()
+		if chunked:
+			writer.write(b"0\r\n\r\n")
+		await writer.drain()
+		response.release()
+		if not keep_alive or (send_body and length is not None and size != length):
+			# جسم ينتهي بإغلاق الاتصال، أو أقصر مما أعلنه PHP
+			writer.close()
+		return status, size
+
+	def _resolve_script(self, url_path):
+		"""Returns (script file, PATH_INFO) for PHP requests, or (None, None) for static ones."""
+		if "\0" in url_path:
+			return None, None # يصل إلى translate_path الذي يرفضه أيضاً
+		parts = [p for p in url_path.split("/") if p and p not in (".", "..")]
+		# أول جزء من المسار ينتهي بـ .php هو السكربت، والباقي PATH_INFO
+		for i, part in enumerate(parts):
+			if part.endswith(".php"):
+				candidate = os.path.realpath(os.path.join(self.root, *parts[:i + 1]))
+				if candidate.startswith(self.root + os.sep) and os.path.isfile(candidate):
+					return candidate, "/" + "/".join(parts[i + 1:]) if parts[i + 1:] else ""
+				break
+		fs_path = os.path.join(self.root, *parts)
+		if os.path.isdir(fs_path):
+			index = os.path.join(fs_path, "index.php")
+			if os.path.isfile(index) and url_path.endswith("/"):
+				return index, ""
+			return None, None
+		if os.path.exists(fs_path):
+			return None, None
+		index = os.path.join(self.root, "index.php")
+		if os.path.isfile(index):
+			return index, ""
+		return None, None
+
+	def _cgi_params(self, request, writer, script, path_info, body):
+		peer = writer.get_extra_info("peername") or ("", 0)
+		local = writer.get_extra_info("sockname") or ("", self.port)
+		script_name = "/" + os.path.relpath(script, self.root).replace(os.sep, "/")
+		params = {
+			"GATEWAY_INTERFACE": "CGI/1.1",
+			"SERVER_SOFTWARE": SERVER_NAME,
+			"SERVER_PROTOCOL": request.version,
+			"SERVER_NAME": request.headers.get("host", "localhost").split(":")[0],
+			"SERVER_ADDR": local[0],
+			"SERVER_PORT": str(local[1]),
+			"REMOTE_ADDR": peer[0],
+			"REMOTE_PORT": str(peer[1]),
+			"REQUEST_METHOD": request.method,
+			"REQUEST_URI": request.target,
+			"DOCUMENT_URI": request.path,
+			"DOCUMENT_ROOT": self.root,
+			"SCRIPT_FILENAME": script,
+			"SCRIPT_NAME": script_name,
+			"PHP_SELF": script_name + path_info,
+			"PATH_INFO": path_info,
+			"QUERY_STRING": request.query,
+			"CONTENT_LENGTH": str(len(body)),
+			"CONTENT_TYPE": request.headers.get("content-type", ""),
+			# مطلوب عندما يكون cgi.force_redirect مفعلاً في php-cgi
+			"REDIRECT_STATUS": "200",
+		}
+		for name, value in request.headers.items():
+			if name in ("content-type", "content-length"):
+				continue
+			params["HTTP_" + name.upper().replace("-", "_")] = value
+		return params
+
+
+def start_php_cgi_pool(doc_root, workers, binary="php-cgi"):
+	"""Starts ``workers`` php-cgi processes on private Unix sockets.
+
+	Returns (processes, socket paths, socket directory). Raises
+	FileNotFoundError if php-cgi is not installed.
+	"""
+	if shutil.which(binary) is None:
+		raise FileNotFoundError(binary)
+	socket_dir = tempfile.mkdtemp(prefix="hel-php-cgi-")
+	processes, paths = [], []
+	for index in range(max(1, workers)):
+		path = os.path.join(socket_dir, f"php-{index}.sock")
+		processes.append(spawn_php_cgi(doc_root, path, binary))
+		paths.append(path)
+	return processes, paths, socket_dir
+
+
+def spawn_php_cgi(doc_root, path, binary="php-cgi"):
+	"""Starts one php-cgi process on the Unix socket ``path`` (also used to replace a dead worker)."""
+	try:
+		os.unlink(path) # مقبس متبقٍ من عملية انتهت يمنع الربط
+	except FileNotFoundError:
+		pass
+	env = os.environ.copy()
+	# كل عملية تخدم اتصالاً واحداً في كل مرة، والمدير هو من يوزع الطلبات
+	env["PHP_FCGI_CHILDREN"] = "0"
+	env["PHP_FCGI_MAX_REQUESTS"] = "0"
+	process = subprocess.Popen(
+		[binary, "-b", path],
+		cwd=doc_root,
+		stdout=subprocess.PIPE,
+		stderr=subprocess.PIPE,
+		env=env
+	)
+	process.socket_path = path
+	return process
+
+
+def wait_for_sockets(processes, paths, timeout=10):
+	"""Waits until every php-cgi socket exists; returns an error string or None."""
+	deadline = time.monotonic() + timeout
+	delay = 0.005
+	while True:
+		for process in processes:
+			if process.poll() is not None:
+				return f"php-cgi exited with code {process.returncode}"
+		if all(os.path.exists(path) for path in paths):
+			return None
+		if time.monotonic() >= deadline:
+			return "timed out waiting for php-cgi sockets"
+		time.sleep(delay)
+		delay = min(delay * 2, 0.25)
@@ -0,0 +1,126 @@
+# server_manager/file_cache.py
+import hashlib
+import os
+from collections import OrderedDict
+
+from .config import STATIC_CACHE_MAX_BYTES, STATIC_CACHE_MAX_FILE_BYTES, STATIC_CACHE_MAX_ENTRIES
+from .http_util import http_date, parse_http_date
+
+
+class CachedFile:
+	"""Metadata (and, for small files, the contents) of one served file."""
+	__slots__ = ("path", "size", "mtime", "mtime_ns", "ino", "content_type", "etag", "last_modified", "body")
+
+	def __init__(self, path, st, content_type, body=None):
+		self.path = path
+		self.size = st.st_size
+		self.mtime = st.st_mtime
+		self.mtime_ns = st.st_mtime_ns
+		self.ino = st.st_ino
+		self.content_type = content_type
+		self.body = body
+		self.last_modified = http_date(st.st_mtime)
+		if body is not None:
+			# ETag قوي مبني على المحتوى نفسه
+			self.etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+		else:
+			# للملفات الكبيرة نتجنب قراءة الملف كاملاً لحساب البصمة
+			self.etag = f'"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+	def matches(self, st):
+		"""Returns True if a fresh stat result still describes this entry."""
+		return st.st_mtime_ns == self.mtime_ns and st.st_size == self.size and st.st_ino == self.ino
+
+	def not_modified(self, headers, etag=None):
+		"""Evaluates If-None-Match / If-Modified-Since against this entry (or the given variant ETag)."""
+		if etag is None:
+			etag = self.etag
+		if_none_match = headers.get("if-none-match")
+		if if_none_match is not None:
+			if if_none_match.strip() == "*":
+				return True
+			# المقارنة الضعيفة مسموحة لطلبات GET/HEAD (RFC 7232)
+			tags = [tag.strip() for tag in if_none_match.split(",")]
+			return any(tag.removeprefix("W/") == etag for tag in tags)
+		if_modified_since = headers.get("if-modified-since")
+		if if_modified_since is not None:
+			since = parse_http_date(if_modified_since)
+			return since is not None and int(self.mtime) <= since
+		return False
+
+
+class FileCache:
+	"""Size- and count-bounded LRU of resolved URL paths to CachedFile entries.
+
+	Small files keep their contents in memory; larger ones keep only metadata
+	and are still streamed with sendfile. When ``watcher`` is set (an inotify
+	watcher invalidates entries), hits on files in a watched directory skip
+	the stat call entirely; everything else is still checked with stat.
+	"""
+
+	def __init__(self, max_bytes=STATIC_CACHE_MAX_BYTES, max_file_bytes=STATIC_CACHE_MAX_FILE_BYTES,
+			max_entries=STATIC_CACHE_MAX_ENTRIES):
+		self.max_bytes = max_bytes
+		self.max_entries = max_entries
+		self.max_file_bytes = max_file_bytes
+		self.watcher = None
+		self._entries = OrderedDict() # url path -> CachedFile
+		self._bytes = 0
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, url_path):
+		entry = self._entries.get(url_path)
+		if entry is None:
+			self.misses += 1
+			return None
+		if self.watcher is None or not self.watcher.watches(os.path.dirname(entry.path)):
+			try:
+				st = os.stat(entry.path)
+			except OSError:
+				st = None
+			if st is None or not entry.matches(st):
+				self._remove(url_path)
+				self.misses += 1
+				return None
+		self._entries.move_to_end(url_path)
+		self.hits += 1
+		return entry
+
+	def load(self, url_path, fs_path, content_type):
+		"""Reads fs_path, stores it under url_path and returns the entry."""
+		with open(fs_path, "rb") as f:
+			st = os.fstat(f.fileno())
+			body = None
+			if st.st_size <= self.max_file_bytes:
+				body = f.read()
+		entry = CachedFile(fs_path, st, content_type, body)
+		self._remove(url_path)
+		self._entries[url_path] = entry
+		if body is not None:
+			self._bytes += len(body)
+		while (self._bytes > self.max_bytes or len(self._entries) > self.max_entries) and self._entries:
+			self._remove(next(iter(self._entries)))
+		return entry
+
+	def _remove(self, url_path):
+		entry = self._entries.pop(url_path, None)
+		if entry is not None and entry.body is not None:
+			self._bytes -= len(entry.body)
+
+	def invalidate(self, fs_path):
+		"""Drops entries for fs_path, anything below it, and index lookups in its directory."""
+		prefix = fs_path.rstrip(os.sep) + os.sep
+		parent = os.path.dirname(fs_path)
+		# عناوين المجلدات (المنتهية بـ /) قد تشير الآن إلى ملف index مختلف
+		stale = [
+			url for url, entry in self._entries.items()
+			if entry.path == fs_path or entry.path.startswith(prefix)
+			or (url.endswith("/") and os.path.dirname(entry.path) == parent)
+		]
+		for url in stale:
+			self._remove(url)
+
+	def clear(self):
+		self._entries.clear()
+		self._bytes = 0
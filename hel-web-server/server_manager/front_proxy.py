@@ -0,0 +1,684 @@
+# server_manager/front_proxy.py
+import asyncio
+import html
+import socket
+import threading
+import time
+from collections import deque
+from urllib.parse import quote
+
+from .http_util import (
+	BadRequest, PayloadTooLarge, Request, SERVER_NAME, MAX_BODY_BYTES, read_request, read_body, iter_body,
+	chain_chunks, http_date, response_head, access_log_line, connection_headers
+)
+from .http_cache import CachedResponse, parse_cache_control, storable
+
+KEEPALIVE_TIMEOUT = 15
+UPSTREAM_TIMEOUT = 60
+MAX_IDLE_PER_BACKEND = 32
+STREAM_LIMIT = 64 * 1024
+COPY_CHUNK = 64 * 1024
+# أجسام الطلبات حتى هذا الحجم تُقرأ كاملة قبل التمرير (يمكن إعادة إرسالها)، والأكبر تُبث إلى الخادم الخلفي
+BUFFERED_BODY_BYTES = 64 * 1024
+
+# ترويسات خاصة بالاتصال الواحد ولا يجب تمريرها (RFC 7230 القسم 6.1)
+HOP_BY_HOP = {
+	"connection", "keep-alive", "proxy-connection", "proxy-authenticate",
+	"proxy-authorization", "te", "trailer", "transfer-encoding", "upgrade",
+}
+# شروط العميل تُقيَّم مقابل النسخة المخزنة، ولا تُرسل إلى الخادم الخلفي عند ملء الذاكرة
+CONDITIONAL_HEADERS = {"if-none-match", "if-modified-since", "if-match", "if-unmodified-since", "if-range"}
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS", "TRACE"}
+# طرق يمكن إعادة إرسالها دون أثر إضافي (RFC 9110 القسم 9.2.2)
+IDEMPOTENT_METHODS = SAFE_METHODS | {"PUT", "DELETE"}
+# محارف تبقى كما هي عند إعادة ترميز المسار بعد حذف البادئة (RFC 3986 القسم 3.3)
+PATH_SAFE = "/:@!$&'()*+,;=~"
+
+
+class Route:
+	"""Maps a Host name and/or path prefix to a backend address, optionally through an HttpCache."""
+	__slots__ = ("name", "upstream", "hosts", "prefix", "strip_prefix", "cache")
+
+	def __init__(self, name, upstream, hosts=(), prefix=None, strip_prefix=False, cache=None):
+		self.name = name
+		self.upstream = upstream # (host, port)
+		self.hosts = {h.lower() for h in hosts}
+		self.prefix = prefix.rstrip("/") if prefix else None
+		self.strip_prefix = strip_prefix
+		self.cache = cache
+
+	def matches_prefix(self, path):
+		return self.prefix is not None and (path == self.prefix or path.startswith(self.prefix + "/"))
+
+
+class RequestBody:
+	"""A client's request body that is read from its connection only while it is sent upstream."""
+	__slots__ = ("chunked", "length", "started", "finished", "_chunks")
+
+	def __init__(self, reader, request):
+		self.chunked = request.chunked
+		self.length = None if self.chunked else request.content_length
+		self.started = False # بدأت القراءة من العميل، فلا يمكن إعادة الإرسال
+		self.finished = False
+		self._chunks = iter_body(reader, request)
+
+	async def chunks(self):
+		self.started = True
+		async for data in self._chunks:
+			yield data
+		self.finished = True
+
+	async def send(self, writer):
+		"""Copies the body to an upstream connection, re-chunked if the client sent it chunked."""
+		async for data in self.chunks():
+			writer.write(b"%x\r\n%s\r\n" % (len(data), data) if self.chunked else data)
+			await writer.drain()
+		if self.chunked:
+			writer.write(b"0\r\n\r\n")
+
+	async def discard(self):
+		async for _ in self.chunks():
+			pass
+
+
+async def request_body(reader, request):
+	"""Returns the body to forward: bytes for small bodies, a RequestBody stream for large or chunked ones.
+
+	Raises PayloadTooLarge at once when Content-Length is above MAX_BODY_BYTES;
+	a chunked body raises it while it is streamed.
+	"""
+	if not request.has_body:
+		return b""
+	if not request.chunked:
+		if request.content_length > MAX_BODY_BYTES:
+			raise PayloadTooLarge(f"request body larger than {MAX_BODY_BYTES} bytes")
+		if request.content_length <= BUFFERED_BODY_BYTES:
+			return await read_body(reader, request)
+	return RequestBody(reader, request)
+
+
+class UpstreamResponse:
+	"""Status, headers and a body reader for one upstream response."""
+	__slots__ = ("status", "headers", "length", "chunked", "reusable", "_reader")
+
+	def __init__(self, status, headers, length, chunked, reusable, reader):
+		self.status = status
+		self.headers = headers
+		self.length = length # None: يُقرأ حتى نهاية الاتصال
+		self.chunked = chunked
+		self.reusable = reusable
+		self._reader = reader
+
+	def header(self, name):
+		name = name.lower()
+		for key, value in self.headers:
+			if key.lower() == name:
+				return value
+		return None
+
+	async def iter_body(self):
+		"""Yields the decoded body in chunks."""
+		reader = self._reader
+		if self.chunked:
+			while True:
+				size = int((await reader.readuntil(b"\r\n")).split(b";", 1)[0].strip(), 16)
+				if size == 0:
+					while (await reader.readuntil(b"\r\n")) != b"\r\n":
+						pass
+					return
+				yield await reader.readexactly(size)
+				await reader.readexactly(2)
+		elif self.length is not None:
+			remaining = self.length
+			while remaining:
+				data = await reader.read(min(remaining, COPY_CHUNK))
+				if not data:
+					raise asyncio.IncompleteReadError(b"", remaining)
+				remaining -= len(data)
+				yield data
+		else:
+			while True:
+				data = await reader.read(COPY_CHUNK)
+				if not data:
+					return
+				yield data
+
+	async def read_all(self):
+		return b"".join([chunk async for chunk in self.iter_body()])
+
+
+async def read_response_head(reader, method):
+	"""Reads an HTTP/1.x response head (skipping 1xx) and works out how its body is framed."""
+	while True:
+		head = await reader.readuntil(b"\r\n\r\n")
+		lines = head.decode("latin-1").split("\r\n")
+		parts = lines[0].split(" ", 2)
+		if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+			raise ValueError("malformed response from backend")
+		status = int(parts[1])
+		if 100 <= status < 200 and status != 101:
+			# ردود 1xx المؤقتة لا تُمرر
+			continue
+		headers = []
+		for line in lines[1:]:
+			if line:
+				name, _, value = line.partition(":")
+				headers.append((name.strip(), value.strip()))
+		break
+
+	lowered = {name.lower(): value for name, value in headers}
+	connection = lowered.get("connection", "").lower()
+	reusable = parts[0] == "HTTP/1.1" and "close" not in connection
+	chunked = "chunked" in lowered.get("transfer-encoding", "").lower()
+	length = None
+	if method == "HEAD" or status in (204, 304):
+		length = 0
+	elif not chunked and "content-length" in lowered:
+		length = int(lowered["content-length"])
+	elif not chunked:
+		reusable = False
+	return UpstreamResponse(status, headers, length, chunked, reusable, reader)
+
+
+class UpstreamPool:
+	"""Idle keep-alive connections to one backend, reused across requests."""
+
+	def __init__(self, address, max_idle=MAX_IDLE_PER_BACKEND):
+		self.address = address
+		self.max_idle = max_idle
+		self._idle = deque()
+		self.opened = 0
+		self.reused = 0
+
+	async def acquire(self, fresh=False):
+		"""Returns (reader, writer, reused); ``fresh`` skips the idle connections."""
+		while self._idle and not fresh:
+			reader, writer = self._idle.pop()
+			if not writer.is_closing() and not reader.at_eof():
+				self.reused += 1
+				return reader, writer, True
+			writer.close()
+		reader, writer = await asyncio.open_connection(*self.address, limit=STREAM_LIMIT)
+		sock = writer.get_extra_info("socket")
+		if sock is not None:
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		self.opened += 1
+		return reader, writer, False
+
+	def release(self, reader, writer):
+		if len(self._idle) < self.max_idle and not writer.is_closing():
+			self._idle.append((reader, writer))
+		else:
+			writer.close()
+
+	def close(self):
+		while self._idle:
+			self._idle.pop()[1].close()
+
+
+class FrontProxy:
+	"""Single-port HTTP front listener routing by Host header or path prefix.
+
+	Each backend has a pool of persistent upstream connections, so proxied
+	requests do not pay a TCP connect to runserver/flask/php each time.
+	GET/HEAD requests to a route with a ``cache`` are answered from it when
+	the stored response is fresh; concurrent misses of one URL share a
+	single upstream fetch.
+	"""
+
+	def __init__(self, port, routes, host="0.0.0.0", log=None):
+		self.port = port
+		self.host = host
+		self.routes = list(routes)
+		self.log = log or (lambda message: None)
+		# اختياري: on_request(route name, method, path, status, size, seconds) لكل طلب
+		self.on_request = None
+		self.pools = {}
+		self.loop = None
+		self._server = None
+		self._thread = None
+		self._connections = {}
+
+	# ------------------------------------------------------------------
+	# Lifecycle (نفس أسلوب StaticServer: حلقة asyncio خاصة في خيط مستقل)
+	# ------------------------------------------------------------------
+
+	def start(self):
+		sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		try:
+			sock.bind((self.host, self.port))
+			sock.listen(socket.SOMAXCONN)
+		except OSError:
+			sock.close()
+			raise
+		sock.setblocking(False)
+		self.loop = asyncio.new_event_loop()
+		started = threading.Event()
+		self._thread = threading.Thread(target=self._run, args=(sock, started), name="front-proxy", daemon=True)
+		self._thread.start()
+		started.wait()
+
+	def _run(self, sock, started):
+		asyncio.set_event_loop(self.loop)
+		self._server = self.loop.run_until_complete(
+			asyncio.start_server(self._handle_connection, sock=sock, limit=STREAM_LIMIT)
+		)
+		started.set()
+		try:
+			self.loop.run_forever()
+		finally:
+			self.loop.close()
+
+	def is_running(self):
+		return self._thread is not None and self._thread.is_alive()
+
+	def stop(self):
+		if not self.is_running():
+			return
+
+		async def shutdown():
+			self._server.close()
+			tasks = list(self._connections.items())
+			for task, writer in tasks:
+				writer.transport.abort()
+			await asyncio.gather(*(task for task, _ in tasks), return_exceptions=True)
+			self.close_pools()
+			await self._server.wait_closed()
+			self.loop.stop()
+
+		asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+		self._thread.join(timeout=5)
+		self._thread = None
+
+	# ------------------------------------------------------------------
+	# Routing
+	# ------------------------------------------------------------------
+
+	def match(self, request):
+		"""Picks the route for a request: Host first, then the longest path prefix, then the default.
+
+		Returns (route, matched by prefix), or (None, False).
+		"""
+		host = request.headers.get("host", "").rsplit(":", 1)[0].lower()
+		for route in self.routes:
+			if host in route.hosts:
+				return route, False
+		best = None
+		for route in self.routes:
+			if route.matches_prefix(request.path) and (best is None or len(route.prefix) > len(best.prefix)):
+				best = route
+		if best is not None:
+			return best, True
+		for route in self.routes:
+			if not route.hosts and route.prefix is None:
+				return route, False
+		return None, False
+
+	def close_pools(self):
+		"""Closes the idle upstream connections (on the proxy's loop)."""
+		for pool in self.pools.values():
+			pool.close()
+
+	def _pool(self, route):
+		pool = self.pools.get(route.upstream)
+		if pool is None:
+			pool = self.pools[route.upstream] = UpstreamPool(route.upstream)
+		return pool
+
+	# ------------------------------------------------------------------
+	# Proxying
+	# ------------------------------------------------------------------
+
+	async def _handle_connection(self, reader, writer):
+		task = asyncio.current_task()
+		self._connections[task] = writer
+		sock = writer.get_extra_info("socket")
+		if sock is not None:
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		peer = writer.get_extra_info("peername") or ("-", 0)
+		try:
+			while True:
+				try:
+					request = await asyncio.wait_for(read_request(reader), KEEPALIVE_TIMEOUT)
+				except asyncio.TimeoutError:
+					break
+				except BadRequest:
+					await self._send_error(writer, 400, False)
+					break
+				if request is None:
+					break
+				try:
+					request.body = await request_body(reader, request)
+				except PayloadTooLarge:
+					status, size = await self._send_error(writer, 413, False)
+					self.log(access_log_line(peer[0], f"{request.method} {request.target} {request.version}", status, size))
+					break
+				keep_alive = await self.handle(request, writer, peer)
+				if not keep_alive:
+					break
+		except (OSError, asyncio.IncompleteReadError, BadRequest):
+			pass
+		finally:
+			self._connections.pop(task, None)
+			writer.close()
+
+	async def handle(self, request, writer, peer):
+		"""Proxies one request; returns whether the client connection stays open."""
+		keep_alive = request.keep_alive
+		started = self.loop.time()
+		route, by_prefix = self.match(request)
+		if route is None:
+			status, size = await self._send_error(writer, 502, keep_alive, "No backend matches this request")
+			self.log(access_log_line(peer[0], f"{request.method} {request.target} {request.version}", status, size))
+			return await self.finish_body(request, keep_alive)
+
+		status, size, keep_alive, outcome = await self.forward(route, request, writer, peer, by_prefix, keep_alive)
+		keep_alive = await self.finish_body(request, keep_alive)
+		suffix = f" -> {route.name}" + (f" ({outcome})" if outcome else "")
+		self.log(access_log_line(peer[0], f"{request.method} {request.target} {request.version}", status, size) + suffix)
+		if self.on_request is not None:
+			self.on_request(route.name, request.method, request.path, status, size, self.loop.time() - started)
+		return keep_alive
+
+	async def forward(self, route, request, writer, peer, by_prefix, keep_alive):
+		"""Answers one request through ``route`` (cache or backend); returns (status, size, keep_alive, cache outcome)."""
+		cached, body, outcome = None, None, None
+		try:
+			if route.cache is not None and request.method in ("GET", "HEAD") and "range" not in request.headers:
+				cached, response, body, outcome = await asyncio.wait_for(
+					self.fetch_cached(route, request, peer, by_prefix), UPSTREAM_TIMEOUT
+				)
+			else:
+				# بث جسم الطلب يسير بسرعة العميل، فالمهلة تشمل الاتصال وانتظار الرد فقط
+				response = await self.fetch(route, request, peer, by_prefix, UPSTREAM_TIMEOUT)
+		except asyncio.TimeoutError:
+			status, size = await self._send_error(writer, 504, keep_alive)
+		except PayloadTooLarge:
+			# جسم مقطع تجاوز الحد أثناء البث: بقيته ما زالت في الاتصال
+			keep_alive = False
+			status, size = await self._send_error(writer, 413, keep_alive)
+		except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+			status, size = await self._send_error(writer, 502, keep_alive, f"Backend '{route.name}' unavailable: {e}")
+		else:
+			if cached is not None:
+				status, size = await self.send_cached(cached, request, writer, keep_alive, outcome)
+			else:
+				status = response.status
+				size, keep_alive = await self.relay(response, request, writer, keep_alive, body)
+				if route.cache is not None and request.method not in SAFE_METHODS and status < 400:
+					# طلب يغير المورد يُبطل النسخ المخزنة لعنوانه (RFC 9111 القسم 4.4)
+					route.cache.invalidate(self.loop, route.cache.primary_key(request))
+		return status, size, keep_alive, outcome
+
+	async def finish_body(self, request, keep_alive):
+		"""Reads what is left of a streamed client body so the connection can take another request.
+
+		Returns whether the client connection can stay open.
+		"""
+		body = request.body
+		if not isinstance(body, RequestBody) or body.finished:
+			return keep_alive
+		if body.started or not keep_alive:
+			# البث توقف في منتصفه: لا نعرف أين يبدأ الطلب التالي
+			return False
+		await body.discard()
+		return keep_alive
+
+	def _upstream_head(self, route, request, peer, by_prefix):
+		target = request.target
+		if by_prefix and route.strip_prefix:
+			# البادئة تُطابق المسار بعد فك الترميز، لذلك نحذفها منه ثم نعيد الترميز
+			path = request.path[len(route.prefix):]
+			if not path.startswith("/"):
+				path = "/" + path
+			target = quote(path, safe=PATH_SAFE)
+			if "?" in request.target:
+				target += "?" + request.query
+		lines = [f"{request.method} {target} HTTP/1.1"]
+		forwarded_for = peer[0]
+		for name, value in request.raw_headers:
+			key = name.lower()
+			if key in HOP_BY_HOP or key == "content-length":
+				continue
+			if key == "x-forwarded-for":
+				forwarded_for = f"{value}, {peer[0]}"
+				continue
+			lines.append(f"{name}: {value}")
+		lines.append(f"X-Forwarded-For: {forwarded_for}")
+		lines.append("X-Forwarded-Proto: http")
+		if isinstance(request.body, RequestBody):
+			if request.body.chunked:
+				lines.append("Transfer-Encoding: chunked")
+			else:
+				lines.append(f"Content-Length: {request.body.length}")
+		elif request.body or request.method in ("POST", "PUT", "PATCH"):
+			lines.append(f"Content-Length: {len(request.body)}")
+		lines.append("Connection: keep-alive")
+		return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+	async def fetch(self, route, request, peer, by_prefix=False, timeout=None):
+		"""Sends the request upstream over a pooled connection and reads the response head.
+
+		``timeout`` limits connecting and waiting for the head, not sending the body.
+		"""
+		pool = self._pool(route)
+		body = request.body
+		streamed = isinstance(body, RequestBody)
+		payload = self._upstream_head(route, request, peer, by_prefix)
+		if not streamed:
+			payload += body
+		for attempt in range(2):
+			# جسم يُبث لا يمكن إعادة إرساله، لذلك لا نخاطر باتصال خامل ربما أغلقه الخادم الخلفي
+			reader, writer, reused = await asyncio.wait_for(pool.acquire(fresh=streamed), timeout)
+			sent = False
+			try:
+				writer.write(payload)
+				if streamed:
+					await body.send(writer)
+				await writer.drain()
+				sent = True
+				response = await asyncio.wait_for(read_response_head(reader, request.method), timeout)
+			except asyncio.TimeoutError:
+				writer.close()
+				raise
+			except (OSError, asyncio.IncompleteReadError, ValueError):
+				writer.close()
+				# اتصال محفوظ ربما أغلقه الخادم الخلفي أثناء الخمول: نعيد المحاولة باتصال جديد،
+				# إلا لطلب غير متكرر الأثر ربما نفذه الخادم الخلفي قبل انقطاع الاتصال
+				if reused and attempt == 0 and (not sent or request.method in IDEMPOTENT_METHODS):
+					continue
+				raise
+			except BaseException:
+				# إلغاء (انتهاء مهلة الخادم الخلفي): الاتصال في منتصف رد ولا يصلح لإعادة الاستخدام
+				writer.close()
+				raise
+			return _PooledResponse(response, pool, reader, writer)
+
+	async def fetch_cached(self, route, request, peer, by_prefix=False):
+		"""Looks a GET/HEAD request up in route.cache, filling the cache on a miss.
+
+		Returns (CachedResponse, None, None, outcome) when the answer comes
+		from the cache, or (None, pooled response, body iterator or None,
+		outcome) when the response must be relayed as it arrives.
+		"""
+		cache = route.cache
+		primary = cache.primary_key(request)
+		directives = parse_cache_control(request.headers.get("cache-control"))
+		if "no-store" in directives:
+			return None, await self.fetch(route, request, peer, by_prefix), None, "BYPASS"
+		# إعادة التحميل القسرية من المتصفح تتجاوز النسخة المخزنة لكنها تحدّثها
+		reload = "no-cache" in directives or directives.get("max-age") == "0" or "no-cache" in request.headers.get("pragma", "")
+		key = cache.key(primary, request)
+		entry = None if reload else await cache.get(self.loop, key)
+		if entry is not None and entry.is_fresh():
+			cache.hits += 1
+			return entry, None, None, "HIT"
+
+		pending = cache.pending.get(key)
+		if pending is not None and not reload:
+			# جلب مماثل جارٍ: ننتظر نتيجته بدلاً من إرسال طلب آخر إلى الخادم الخلفي
+			shared = await asyncio.shield(pending)
+			if shared is not None and shared[0] == cache.key(primary, request):
+				cache.collapsed += 1
+				return shared[1], None, None, "HIT"
+		if request.method != "GET":
+			# HEAD لا يحمل جسماً يمكن تخزينه
+			cache.misses += 1
+			return None, await self.fetch(route, request, peer, by_prefix), None, "MISS"
+
+		future = self.loop.create_future()
+		cache.pending[key] = future
+		shared = None
+		try:
+			result = await self._fill(route, request, peer, by_prefix, primary, entry)
+			if result[0] is not None and result[4] is not None:
+				shared = (result[4], result[0])
+			return result[:4]
+		finally:
+			if cache.pending.get(key) is future:
+				del cache.pending[key]
+			future.set_result(shared)
+
+	async def _fill(self, route, request, peer, by_prefix, primary, stale):
+		"""Fetches a GET for the cache (revalidating ``stale`` if it has validators).
+
+		Returns fetch_cached()'s tuple plus the variant key the response was
+		stored under (None when it was not stored).
+		"""
+		cache = route.cache
+		headers = [(n, v) for n, v in request.raw_headers if n.lower() not in CONDITIONAL_HEADERS]
+		if stale is not None:
+			headers += stale.validators()
+		upstream = Request("GET", request.target, request.version, headers)
+		pooled = await self.fetch(route, upstream, peer, by_prefix)
+		response = pooled.response
+
+		if stale is not None and response.status == 304:
+			try:
+				await response.read_all()
+			except BaseException:
+				pooled.discard()
+				raise
+			pooled.done()
+			# النسخة المخزنة ما زالت صالحة: نحدّث ترويساتها ووقت تخزينها فقط
+			merged = {n.lower(): (n, v) for n, v in stale.headers}
+			merged.update({n.lower(): (n, v) for n, v in response.headers})
+			stale.stored_at = time.time()
+			stale.update_headers(list(merged.values()))
+			cache.revalidated += 1
+			return stale, None, None, "REVALIDATED", cache.store(self.loop, primary, request, stale)
+
+		cache.misses += 1
+		lowered = {n.lower(): v for n, v in response.headers}
+		directives = parse_cache_control(lowered.get("cache-control"))
+		if not storable(request, response.status, lowered, directives) or (
+			response.length is not None and response.length > cache.max_object_bytes
+		):
+			return None, pooled, None, "MISS", None
+
+		chunks, size = [], 0
+		body = response.iter_body()
+		try:
+			async for chunk in body:
+				chunks.append(chunk)
+				size += len(chunk)
+				if size > cache.max_object_bytes:
+					# أكبر من أن يُخزن: نكمل البث للعميل بما قرأناه ثم الباقي
+					return None, pooled, chain_chunks(chunks, body), "MISS", None
+		except BaseException:
+			pooled.discard()
+			raise
+		pooled.done()
+		vary = [name.strip().lower() for name in lowered.get("vary", "").split(",") if name.strip()]
+		entry = CachedResponse(response.status, response.headers, b"".join(chunks), vary=vary)
+		return entry, None, None, "MISS", cache.store(self.loop, primary, request, entry)
+
+	async def send_cached(self, entry, request, writer, keep_alive, outcome):
+		"""Writes a stored response (or a 304 for a matching conditional request); returns (status, size)."""
+		headers = [(n, v) for n, v in entry.headers if n.lower() != "content-length"]
+		headers.append(("Age", str(int(entry.age()))))
+		headers.append(("X-Cache", outcome))
+		if entry.not_modified(request.headers):
+			status, body = 304, b""
+		else:
+			status, body = entry.status, entry.body
+			headers.append(("Content-Length", str(len(body))))
+		headers += connection_headers(request, keep_alive)
+		writer.write(response_head(status, headers) + (body if request.method != "HEAD" else b""))
+		await writer.drain()
+		return status, len(body)
+
+	async def relay(self, pooled, request, writer, keep_alive, body=None):
+		"""Streams an upstream response to the client; returns (body size, keep_alive).
+
+		``body`` replaces the response's own body iterator when part of it
+		was already read.
+		"""
+		response = pooled.response
+		headers = [(n, v) for n, v in response.headers if n.lower() not in HOP_BY_HOP]
+		chunked_out = False
+		if response.length is not None:
+			if not any(n.lower() == "content-length" for n, _ in headers) and response.length:
+				headers.append(("Content-Length", str(response.length)))
+		elif request.version == "HTTP/1.1":
+			headers.append(("Transfer-Encoding", "chunked"))
+			chunked_out = True
+		else:
+			keep_alive = False
+		headers += connection_headers(request, keep_alive)
+
+		size = 0
+		try:
+			writer.write(response_head(response.status, headers))
+			async for chunk in body or response.iter_body():
+				size += len(chunk)
+				writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked_out else chunk)
+				await writer.drain()
+			if chunked_out:
+				writer.write(b"0\r\n\r\n")
+			await writer.drain()
+		except BaseException:
+			pooled.discard()
+			raise
+		pooled.done()
+		return size, keep_alive
+
+	async def _send_error(self, writer, status, keep_alive, message=""):
+		body = f"<html><body><h1>Error {status}</h1><p>{html.escape(message)}</p></body></html>".encode()
+		headers = [
+			("Server", SERVER_NAME),
+			("Date", http_date()),
+			("Content-Type", "text/html; charset=utf-8"),
+			("Content-Length", str(len(body))),
+		]
+		if not keep_alive:
+			headers.append(("Connection", "close"))
+		writer.write(response_head(status, headers) + body)
+		await writer.drain()
+		return status, len(body)
+
+
+class _PooledResponse:
+	"""Upstream response plus the pooled connection it was read from."""
+	__slots__ = ("response", "pool", "reader", "writer")
+
+	def __init__(self, response, pool, reader, writer):
+		self.response = response
+		self.pool = pool
+		self.reader = reader
+		self.writer = writer
+
+	@property
+	def status(self):
+		return self.response.status
+
+	def done(self):
+		"""Returns the connection to the pool once the body was fully read."""
+		if self.response.reusable:
+			self.pool.release(self.reader, self.writer)
+		else:
+			self.writer.close()
+
+	def discard(self):
+		self.writer.close()
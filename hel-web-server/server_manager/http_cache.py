@@ -0,0 +1,362 @@
+# server_manager/http_cache.py
+"""Shared HTTP cache for proxied Flask/Django backends (a subset of RFC 9111).
+
+A response is stored only when the backend allows it: an explicit
+lifetime (``s-maxage``, ``max-age`` or ``Expires``) or a validator
+(``ETag``/``Last-Modified``) to revalidate with. ``no-store``,
+``private``, ``Set-Cookie``, ``Vary: *`` and authorized requests without
+``public`` are never stored. Entries live in a byte-bounded memory LRU;
+entries pushed out of memory move to an optional on-disk tier. The front
+proxy shares one upstream fetch between concurrent misses of a key
+through ``pending``.
+"""
+import hashlib
+import json
+import os
+import shutil
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import HTTP_CACHE_MAX_BYTES, HTTP_CACHE_MAX_OBJECT_BYTES, HTTP_CACHE_DISK_BYTES
+from .http_util import parse_http_date
+
+# الحالات القابلة للتخزين افتراضياً (RFC 9110 القسم 15.1)
+CACHEABLE_STATUSES = {200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501}
+# ترويسات لا تُحفظ مع الاستجابة: تخص الاتصال أو تُحسب عند الإرسال
+UNSTORED_HEADERS = {
+	"connection", "keep-alive", "proxy-connection", "te", "trailer", "transfer-encoding",
+	"upgrade", "content-length", "age", "x-cache",
+}
+_META = struct.Struct("<I") # طول بيانات الوصف قبل الجسم في ملفات القرص
+
+
+def parse_cache_control(value):
+	"""Returns {directive: argument or True} for a Cache-Control header value."""
+	directives = {}
+	for part in (value or "").split(","):
+		name, sep, argument = part.strip().partition("=")
+		if name:
+			directives[name.lower()] = argument.strip().strip('"') if sep else True
+	return directives
+
+
+def _seconds(value):
+	try:
+		return max(0, int(value))
+	except (TypeError, ValueError):
+		return 0
+
+
+def freshness_lifetime(headers, directives):
+	"""Seconds a response stays fresh in a shared cache, or None without an explicit lifetime."""
+	for name in ("s-maxage", "max-age"):
+		if name in directives:
+			return _seconds(directives[name])
+	if "expires" in headers:
+		expires = parse_http_date(headers["expires"])
+		if expires is None:
+			return 0 # قيمة غير صالحة تعني أنها منتهية أصلاً
+		date = parse_http_date(headers.get("date", "")) or time.time()
+		return max(0, int(expires - date))
+	return None
+
+
+def storable(request, status, headers, directives):
+	"""Whether a shared cache may keep this response to a GET request."""
+	if status not in CACHEABLE_STATUSES:
+		return False
+	if "no-store" in directives or "private" in directives or "set-cookie" in headers:
+		return False
+	if headers.get("vary", "").strip() == "*":
+		return False
+	if "authorization" in request.headers and not ("public" in directives or "s-maxage" in directives):
+		return False
+	if "etag" in headers or "last-modified" in headers:
+		return True
+	return bool(freshness_lifetime(headers, directives))
+
+
+class CachedResponse:
+	"""One stored response: status, end-to-end headers, body and its freshness."""
+	__slots__ = ("status", "headers", "body", "stored_at", "initial_age", "lifetime", "etag",
+		"last_modified", "no_cache", "vary")
+
+	def __init__(self, status, headers, body, stored_at=None, vary=()):
+		self.status = status
+		self.body = body
+		self.vary = tuple(vary) # أسماء ترويسات الطلب التي تختلف الاستجابة حسبها
+		self.stored_at = time.time() if stored_at is None else stored_at
+		self.update_headers(headers)
+
+	def update_headers(self, headers):
+		"""Sets the headers and recomputes freshness (also used after a 304 revalidation)."""
+		self.headers = [(n, v) for n, v in headers if n.lower() not in UNSTORED_HEADERS]
+		lowered = {n.lower(): v for n, v in headers}
+		directives = parse_cache_control(lowered.get("cache-control"))
+		self.initial_age = _seconds(lowered.get("age", 0))
+		self.lifetime = freshness_lifetime(lowered, directives) or 0
+		self.no_cache = "no-cache" in directives
+		self.etag = lowered.get("etag")
+		self.last_modified = lowered.get("last-modified")
+
+	@property
+	def size(self):
+		return len(self.body) + sum(len(n) + len(v) for n, v in self.headers)
+
+	def age(self, now=None):
+		return self.initial_age + max(0.0, (time.time() if now is None else now) - self.stored_at)
+
+	def is_fresh(self, now=None):
+		return not self.no_cache and self.age(now) < self.lifetime
+
+	def not_modified(self, headers):
+		"""Evaluates the client's If-None-Match / If-Modified-Since against this entry."""
+		if_none_match = headers.get("if-none-match")
+		if if_none_match is not None:
+			if self.etag is None:
+				return False
+			if if_none_match.strip() == "*":
+				return True
+			etag = self.etag.removeprefix("W/")
+			return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+		if_modified_since = headers.get("if-modified-since")
+		if if_modified_since is not None and self.last_modified is not None:
+			since = parse_http_date(if_modified_since)
+			modified = parse_http_date(self.last_modified)
+			return since is not None and modified is not None and modified <= since
+		return False
+
+	def validators(self):
+		"""Conditional request headers that let the backend answer 304 for this entry."""
+		headers = []
+		if self.etag is not None:
+			headers.append(("If-None-Match", self.etag))
+		if self.last_modified is not None:
+			headers.append(("If-Modified-Since", self.last_modified))
+		return headers
+
+	def to_bytes(self):
+		meta = json.dumps({
+			"status": self.status, "headers": self.headers, "stored": self.stored_at,
+			"age": self.initial_age, "vary": self.vary,
+		}).encode("utf-8")
+		return _META.pack(len(meta)) + meta + self.body
+
+	@classmethod
+	def from_bytes(cls, data):
+		(length,) = _META.unpack_from(data)
+		meta = json.loads(data[_META.size:_META.size + length])
+		headers = [tuple(h) for h in meta["headers"]]
+		if meta["age"]:
+			headers.append(("Age", str(meta["age"])))
+		return cls(meta["status"], headers, data[_META.size + length:], meta["stored"], meta["vary"])
+
+
+class DiskTier:
+	"""Second cache level: entries evicted from memory, one file each, LRU-bounded by bytes.
+
+	Every process uses its own directory (``<name>-<pid>``) and removes it
+	on close; directories left behind by dead processes are removed too.
+	File I/O runs on one dedicated thread (``executor``), so writes and
+	deletions happen in the order they were requested.
+	"""
+
+	def __init__(self, root, name, max_bytes=HTTP_CACHE_DISK_BYTES):
+		self.root = root
+		self.directory = os.path.join(root, f"{name}-{os.getpid()}")
+		self.max_bytes = max_bytes
+		self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="http-cache-disk")
+		# يزداد مع كل مسح، فلا تُكتب استجابة أُخرجت من الذاكرة قبل المسح
+		self.generation = 0
+		self._files = OrderedDict() # key -> حجم الملف
+		self._bytes = 0
+		self._lock = threading.Lock()
+		self._remove_orphans()
+		os.makedirs(self.directory, exist_ok=True)
+
+	def _remove_orphans(self):
+		try:
+			entries = os.listdir(self.root)
+		except OSError:
+			return
+		for entry in entries:
+			pid = entry.rpartition("-")[2]
+			if not pid.isdigit():
+				continue
+			try:
+				os.kill(int(pid), 0)
+				continue
+			except ProcessLookupError:
+				pass
+			except OSError:
+				continue # عملية حية لمستخدم آخر
+			shutil.rmtree(os.path.join(self.root, entry), ignore_errors=True)
+
+	def _path(self, key):
+		return os.path.join(self.directory, hashlib.sha1(repr(key).encode("utf-8")).hexdigest())
+
+	def save(self, key, entry, generation):
+		data = entry.to_bytes()
+		if len(data) > self.max_bytes or generation != self.generation:
+			return
+		path = self._path(key)
+		try:
+			with open(path + ".tmp", "wb") as f:
+				f.write(data)
+			os.replace(path + ".tmp", path)
+		except OSError:
+			return
+		with self._lock:
+			if generation != self.generation:
+				self._unlink(path)
+				return
+			self._bytes += len(data) - self._files.pop(key, 0)
+			self._files[key] = len(data)
+			while self._bytes > self.max_bytes and self._files:
+				old_key, size = self._files.popitem(last=False)
+				self._bytes -= size
+				self._unlink(self._path(old_key))
+
+	def take(self, key):
+		"""Removes and returns the entry stored under ``key`` (it moves back to memory), or None."""
+		with self._lock:
+			if key not in self._files:
+				return None
+			self._bytes -= self._files.pop(key)
+		path = self._path(key)
+		try:
+			with open(path, "rb") as f:
+				data = f.read()
+		except OSError:
+			return None
+		self._unlink(path)
+		try:
+			return CachedResponse.from_bytes(data)
+		except (ValueError, KeyError, struct.error):
+			return None
+
+	@staticmethod
+	def _unlink(path):
+		try:
+			os.remove(path)
+		except OSError:
+			pass
+
+	def discard(self, primary):
+		"""Removes every variant of one URL."""
+		with self._lock:
+			keys = [key for key in self._files if key[0] == primary]
+			for key in keys:
+				self._bytes -= self._files.pop(key)
+		for key in keys:
+			self._unlink(self._path(key))
+
+	def clear(self):
+		"""Forgets every entry at once; the files are deleted on the I/O thread."""
+		with self._lock:
+			self.generation += 1
+			keys = list(self._files)
+			self._files.clear()
+			self._bytes = 0
+		if keys:
+			self.executor.submit(lambda: [self._unlink(self._path(key)) for key in keys])
+
+	def close(self):
+		self.clear()
+		self.executor.shutdown(wait=True)
+		shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class HttpCache:
+	"""Memory LRU of CachedResponse entries keyed by (host + target, Vary'd request headers).
+
+	Used only from the front proxy's event loop (clear() is scheduled onto
+	it with call_soon_threadsafe); disk reads and writes run on the disk
+	tier's I/O thread.
+	"""
+
+	def __init__(self, max_bytes=HTTP_CACHE_MAX_BYTES, max_object_bytes=HTTP_CACHE_MAX_OBJECT_BYTES, disk=None):
+		self.max_bytes = max_bytes
+		self.max_object_bytes = max_object_bytes
+		self.disk = disk
+		self.pending = {} # مفتاح -> Future لجلب جارٍ يشترك فيه كل من يطلب نفس العنوان
+		self._entries = OrderedDict()
+		self._vary = {} # العنوان -> أسماء ترويسات Vary في آخر استجابة مخزنة
+		self._bytes = 0
+		self.hits = 0
+		self.misses = 0
+		self.revalidated = 0
+		self.collapsed = 0
+
+	@staticmethod
+	def primary_key(request):
+		return request.headers.get("host", "").lower() + request.target
+
+	def key(self, primary, request, vary=None):
+		"""The variant key of ``request``: its URL plus the request headers named by Vary."""
+		names = self._vary.get(primary, ()) if vary is None else vary
+		return (primary,) + tuple(" ".join(request.headers.get(name, "").split()) for name in names)
+
+	async def get(self, loop, key):
+		entry = self._entries.get(key)
+		if entry is not None:
+			self._entries.move_to_end(key)
+			return entry
+		if self.disk is None:
+			return None
+		entry = await loop.run_in_executor(self.disk.executor, self.disk.take, key)
+		if entry is None or key[0] not in self._vary:
+			return None # أُبطل العنوان أثناء القراءة
+		self._insert(loop, key, entry)
+		return entry
+
+	def store(self, loop, primary, request, entry):
+		"""Stores a response to ``request``; returns its variant key, or None if it is too large."""
+		if len(entry.body) > self.max_object_bytes:
+			return None
+		self._vary[primary] = entry.vary
+		key = self.key(primary, request)
+		self._insert(loop, key, entry)
+		return key
+
+	def _insert(self, loop, key, entry):
+		old = self._entries.pop(key, None)
+		if old is not None:
+			self._bytes -= old.size
+		self._entries[key] = entry
+		self._bytes += entry.size
+		while self._bytes > self.max_bytes and self._entries:
+			evicted_key, evicted = self._entries.popitem(last=False)
+			self._bytes -= evicted.size
+			if self.disk is not None:
+				loop.run_in_executor(self.disk.executor, self.disk.save, evicted_key, evicted, self.disk.generation)
+
+	def invalidate(self, loop, primary):
+		"""Drops every variant of one URL (after a successful unsafe request to it)."""
+		for key in [k for k in self._entries if k[0] == primary]:
+			self._bytes -= self._entries.pop(key).size
+		self._vary.pop(primary, None)
+		if self.disk is not None:
+			loop.run_in_executor(self.disk.executor, self.disk.discard, primary)
+
+	def clear(self):
+		"""Drops every entry (the project's files changed, so any page may differ now)."""
+		self._entries.clear()
+		self._vary.clear()
+		self._bytes = 0
+		if self.disk is not None:
+			self.disk.clear()
+
+	def close(self):
+		self.clear()
+		if self.disk is not None:
+			self.disk.close()
+
+	def stats(self):
+		return {
+			"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses,
+			"revalidated": self.revalidated, "collapsed": self.collapsed,
+		}
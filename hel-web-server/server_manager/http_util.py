@@ -0,0 +1,264 @@
+# server_manager/http_util.py
+import asyncio
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from urllib.parse import unquote
+
+# الحدود القصوى لحجم رأس الطلب لحماية الخادم من الطلبات المشوهة
+MAX_HEADER_BYTES = 64 * 1024
+MAX_HEADERS = 100
+# الحد الأقصى لحجم جسم الطلب (الأكبر يُرد عليه بـ 413)، وحجم القطعة عند قراءته
+MAX_BODY_BYTES = 100 * 1024 * 1024
+BODY_CHUNK = 64 * 1024
+
+SERVER_NAME = "Hel-Web-Server"
+
+
+class BadRequest(Exception):
+	"""Raised when a request cannot be parsed."""
+
+
+class PayloadTooLarge(BadRequest):
+	"""Raised when a request body is larger than the allowed limit (answered with 413)."""
+
+
+class Request:
+	"""A parsed HTTP/1.x request head."""
+	__slots__ = ("method", "target", "path", "query", "version", "headers", "raw_headers", "body")
+
+	def __init__(self, method, target, version, raw_headers):
+		self.method = method
+		self.target = target
+		self.version = version
+		self.raw_headers = raw_headers
+		self.body = b""
+		self.headers = {}
+		for name, value in raw_headers:
+			key = name.lower()
+			if key in self.headers:
+				self.headers[key] += ", " + value
+			else:
+				self.headers[key] = value
+		path, _, self.query = target.partition("?")
+		self.path = unquote(path)
+
+	@property
+	def keep_alive(self):
+		"""Whether the client expects the connection to stay open after the response."""
+		connection = self.headers.get("connection", "").lower()
+		if self.version == "HTTP/1.1":
+			return "close" not in connection
+		return "keep-alive" in connection
+
+	@property
+	def content_length(self):
+		value = self.headers.get("content-length")
+		if value is None:
+			return 0
+		if not value.isdigit():
+			raise BadRequest("invalid Content-Length")
+		return int(value)
+
+	@property
+	def chunked(self):
+		return "chunked" in self.headers.get("transfer-encoding", "").lower()
+
+	@property
+	def has_body(self):
+		return self.chunked or self.content_length > 0
+
+
+async def read_request(reader):
+	"""Reads one request head from the stream; returns None on a clean EOF."""
+	try:
+		head = await reader.readuntil(b"\r\n\r\n")
+	except asyncio.IncompleteReadError as e:
+		if not e.partial.strip():
+			return None
+		raise BadRequest("incomplete request head")
+	except asyncio.LimitOverrunError:
+		raise BadRequest("request head too large")
+
+	lines = head.decode("latin-1").split("\r\n")
+	# تجاهل الأسطر الفارغة قبل سطر الطلب (مسموح بها في RFC 7230)
+	while lines and not lines[0]:
+		lines.pop(0)
+	parts = lines[0].split() if lines else []
+	if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+		raise BadRequest("malformed request line")
+
+	raw_headers = []
+	for line in lines[1:]:
+		if not line:
+			continue
+		name, sep, value = line.partition(":")
+		if not sep or not name or name != name.strip():
+			raise BadRequest("malformed header line")
+		raw_headers.append((name, value.strip()))
+		if len(raw_headers) > MAX_HEADERS:
+			raise BadRequest("too many headers")
+	return Request(parts[0], parts[1], parts[2], raw_headers)
+
+
+async def _read_exactly(reader, count):
+	"""Yields ``count`` bytes from the stream in chunks of at most BODY_CHUNK."""
+	while count:
+		data = await reader.read(min(count, BODY_CHUNK))
+		if not data:
+			raise asyncio.IncompleteReadError(b"", count)
+		count -= len(data)
+		yield data
+
+
+async def iter_body(reader, request, limit=MAX_BODY_BYTES):
+	"""Yields the request body (Content-Length or chunked) as it arrives.
+
+	Raises PayloadTooLarge once the body is known to exceed ``limit``
+	bytes; the connection is then out of sync and must be closed.
+	"""
+	if request.chunked:
+		total = 0
+		while True:
+			size_line = await reader.readuntil(b"\r\n")
+			try:
+				size = int(size_line.split(b";", 1)[0].strip(), 16)
+			except ValueError:
+				raise BadRequest("invalid chunk size")
+			if size == 0:
+				# تخطي الترويسات الختامية (trailers)
+				while (await reader.readuntil(b"\r\n")) != b"\r\n":
+					pass
+				return
+			total += size
+			if total > limit:
+				raise PayloadTooLarge(f"request body larger than {limit} bytes")
+			async for data in _read_exactly(reader, size):
+				yield data
+			await reader.readexactly(2)
+	length = request.content_length
+	if length > limit:
+		raise PayloadTooLarge(f"request body larger than {limit} bytes")
+	async for data in _read_exactly(reader, length):
+		yield data
+
+
+async def read_body(reader, request, limit=MAX_BODY_BYTES):
+	"""Reads the complete request body into memory (at most ``limit`` bytes)."""
+	return b"".join([data async for data in iter_body(reader, request, limit)])
+
+
+async def discard_body(reader, request, limit=MAX_BODY_BYTES):
+	"""Reads and drops the request body so the next request on the connection can be parsed."""
+	async for _ in iter_body(reader, request, limit):
+		pass
+
+
+async def chain_chunks(chunks, rest):
+	"""Yields already read chunks, then the rest of an async stream."""
+	for chunk in chunks:
+		yield chunk
+	async for chunk in rest:
+		yield chunk
+
+
+_date_cache = [0, ""]
+
+
+def http_date(timestamp=None):
+	"""Formats an RFC 7231 date; the current-time value is cached per second."""
+	if timestamp is not None:
+		return formatdate(timestamp, usegmt=True)
+	now = int(time.time())
+	if _date_cache[0] != now:
+		_date_cache[0] = now
+		_date_cache[1] = formatdate(now, usegmt=True)
+	return _date_cache[1]
+
+
+def parse_http_date(value):
+	"""Parses an HTTP date header into a POSIX timestamp, or None if invalid."""
+	try:
+		return parsedate_to_datetime(value).timestamp()
+	except (TypeError, ValueError, IndexError):
+		return None
+
+
+def response_head(status, headers, version="HTTP/1.1"):
+	"""Serializes a status line and header list into bytes."""
+	try:
+		reason = HTTPStatus(status).phrase
+	except ValueError:
+		# رمز غير قياسي من خادم خلفي (مثل 599): نمرره بعبارة عامة
+		reason = "Unknown Status"
+	lines = [f"{version} {status} {reason}"]
+	lines.extend(f"{name}: {value}" for name, value in headers)
+	return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def connection_headers(request, keep_alive):
+	"""Connection header for a response: close, or keep-alive spelled out for HTTP/1.0 clients."""
+	if not keep_alive:
+		return [("Connection", "close")]
+	if request is not None and request.version == "HTTP/1.0":
+		# عميل HTTP/1.0 يفترض الإغلاق ما لم يُذكر keep-alive صراحة
+		return [("Connection", "keep-alive")]
+	return []
+
+
+def access_log_line(peer, request_line, status, size):
+	"""Formats an access log line the same way Python's http.server does."""
+	timestamp = time.strftime("%d/%b/%Y %H:%M:%S")
+	return f'{peer} - - [{timestamp}] "{request_line}" {status} {size if size else "-"}'
+
+
+# الحد الأقصى لعدد المقاطع في طلب Range واحد (لمنع الطلبات المسيئة)
+MAX_RANGES = 16
+
+
+def parse_range(header, size):
+	"""Parses a bytes Range header.
+
+	Returns a sorted list of non-overlapping (start, end) inclusive pairs,
+	an empty list if no range is satisfiable (416), or None if the header
+	is invalid or should be ignored (serve the full body).
+	"""
+	unit, _, spec = header.partition("=")
+	if unit.strip().lower() != "bytes" or not spec:
+		return None
+	ranges = []
+	for part in spec.split(","):
+		first, sep, last = part.strip().partition("-")
+		if not sep:
+			return None
+		first, last = first.strip(), last.strip()
+		if first:
+			if not first.isdigit() or (last and not last.isdigit()):
+				return None
+			start = int(first)
+			end = int(last) if last else size - 1
+			if last and end < start:
+				return None
+		else:
+			# صيغة "-N" تعني آخر N بايت
+			if not last.isdigit():
+				return None
+			length = int(last)
+			if length == 0:
+				continue
+			start = max(size - length, 0)
+			end = size - 1
+		if start >= size:
+			continue
+		ranges.append((start, min(end, size - 1)))
+	if len(ranges) > MAX_RANGES:
+		return None
+
+	ranges.sort()
+	merged = []
+	for start, end in ranges:
+		if merged and start <= merged[-1][1] + 1:
+			merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+		else:
+			merged.append((start, end))
+	return merged
@@ -0,0 +1,139 @@
+# server_manager/inotify.py
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+
+# ثوابت inotify من <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+CHANGE_MASK = (
+	IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+	| IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+
+# مجلدات لا داعي لمراقبتها (تتغير كثيراً ولا تؤثر على ما يُخدم)
+IGNORED_DIRS = {".git", ".hg", ".svn", "__pycache__", "node_modules", ".venv", "venv", ".mypy_cache", ".pytest_cache"}
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+_libc = None
+
+
+def _load_libc():
+	global _libc
+	if _libc is None:
+		name = ctypes.util.find_library("c")
+		if not name:
+			raise OSError(errno.ENOSYS, "libc not found")
+		_libc = ctypes.CDLL(name, use_errno=True)
+		if not hasattr(_libc, "inotify_init1"):
+			raise OSError(errno.ENOSYS, "inotify is not available on this system")
+	return _libc
+
+
+def is_supported():
+	"""Returns True if inotify can be used on this system."""
+	try:
+		_load_libc()
+		return True
+	except OSError:
+		return False
+
+
+class Inotify:
+	"""Recursive, non-blocking inotify watcher for a directory tree.
+
+	The file descriptor can be registered with a selector or an asyncio loop;
+	``read_events()`` returns (path, mask) tuples and automatically watches
+	directories created after the watcher was set up.
+	"""
+
+	def __init__(self, root, mask=CHANGE_MASK):
+		self._libc = _load_libc()
+		self.root = os.path.realpath(root)
+		self.mask = mask
+		self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+		if self.fd < 0:
+			err = ctypes.get_errno()
+			raise OSError(err, os.strerror(err))
+		self._paths = {} # wd -> مسار المجلد
+		self._watched = set() # المجلدات المراقبة فعلاً
+		self.add_tree(self.root)
+
+	def fileno(self):
+		return self.fd
+
+	def watches(self, directory):
+		"""True if changes in ``directory`` itself are reported (ignored, unwatchable and symlinked dirs are not)."""
+		return directory in self._watched
+
+	def add_tree(self, path):
+		"""Watches path and every subdirectory below it."""
+		self._add_watch(path)
+		for dirpath, dirnames, _ in os.walk(path):
+			dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+			for name in dirnames:
+				self._add_watch(os.path.join(dirpath, name))
+
+	def _add_watch(self, path):
+		wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.mask | IN_ONLYDIR)
+		if wd < 0:
+			# المجلد قد يُحذف قبل إضافته أو قد نصل لحد max_user_watches
+			return False
+		self._paths[wd] = path
+		self._watched.add(path)
+		return True
+
+	def read_events(self):
+		"""Drains all pending events; returns a list of (path, mask)."""
+		events = []
+		while True:
+			try:
+				data = os.read(self.fd, 64 * 1024)
+			except BlockingIOError:
+				break
+			if not data:
+				break
+			offset = 0
+			while offset < len(data):
+				wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+				offset += _EVENT_HEADER.size
+				name = data[offset:offset + length].rstrip(b"\0")
+				offset += length
+
+				if mask & IN_Q_OVERFLOW:
+					# فقدنا أحداثاً، يجب اعتبار كل الشجرة متغيرة
+					events.append((self.root, mask))
+					continue
+				directory = self._paths.get(wd)
+				if directory is None:
+					continue
+				if mask & IN_IGNORED:
+					self._watched.discard(self._paths.pop(wd))
+					continue
+				path = os.path.join(directory, os.fsdecode(name)) if name else directory
+				if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and os.path.basename(path) not in IGNORED_DIRS:
+					self.add_tree(path)
+				events.append((path, mask))
+		return events
+
+	def close(self):
+		if self.fd >= 0:
+			os.close(self.fd)
+			self.fd = -1
@@ -0,0 +1,172 @@
+# server_manager/interfaces.py
+"""Lists the host's IPv4 and IPv6 addresses without DNS.
+
+IPv4 addresses come from the SIOCGIFCONF ioctl and IPv6 addresses from
+/proc/net/if_inet6. The result is cached and refreshed only when a
+rtnetlink address or link notification arrives (or, where netlink is not
+available, after ADDRESS_CACHE_TTL seconds).
+"""
+import array
+import errno
+import fcntl
+import select
+import socket
+import struct
+import threading
+import time
+
+from .events import Signal
+
+SIOCGIFCONF = 0x8912
+# اسم الواجهة (16) + اتحاد العناوين (24 بايت على أنظمة 64 بت، 16 على 32 بت)
+IFREQ_SIZE = 40 if struct.calcsize("P") == 8 else 32
+MAX_INTERFACES = 128
+ADDRESS_CACHE_TTL = 30.0
+
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+
+IPV6_SCOPE_LINK = 0x20
+
+
+class Address:
+	"""One address of a local interface."""
+	__slots__ = ("interface", "family", "address", "link_local")
+
+	def __init__(self, interface, family, address, link_local=False):
+		self.interface = interface
+		self.family = family
+		self.address = address
+		self.link_local = link_local
+
+	@property
+	def is_loopback(self):
+		return self.address.startswith("127.") or self.address == "::1"
+
+	def url(self, port, scheme="http"):
+		if self.family == socket.AF_INET:
+			return f"{scheme}://{self.address}:{port}"
+		# عناوين link-local تحتاج اسم الواجهة (%25 هي % بعد الترميز)
+		zone = f"%25{self.interface}" if self.link_local else ""
+		return f"{scheme}://[{self.address}{zone}]:{port}"
+
+
+def ipv4_addresses():
+	"""Returns an Address for every configured IPv4 interface address (SIOCGIFCONF)."""
+	buffer = array.array("B", bytes(IFREQ_SIZE * MAX_INTERFACES))
+	address, _ = buffer.buffer_info()
+	with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+		request = struct.pack("iL", len(buffer), address)
+		length = struct.unpack("iL", fcntl.ioctl(s.fileno(), SIOCGIFCONF, request))[0]
+	data = buffer.tobytes()
+	result = []
+	for offset in range(0, length, IFREQ_SIZE):
+		name = data[offset:offset + 16].split(b"\0", 1)[0].decode()
+		# sockaddr_in: العائلة (2) ثم المنفذ (2) ثم العنوان (4)
+		result.append(Address(name, socket.AF_INET, socket.inet_ntoa(data[offset + 20:offset + 24])))
+	return result
+
+
+def ipv6_addresses():
+	"""Returns an Address for every IPv6 address in /proc/net/if_inet6."""
+	result = []
+	try:
+		with open("/proc/net/if_inet6") as f:
+			lines = f.readlines()
+	except OSError:
+		return result # IPv6 معطل في النواة
+	for line in lines:
+		fields = line.split()
+		if len(fields) < 6:
+			continue
+		address = socket.inet_ntop(socket.AF_INET6, bytes.fromhex(fields[0]))
+		result.append(Address(fields[5], socket.AF_INET6, address, int(fields[3], 16) == IPV6_SCOPE_LINK))
+	return result
+
+
+def list_addresses():
+	"""Returns every local address: loopback first, then IPv4, then global and link-local IPv6."""
+	addresses = ipv4_addresses() + ipv6_addresses()
+	return sorted(addresses, key=lambda a: (not a.is_loopback, a.family != socket.AF_INET, a.link_local))
+
+
+class AddressMonitor:
+	"""Cached address list kept current by an rtnetlink listener thread.
+
+	``changed`` (list of Address) is emitted from the listener thread when
+	the set of addresses changes.
+	"""
+
+	def __init__(self):
+		self.changed = Signal()
+		self._addresses = None
+		self._loaded_at = 0.0
+		self._lock = threading.Lock()
+		self._netlink = None
+		self._thread = None
+
+	def start(self):
+		"""Starts listening for interface changes; returns False if rtnetlink is unavailable."""
+		with self._lock:
+			if self._thread is not None:
+				return self._netlink is not None
+			try:
+				self._netlink = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+				self._netlink.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+			except (AttributeError, OSError):
+				self._netlink = None
+			self._thread = threading.Thread(target=self._run, name="address-monitor", daemon=True)
+			self._thread.start()
+			return self._netlink is not None
+
+	def addresses(self):
+		"""Returns the cached list, loading it first if needed."""
+		with self._lock:
+			stale = self._netlink is None and time.monotonic() - self._loaded_at > ADDRESS_CACHE_TTL
+			if self._addresses is None or stale:
+				self._load()
+			return self._addresses
+
+	def _load(self):
+		try:
+			self._addresses = list_addresses()
+		except OSError:
+			self._addresses = [Address("lo", socket.AF_INET, "127.0.0.1")]
+		self._loaded_at = time.monotonic()
+
+	def _run(self):
+		# التحميل الأول يتم هنا أيضاً حتى لا تنتظره الواجهة
+		self.addresses()
+		if self._netlink is None:
+			return
+		while True:
+			try:
+				self._netlink.recv(65536)
+				# نجمع دفعة الرسائل المتتالية (إضافة واجهة تولد عدة رسائل) في تحديث واحد
+				while select.select([self._netlink], [], [], 0.2)[0]:
+					self._netlink.recv(65536)
+			except OSError as e:
+				# ENOBUFS: فاتتنا رسائل، لكن إعادة القراءة الكاملة تكفي
+				if e.errno != errno.ENOBUFS:
+					return
+			with self._lock:
+				before = [(a.interface, a.address) for a in self._addresses or ()]
+				self._load()
+				addresses = self._addresses
+			if [(a.interface, a.address) for a in addresses] != before:
+				self.changed.emit(addresses)
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_address_monitor():
+	"""Returns the process-wide, already started address monitor."""
+	global _monitor
+	with _monitor_lock:
+		if _monitor is None:
+			_monitor = AddressMonitor()
+			_monitor.start()
+		return _monitor
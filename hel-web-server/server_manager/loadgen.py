@@ -0,0 +1,157 @@
+# server_manager/loadgen.py
+"""Closed-loop asyncio HTTP/1.1 load generator.
+
+``concurrency`` clients each send one request at a time for ``duration``
+seconds, over a persistent connection when ``keep_alive`` is set, picking
+requests from a weighted mix.
+"""
+import asyncio
+import random
+import socket
+import time
+
+from .front_proxy import read_response_head
+from .metrics import Histogram
+
+CONNECT_TIMEOUT = 5
+REQUEST_TIMEOUT = 30
+ERROR_BACKOFF = 0.01
+
+
+class RequestSpec:
+	"""One entry of the request mix."""
+	__slots__ = ("method", "path", "body", "weight", "headers")
+
+	def __init__(self, path="/", method="GET", body=b"", weight=1, headers=()):
+		self.method = method
+		self.path = path
+		self.body = body
+		self.weight = weight
+		self.headers = tuple(headers)
+
+	@classmethod
+	def parse(cls, text):
+		"""Parses '[METHOD] PATH [WEIGHT]', e.g. '/about 3' or 'POST /form'."""
+		tokens = text.split()
+		method = tokens.pop(0).upper() if len(tokens) > 1 and not tokens[0].startswith("/") else "GET"
+		weight = int(tokens.pop()) if len(tokens) > 1 and tokens[-1].isdigit() else 1
+		return cls(tokens[0], method, weight=weight)
+
+
+class LoadResult:
+	"""Totals of one load run."""
+
+	def __init__(self):
+		self.requests = 0
+		self.errors = 0
+		self.bytes = 0
+		self.connections = 0
+		self.statuses = {}
+		self.error_kinds = {}
+		self.latency = Histogram()
+		self.elapsed = 0.0
+
+	def add_error(self, error):
+		self.errors += 1
+		kind = type(error).__name__
+		self.error_kinds[kind] = self.error_kinds.get(kind, 0) + 1
+
+	def to_dict(self):
+		latency = self.latency
+		return {
+			"requests": self.requests,
+			"errors": self.errors,
+			"error_kinds": self.error_kinds,
+			"connections": self.connections,
+			"bytes": self.bytes,
+			"elapsed": round(self.elapsed, 3),
+			"rps": round(self.requests / self.elapsed, 1) if self.elapsed else 0.0,
+			"statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+			"p50_ms": latency.percentile(50) / 1000,
+			"p90_ms": latency.percentile(90) / 1000,
+			"p95_ms": latency.percentile(95) / 1000,
+			"p99_ms": latency.percentile(99) / 1000,
+			"max_ms": latency.max / 1000,
+		}
+
+
+class LoadGenerator:
+	"""Drives ``concurrency`` closed-loop clients against host:port."""
+
+	def __init__(self, host, port, mix=None, concurrency=16, duration=10.0, keep_alive=True, host_header=None, seed=None):
+		self.host = host
+		self.port = port
+		self.mix = mix or [RequestSpec("/")]
+		self.concurrency = max(1, concurrency)
+		self.duration = duration
+		self.keep_alive = keep_alive
+		self.host_header = host_header or f"{host}:{port}"
+		self.random = random.Random(seed)
+		self._payloads = [self._encode(spec) for spec in self.mix]
+		self._weights = [spec.weight for spec in self.mix]
+
+	def _encode(self, spec):
+		lines = [
+			f"{spec.method} {spec.path} HTTP/1.1",
+			f"Host: {self.host_header}",
+			"User-Agent: hel-web-server-loadgen",
+			"Connection: keep-alive" if self.keep_alive else "Connection: close",
+		]
+		lines.extend(f"{name}: {value}" for name, value in spec.headers)
+		if spec.body or spec.method in ("POST", "PUT", "PATCH"):
+			lines.append(f"Content-Length: {len(spec.body)}")
+		return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + spec.body
+
+	def run(self):
+		"""Runs the load test on a private event loop; returns a LoadResult."""
+		return asyncio.run(self.run_async())
+
+	async def run_async(self):
+		result = LoadResult()
+		loop = asyncio.get_running_loop()
+		started = loop.time()
+		deadline = started + self.duration
+		await asyncio.gather(*(self._client(result, deadline) for _ in range(self.concurrency)))
+		result.elapsed = loop.time() - started
+		return result
+
+	async def _connect(self, result):
+		reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), CONNECT_TIMEOUT)
+		sock = writer.get_extra_info("socket")
+		if sock is not None:
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		result.connections += 1
+		return reader, writer
+
+	async def _client(self, result, deadline):
+		loop = asyncio.get_running_loop()
+		reader = writer = None
+		choices = range(len(self._payloads))
+		while loop.time() < deadline:
+			index = self.random.choices(choices, self._weights)[0] if len(self._payloads) > 1 else 0
+			began = time.perf_counter()
+			try:
+				if writer is None:
+					reader, writer = await self._connect(result)
+				writer.write(self._payloads[index])
+				response = await asyncio.wait_for(read_response_head(reader, self.mix[index].method), REQUEST_TIMEOUT)
+				size = 0
+				async for chunk in response.iter_body():
+					size += len(chunk)
+			except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+				result.add_error(e)
+				if writer is not None:
+					writer.close()
+				reader = writer = None
+				# مهلة قصيرة حتى لا تتحول أخطاء الاتصال السريعة إلى حلقة تستهلك المعالج
+				await asyncio.sleep(ERROR_BACKOFF)
+				continue
+			result.latency.record((time.perf_counter() - began) * 1_000_000)
+			result.requests += 1
+			result.bytes += size
+			result.statuses[response.status] = result.statuses.get(response.status, 0) + 1
+			if not (self.keep_alive and response.reusable):
+				writer.close()
+				reader = writer = None
+		if writer is not None:
+			writer.close()
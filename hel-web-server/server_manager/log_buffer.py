@@ -0,0 +1,106 @@
+# server_manager/log_buffer.py
+import threading
+import time
+from array import array
+
+from .config import LOG_RETENTION
+
+# مستويات السجلات (تُخزن كبايت واحد لكل سطر)
+LEVEL_INFO = 0
+LEVEL_WARNING = 1
+LEVEL_ERROR = 2
+LEVEL_NAMES = ("INFO", "WARNING", "ERROR")
+
+_ERROR_MARKERS = ("Error", "ERROR", "Traceback", "Exception", "[FATAL", "Failed", "failed")
+_WARNING_MARKERS = ("Warning", "WARNING", "Deprecat")
+
+
+def classify(text):
+	"""Returns the severity level of a log line using cheap substring checks."""
+	for marker in _ERROR_MARKERS:
+		if marker in text:
+			return LEVEL_ERROR
+	for marker in _WARNING_MARKERS:
+		if marker in text:
+			return LEVEL_WARNING
+	return LEVEL_INFO
+
+
+class LogBuffer:
+	"""Fixed-size ring buffer of log lines.
+
+	Timestamps and levels live in flat arrays next to a list of message
+	strings, so each retained line costs one string plus a few bytes. Every
+	line gets a monotonically increasing sequence number; once the buffer is
+	full the oldest lines are overwritten.
+	"""
+
+	def __init__(self, capacity=LOG_RETENTION):
+		self.capacity = capacity
+		self._times = array("d", bytes(8 * capacity))
+		self._levels = array("B", bytes(capacity))
+		self._texts = [None] * capacity
+		self._next_seq = 0 # رقم السطر التالي
+		self._first_cleared = 0 # أول سطر بعد آخر عملية مسح
+		self._lock = threading.Lock()
+
+	def append(self, text, timestamp=None, level=None):
+		"""Adds a line; safe to call from any thread."""
+		if timestamp is None:
+			timestamp = time.time()
+		if level is None:
+			level = classify(text)
+		with self._lock:
+			slot = self._next_seq % self.capacity
+			self._times[slot] = timestamp
+			self._levels[slot] = level
+			self._texts[slot] = text
+			self._next_seq += 1
+
+	# يسمح بتمرير المخزن مكان log_signal إلى WebServer
+	emit = append
+
+	def clear(self):
+		"""Drops all retained lines without resetting sequence numbers."""
+		with self._lock:
+			self._texts = [None] * self.capacity
+			self._first_cleared = self._next_seq
+
+	@property
+	def first_seq(self):
+		"""Sequence number of the oldest retained line."""
+		return max(self._next_seq - self.capacity, self._first_cleared)
+
+	@property
+	def next_seq(self):
+		"""Sequence number the next appended line will get."""
+		return self._next_seq
+
+	def bounds(self):
+		"""Returns (first_seq, next_seq) read together, consistent with concurrent appends."""
+		with self._lock:
+			return self.first_seq, self._next_seq
+
+	def __len__(self):
+		first, end = self.bounds()
+		return end - first
+
+	def get(self, seq):
+		"""Returns (timestamp, level, text) for a retained sequence number, or None."""
+		with self._lock:
+			if not self.first_seq <= seq < self._next_seq:
+				return None
+			slot = seq % self.capacity
+			# الحقول الثلاثة من نفس السطر، لا يستبدلها append في منتصف القراءة
+			return self._times[slot], self._levels[slot], self._texts[slot]
+
+	def snapshot(self, start_seq=None):
+		"""Returns a list of (seq, timestamp, level, text) from start_seq to the newest line."""
+		with self._lock:
+			first = self.first_seq
+			start = first if start_seq is None else max(start_seq, first)
+			result = []
+			for seq in range(start, self._next_seq):
+				slot = seq % self.capacity
+				result.append((seq, self._times[slot], self._levels[slot], self._texts[slot]))
+			return result
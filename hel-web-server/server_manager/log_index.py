@@ -0,0 +1,218 @@
+# server_manager/log_index.py
+"""Incremental inverted index and live filters over a LogBuffer.
+
+Every new line is tokenized once into lower-case word tokens; each token
+keeps an ascending array of the sequence numbers that contain it.
+Structured facets (backend tag, output stream label, level) are indexed
+as reserved tokens, so a filter becomes an intersection of posting lists
+followed by an exact check of the few remaining lines. Evicted sequence
+numbers are trimmed from the posting lists in batches.
+"""
+import re
+from array import array
+from bisect import bisect_left
+
+from .log_buffer import LEVEL_INFO
+
+_TOKEN_RE = re.compile(r"\w+")
+# "[site] [SERVER-ERR]: ..." : وسم الخادم (في السجل المجمع) ثم وسم مجرى المخرجات
+_TAGS_RE = re.compile(r"^(?:\[([^\]\s]+)\] )?\[([A-Z][A-Z-]*)\]:")
+
+STREAM_LABELS = ("SERVER", "SERVER-ERR", "PHP", "PHP-LOG")
+ERROR_STREAMS = ("SERVER-ERR", "PHP-LOG")
+
+_BACKEND = "\0b:"
+_STREAM = "\0s:"
+_LEVEL = "\0l:"
+
+
+def parse_tags(text):
+	"""Returns (backend, stream) from a log line's leading tags ('' when absent)."""
+	match = _TAGS_RE.match(text)
+	if match:
+		return match.group(1) or "", match.group(2)
+	# رسائل المدير في السجل المجمع تحمل وسم الخادم فقط: "[site] Server stopped"
+	if text.startswith("[") and "] " in text:
+		tag = text[1:text.index("] ")]
+		if tag and " " not in tag and tag not in STREAM_LABELS:
+			return tag, ""
+	return "", ""
+
+
+class LogQuery:
+	"""A filter: text (substring or regex, case-insensitive), minimum level, streams and backend."""
+
+	def __init__(self, text="", regex=False, min_level=LEVEL_INFO, streams=None, backend=None):
+		self.text = text
+		self.regex = regex and bool(text)
+		self.min_level = min_level
+		self.streams = frozenset(streams) if streams else None
+		self.backend = backend
+		# يرفع re.error إذا كان التعبير غير صالح
+		self.pattern = re.compile(text, re.IGNORECASE) if self.regex else None
+		self.needle = text.lower()
+
+	@property
+	def is_empty(self):
+		return not self.text and self.min_level == LEVEL_INFO and self.streams is None and self.backend is None
+
+	def refines(self, other):
+		"""True if every line matching self also matches ``other`` (so other's results can be narrowed)."""
+		return (
+			other is not None and not self.regex and not other.regex
+			and other.needle in self.needle and self.min_level >= other.min_level
+			and self.streams == other.streams and self.backend == other.backend
+		)
+
+	def match(self, level, text):
+		if level < self.min_level:
+			return False
+		if self.streams is not None or self.backend is not None:
+			backend, stream = parse_tags(text)
+			if self.streams is not None and stream not in self.streams:
+				return False
+			if self.backend is not None and backend != self.backend:
+				return False
+		if self.pattern is not None:
+			return self.pattern.search(text) is not None
+		return not self.needle or self.needle in text.lower()
+
+
+class LogIndex:
+	"""Token -> sequence number postings for the lines currently in a LogBuffer."""
+
+	def __init__(self, log_buffer):
+		self.log_buffer = log_buffer
+		self.postings = {}
+		self.backends = set()
+		self._indexed = log_buffer.first_seq # أول سطر لم يُفهرس بعد
+		self._trimmed = self._indexed
+
+	def update(self):
+		"""Indexes lines appended since the last call; returns the number indexed."""
+		buffer = self.log_buffer
+		first, end = buffer.bounds()
+		start = max(self._indexed, first)
+		postings = self.postings
+		for seq in range(start, end):
+			record = buffer.get(seq)
+			if record is None:
+				continue
+			_, level, text = record
+			backend, stream = parse_tags(text)
+			tokens = set(_TOKEN_RE.findall(text.lower()))
+			tokens.add(_LEVEL + str(level))
+			tokens.add(_BACKEND + backend)
+			if stream:
+				tokens.add(_STREAM + stream)
+			if backend:
+				self.backends.add(backend)
+			for token in tokens:
+				posting = postings.get(token)
+				if posting is None:
+					posting = postings[token] = array("q")
+				posting.append(seq)
+		self._indexed = end
+		# حذف الأسطر المزالة من المخزن على دفعات بدلاً من كل سطر
+		first = buffer.first_seq
+		if first - self._trimmed >= max(1, buffer.capacity // 4):
+			self._trim(first)
+		return end - start
+
+	@property
+	def indexed(self):
+		"""Sequence number of the first line not indexed yet."""
+		return self._indexed
+
+	def _trim(self, first):
+		for token in list(self.postings):
+			posting = self.postings[token]
+			cut = bisect_left(posting, first)
+			if cut == len(posting):
+				del self.postings[token]
+			elif cut:
+				del posting[:cut]
+		self.backends = {key[len(_BACKEND):] for key in self.postings if key.startswith(_BACKEND)} - {""}
+		self._trimmed = first
+
+	def _union(self, tokens):
+		result = set()
+		for token in tokens:
+			posting = self.postings.get(token)
+			if posting is not None:
+				result.update(posting)
+		return result
+
+	def candidates(self, query, start=None):
+		"""Returns ascending sequence numbers that may match ``query`` (from ``start`` on)."""
+		sets = []
+		if query.backend is not None:
+			sets.append(self._union([_BACKEND + query.backend]))
+		if query.streams is not None:
+			sets.append(self._union(_STREAM + stream for stream in query.streams))
+		if query.min_level > LEVEL_INFO:
+			sets.append(self._union(_LEVEL + str(level) for level in range(query.min_level, 3)))
+		if query.needle and not query.regex:
+			# كل كلمة في النص المطلوب قد تكون جزءاً من كلمة مفهرسة، لذلك نبحث في المفردات
+			for part in _TOKEN_RE.findall(query.needle):
+				sets.append(self._union(token for token in self.postings if part in token and token[0] != "\0"))
+		first = max(self.log_buffer.first_seq, start or 0)
+		if not sets:
+			return list(range(first, self.indexed))
+		sets.sort(key=len)
+		result = sets[0].intersection(*sets[1:])
+		return sorted(seq for seq in result if seq >= first)
+
+
+class LiveFilter:
+	"""The matching sequence numbers of one query, kept current as lines arrive and are evicted."""
+
+	def __init__(self, index, query):
+		self.index = index
+		self.query = query
+		self.seqs = []
+		self._checked = index.log_buffer.first_seq
+		self._rebuild()
+
+	def _verify(self, seqs):
+		buffer = self.index.log_buffer
+		match = self.query.match
+		result = []
+		for seq in seqs:
+			record = buffer.get(seq)
+			if record is not None and match(record[1], record[2]):
+				result.append(seq)
+		return result
+
+	def _rebuild(self):
+		self.index.update()
+		# candidates() يقف عند آخر سطر مفهرس، وما بعده يُفحص في poll() التالية
+		self.seqs = self._verify(self.index.candidates(self.query))
+		self._checked = self.index.indexed
+
+	def set_query(self, query):
+		"""Switches to a new query, narrowing the current results when possible."""
+		previous, self.query = self.query, query
+		self.index.update()
+		if query.refines(previous):
+			end = self.index.indexed
+			self.seqs = self._verify(self.seqs) + self._verify(range(self._checked, end))
+			self._checked = end
+		else:
+			self._rebuild()
+
+	def poll(self):
+		"""Returns (matches evicted from the front, new matching seqs) without applying them."""
+		self.index.update()
+		first, end = self.index.log_buffer.first_seq, self.index.indexed
+		removed = bisect_left(self.seqs, first)
+		added = self._verify(range(max(self._checked, first), end))
+		self._checked = end
+		return removed, added
+
+	def refresh(self):
+		"""Applies evictions and new lines; returns (rows removed from the front, rows appended)."""
+		removed, added = self.poll()
+		del self.seqs[:removed]
+		self.seqs.extend(added)
+		return removed, len(added)
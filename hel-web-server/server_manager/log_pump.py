@@ -0,0 +1,217 @@
+# server_manager/log_pump.py
+import codecs
+import os
+import queue
+import selectors
+import sys
+import threading
+import traceback
+
+from .config import LOG_PUMP_QUEUE
+
+READ_CHUNK = 64 * 1024
+MAX_LINE_CHARS = 64 * 1024 # سطر أطول من هذا (أو مخرجات بلا أسطر) يُقسم بدلاً من تخزينه بلا حد
+
+# علامة في الطابور: بدأت فجوة أسطر مسقطة لهذه العملية
+_DROPPED = object()
+
+# القيم الافتراضية لبادئات السجلات (نفس البادئات المستخدمة سابقاً)
+DEFAULT_LABELS = ("[SERVER]", "[SERVER-ERR]")
+
+
+class _Stream:
+	"""One pipe of a supervised process plus its incremental decoder state."""
+	__slots__ = ("fd", "file", "label", "entry", "decoder", "pending")
+
+	def __init__(self, file, label, entry):
+		self.fd = file.fileno()
+		self.file = file
+		self.label = label
+		self.entry = entry
+		self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+		self.pending = ""
+
+
+class _Entry:
+	"""Bookkeeping for a registered process."""
+	__slots__ = ("process", "sink", "on_exit", "open_streams", "sink_failed", "dropped")
+
+	def __init__(self, process, sink, on_exit):
+		self.process = process
+		self.sink = sink
+		self.on_exit = on_exit
+		self.open_streams = 0
+		self.sink_failed = False
+		self.dropped = 0 # أسطر أُسقطت منذ آخر بلاغ، وعلامة _DROPPED في الطابور ما دام موجباً
+
+
+class LogPump:
+	"""Multiplexes stdout/stderr of every supervised process on one thread.
+
+	Both pipes of each process are read concurrently with non-blocking reads,
+	so a chatty stream can never stall the child behind an unread one. Decoded
+	lines go into a shared queue drained by a single dispatcher thread, which
+	keeps slow consumers (e.g. the GUI) from delaying the reads. Once
+	``queue_limit`` lines are waiting, new lines are dropped and counted, and
+	the sink is told how many were lost.
+	"""
+
+	def __init__(self, queue_limit=LOG_PUMP_QUEUE):
+		self.queue = queue.SimpleQueue()
+		self.queue_limit = queue_limit
+		self.dropped = 0
+		self._queued = 0 # أسطر في الطابور (العلامات لا تُحسب)
+		self._selector = selectors.DefaultSelector()
+		self._lock = threading.Lock()
+		self._pending = []
+		self._wakeup_r, self._wakeup_w = os.pipe()
+		os.set_blocking(self._wakeup_r, False)
+		os.set_blocking(self._wakeup_w, False)
+		self._selector.register(self._wakeup_r, selectors.EVENT_READ)
+		self._reader = None
+		self._dispatcher = None
+
+	def register(self, process, sink, labels=DEFAULT_LABELS, on_exit=None):
+		"""Starts pumping the process's pipes into ``sink``; ``on_exit`` runs after EOF on both."""
+		entry = _Entry(process, sink, on_exit)
+		streams = []
+		for file, label in ((process.stdout, labels[0]), (process.stderr, labels[1])):
+			if file is not None:
+				os.set_blocking(file.fileno(), False)
+				streams.append(_Stream(file, label, entry))
+		entry.open_streams = len(streams)
+
+		if not streams:
+			self.queue.put((entry, None))
+			self._ensure_threads()
+			return
+
+		with self._lock:
+			self._pending.extend(streams)
+		self._ensure_threads()
+		self._wakeup()
+
+	def _ensure_threads(self):
+		with self._lock:
+			if self._reader is None:
+				self._reader = threading.Thread(target=self._read_loop, name="log-pump", daemon=True)
+				self._reader.start()
+			if self._dispatcher is None:
+				self._dispatcher = threading.Thread(target=self._dispatch_loop, name="log-dispatch", daemon=True)
+				self._dispatcher.start()
+
+	def _wakeup(self):
+		try:
+			os.write(self._wakeup_w, b"\0")
+		except BlockingIOError:
+			pass
+
+	def _read_loop(self):
+		while True:
+			for key, _ in self._selector.select():
+				if key.fd == self._wakeup_r:
+					self._drain_wakeup()
+					continue
+				self._read_stream(key.data)
+
+	def _drain_wakeup(self):
+		try:
+			while os.read(self._wakeup_r, 4096):
+				pass
+		except BlockingIOError:
+			pass
+		with self._lock:
+			streams, self._pending = self._pending, []
+		for stream in streams:
+			self._selector.register(stream.fd, selectors.EVENT_READ, stream)
+
+	def _read_stream(self, stream):
+		try:
+			data = os.read(stream.fd, READ_CHUNK)
+		except BlockingIOError:
+			return
+		except OSError:
+			data = b""
+
+		if data:
+			text = stream.pending + stream.decoder.decode(data)
+			lines = text.split("\n")
+			stream.pending = lines.pop()
+			while len(stream.pending) > MAX_LINE_CHARS:
+				lines.append(stream.pending[:MAX_LINE_CHARS])
+				stream.pending = stream.pending[MAX_LINE_CHARS:]
+			for line in lines:
+				self._put_line(stream.entry, f"{stream.label}: {line.rstrip()}")
+			return
+
+		# EOF: تفريغ ما تبقى في المخزن ثم إغلاق الأنبوب
+		tail = stream.pending + stream.decoder.decode(b"", final=True)
+		if tail.strip():
+			self._put_line(stream.entry, f"{stream.label}: {tail.rstrip()}")
+		self._selector.unregister(stream.fd)
+		stream.file.close()
+		stream.entry.open_streams -= 1
+		if stream.entry.open_streams == 0:
+			self.queue.put((stream.entry, None))
+
+	def _put_line(self, entry, line):
+		with self._lock:
+			if self._queued >= self.queue_limit:
+				self.dropped += 1
+				entry.dropped += 1
+				if entry.dropped > 1:
+					return
+				# علامة واحدة لكل فجوة، في موضعها بين الأسطر
+				line = _DROPPED
+			else:
+				self._queued += 1
+		self.queue.put((entry, line))
+
+	def _dispatch_loop(self):
+		while True:
+			entry, line = self.queue.get()
+			if line is _DROPPED:
+				with self._lock:
+					dropped, entry.dropped = entry.dropped, 0
+				self._deliver(entry, f"[log-pump]: {dropped} lines dropped (output faster than it could be logged)")
+				continue
+			if line is None:
+				if entry.on_exit is not None:
+					# on_exit ينتظر انتهاء العملية وقد يعيد تشغيلها، فلا يُنفَّذ في خيط التوزيع
+					threading.Thread(target=self._run_on_exit, args=(entry,), name="log-exit", daemon=True).start()
+				continue
+			with self._lock:
+				self._queued -= 1
+			self._deliver(entry, line)
+
+	@staticmethod
+	def _deliver(entry, line):
+		try:
+			entry.sink(line)
+		except Exception:
+			# لا يجب أن يوقف خطأ في مستهلك واحد بقية السجلات، لكن نطبعه مرة واحدة
+			if not entry.sink_failed:
+				entry.sink_failed = True
+				print(f"log-pump: sink for pid {entry.process.pid} failed; further errors are suppressed", file=sys.stderr)
+				traceback.print_exc()
+
+	@staticmethod
+	def _run_on_exit(entry):
+		try:
+			entry.on_exit(entry.process)
+		except Exception:
+			print(f"log-pump: exit callback for pid {entry.process.pid} failed", file=sys.stderr)
+			traceback.print_exc()
+
+
+_shared_pump = None
+_shared_lock = threading.Lock()
+
+
+def get_log_pump():
+	"""Returns the process-wide log pump shared by all servers."""
+	global _shared_pump
+	with _shared_lock:
+		if _shared_pump is None:
+			_shared_pump = LogPump()
+		return _shared_pump
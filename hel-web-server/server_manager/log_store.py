@@ -0,0 +1,337 @@
+# server_manager/log_store.py
+"""Persistent, rotating log store.
+
+Lines are queued in memory and written by one background thread in
+batches. Each batch becomes an independently zlib-compressed block
+appended to the current segment file (``<name>.seg``), and one JSON line
+describing the block (time range, offset, size, line count, level mask,
+backends) is appended to the segment's sparse index (``<name>.idx``).
+Queries read only the index files and then decompress just the blocks
+whose time range, levels and backends can match.
+
+Every process writes its own segments (the GUI and the daemon may run at
+the same time); the active segment is flock()ed so that pruning by
+another process skips it.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+from .config import (
+	LOG_STORE_DIR, LOG_BLOCK_BYTES, LOG_BLOCK_SECONDS, LOG_SEGMENT_BYTES,
+	LOG_STORE_MAX_BYTES, LOG_STORE_QUEUE
+)
+from .log_buffer import classify
+
+_FRAME = struct.Struct("<I") # طول الكتلة المضغوطة قبل كل كتلة
+
+
+class Block:
+	"""Index entry of one compressed block."""
+	__slots__ = ("first", "last", "offset", "size", "count", "levels", "backends")
+
+	def __init__(self, first, last, offset, size, count, levels, backends):
+		self.first = first
+		self.last = last
+		self.offset = offset
+		self.size = size
+		self.count = count
+		self.levels = levels # قناع بتات المستويات الموجودة في الكتلة
+		self.backends = backends
+
+	@classmethod
+	def from_json(cls, line):
+		d = json.loads(line)
+		return cls(d["t0"], d["t1"], d["off"], d["len"], d["n"], d["lv"], d["be"])
+
+	def to_json(self):
+		return json.dumps({
+			"t0": self.first, "t1": self.last, "off": self.offset, "len": self.size,
+			"n": self.count, "lv": self.levels, "be": self.backends,
+		})
+
+	def matches(self, since, until, backends, min_level):
+		if since is not None and self.last < since:
+			return False
+		if until is not None and self.first > until:
+			return False
+		if backends is not None and not backends.intersection(self.backends):
+			return False
+		return self.levels >> min_level != 0
+
+
+def read_index(index_path):
+	"""Returns the blocks of a segment; a torn last line (crash mid-write) is ignored."""
+	blocks = []
+	try:
+		with open(index_path, encoding="utf-8") as f:
+			for line in f:
+				try:
+					blocks.append(Block.from_json(line))
+				except (ValueError, KeyError):
+					break
+	except OSError:
+		pass
+	return blocks
+
+
+def read_block(segment, block):
+	"""Decompresses one block; returns a list of (timestamp, level, backend, text)."""
+	segment.seek(block.offset)
+	(size,) = _FRAME.unpack(segment.read(_FRAME.size))
+	payload = zlib.decompress(segment.read(size))
+	return [tuple(json.loads(line)) for line in payload.decode("utf-8").splitlines()]
+
+
+class LogStore:
+	"""Append-only segmented log store; append() never blocks on disk I/O."""
+
+	def __init__(self, directory=LOG_STORE_DIR, block_bytes=LOG_BLOCK_BYTES, block_seconds=LOG_BLOCK_SECONDS,
+			segment_bytes=LOG_SEGMENT_BYTES, max_bytes=LOG_STORE_MAX_BYTES, queue_limit=LOG_STORE_QUEUE):
+		self.directory = directory
+		self.block_bytes = block_bytes
+		self.block_seconds = block_seconds
+		self.segment_bytes = segment_bytes
+		self.max_bytes = max_bytes
+		self.queue_limit = queue_limit
+		self.dropped = 0 # أسطر أُسقطت لأن القرص لم يواكب
+		self._queue = deque()
+		self._cond = threading.Condition()
+		self._flush_requests = 0
+		self._flushed = 0
+		self._thread = None
+		self._segment = None # (ملف الكتل، ملف الفهرس)
+		self._segment_size = 0
+
+	# ------------------------------------------------------------------
+	# Writing
+	# ------------------------------------------------------------------
+
+	def append(self, backend, text, timestamp=None, level=None):
+		"""Queues one line; safe to call from any thread."""
+		record = (
+			time.time() if timestamp is None else timestamp,
+			classify(text) if level is None else level,
+			backend,
+			text,
+		)
+		with self._cond:
+			if len(self._queue) >= self.queue_limit:
+				self.dropped += 1
+				return
+			self._queue.append(record)
+			if self._thread is None:
+				self._thread = threading.Thread(target=self._run, name="log-store", daemon=True)
+				self._thread.start()
+			if len(self._queue) == 1:
+				self._cond.notify()
+
+	def flush(self, timeout=5):
+		"""Writes every queued line to disk before returning."""
+		with self._cond:
+			if self._thread is None:
+				return
+			self._flush_requests += 1
+			target = self._flush_requests
+			self._cond.notify()
+			self._cond.wait_for(lambda: self._flushed >= target, timeout)
+
+	def _run(self):
+		batch, batch_bytes, started = [], 0, None
+		while True:
+			with self._cond:
+				if not self._queue and self._flushed >= self._flush_requests:
+					timeout = None if started is None else max(0.0, started + self.block_seconds - time.monotonic())
+					self._cond.wait(timeout)
+				pending = list(self._queue)
+				self._queue.clear()
+				flush_target = self._flush_requests
+			if pending and started is None:
+				started = time.monotonic()
+			batch.extend(pending)
+			batch_bytes += sum(len(record[3]) + 32 for record in pending)
+			flushing = flush_target > self._flushed
+			due = started is not None and time.monotonic() - started >= self.block_seconds
+			if batch and (flushing or due or batch_bytes >= self.block_bytes):
+				self._write_blocks(batch)
+				batch, batch_bytes, started = [], 0, None
+			if flushing:
+				with self._cond:
+					self._flushed = flush_target
+					self._cond.notify_all()
+
+	def _write_blocks(self, records):
+		"""Writes records as blocks of about block_bytes each (a burst must not become one huge block)."""
+		start, size = 0, 0
+		for i, record in enumerate(records):
+			size += len(record[3]) + 32
+			if size >= self.block_bytes or i == len(records) - 1:
+				try:
+					self._write_block(records[start:i + 1])
+				except OSError:
+					self.dropped += i + 1 - start
+					self._close_segment()
+				start, size = i + 1, 0
+
+	def _write_block(self, records):
+		if self._segment is None or self._segment_size >= self.segment_bytes:
+			self._open_segment()
+		segment, index = self._segment
+		payload = zlib.compress("\n".join(json.dumps(r, ensure_ascii=False) for r in records).encode("utf-8"), 6)
+		levels, backends = 0, []
+		for _, level, backend, _ in records:
+			levels |= 1 << level
+			if backend not in backends:
+				backends.append(backend)
+		block = Block(records[0][0], max(r[0] for r in records), self._segment_size, len(payload), len(records), levels, backends)
+		# الكتلة أولاً ثم سطر الفهرس، فلا يشير الفهرس أبداً إلى كتلة غير مكتملة
+		os.write(segment, _FRAME.pack(len(payload)) + payload)
+		os.write(index, (block.to_json() + "\n").encode("utf-8"))
+		self._segment_size += _FRAME.size + len(payload)
+
+	def _open_segment(self):
+		self._close_segment()
+		os.makedirs(self.directory, exist_ok=True)
+		name = os.path.join(self.directory, f"{time.time():017.6f}-{os.getpid()}")
+		segment = os.open(name + ".seg", os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+		fcntl.flock(segment, fcntl.LOCK_EX | fcntl.LOCK_NB)
+		index = os.open(name + ".idx", os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+		self._segment = (segment, index)
+		self._segment_size = 0
+		self._prune()
+
+	def _close_segment(self):
+		if self._segment is not None:
+			for fd in self._segment:
+				os.close(fd)
+			self._segment = None
+
+	def _prune(self):
+		"""Deletes the oldest segments (of any process) beyond max_bytes, skipping locked ones."""
+		segments = self.segments()
+		total = sum(os.path.getsize(path) for path in segments if os.path.exists(path))
+		for path in segments:
+			if total <= self.max_bytes:
+				break
+			try:
+				fd = os.open(path, os.O_RDONLY)
+			except OSError:
+				continue
+			try:
+				fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+			except OSError:
+				continue # مقطع نشط لعملية أخرى
+			finally:
+				os.close(fd)
+			try:
+				total -= os.path.getsize(path)
+			except OSError:
+				continue
+			for victim in (path, path[:-4] + ".idx"):
+				try:
+					os.remove(victim)
+				except OSError:
+					pass
+
+	# ------------------------------------------------------------------
+	# Reading
+	# ------------------------------------------------------------------
+
+	def segments(self):
+		"""Segment paths, oldest first (names start with their creation time)."""
+		return sorted(glob.glob(os.path.join(self.directory, "*.seg")))
+
+	def query(self, since=None, until=None, backends=None, min_level=0, contains=None, limit=None):
+		"""Returns matching (timestamp, level, backend, text) records in time order.
+
+		Only blocks whose index entry overlaps the time range and contains
+		a wanted backend and level are decompressed. With ``limit`` the
+		newest ``limit`` matches are returned, reading blocks newest first
+		and stopping once older blocks cannot change the result.
+		"""
+		self.flush()
+		backends = set(backends) if backends else None
+		candidates = [
+			(block, path)
+			for path in self.segments()
+			for block in read_index(path[:-4] + ".idx")
+			if block.matches(since, until, backends, min_level)
+		]
+		if limit:
+			candidates.sort(key=lambda candidate: candidate[0].last, reverse=True)
+		results = []
+		files = {}
+		try:
+			for block, path in candidates:
+				if limit and len(results) >= limit:
+					results.sort(key=lambda record: record[0])
+					del results[:-limit]
+					if block.last < results[0][0]:
+						break
+				try:
+					if path not in files:
+						files[path] = open(path, "rb")
+					records = read_block(files[path], block)
+				except (OSError, ValueError, zlib.error, struct.error):
+					continue # مقطع حُذف أثناء القراءة أو كتلة تالفة
+				for record in records:
+					timestamp, level, backend, text = record
+					if since is not None and timestamp < since or until is not None and timestamp > until:
+						continue
+					if level < min_level or backends is not None and backend not in backends:
+						continue
+					if contains and contains not in text:
+						continue
+					results.append(record)
+		finally:
+			for f in files.values():
+				f.close()
+		results.sort(key=lambda record: record[0])
+		return results[-limit:] if limit else results
+
+	def backends(self):
+		"""Every backend name found in the index files."""
+		names = set()
+		for path in self.segments():
+			for block in read_index(path[:-4] + ".idx"):
+				names.update(block.backends)
+		return sorted(names)
+
+
+class StoredLog:
+	"""Log sink that persists every message under ``backend`` and forwards it to ``sink``."""
+
+	def __init__(self, sink, backend, store=None):
+		self.sink = sink
+		self.backend = backend
+		self.store = store or get_log_store()
+
+	def emit(self, message):
+		self.store.append(self.backend, message)
+		self.sink.emit(message)
+
+	def __getattr__(self, name):
+		# connect() وغيرها تذهب إلى الإشارة الأصلية
+		return getattr(self.sink, name)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_log_store():
+	"""Returns the process-wide log store."""
+	global _store
+	with _store_lock:
+		if _store is None:
+			_store = LogStore()
+			# نكتب ما تبقى في الطابور عند الخروج العادي
+			atexit.register(_store.flush)
+		return _store
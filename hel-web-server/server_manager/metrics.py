@@ -0,0 +1,217 @@
+# server_manager/metrics.py
+import json
+import re
+import threading
+import time
+from array import array
+
+# عدد بتات الدقة داخل كل نطاق أُسّي: 2^(5-1) = 16 خانة لكل مضاعفة، أي خطأ نسبي أقل من 6%
+SUB_BUCKET_BITS = 5
+_SUB_COUNT = 1 << SUB_BUCKET_BITS
+_SUB_HALF = _SUB_COUNT >> 1
+HISTOGRAM_BUCKETS = 512 # تغطي حتى ساعة كاملة بالميكروثانية
+
+RATE_WINDOW = 60 # ثوانٍ محفوظة لحساب عدد الطلبات في الثانية
+MAX_PATHS = 200 # بعد هذا العدد تُجمع المسارات الجديدة تحت "(other)"
+OTHER_PATH = "(other)"
+
+# "GET /path HTTP/1.1" 200 1234  (http.server، Werkzeug، runserver وخوادمنا المدمجة)
+_REQUEST_LINE_RE = re.compile(r'"([A-Z]+) (\S+) HTTP/[\d.]+" (\d{3}) (\d+|-)')
+# [Sat Oct 18 15:10:04 2026] 127.0.0.1:54321 [200]: GET /index.php  (php -S)
+_PHP_RE = re.compile(r"\d+\]? ?\[(\d{3})\]: ([A-Z]+) (\S+)")
+
+
+def parse_access_line(text):
+	"""Parses an access-log line from any supported backend.
+
+	Returns (method, path, status, size) or None; size is 0 when unknown.
+	"""
+	match = _REQUEST_LINE_RE.search(text)
+	if match:
+		method, target, status, size = match.groups()
+		return method, target.split("?", 1)[0], int(status), int(size) if size != "-" else 0
+	match = _PHP_RE.search(text)
+	if match:
+		status, method, target = match.groups()
+		return method, target.split("?", 1)[0], int(status), 0
+	return None
+
+
+class Histogram:
+	"""Log-linear (HDR-style) latency histogram in microseconds.
+
+	Values below 2^SUB_BUCKET_BITS are exact; above that every power of two
+	is split into equal sub-buckets, so relative error stays bounded while
+	the whole range fits in a small fixed array.
+	"""
+
+	def __init__(self):
+		self.counts = array("Q", bytes(8 * HISTOGRAM_BUCKETS))
+		self.total = 0
+		self.max = 0
+
+	@staticmethod
+	def _index(value):
+		if value < _SUB_COUNT:
+			return value
+		exponent = value.bit_length() - SUB_BUCKET_BITS
+		return min(exponent * _SUB_HALF + (value >> exponent), HISTOGRAM_BUCKETS - 1)
+
+	@staticmethod
+	def _value(index):
+		"""Upper bound of a bucket."""
+		if index < _SUB_COUNT:
+			return index
+		exponent = index // _SUB_HALF - 1
+		return ((index - exponent * _SUB_HALF + 1) << exponent) - 1
+
+	def record(self, micros):
+		micros = max(0, int(micros))
+		self.counts[self._index(micros)] += 1
+		self.total += 1
+		if micros > self.max:
+			self.max = micros
+
+	def percentile(self, p):
+		"""Returns the value at percentile p (0-100) in microseconds."""
+		if not self.total:
+			return 0
+		target = max(1, -(-self.total * p // 100))
+		seen = 0
+		for index, count in enumerate(self.counts):
+			seen += count
+			if seen >= target:
+				return min(self._value(index), self.max)
+		return self.max
+
+
+class RateCounter:
+	"""Requests per second over the last RATE_WINDOW seconds."""
+
+	def __init__(self):
+		self.counts = array("I", bytes(4 * RATE_WINDOW))
+		self.seconds = array("q", [-1] * RATE_WINDOW)
+
+	def add(self, now):
+		second = int(now)
+		slot = second % RATE_WINDOW
+		if self.seconds[slot] != second:
+			self.seconds[slot] = second
+			self.counts[slot] = 0
+		self.counts[slot] += 1
+
+	def rate(self, now, window=10):
+		"""Average requests per second over the last ``window`` full seconds."""
+		current = int(now)
+		total = 0
+		for slot in range(RATE_WINDOW):
+			if current - window <= self.seconds[slot] < current:
+				total += self.counts[slot]
+		return total / window
+
+
+class RequestStats:
+	"""Counters for one backend or one path."""
+	__slots__ = ("requests", "bytes", "statuses", "latency", "rate")
+
+	def __init__(self):
+		self.requests = 0
+		self.bytes = 0
+		self.statuses = {}
+		self.latency = Histogram()
+		self.rate = RateCounter()
+
+	def add(self, status, size, micros, now):
+		self.requests += 1
+		self.bytes += size
+		self.statuses[status] = self.statuses.get(status, 0) + 1
+		if micros is not None:
+			self.latency.record(micros)
+		self.rate.add(now)
+
+	def summary(self, now):
+		latency = self.latency
+		return {
+			"requests": self.requests,
+			"bytes": self.bytes,
+			"rps": round(self.rate.rate(now), 2),
+			"statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+			"timed": latency.total,
+			"p50_ms": latency.percentile(50) / 1000,
+			"p95_ms": latency.percentile(95) / 1000,
+			"p99_ms": latency.percentile(99) / 1000,
+			"max_ms": latency.max / 1000,
+		}
+
+
+class MetricsRegistry:
+	"""Per-backend and per-path request statistics shared by all servers."""
+
+	def __init__(self):
+		self._backends = {} # الاسم -> (إحصاءات الخادم، {المسار: إحصاءات})
+		self._lock = threading.Lock()
+
+	def record(self, backend, method, path, status, size=0, seconds=None, now=None):
+		"""Adds one request; ``seconds`` is the measured latency, if known."""
+		now = now or time.time()
+		micros = seconds * 1_000_000 if seconds is not None else None
+		with self._lock:
+			entry = self._backends.get(backend)
+			if entry is None:
+				entry = self._backends[backend] = (RequestStats(), {})
+			totals, paths = entry
+			totals.add(status, size, micros, now)
+			if path not in paths and len(paths) >= MAX_PATHS:
+				path = OTHER_PATH
+			stats = paths.get(path)
+			if stats is None:
+				stats = paths[path] = RequestStats()
+			stats.add(status, size, micros, now)
+
+	def observe_log_line(self, backend, text):
+		"""Records a request from an access-log line; returns True if the line was one."""
+		parsed = parse_access_line(text)
+		if parsed is None:
+			return False
+		method, path, status, size = parsed
+		self.record(backend, method, path, status, size)
+		return True
+
+	def reset(self, backend=None):
+		with self._lock:
+			if backend is None:
+				self._backends.clear()
+			else:
+				self._backends.pop(backend, None)
+
+	def snapshot(self):
+		"""Returns a JSON-serialisable dict of all statistics."""
+		now = time.time()
+		with self._lock:
+			return {
+				"timestamp": now,
+				"backends": {
+					name: dict(
+						totals.summary(now),
+						paths={path: stats.summary(now) for path, stats in paths.items()}
+					)
+					for name, (totals, paths) in self._backends.items()
+				},
+			}
+
+	def export_json(self, path):
+		with open(path, "w", encoding="utf-8") as f:
+			json.dump(self.snapshot(), f, indent=2)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics():
+	"""Returns the process-wide metrics registry."""
+	global _registry
+	with _registry_lock:
+		if _registry is None:
+			_registry = MetricsRegistry()
+		return _registry
@@ -0,0 +1,251 @@
+# server_manager/ports.py
+"""Finds which processes own a TCP port by reading /proc, without fuser or lsof.
+
+/proc/net/tcp and tcp6 give the socket inode of every bound port; the
+inode is mapped to a PID through the ``socket:[inode]`` links in
+/proc/<pid>/fd. That map is cached and only rebuilt when an inode is
+not in it.
+"""
+import os
+import signal
+import socket
+import threading
+import time
+
+from .config import PORT_SEARCH_SPAN
+
+TCP_TABLES = (("/proc/net/tcp", socket.AF_INET), ("/proc/net/tcp6", socket.AF_INET6))
+TCP_LISTEN = "0A"
+TCP_CLOSE = "07" # مقبس مربوط بمنفذ لكنه غير متصل ولا يستمع
+INDEX_RESCAN_INTERVAL = 0.5 # أقل فاصل بين مسحين كاملين لـ /proc/*/fd
+KILL_TIMEOUT = 3
+
+
+def _decode_address(hex_address, family):
+	# العنوان مخزن ككلمات 32 بت بترتيب بايتات المعالج (little-endian)
+	raw = bytes.fromhex(hex_address)
+	raw = b"".join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+	return socket.inet_ntop(family, raw)
+
+
+def read_tcp_sockets():
+	"""Yields (local address, port, state, uid, inode) for every TCP socket on this host."""
+	for path, family in TCP_TABLES:
+		try:
+			with open(path) as f:
+				lines = f.readlines()[1:]
+		except OSError:
+			continue
+		for line in lines:
+			fields = line.split()
+			if len(fields) < 10:
+				continue
+			address, port = fields[1].split(":")
+			yield _decode_address(address, family), int(port, 16), fields[3], int(fields[7]), int(fields[9])
+
+
+def bound_ports():
+	"""Returns the set of local ports held by listening or bound, unconnected TCP sockets.
+
+	Connections (including TIME_WAIT left behind by a stopped server) do not
+	count: they do not stop a SO_REUSEADDR bind, which has the final say.
+	"""
+	return {port for _, port, state, _, _ in read_tcp_sockets() if state in (TCP_LISTEN, TCP_CLOSE)}
+
+
+class SocketIndex:
+	"""Cached socket inode -> [(pid, fd)] map built from /proc/<pid>/fd.
+
+	A socket shared by forked workers is held by several processes, so
+	every holder is kept. Cached entries are re-checked with one readlink
+	each; a full rescan only happens for inodes that are not cached.
+	"""
+
+	def __init__(self):
+		self._holders = {}
+		self._scanned_at = 0.0
+		self._lock = threading.Lock()
+
+	@staticmethod
+	def _valid(inode, pid, fd):
+		try:
+			return os.readlink(f"/proc/{pid}/fd/{fd}") == f"socket:[{inode}]"
+		except OSError:
+			return False
+
+	def lookup(self, inodes):
+		"""Returns {inode: [pid, ...]}; inodes held only by other users' processes are left out."""
+		with self._lock:
+			found = {}
+			missing = set()
+			for inode in set(inodes):
+				holders = [(pid, fd) for pid, fd in self._holders.get(inode, ()) if self._valid(inode, pid, fd)]
+				if holders:
+					self._holders[inode] = holders
+					found[inode] = sorted(pid for pid, _ in holders)
+				else:
+					self._holders.pop(inode, None)
+					missing.add(inode)
+			if missing and time.monotonic() - self._scanned_at >= INDEX_RESCAN_INTERVAL:
+				self._scan()
+				for inode in missing:
+					if inode in self._holders:
+						found[inode] = sorted(pid for pid, _ in self._holders[inode])
+			return found
+
+	def _scan(self):
+		"""Rebuilds the whole index (one readlink per open file descriptor on the system)."""
+		holders = {}
+		for entry in os.listdir("/proc"):
+			if not entry.isdigit():
+				continue
+			fd_dir = f"/proc/{entry}/fd"
+			try:
+				fds = os.listdir(fd_dir)
+			except OSError:
+				continue # عملية لمستخدم آخر أو انتهت للتو
+			for fd in fds:
+				try:
+					target = os.readlink(f"{fd_dir}/{fd}")
+				except OSError:
+					continue
+				if target.startswith("socket:["):
+					holders.setdefault(int(target[8:-1]), []).append((int(entry), fd))
+		self._holders = holders
+		self._scanned_at = time.monotonic()
+
+
+_index = SocketIndex()
+
+
+def _read_text(path):
+	try:
+		with open(path, "rb") as f:
+			return f.read().replace(b"\0", b" ").decode(errors="replace").strip()
+	except OSError:
+		return ""
+
+
+def _running(pid):
+	"""True while a process exists and is not a zombie."""
+	try:
+		with open(f"/proc/{pid}/stat", "rb") as f:
+			data = f.read()
+	except OSError:
+		return False
+	return data[data.rindex(b")") + 2:data.rindex(b")") + 3] != b"Z"
+
+
+class PortOwner:
+	"""A listening socket on a port and the processes holding it (empty if not visible to us)."""
+	__slots__ = ("port", "address", "uid", "inode", "pids", "name", "cmdline")
+
+	def __init__(self, port, address, uid, inode, pids=()):
+		self.port = port
+		self.address = address
+		self.uid = uid
+		self.inode = inode
+		self.pids = list(pids)
+		pid = self.pid
+		self.name = _read_text(f"/proc/{pid}/comm") if pid else ""
+		self.cmdline = _read_text(f"/proc/{pid}/cmdline") if pid else ""
+
+	@property
+	def pid(self):
+		"""The oldest holder, usually the process that opened the socket."""
+		return self.pids[0] if self.pids else None
+
+	def describe(self):
+		if not self.pids:
+			return f"a process of uid {self.uid} that we cannot inspect, on {self.address}"
+		others = f" and {len(self.pids) - 1} more" if len(self.pids) > 1 else ""
+		return f"{self.name} (pid {self.pid}{others}: {self.cmdline[:80]}) on {self.address}"
+
+	def to_dict(self):
+		return {
+			"port": self.port, "address": self.address, "uid": self.uid,
+			"pids": self.pids, "name": self.name, "cmdline": self.cmdline,
+		}
+
+
+def port_owners(port):
+	"""Returns a PortOwner for each listening socket on ``port``."""
+	sockets = [
+		(address, uid, inode)
+		for address, local_port, state, uid, inode in read_tcp_sockets()
+		if local_port == port and state == TCP_LISTEN and inode
+	]
+	if not sockets:
+		return []
+	pids = _index.lookup(inode for _, _, inode in sockets)
+	return [PortOwner(port, address, uid, inode, pids.get(inode, ())) for address, uid, inode in sockets]
+
+
+def is_port_free(port, host="0.0.0.0"):
+	"""True if no socket holds ``port`` (IPv4 or IPv6) and it can be bound on ``host``."""
+	return port not in bound_ports() and _can_bind(port, host)
+
+
+def _can_bind(port, host):
+	with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+		s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		try:
+			s.bind((host, port))
+			return True
+		except OSError:
+			return False
+
+
+def find_free_port(start, span=PORT_SEARCH_SPAN, host="0.0.0.0", exclude=()):
+	"""Returns the first port in [start, start + span) that nothing is bound to, or None.
+
+	The socket tables are read once for the whole range; only the chosen
+	candidate is confirmed with a real bind.
+	"""
+	taken = bound_ports().union(exclude)
+	for port in range(start, min(start + span, 65536)):
+		if port not in taken and _can_bind(port, host):
+			return port
+	return None
+
+
+def ephemeral_port(host="127.0.0.1"):
+	"""Returns a port the kernel just picked as free on ``host`` (for internal listeners)."""
+	with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+		s.bind((host, 0))
+		return s.getsockname()[1]
+
+
+def kill_port_owners(port, timeout=KILL_TIMEOUT):
+	"""Sends SIGTERM (then SIGKILL after ``timeout``) to every process listening on ``port``.
+
+	Returns (killed, failed) lists of PortOwner. Our own process is never
+	signalled; sockets we cannot inspect or signal are reported as failed.
+	"""
+	me = os.getpid()
+	killed, failed, pids = [], [], []
+	for owner in port_owners(port):
+		targets = [pid for pid in owner.pids if pid != me]
+		if not targets:
+			failed.append(owner)
+			continue
+		try:
+			for pid in targets:
+				if pid not in pids:
+					os.kill(pid, signal.SIGTERM)
+					pids.append(pid)
+			killed.append(owner)
+		except ProcessLookupError:
+			killed.append(owner)
+		except PermissionError:
+			failed.append(owner)
+	deadline = time.monotonic() + timeout
+	for pid in pids:
+		while _running(pid) and time.monotonic() < deadline:
+			time.sleep(0.05)
+		if _running(pid):
+			try:
+				os.kill(pid, signal.SIGKILL)
+			except OSError:
+				pass
+	return killed, failed
@@ -0,0 +1,252 @@
+# server_manager/precompress.py
+import gzip
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+	import brotli # اختياري: pip install brotli
+except ImportError:
+	brotli = None
+
+from .config import PRECOMPRESS_DIR, PRECOMPRESS_WORKERS, PRECOMPRESS_MIN_BYTES, PRECOMPRESS_MAX_BYTES, PRECOMPRESS_CACHE_BYTES
+from .inotify import IGNORED_DIRS
+
+COMPRESSIBLE_EXTENSIONS = {
+	".html", ".htm", ".css", ".js", ".mjs", ".json", ".map", ".svg", ".txt",
+	".xml", ".csv", ".md", ".wasm", ".ico", ".ttf", ".otf", ".webmanifest",
+}
+
+# الترميزات بالترتيب المفضل عند تساوي الأولوية
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def parse_accept_encoding(header):
+	"""Returns the set of encodings the client accepts (q > 0)."""
+	accepted = set()
+	if not header:
+		return accepted
+	for item in header.split(","):
+		name, _, params = item.strip().partition(";")
+		name = name.strip().lower()
+		q = 1.0
+		params = params.strip()
+		if params.startswith("q="):
+			try:
+				q = float(params[2:])
+			except ValueError:
+				q = 0.0
+		if q > 0:
+			accepted.add(name)
+	return accepted
+
+
+def is_compressible(path):
+	return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+class Variant:
+	"""A compressed copy of a source file stored in the cache directory."""
+	__slots__ = ("encoding", "path", "size", "etag")
+
+	def __init__(self, encoding, path, size, digest):
+		self.encoding = encoding
+		self.path = path
+		self.size = size
+		self.etag = f'"{digest[:24]}-{encoding}"'
+
+
+class _Source:
+	__slots__ = ("mtime_ns", "size", "digest", "variants")
+
+	def __init__(self, mtime_ns, size, digest, variants):
+		self.mtime_ns = mtime_ns
+		self.size = size
+		self.digest = digest
+		self.variants = variants
+
+
+class PrecompressStore:
+	"""Compresses a project's text assets once, in a background worker pool.
+
+	Compressed variants are stored in a shared cache directory keyed by the
+	SHA-256 of the source contents, so unchanged files are never compressed
+	twice, even across restarts or between projects. Variants of a file that
+	changed or was deleted are removed, and the directory is kept under
+	``max_bytes`` by deleting the least recently used variants first.
+	"""
+
+	def __init__(self, root, cache_dir=PRECOMPRESS_DIR, log=None, roots=None, max_bytes=PRECOMPRESS_CACHE_BYTES):
+		self.root = os.path.realpath(root)
+		# المجلدات التي تُفحص عند البدء (الجذر افتراضياً)
+		self.roots = [os.path.realpath(r) for r in roots] if roots else [self.root]
+		self.cache_dir = cache_dir
+		self.max_bytes = max_bytes
+		self.log = log or (lambda message: None)
+		self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+		self._sources = {} # مسار الملف -> _Source
+		self._disk_bytes = 0 # تقدير حجم مجلد الضغط، يُعاد حسابه عند كل تقليم
+		self._pool = None
+		self._lock = threading.Lock()
+
+	def start(self):
+		"""Schedules compression of every compressible file under the scanned roots."""
+		self._pool = ThreadPoolExecutor(max_workers=PRECOMPRESS_WORKERS, thread_name_prefix="precompress")
+		self._pool.submit(self._scan)
+
+	def stop(self):
+		if self._pool is not None:
+			self._pool.shutdown(wait=False, cancel_futures=True)
+			self._pool = None
+
+	def _scan(self):
+		count = 0
+		for root in self.roots:
+			for dirpath, dirnames, filenames in os.walk(root):
+				dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+				for name in filenames:
+					path = os.path.join(dirpath, name)
+					if is_compressible(path):
+						self.refresh(path)
+						count += 1
+		self.log(f"Precompression scheduled for {count} files ({', '.join(self.encodings)})")
+		self._prune()
+
+	def refresh(self, path):
+		"""Queues (re)compression of path; call when the file changed."""
+		if self._pool is None or not is_compressible(path):
+			return
+		try:
+			self._pool.submit(self._compress, path)
+		except RuntimeError:
+			# تم إيقاف المجمع أثناء الإغلاق
+			pass
+
+	def discard(self, path):
+		"""Forgets path (deleted, or no longer worth compressing) and deletes its variants."""
+		with self._lock:
+			source = self._sources.pop(path, None)
+		if source is not None:
+			self._remove_unused(source)
+
+	def _remove_unused(self, source):
+		"""Deletes a source's variant files unless another file of this project has the same contents."""
+		with self._lock:
+			if any(other.digest == source.digest for other in self._sources.values()):
+				return
+		for variant in source.variants.values():
+			try:
+				os.remove(variant.path)
+			except OSError:
+				pass
+
+	def _prune(self):
+		"""Deletes the least recently used variants (of any project) beyond max_bytes.
+
+		Variants this store currently serves are kept; reused variants have
+		their mtime refreshed, so it tracks the last use.
+		"""
+		with self._lock:
+			in_use = {v.path for source in self._sources.values() for v in source.variants.values()}
+		files = []
+		try:
+			buckets = os.listdir(self.cache_dir)
+		except OSError:
+			return
+		for bucket in buckets:
+			bucket = os.path.join(self.cache_dir, bucket)
+			try:
+				names = os.listdir(bucket)
+			except OSError:
+				continue
+			for name in names:
+				path = os.path.join(bucket, name)
+				try:
+					st = os.stat(path)
+				except OSError:
+					continue
+				files.append((st.st_mtime_ns, st.st_size, path))
+		total = sum(size for _, size, _ in files)
+		files.sort()
+		for _, size, path in files:
+			if total <= self.max_bytes:
+				break
+			if path in in_use:
+				continue
+			try:
+				os.remove(path)
+			except OSError:
+				continue
+			total -= size
+			try:
+				os.rmdir(os.path.dirname(path)) # ينجح فقط إذا أصبح المجلد فارغاً
+			except OSError:
+				pass
+		with self._lock:
+			self._disk_bytes = total
+
+	def _compress(self, path):
+		try:
+			st = os.stat(path)
+		except OSError:
+			self.discard(path)
+			return
+		if not PRECOMPRESS_MIN_BYTES <= st.st_size <= PRECOMPRESS_MAX_BYTES:
+			self.discard(path)
+			return
+		current = self._sources.get(path)
+		if current is not None and current.mtime_ns == st.st_mtime_ns and current.size == st.st_size:
+			return
+
+		with open(path, "rb") as f:
+			data = f.read()
+		digest = hashlib.sha256(data).hexdigest()
+		bucket = os.path.join(self.cache_dir, digest[:2])
+		os.makedirs(bucket, exist_ok=True)
+
+		variants = {}
+		written = 0
+		for encoding in self.encodings:
+			target = os.path.join(bucket, digest + ENCODING_SUFFIXES[encoding])
+			try:
+				# نسخة موجودة (من مشروع آخر أو تشغيل سابق) تُعلَّم كمستخدمة حديثاً
+				os.utime(target)
+			except OSError:
+				if encoding == "br":
+					compressed = brotli.compress(data, quality=11)
+				else:
+					compressed = gzip.compress(data, compresslevel=9, mtime=0)
+				if len(compressed) >= len(data):
+					continue
+				tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+				with open(tmp, "wb") as out:
+					out.write(compressed)
+				os.replace(tmp, target)
+				written += len(compressed)
+			size = os.path.getsize(target)
+			if size < len(data):
+				variants[encoding] = Variant(encoding, target, size, digest)
+
+		with self._lock:
+			old = self._sources.get(path)
+			self._sources[path] = _Source(st.st_mtime_ns, st.st_size, digest, variants)
+			self._disk_bytes += written
+			over = self._disk_bytes > self.max_bytes
+		if old is not None and old.digest != digest:
+			self._remove_unused(old)
+		if over:
+			self._prune()
+
+	def lookup(self, path, mtime_ns, size, accept_encoding):
+		"""Returns the best Variant for the client, or None to send the identity body."""
+		source = self._sources.get(path)
+		if source is None or not source.variants:
+			return None
+		if source.mtime_ns != mtime_ns or source.size != size:
+			return None
+		accepted = parse_accept_encoding(accept_encoding)
+		for encoding in self.encodings:
+			if encoding in accepted and encoding in source.variants:
+				return source.variants[encoding]
+		return None
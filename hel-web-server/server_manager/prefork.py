@@ -0,0 +1,126 @@
+# server_manager/prefork.py
+import ctypes
+import ctypes.util
+import os
+import signal
+import socket
+import sys
+import time
+
+PR_SET_PDEATHSIG = 1
+
+# إذا انهار عامل بسرعة بعد تشغيله، ننتظر قبل إعادة تشغيله لتجنب حلقة لا نهائية
+RESPAWN_BACKOFF = 1.0
+
+
+def bind_socket(host, port, reuse_port=False, fd=None):
+	"""Returns a listening socket: an inherited fd, or a new (optionally SO_REUSEPORT) bind."""
+	if fd is not None:
+		sock = socket.socket(fileno=fd)
+		sock.setblocking(True)
+		return sock
+	sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+	sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+	if reuse_port:
+		sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+	sock.bind((host, port))
+	sock.listen(socket.SOMAXCONN)
+	return sock
+
+
+def _die_with_parent():
+	"""Asks the kernel to SIGTERM this worker if the master process dies."""
+	try:
+		libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+		libc.prctl(PR_SET_PDEATHSIG, signal.SIGTERM)
+	except (OSError, AttributeError):
+		pass
+
+
+class PreforkMaster:
+	"""Forks N worker processes and keeps them running.
+
+	Without an inherited fd every worker binds its own socket with
+	SO_REUSEPORT so the kernel spreads connections across them; with ``fd``
+	all workers accept on the same inherited listening socket. SIGTERM or
+	SIGINT is forwarded to the workers, which finish in-flight requests
+	before exiting. Once the workers are forked, a byte is written to
+	``ready_fd`` so a manager can retire the previous generation.
+	"""
+
+	def __init__(self, host, port, workers, worker_main, fd=None, name="worker", ready_fd=None):
+		self.host = host
+		self.port = port
+		self.workers = max(1, workers)
+		self.worker_main = worker_main
+		self.fd = fd
+		self.name = name
+		self.ready_fd = ready_fd
+		self.children = {} # pid -> رقم العامل
+		self.stopping = False
+
+	def _spawn(self, index):
+		pid = os.fork()
+		if pid == 0:
+			_die_with_parent()
+			if self.ready_fd is not None:
+				os.close(self.ready_fd)
+			signal.signal(signal.SIGTERM, signal.SIG_DFL)
+			signal.signal(signal.SIGINT, signal.SIG_DFL)
+			code = 0
+			try:
+				sock = bind_socket(self.host, self.port, reuse_port=True, fd=self.fd)
+				self.worker_main(sock, index)
+			except KeyboardInterrupt:
+				pass
+			except BaseException as e:
+				print(f"[{self.name} {index}] crashed: {e!r}", file=sys.stderr, flush=True)
+				code = 1
+			finally:
+				sys.stdout.flush()
+				sys.stderr.flush()
+				os._exit(code)
+		self.children[pid] = index
+		return pid
+
+	def _forward(self, signum, frame):
+		self.stopping = True
+		for pid in list(self.children):
+			try:
+				os.kill(pid, signal.SIGTERM)
+			except ProcessLookupError:
+				pass
+
+	def run(self):
+		"""Starts the workers and supervises them until a stop signal arrives."""
+		if self.fd is None:
+			# فحص مبكر: إذا كان المنفذ مشغولاً نفشل في العملية الرئيسية برسالة واضحة
+			bind_socket(self.host, self.port, reuse_port=True).close()
+		signal.signal(signal.SIGTERM, self._forward)
+		signal.signal(signal.SIGINT, self._forward)
+
+		for index in range(self.workers):
+			self._spawn(index)
+		print(f"[{self.name}] master {os.getpid()} running {self.workers} workers on {self.host}:{self.port}", flush=True)
+		if self.ready_fd is not None:
+			os.write(self.ready_fd, b"1")
+			os.close(self.ready_fd)
+			self.ready_fd = None
+
+		started = {pid: time.monotonic() for pid in self.children}
+		while self.children:
+			try:
+				pid, status = os.wait()
+			except ChildProcessError:
+				break
+			except InterruptedError:
+				continue
+			index = self.children.pop(pid, None)
+			if index is None or self.stopping:
+				continue
+			code = os.waitstatus_to_exitcode(status)
+			print(f"[{self.name}] worker {index} (pid {pid}) exited with {code}; respawning", file=sys.stderr, flush=True)
+			if time.monotonic() - started.pop(pid, 0) < RESPAWN_BACKOFF:
+				time.sleep(RESPAWN_BACKOFF)
+			started[self._spawn(index)] = time.monotonic()
+		return 0
@@ -0,0 +1,279 @@
+# server_manager/proc_sampler.py
+import os
+import threading
+import time
+from array import array
+
+from .config import (
+	SAMPLE_INTERVAL, SAMPLE_HISTORY, ALERT_CPU_PERCENT, ALERT_CPU_SAMPLES,
+	ALERT_RSS_MB, ALERT_FD_FRACTION
+)
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+SERIES = ("cpu", "rss_mb", "fds", "threads", "read_kbs", "write_kbs")
+ALERT_NAMES = {"cpu": "CPU usage", "rss": "Memory usage", "fds": "Open file count"}
+
+
+def read_stat(pid):
+	"""Returns (ppid, utime + stime ticks, threads) from /proc/<pid>/stat."""
+	with open(f"/proc/{pid}/stat", "rb") as f:
+		data = f.read()
+	# اسم العملية بين قوسين وقد يحتوي على مسافات، لذلك نقسم بعد آخر قوس
+	fields = data[data.rindex(b")") + 2:].split()
+	return int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[17])
+
+
+def read_rss(pid):
+	with open(f"/proc/{pid}/statm", "rb") as f:
+		return int(f.read().split()[1]) * PAGE_SIZE
+
+
+def count_fds(pid):
+	try:
+		return len(os.listdir(f"/proc/{pid}/fd"))
+	except PermissionError:
+		return 0
+
+
+def read_io(pid):
+	"""Returns (read_bytes, write_bytes), or (0, 0) if /proc/<pid>/io is not readable."""
+	try:
+		with open(f"/proc/{pid}/io", "rb") as f:
+			values = dict(line.split(b":", 1) for line in f.read().splitlines() if b":" in line)
+		return int(values[b"read_bytes"]), int(values[b"write_bytes"])
+	except (OSError, KeyError, ValueError):
+		return 0, 0
+
+
+def fd_limit(pid):
+	"""Soft RLIMIT_NOFILE of a process, or None."""
+	try:
+		with open(f"/proc/{pid}/limits") as f:
+			for line in f:
+				if line.startswith("Max open files"):
+					value = line.split()[3]
+					return int(value) if value.isdigit() else None
+	except OSError:
+		pass
+	return None
+
+
+def _children(pid):
+	"""Direct children from /proc/<pid>/task/*/children, or None if the kernel lacks that file."""
+	result = []
+	try:
+		for tid in os.listdir(f"/proc/{pid}/task"):
+			with open(f"/proc/{pid}/task/{tid}/children", "rb") as f:
+				result.extend(int(child) for child in f.read().split())
+	except FileNotFoundError:
+		if not os.path.exists(f"/proc/{pid}"):
+			return []
+		return None
+	except OSError:
+		return []
+	return result
+
+
+def _children_by_scan():
+	"""Maps ppid -> children by reading every /proc/<pid>/stat."""
+	children = {}
+	for entry in os.listdir("/proc"):
+		if entry.isdigit():
+			try:
+				ppid = read_stat(entry)[0]
+			except (OSError, ValueError, IndexError):
+				continue
+			children.setdefault(ppid, []).append(int(entry))
+	return children
+
+
+def descendants(pids):
+	"""Returns the given pids plus all of their descendants."""
+	result, stack, table = [], list(pids), None
+	while stack:
+		pid = stack.pop()
+		result.append(pid)
+		found = _children(pid) if table is None else None
+		if found is None:
+			# بدون CONFIG_PROC_CHILDREN نمسح /proc مرة واحدة لكل عينة
+			if table is None:
+				table = _children_by_scan()
+			found = table.get(pid, ())
+		stack.extend(found)
+	return result
+
+
+class Ring:
+	"""Fixed-size float ring buffer; values() returns oldest first."""
+	__slots__ = ("data", "index", "count")
+
+	def __init__(self, capacity=SAMPLE_HISTORY):
+		self.data = array("f", bytes(4 * capacity))
+		self.index = 0
+		self.count = 0
+
+	def append(self, value):
+		self.data[self.index] = value
+		self.index = (self.index + 1) % len(self.data)
+		self.count = min(self.count + 1, len(self.data))
+
+	def values(self):
+		if self.count < len(self.data):
+			return self.data[:self.count].tolist()
+		return (self.data[self.index:] + self.data[:self.index]).tolist()
+
+	def last(self):
+		return self.data[self.index - 1] if self.count else 0.0
+
+
+class ProcessGroup:
+	"""Samples of one supervised server: the sum over its processes."""
+
+	def __init__(self, name, roots, on_alert=None):
+		self.name = name
+		self.roots = roots # دالة تعيد [(pid, مع الأبناء؟), ...]
+		self.on_alert = on_alert
+		self.series = {key: Ring() for key in SERIES}
+		self.pids = []
+		self.fd_limit = None # حد الملفات المفتوحة للعملية الأقرب إلى حدها
+		self.fd_peak = 0 # عدد ملفات تلك العملية
+		self._fd_limits = {} # pid -> RLIMIT_NOFILE
+		self._last = None # (الوقت، tick المعالج، بايتات القراءة، بايتات الكتابة)
+		self._cpu_high = 0
+		self.alerts = set()
+
+	def latest(self):
+		return {key: ring.last() for key, ring in self.series.items()}
+
+
+class ProcessSampler:
+	"""Periodically reads /proc for every watched server and its children.
+
+	A group's ``on_alert(message)`` is called from the sampler thread when a
+	threshold is crossed, and once more when it clears.
+	"""
+
+	def __init__(self, interval=SAMPLE_INTERVAL):
+		self.interval = interval
+		self.groups = {}
+		self._lock = threading.Lock()
+		self._stop = threading.Event()
+		self._thread = None
+
+	def watch(self, name, roots, on_alert=None):
+		"""Starts sampling a server; ``roots()`` returns its [(pid, include children)] list."""
+		with self._lock:
+			self.groups[name] = ProcessGroup(name, roots, on_alert)
+		if self._thread is None:
+			self._thread = threading.Thread(target=self._run, name="proc-sampler", daemon=True)
+			self._thread.start()
+
+	def unwatch(self, name):
+		with self._lock:
+			self.groups.pop(name, None)
+
+	def get(self, name):
+		return self.groups.get(name)
+
+	def latest(self):
+		"""Returns {name: latest values} for every watched server."""
+		with self._lock:
+			return {name: group.latest() for name, group in self.groups.items()}
+
+	def stop(self):
+		self._stop.set()
+
+	def _run(self):
+		while not self._stop.wait(self.interval):
+			with self._lock:
+				groups = list(self.groups.values())
+			for group in groups:
+				try:
+					self.sample(group)
+				except Exception:
+					# عملية انتهت أثناء القراءة، نكتفي بتخطي هذه العينة
+					pass
+
+	def sample(self, group, now=None):
+		now = now or time.monotonic()
+		roots = group.roots()
+		recursive = [pid for pid, children in roots if children]
+		pids = [pid for pid, children in roots if not children]
+		if recursive:
+			pids += descendants(recursive)
+		if set(pids) != set(group.pids):
+			# عملية جديدة (إعادة تحميل أو عامل جديد): فرق العدادات سيحسب عمرها كله
+			group._last = None
+			group._fd_limits = {pid: limit for pid, limit in group._fd_limits.items() if pid in pids}
+		group.pids = pids
+
+		ticks = threads = rss = fds = read_bytes = write_bytes = 0
+		peak = None # (نسبة الاستخدام، عدد الملفات، الحد) للعملية الأقرب إلى حدها
+		for pid in pids:
+			try:
+				_, cpu, count = read_stat(pid)
+				ticks += cpu
+				threads += count
+				rss += read_rss(pid)
+				open_files = count_fds(pid)
+				fds += open_files
+				r, w = read_io(pid)
+				read_bytes += r
+				write_bytes += w
+			except (OSError, ValueError, IndexError):
+				continue
+			if pid not in group._fd_limits:
+				group._fd_limits[pid] = fd_limit(pid)
+			limit = group._fd_limits[pid]
+			if limit and (peak is None or open_files / limit > peak[0]):
+				peak = (open_files / limit, open_files, limit)
+		if peak is not None:
+			_, group.fd_peak, group.fd_limit = peak
+
+		last, group._last = group._last, (now, ticks, read_bytes, write_bytes)
+		if last is None or not pids:
+			return
+		elapsed = max(now - last[0], 1e-6)
+		cpu = max(0.0, (ticks - last[1]) / CLOCK_TICKS / elapsed * 100)
+		series = group.series
+		series["cpu"].append(cpu)
+		series["rss_mb"].append(rss / (1024 * 1024))
+		series["fds"].append(fds)
+		series["threads"].append(threads)
+		series["read_kbs"].append(max(0, read_bytes - last[2]) / 1024 / elapsed)
+		series["write_kbs"].append(max(0, write_bytes - last[3]) / 1024 / elapsed)
+		self._check_alerts(group, cpu, rss / (1024 * 1024))
+
+	def _check_alerts(self, group, cpu, rss_mb):
+		group._cpu_high = group._cpu_high + 1 if cpu >= ALERT_CPU_PERCENT else 0
+		checks = {
+			"cpu": (group._cpu_high >= ALERT_CPU_SAMPLES, f"CPU at {cpu:.0f}% for {ALERT_CPU_SAMPLES} samples"),
+			"rss": (rss_mb >= ALERT_RSS_MB, f"memory at {rss_mb:.0f} MB (limit {ALERT_RSS_MB} MB)"),
+		}
+		if group.fd_limit:
+			# الحد لكل عملية، فنقارن العملية الأقرب إلى حدها وليس مجموع العمليات
+			checks["fds"] = (group.fd_peak >= group.fd_limit * ALERT_FD_FRACTION, f"{group.fd_peak} open files in one process of {group.fd_limit} allowed")
+		for key, (active, message) in checks.items():
+			if active and key not in group.alerts:
+				group.alerts.add(key)
+				if group.on_alert:
+					group.on_alert(f"WARNING: {message}")
+			elif not active and key in group.alerts:
+				group.alerts.discard(key)
+				if group.on_alert:
+					group.on_alert(f"{ALERT_NAMES[key]} back to normal")
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+	"""Returns the process-wide sampler."""
+	global _sampler
+	with _sampler_lock:
+		if _sampler is None:
+			_sampler = ProcessSampler()
+		return _sampler
@@ -0,0 +1,130 @@
+# server_manager/readiness.py
+import errno
+import os
+import selectors
+import socket
+import time
+
+from .config import DEFAULT_READY_TIMEOUT
+
+# أول مهلة بين محاولات الاتصال، ثم تتضاعف حتى الحد الأقصى.
+INITIAL_DELAY = 0.005
+MAX_DELAY = 0.25
+
+
+class ReadinessResult:
+	"""Outcome of a readiness probe."""
+	__slots__ = ("ready", "elapsed", "exit_code", "reason")
+
+	def __init__(self, ready, elapsed, exit_code=None, reason=""):
+		self.ready = ready
+		self.elapsed = elapsed
+		self.exit_code = exit_code
+		self.reason = reason
+
+	@property
+	def exited(self):
+		return self.exit_code is not None
+
+
+def _try_connect(host, port, timeout):
+	"""Attempts one non-blocking connect; returns the socket or None."""
+	sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+	sock.setblocking(False)
+	err = sock.connect_ex((host, port))
+	if err in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+		with selectors.DefaultSelector() as sel:
+			sel.register(sock, selectors.EVENT_WRITE)
+			if sel.select(timeout):
+				err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+			else:
+				err = errno.ETIMEDOUT
+	if err == 0:
+		return sock
+	sock.close()
+	return None
+
+
+def _http_get_status(sock, host, port, path, timeout):
+	"""Sends a GET on an already connected socket and returns the status code."""
+	sock.setblocking(True)
+	sock.settimeout(timeout)
+	request = (
+		f"GET {path} HTTP/1.1\r\n"
+		f"Host: {host}:{port}\r\n"
+		"User-Agent: hel-web-server-readiness\r\n"
+		"Connection: close\r\n\r\n"
+	)
+	sock.sendall(request.encode("ascii"))
+	head = b""
+	while b"\r\n" not in head:
+		chunk = sock.recv(1024)
+		if not chunk:
+			break
+		head += chunk
+	status_line = head.split(b"\r\n", 1)[0].split()
+	if len(status_line) >= 2 and status_line[0].startswith(b"HTTP/") and status_line[1].isdigit():
+		return int(status_line[1])
+	return None
+
+
+def wait_until_ready(port, process=None, host="127.0.0.1", health_path=None, timeout=DEFAULT_READY_TIMEOUT):
+	"""Polls host:port with exponential backoff until it accepts connections.
+
+	Fails fast if ``process`` exits before the port opens. When ``health_path``
+	is given, the server is only considered ready once it answers an HTTP GET.
+	"""
+	started = time.monotonic()
+	deadline = started + timeout
+	delay = INITIAL_DELAY
+	reason = "timed out"
+
+	while True:
+		if process is not None:
+			code = process.poll()
+			if code is not None:
+				return ReadinessResult(False, time.monotonic() - started, code, f"process exited with code {code}")
+
+		remaining = deadline - time.monotonic()
+		if remaining <= 0:
+			return ReadinessResult(False, time.monotonic() - started, reason=reason)
+
+		sock = _try_connect(host, port, min(delay, remaining))
+		if sock is not None:
+			with sock:
+				if not health_path:
+					return ReadinessResult(True, time.monotonic() - started)
+				try:
+					status = _http_get_status(sock, host, port, health_path, max(remaining, 0.1))
+				except OSError as e:
+					status = None
+					reason = f"health check failed: {e}"
+				if status is not None:
+					# أي رد HTTP يعني أن التطبيق يخدم الطلبات، حتى لو كان خطأ 5xx.
+					return ReadinessResult(True, time.monotonic() - started, reason=f"GET {health_path} -> {status}")
+		else:
+			reason = "port not accepting connections"
+
+		time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+		delay = min(delay * 2, MAX_DELAY)
+
+
+def wait_for_ready_fd(fd, process=None, timeout=DEFAULT_READY_TIMEOUT):
+	"""Waits for a backend to write to its ready pipe (see ``--ready-fd``); closes ``fd``.
+
+	Used when the manager owns the listening socket: connecting to the port
+	always succeeds then, so only the backend itself can say it is serving.
+	"""
+	started = time.monotonic()
+	try:
+		with selectors.DefaultSelector() as sel:
+			sel.register(fd, selectors.EVENT_READ)
+			if not sel.select(timeout):
+				return ReadinessResult(False, time.monotonic() - started, reason="timed out")
+		if os.read(fd, 1):
+			return ReadinessResult(True, time.monotonic() - started)
+	finally:
+		os.close(fd)
+	# نهاية الأنبوب بدون بيانات: العملية خرجت قبل أن تصبح جاهزة
+	code = process.poll() if process is not None else None
+	return ReadinessResult(False, time.monotonic() - started, code, f"ready pipe closed (exit code {code})")
@@ -0,0 +1,104 @@
+# server_manager/reloader.py
+import os
+import selectors
+import threading
+import time
+
+from .config import RELOAD_DEBOUNCE, RELOAD_MAX_DELAY, RELOAD_CODE_EXTENSIONS
+from .inotify import Inotify
+
+# ملفات مؤقتة تكتبها المحررات ولا تعني تغييراً حقيقياً في المشروع
+_TEMP_SUFFIXES = ("~", ".swp", ".swx", ".swo", ".tmp", ".pyc")
+_TEMP_NAMES = {"4913"} # ملف اختبار يكتبه vim قبل الحفظ
+
+CHANGE_CODE = "code"
+CHANGE_STATIC = "static"
+
+
+def classify(paths):
+	"""Splits changed paths into (code files, other files), dropping editor noise."""
+	code, other = [], []
+	for path in paths:
+		name = os.path.basename(path)
+		if name in _TEMP_NAMES or name.endswith(_TEMP_SUFFIXES) or name.startswith(".#"):
+			continue
+		if os.path.splitext(name)[1] in RELOAD_CODE_EXTENSIONS:
+			code.append(path)
+		else:
+			other.append(path)
+	return code, other
+
+
+class ProjectWatcher:
+	"""Watches a project tree with inotify and reports debounced change bursts.
+
+	``on_change(kind, paths)`` runs on the watcher thread once no event has
+	arrived for RELOAD_DEBOUNCE seconds (or RELOAD_MAX_DELAY after the first
+	one); ``kind`` is CHANGE_CODE if any source file changed, else CHANGE_STATIC.
+	"""
+
+	def __init__(self, root, on_change):
+		self.root = root
+		self.on_change = on_change
+		self._inotify = Inotify(root)
+		self._wake_r, self._wake_w = os.pipe()
+		self._stopping = False
+		self._closed = False
+		self._close_lock = threading.Lock()
+		self._thread = threading.Thread(target=self._run, name="project-watcher", daemon=True)
+
+	def start(self):
+		self._thread.start()
+
+	def stop(self):
+		"""Stops the watcher; safe to call from on_change itself."""
+		if self._stopping:
+			return
+		self._stopping = True
+		if self._thread.is_alive():
+			os.write(self._wake_w, b"x")
+			if threading.current_thread() is self._thread:
+				return # الخيط يغلق الواصفات بنفسه عند خروجه
+			self._thread.join(timeout=2)
+		if not self._thread.is_alive():
+			# مراقب لم يُشغَّل أبداً يملك واصفات inotify والأنبوب منذ __init__
+			self._close()
+
+	def _close(self):
+		with self._close_lock:
+			if self._closed:
+				return
+			self._closed = True
+		self._inotify.close()
+		os.close(self._wake_r)
+		os.close(self._wake_w)
+
+	def _run(self):
+		pending = set()
+		first = deadline = None
+		try:
+			with selectors.DefaultSelector() as sel:
+				sel.register(self._inotify.fileno(), selectors.EVENT_READ)
+				sel.register(self._wake_r, selectors.EVENT_READ)
+				while not self._stopping:
+					timeout = None if deadline is None else max(0, deadline - time.monotonic())
+					ready = sel.select(timeout)
+					if self._stopping:
+						break
+					if ready:
+						paths = [path for path, _ in self._inotify.read_events()]
+						if paths:
+							now = time.monotonic()
+							pending.update(paths)
+							first = first or now
+							deadline = min(now + RELOAD_DEBOUNCE, first + RELOAD_MAX_DELAY)
+						continue
+					# مرت فترة هدوء كاملة: نعالج الدفعة المجمعة مرة واحدة
+					batch, pending, first, deadline = pending, set(), None, None
+					code, other = classify(batch)
+					if code:
+						self.on_change(CHANGE_CODE, sorted(code + other))
+					elif other:
+						self.on_change(CHANGE_STATIC, sorted(other))
+		finally:
+			self._close()
@@ -0,0 +1,431 @@
+# server_manager/static_server.py
+import asyncio
+import html
+import mimetypes
+import mmap
+import os
+import uuid
+import socket
+import threading
+from urllib.parse import quote
+
+from .file_cache import FileCache
+from .inotify import Inotify
+from .precompress import PrecompressStore, is_compressible
+from .http_util import (
+	BadRequest, PayloadTooLarge, SERVER_NAME, read_request, discard_body, http_date,
+	response_head, access_log_line, parse_range, connection_headers
+)
+
+KEEPALIVE_TIMEOUT = 15 # ثواني انتظار الطلب التالي على نفس الاتصال
+INDEX_FILES = ("index.html", "index.htm")
+STREAM_LIMIT = 64 * 1024
+MMAP_CHUNK = 256 * 1024
+
+
+class StaticServer:
+	"""Asyncio static file server that runs on a private event loop thread.
+
+	Connections are HTTP/1.1 keep-alive by default and file bodies are sent
+	with os.sendfile through the event loop, so no data is copied through
+	Python buffers and no interpreter has to be spawned.
+	"""
+	access_log = True # سطر سجل لكل طلب (الأصناف الفرعية التي تمرر الطلبات تسجل بنفسها)
+
+	def __init__(self, root, port, host="0.0.0.0", log=None):
+		self.root = os.path.realpath(root)
+		self.port = port
+		self.host = host
+		self.log = log or (lambda message: None)
+		# اختياري: on_request(method, path, status, size, seconds) لكل طلب مكتمل
+		self.on_request = None
+		self.loop = None
+		self._server = None
+		self._thread = None
+		self._connections = {} # مهمة الاتصال -> writer
+		self.cache = FileCache()
+		self.precompressed = PrecompressStore(self.root, log=self.log)
+		self._watcher = None
+
+	# ------------------------------------------------------------------
+	# Lifecycle
+	# ------------------------------------------------------------------
+
+	def start(self):
+		"""Binds the port and starts serving; raises OSError if the bind fails."""
+		sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+		try:
+			sock.bind((self.host, self.port))
+			sock.listen(socket.SOMAXCONN)
+		except OSError:
+			sock.close()
+			raise
+		sock.setblocking(False)
+
+		self.loop = asyncio.new_event_loop()
+		started = threading.Event()
+		self._thread = threading.Thread(target=self._run, args=(sock, started), name="static-server", daemon=True)
+		self._thread.start()
+		started.wait()
+
+	def _run(self, sock, started):
+		asyncio.set_event_loop(self.loop)
+		self._server = self.loop.run_until_complete(
+			asyncio.start_server(self._handle_connection, sock=sock, limit=STREAM_LIMIT)
+		)
+		self._watch_root()
+		self.precompressed.start()
+		started.set()
+		try:
+			self.loop.run_forever()
+		finally:
+			if self._watcher is not None:
+				self._watcher.close()
+			self.loop.close()
+
+	def _watch_root(self):
+		"""Invalidates cache entries through inotify; falls back to stat checks."""
+		try:
+			self._watcher = Inotify(self.root)
+		except OSError as e:
+			self.log(f"inotify unavailable ({e}); validating cached files with stat")
+			return
+		self.loop.add_reader(self._watcher.fileno(), self._on_fs_events)
+		self.cache.watcher = self._watcher
+
+	def _on_fs_events(self):
+		for path, _ in self._watcher.read_events():
+			if path == self.root:
+				self.cache.clear()
+			else:
+				self.cache.invalidate(path)
+				self.precompressed.refresh(path)
+
+	def is_running(self):
+		return self._thread is not None and self._thread.is_alive()
+
+	def stop(self):
+		"""Closes the listener and all open connections, then stops the loop."""
+		if not self.is_running():
+			return
+
+		async def shutdown():
+			self._server.close()
+			# إغلاق المقابس ينهي مهام الاتصالات بشكل طبيعي
+			tasks = list(self._connections.items())
+			for task, writer in tasks:
+				writer.transport.abort()
+			await asyncio.gather(*(task for task, _ in tasks), return_exceptions=True)
+			await self._server.wait_closed()
+			if self._watcher is not None:
+				self.loop.remove_reader(self._watcher.fileno())
+			self.precompressed.stop()
+			self.loop.stop()
+
+		asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+		self._thread.join(timeout=5)
+		self._thread = None
+
+	# ------------------------------------------------------------------
+	# Connection handling
+	# ------------------------------------------------------------------
+
+	async def _handle_connection(self, reader, writer):
+		task = asyncio.current_task()
+		self._connections[task] = writer
+		sock = writer.get_extra_info("socket")
+		if sock is not None:
+			# رأس الرد والجسم يُرسلان على دفعتين، لذلك نعطل خوارزمية Nagle
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		peer = writer.get_extra_info("peername")
+		peer_host = peer[0] if peer else "-"
+		try:
+			while True:
+				try:
+					request = await asyncio.wait_for(read_request(reader), KEEPALIVE_TIMEOUT)
+				except asyncio.TimeoutError:
+					break
+				except BadRequest:
+					await self._send_error(writer, None, 400, keep_alive=False)
+					break
+				if request is None:
+					break
+
+				keep_alive = request.keep_alive
+				started = self.loop.time()
+				try:
+					# يجب قراءة الجسم دائماً للحفاظ على تزامن الاتصال
+					request.body = await self._read_body(reader, request)
+				except PayloadTooLarge:
+					keep_alive = False
+					status, size = await self._send_error(writer, request, 413, keep_alive)
+				else:
+					status, size = await self._respond(writer, request, keep_alive)
+				if self.access_log:
+					self.log(access_log_line(peer_host, f"{request.method} {request.target} {request.version}", status, size))
+				if self.on_request is not None:
+					self.on_request(request.method, request.path, status, size, self.loop.time() - started)
+				if not keep_alive:
+					break
+		except (OSError, asyncio.IncompleteReadError, BadRequest):
+			pass
+		except Exception as e:
+			# خطأ برمجي في طلب واحد لا يجب أن يسقط الاتصال دون رد
+			self.log(f"Internal error while handling a request from {peer_host}: {type(e).__name__}: {e}")
+			try:
+				await self._send_error(writer, None, 500, keep_alive=False)
+			except Exception:
+				pass
+		finally:
+			self._connections.pop(task, None)
+			writer.close()
+
+	async def _read_body(self, reader, request):
+		"""Consumes the request body; static files never need it, so it is dropped without buffering.
+
+		Subclasses that pass requests on return the body instead.
+		"""
+		await discard_body(reader, request)
+		return b""
+
+	async def _respond(self, writer, request, keep_alive):
+		"""Serves one request; returns (status, body size) for the access log."""
+		if request.method not in ("GET", "HEAD"):
+			return await self._send_error(writer, request, 405, keep_alive, [("Allow", "GET, HEAD")])
+
+		entry = self.cache.get(request.path)
+		if entry is None:
+			fs_path = self.translate_path(request.path)
+			if fs_path is None:
+				return await self._not_found(writer, request, keep_alive)
+
+			if os.path.isdir(fs_path):
+				if not request.path.endswith("/"):
+					location = quote(request.path + "/")
+					if request.query:
+						location += "?" + request.query
+					return await self._send_simple(writer, request, 301, b"", keep_alive, [("Location", location)])
+				for index in INDEX_FILES:
+					candidate = os.path.join(fs_path, index)
+					if os.path.isfile(candidate):
+						fs_path = candidate
+						break
+				else:
+					return await self._send_listing(writer, request, fs_path, keep_alive)
+
+			try:
+				entry = self.cache.load(request.path, fs_path, self.guess_type(fs_path))
+			except OSError:
+				return await self._not_found(writer, request, keep_alive)
+
+		return await self._send_entry(writer, request, entry, keep_alive)
+
+	async def _not_found(self, writer, request, keep_alive):
+		"""Answers a path with no file behind it; returns (status, body size)."""
+		return await self._send_error(writer, request, 404, keep_alive)
+
+	def translate_path(self, url_path):
+		"""Maps a URL path to a file under the root, or None if it escapes it."""
+		if "\0" in url_path:
+			return None # os.path يرفض البايت الصفري بـ ValueError
+		parts = [p for p in url_path.split("/") if p and p not in (".", "..")]
+		fs_path = os.path.realpath(os.path.join(self.root, *parts))
+		if fs_path != self.root and not fs_path.startswith(self.root + os.sep):
+			return None
+		if not os.path.exists(fs_path):
+			return None
+		return fs_path
+
+	def guess_type(self, path):
+		mime, _ = mimetypes.guess_type(path)
+		if mime is None:
+			return "application/octet-stream"
+		if mime.startswith("text/") or mime in ("application/javascript", "application/json"):
+			return mime + "; charset=utf-8"
+		return mime
+
+	# ------------------------------------------------------------------
+	# Response writers
+	# ------------------------------------------------------------------
+
+	def _base_headers(self, keep_alive, request=None):
+		headers = [("Server", SERVER_NAME), ("Date", http_date())] + connection_headers(request, keep_alive)
+		if keep_alive:
+			headers.append(("Keep-Alive", f"timeout={KEEPALIVE_TIMEOUT}"))
+		return headers
+
+	async def _send_entry(self, writer, request, entry, keep_alive):
+		"""Sends a cached file, answering conditional and range requests."""
+		range_header = request.headers.get("range")
+		if request.method != "GET" or not self._if_range_matches(request, entry):
+			range_header = None
+
+		variant = None
+		# طلبات Range تُخدم دائماً من الملف الأصلي غير المضغوط
+		if is_compressible(entry.path) and range_header is None:
+			variant = self.precompressed.lookup(entry.path, entry.mtime_ns, entry.size, request.headers.get("accept-encoding"))
+		etag = variant.etag if variant is not None else entry.etag
+		headers = [
+			("ETag", etag),
+			("Last-Modified", entry.last_modified),
+			# المتصفح يعيد التحقق في كل مرة، والرد 304 لا يحمل أي جسم
+			("Cache-Control", "no-cache"),
+			("Accept-Ranges", "bytes"),
+		]
+		if is_compressible(entry.path):
+			headers.append(("Vary", "Accept-Encoding"))
+		if entry.not_modified(request.headers, etag):
+			writer.write(response_head(304, self._base_headers(keep_alive, request) + headers))
+			await writer.drain()
+			return 304, 0
+
+		if range_header is not None:
+			ranges = parse_range(range_header, entry.size)
+			if ranges is not None:
+				return await self._send_ranges(writer, request, entry, ranges, keep_alive, headers)
+
+		if variant is not None:
+			try:
+				f = open(variant.path, "rb")
+			except OSError:
+				# حُذفت النسخة بتقليم مجلد الضغط المشترك: نرسل الأصل ونعيد ضغطه
+				self.precompressed.discard(entry.path)
+				self.precompressed.refresh(entry.path)
+				return await self._send_entry(writer, request, entry, keep_alive)
+			with f:
+				headers.append(("Content-Type", entry.content_type))
+				headers.append(("Content-Encoding", variant.encoding))
+				headers.append(("Content-Length", str(variant.size)))
+				return await self._send_file(writer, request, 200, f, 0, variant.size, keep_alive, headers)
+
+		headers.append(("Content-Type", entry.content_type))
+
+		headers.append(("Content-Length", str(entry.size)))
+		if entry.body is not None:
+			writer.write(response_head(200, self._base_headers(keep_alive, request) + headers))
+			if request.method != "HEAD":
+				writer.write(entry.body)
+			await writer.drain()
+			return 200, 0 if request.method == "HEAD" else entry.size
+
+		with open(entry.path, "rb") as f:
+			return await self._send_file(writer, request, 200, f, 0, entry.size, keep_alive, headers)
+
+	def _if_range_matches(self, request, entry):
+		"""If-Range: ranges apply only when the validator still matches (strong comparison)."""
+		if_range = request.headers.get("if-range")
+		if if_range is None:
+			return True
+		if_range = if_range.strip()
+		if if_range.startswith('"') or if_range.startswith("W/"):
+			return if_range == entry.etag
+		return if_range == entry.last_modified
+
+	async def _send_ranges(self, writer, request, entry, ranges, keep_alive, headers):
+		"""Sends 206 with one or more byte ranges, or 416 if none is satisfiable."""
+		if not ranges:
+			headers.append(("Content-Range", f"bytes */{entry.size}"))
+			return await self._send_error(writer, request, 416, keep_alive, headers)
+
+		if len(ranges) == 1:
+			start, end = ranges[0]
+			count = end - start + 1
+			headers.append(("Content-Type", entry.content_type))
+			headers.append(("Content-Range", f"bytes {start}-{end}/{entry.size}"))
+			headers.append(("Content-Length", str(count)))
+			writer.write(response_head(206, self._base_headers(keep_alive, request) + headers))
+			await self._write_range(writer, entry, start, count)
+			return 206, count
+
+		# multipart/byteranges: نحسب الطول الكلي مسبقاً لنتجنب الترميز المقطع (chunked)
+		boundary = uuid.uuid4().hex
+		part_heads = [
+			(
+				f"\r\n--{boundary}\r\n"
+				f"Content-Type: {entry.content_type}\r\n"
+				f"Content-Range: bytes {start}-{end}/{entry.size}\r\n\r\n"
+			).encode("latin-1")
+			for start, end in ranges
+		]
+		closing = f"\r\n--{boundary}--\r\n".encode("latin-1")
+		total = sum(len(h) for h in part_heads) + sum(end - start + 1 for start, end in ranges) + len(closing)
+		headers.append(("Content-Type", f"multipart/byteranges; boundary={boundary}"))
+		headers.append(("Content-Length", str(total)))
+		writer.write(response_head(206, self._base_headers(keep_alive, request) + headers))
+		for part_head, (start, end) in zip(part_heads, ranges):
+			writer.write(part_head)
+			await self._write_range(writer, entry, start, end - start + 1)
+		writer.write(closing)
+		await writer.drain()
+		return 206, total
+
+	async def _write_range(self, writer, entry, offset, count):
+		"""Writes part of a file from the in-memory cache or with sendfile at an offset."""
+		if entry.body is not None:
+			writer.write(memoryview(entry.body)[offset:offset + count])
+			await writer.drain()
+			return
+		await writer.drain()
+		with open(entry.path, "rb") as f:
+			await self._sendfile(writer, f, offset, count)
+
+	async def _send_file(self, writer, request, status, f, offset, count, keep_alive, headers):
+		writer.write(response_head(status, self._base_headers(keep_alive, request) + headers))
+		if request.method == "HEAD" or count == 0:
+			await writer.drain()
+			return status, 0
+		await writer.drain()
+		await self._sendfile(writer, f, offset, count)
+		return status, count
+
+	async def _sendfile(self, writer, f, offset, count):
+		"""Zero-copy send of count bytes at offset; uses mmap if sendfile is unavailable."""
+		try:
+			# sendfile يرسل البيانات من ذاكرة النواة مباشرة إلى المقبس (zero-copy)
+			await self.loop.sendfile(writer.transport, f, offset, count, fallback=False)
+			return
+		except asyncio.SendfileNotAvailableError:
+			pass
+		# الملف المربوط بالذاكرة يشارك صفحات ذاكرة النواة بين كل العملاء.
+		# ننسخ كل قطعة قبل كتابتها: النقل قد يحتفظ بمرجع لما لم يُرسل بعد
+		# (عند انقطاع الاتصال مثلاً)، وإغلاق mmap مع مرجع قائم يرفع BufferError
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+			position = offset
+			end = offset + count
+			while position < end:
+				chunk_end = min(position + MMAP_CHUNK, end)
+				writer.write(mapped[position:chunk_end])
+				await writer.drain()
+				position = chunk_end
+
+	async def _send_simple(self, writer, request, status, body, keep_alive, headers=(), content_type="text/html; charset=utf-8"):
+		all_headers = self._base_headers(keep_alive, request) + list(headers) + [
+			("Content-Type", content_type),
+			("Content-Length", str(len(body))),
+		]
+		writer.write(response_head(status, all_headers))
+		if request is None or request.method != "HEAD":
+			writer.write(body)
+		await writer.drain()
+		return status, len(body)
+
+	async def _send_error(self, writer, request, status, keep_alive, headers=()):
+		body = f"<html><body><h1>Error {status}</h1></body></html>".encode()
+		return await self._send_simple(writer, request, status, body, keep_alive, headers)
+
+	async def _send_listing(self, writer, request, fs_path, keep_alive):
+		try:
+			names = sorted(os.listdir(fs_path), key=str.lower)
+		except OSError:
+			return await self._send_error(writer, request, 404, keep_alive)
+		title = html.escape(request.path)
+		items = []
+		for name in names:
+			display = name + "/" if os.path.isdir(os.path.join(fs_path, name)) else name
+			items.append(f'<li><a href="{quote(display)}">{html.escape(display)}</a></li>')
+		body = (
+			f"<!DOCTYPE HTML><html><head><meta charset=\"utf-8\"><title>Directory listing for {title}</title></head>"
+			f"<body><h1>Directory listing for {title}</h1><hr><ul>{''.join(items)}</ul><hr></body></html>"
+		).encode("utf-8")
+		return await self._send_simple(writer, request, 200, body, keep_alive)
@@ -0,0 +1,226 @@
+# server_manager/supervisor.py
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import SERVER_TYPES, LOG_RETENTION
+from .front_proxy import FrontProxy, Route
+from .log_buffer import LogBuffer
+from .metrics import get_metrics
+from .proc_sampler import get_sampler
+from .web_server import WebServer
+
+
+class _InstanceLog:
+	"""Log sink for one instance: keeps its own buffer and forwards to the shared sink."""
+
+	def __init__(self, name, logs, forward):
+		self.name = name
+		self.logs = logs
+		self.forward = forward
+
+	def emit(self, message):
+		self.logs.append(message)
+		if self.forward is not None:
+			self.forward(f"[{self.name}] {message}")
+
+
+class ServerInstance:
+	"""A named server managed by the Supervisor."""
+
+	def __init__(self, name, project_path, port, server_type_id, workers=None, forward_log=None,
+			hosts=None, prefix=None, strip_prefix=False, cache=None):
+		self.name = name
+		self.project_path = project_path
+		self.port = port
+		self.server_type_id = server_type_id
+		self.workers = workers
+		self.cache = cache # None يترك إعداد HTTP_CACHE_ENABLED
+		# التوجيه عبر الواجهة الأمامية: <name>.localhost افتراضياً
+		self.hosts = list(hosts) if hosts else [f"{name}.localhost"]
+		self.prefix = prefix
+		self.strip_prefix = strip_prefix
+		self.logs = LogBuffer(LOG_RETENTION)
+		self.server = WebServer(port=port, log_signal=_InstanceLog(name, self.logs, forward_log), name=name)
+
+	def start(self):
+		return self.server.start(self.project_path, self.port, self.server_type_id, self.workers, self.cache)
+
+	def stop(self):
+		self.server.stop()
+
+	def reload(self):
+		return self.server.reload()
+
+	def is_running(self):
+		return self.server.is_running()
+
+	def route(self):
+		return Route(self.name, ("127.0.0.1", self.port), self.hosts, self.prefix, self.strip_prefix)
+
+
+class Supervisor:
+	"""Runs any number of named servers side by side.
+
+	All instances share the process-wide log pump and readiness checker;
+	start_all()/stop_all() act on every instance in parallel, so a full
+	stack is up in the time of its slowest member. An optional front proxy
+	puts the whole stack behind one port.
+	"""
+
+	def __init__(self, log=None):
+		self.log = log
+		self.instances = {} # الاسم -> ServerInstance
+		self.proxy = None
+		self.proxy_port = None
+		self._lock = threading.Lock()
+
+	def add(self, name, project_path, port, server_type_id, workers=None, **routing):
+		"""Registers a new instance; raises ValueError on duplicate names/ports or unknown types."""
+		if server_type_id not in SERVER_TYPES.values():
+			raise ValueError(f"Unknown server type: {server_type_id}")
+		with self._lock:
+			if name in self.instances:
+				raise ValueError(f"An instance named '{name}' already exists")
+			for other in self.instances.values():
+				if other.port == port:
+					raise ValueError(f"Port {port} is already used by '{other.name}'")
+			if port == self.proxy_port:
+				raise ValueError(f"Port {port} is reserved for the front proxy")
+			instance = ServerInstance(name, project_path, port, server_type_id, workers, self.log, **routing)
+			self.instances[name] = instance
+			return instance
+
+	def remove(self, name):
+		instance = self.instances.pop(name)
+		instance.stop()
+
+	def get(self, name):
+		return self.instances[name]
+
+	def start(self, name):
+		return self.instances[name].start()
+
+	def stop(self, name):
+		self.instances[name].stop()
+
+	def reload(self, name):
+		"""Reloads one instance without closing its port where the server type allows it."""
+		return self.instances[name].reload()
+
+	def _run_all(self, action, names=None):
+		targets = [self.instances[n] for n in names] if names else list(self.instances.values())
+		if not targets:
+			return {}
+		with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix="supervisor") as pool:
+			futures = {instance.name: pool.submit(action, instance) for instance in targets}
+		results = {}
+		for name, future in futures.items():
+			try:
+				results[name] = future.result()
+			except Exception as e:
+				if self.log:
+					self.log(f"[{name}] {e}")
+				results[name] = False
+		return results
+
+	def start_all(self, names=None):
+		"""Starts instances in parallel; returns {name: success}."""
+		return self._run_all(lambda instance: instance.start(), names)
+
+	def reload_all(self, names=None):
+		"""Reloads instances in parallel; returns {name: success}."""
+		return self._run_all(lambda instance: instance.reload(), names)
+
+	def stop_all(self, names=None):
+		"""Stops instances in parallel (and the front proxy when stopping everything)."""
+		if not names:
+			self.stop_proxy()
+		self._run_all(lambda instance: instance.stop() or True, names)
+
+	def start_proxy(self, port=None, host="0.0.0.0"):
+		"""Starts the front proxy routing to every instance; raises OSError if the port is busy."""
+		port = port or self.proxy_port
+		if port is None:
+			raise ValueError("No proxy port configured")
+		for instance in self.instances.values():
+			if instance.port == port:
+				raise ValueError(f"Port {port} is already used by '{instance.name}'")
+		self.stop_proxy()
+		self.proxy_port = port
+		self.proxy = FrontProxy(port, [i.route() for i in self.instances.values()], host=host, log=self._proxy_log)
+		self.proxy.on_request = self._record_proxy_request
+		self.proxy.start()
+		if self.log:
+			for instance in self.instances.values():
+				where = ", ".join(f"http://{h}:{port}/" for h in instance.hosts)
+				if instance.prefix:
+					where += f", http://localhost:{port}{instance.prefix}/"
+				self.log(f"[proxy] {instance.name}: {where}")
+		return self.proxy
+
+	def stop_proxy(self):
+		if self.proxy is not None:
+			self.proxy.stop()
+			self.proxy = None
+
+	@staticmethod
+	def _record_proxy_request(name, method, path, status, size, seconds):
+		# توقيت مقاس مباشرة في الواجهة الأمامية، منفصل عن سطور سجل الخادم نفسه
+		get_metrics().record(f"proxy/{name}", method, path, status, size, seconds)
+
+	def _proxy_log(self, message):
+		if self.log:
+			self.log(f"[proxy] {message}")
+
+	def status(self):
+		"""Returns a list of (name, server type, port, running) tuples."""
+		return [
+			(i.name, i.server_type_id, i.port, i.is_running())
+			for i in self.instances.values()
+		]
+
+	def resources(self):
+		"""Returns {name: latest CPU/RSS/FD sample} for the running instances."""
+		latest = get_sampler().latest()
+		return {name: latest[name] for name in self.instances if name in latest}
+
+	def caches(self):
+		"""Returns {name: HTTP cache counters} for the instances running behind a cache."""
+		return {
+			name: instance.server.http_cache.stats()
+			for name, instance in self.instances.items()
+			if instance.server.http_cache is not None
+		}
+
+	def load_stack(self, path):
+		"""Adds instances from a JSON stack file.
+
+		The file holds a list of objects with ``name``, ``path``, ``port``,
+		``type`` and optional ``workers``, ``hosts``, ``prefix``,
+		``strip_prefix`` and ``cache``; relative paths are resolved against the stack
+		file's folder. It may instead be an object with a ``servers`` list
+		and a ``proxy_port`` for the front proxy.
+		"""
+		with open(path, encoding="utf-8") as f:
+			entries = json.load(f)
+		if isinstance(entries, dict):
+			self.proxy_port = entries.get("proxy_port")
+			entries = entries.get("servers", [])
+		base = os.path.dirname(os.path.abspath(path))
+		added = []
+		for entry in entries:
+			project_path = os.path.join(base, os.path.expanduser(entry["path"]))
+			added.append(self.add(
+				entry["name"],
+				os.path.normpath(project_path),
+				int(entry["port"]),
+				entry["type"],
+				entry.get("workers"),
+				hosts=entry.get("hosts"),
+				prefix=entry.get("prefix"),
+				strip_prefix=entry.get("strip_prefix", False),
+				cache=entry.get("cache")
+			))
+		return added
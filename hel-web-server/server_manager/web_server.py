@@ -1,34 +1,105 @@
 # server_manager/web_server.py
-import http.server
-import socketserver
 import os
-import socket
-import threading
 import subprocess
+import socket
+import shutil
 import time
 import sys
-from PyQt5.QtCore import QObject, pyqtSignal
-
-from .config import DEFAULT_PORT, SERVER_TYPES
-
-class WebServer(QObject):
-	log_signal = pyqtSignal(str) # لطباعة الرسائل في واجهة المستخدم
-	server_started = pyqtSignal(bool) # لإعلام الواجهة بأن الخادم بدأ
+import threading
 
-	def __init__(self, port=DEFAULT_PORT, log_signal=None):
-		super().__init__()
+from .config import (
+	DEFAULT_PORT, SERVER_TYPES, DEFAULT_READY_TIMEOUT, READY_TIMEOUTS, HEALTH_PATHS, DEFAULT_WORKERS, AUTO_RELOAD,
+	WSGI_THREADS, LOG_STORE_ENABLED, HTTP_CACHE_ENABLED, HTTP_CACHE_TYPES, HTTP_CACHE_DIR, DJANGO_SERVE_STATIC
+)
+from .events import Signal
+from .readiness import wait_until_ready, wait_for_ready_fd
+from .prefork import bind_socket
+from .inotify import is_supported as inotify_supported
+from .reloader import ProjectWatcher, CHANGE_CODE
+from .log_pump import get_log_pump
+from .metrics import get_metrics
+from .proc_sampler import get_sampler
+from .ports import is_port_free, find_free_port, port_owners, kill_port_owners, ephemeral_port
+from .interfaces import get_address_monitor
+from .log_store import StoredLog
+from .static_server import StaticServer
+from .front_proxy import FrontProxy, Route
+from .http_cache import HttpCache, DiskTier
+from .django_static import DjangoGateway, static_mounts
+from .asgi_server import find_django_asgi_app
+from .fastcgi import FastCGIGateway, start_php_cgi_pool, spawn_php_cgi, wait_for_sockets
+
+# وحدات الخوادم التي تقبل مقبس استماع موروثاً (--fd) ويمكن استبدالها دون إغلاق المنفذ
+PREFORK_MODULES = {
+	"flask_prefork": ("server_manager.wsgi_server", "app:app"),
+	"flask_warm": ("server_manager.wsgi_host", "app:app"),
+	"django_asgi": ("server_manager.asgi_server", "auto"),
+}
+# المهلة قبل قتل الجيل القديم إذا لم ينهِ طلباته الجارية
+RETIRE_TIMEOUT = 20
+# ملفات إعداد php-cgi: تعديلها وحده يحتاج مجموعة عمليات جديدة
+PHP_CONFIG_FILES = ("php.ini", ".user.ini")
+# عامل php-cgi ينتهي قبل هذه المدة لا يُعاد تشغيله (خطأ في الإعداد وليس توقفاً عارضاً)
+PHP_CGI_MIN_UPTIME = 2.0
+# كل الخوادم تستمع على 0.0.0.0، فعناوين IPv6 لا تصل إليها
+LISTEN_FAMILIES = (socket.AF_INET,)
+# محاولات تشغيل الخادم الخلفي على منفذ داخلي جديد إذا أخذت عملية أخرى المنفذ المختار قبله
+BACKEND_PORT_ATTEMPTS = 3
+
+class WebServer:
+	"""Starts and stops one backend; has no GUI dependency.
+
+	``log_signal`` (str) and ``server_started`` (bool) are plain Signals;
+	any object with an ``emit`` method can be passed as the log sink.
+	``files_changed`` (list of paths) fires after each debounced burst of
+	project file changes. Requests are counted in the shared metrics
+	registry under ``name``, the backend's processes are sampled by the
+	shared process sampler and every log message is persisted in the log
+	store under the same name. Flask and Django run behind a caching front
+	proxy on the chosen port when ``http_cache_enabled`` is set (from
+	HTTP_CACHE_ENABLED or start()'s ``cache``); Django's static and media
+	URLs are served directly by the static engine in front of runserver.
+	"""
+
+	def __init__(self, port=DEFAULT_PORT, log_signal=None, name="server"):
+		self.name = name
+		self.log_signal = Signal() # لطباعة الرسائل في واجهة المستخدم
+		self.server_started = Signal() # لإعلام الواجهة بأن الخادم بدأ
+		self.files_changed = Signal() # لإبطال ذاكرات التخزين المؤقت عند تغير الملفات
+		# نراقب المشروع بأنفسنا عبر inotify ونعطل مراقبة Django/Flask الدورية
+		self.auto_reload = AUTO_RELOAD and inotify_supported()
+		self.watcher = None
 		self.port = port
-		self.httpd = None 
+		self.httpd = None # خادم الملفات الثابتة المدمج (asyncio)
 		self.server_thread = None
 		self.server_type = None
 		self.project_path = None
-		self.django_process = None # لعمليات Static/Django/Flask
+		self.workers = DEFAULT_WORKERS
+		self.django_process = None # لعمليات Django/Flask
 		self.php_process = None # عملية خادم PHP
-		if log_signal:
+		self.php_cgi_processes = [] # عمليات php-cgi في وضع FastCGI
+		self.php_socket_dir = None
+		self._php_lock = threading.Lock() # يحمي استبدال عمليات php-cgi بين إعادة التشغيل والإيقاف
+		self.listen_socket = None # مقبس الاستماع الذي يملكه المدير في الأوضاع متعددة العمليات
+		self.http_cache_enabled = HTTP_CACHE_ENABLED
+		self.http_cache = None # ذاكرة HTTP أمام Flask/Django (الوكيل نفسه في httpd)
+		self.backend_port = None # المنفذ الداخلي للخادم الخلفي عندما يستقبل httpd الطلبات بدلاً منه
+		self.log_pump = get_log_pump() # قارئ السجلات المشترك لكل العمليات
+		self.metrics = get_metrics()
+		self.sampler = get_sampler()
+		if log_signal is not None:
 			self.log_signal = log_signal
+		if LOG_STORE_ENABLED:
+			# كل رسالة تُحفظ أيضاً في أرشيف السجلات الدائم تحت اسم الخادم
+			self.log_signal = StoredLog(self.log_signal, name)
 
 	def is_running(self):
 		# التحقق من حالة الخوادم
+		if self.backend_port is not None:
+			# الوكيل الأمامي وحده لا يكفي: الخادم الخلفي يجب أن يعمل أيضاً
+			return self.django_process is not None and self.django_process.poll() is None
+		if self.httpd and self.httpd.is_running():
+			return True
 		if self.django_process and self.django_process.poll() is None:
 			return True
 		if self.php_process and self.php_process.poll() is None:
@@ -38,74 +109,69 @@ class WebServer(QObject):
 	def _get_project_name(self, project_path):
 		return os.path.basename(project_path)
 
+	def _python_env(self):
+		"""Environment for Python children; unbuffered so the log pump sees lines as they happen."""
+		env = os.environ.copy()
+		env['PYTHONUNBUFFERED'] = '1'
+		# يسمح للعمليات الفرعية باستيراد خوادم server_manager المدمجة
+		package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+		env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_root, env.get('PYTHONPATH')]))
+		return env
+
 	def _is_port_available(self, port):
-		with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-			try:
-				s.bind(("0.0.0.0", port))
-				return True
-			except socket.error:
-				return False
+		return is_port_free(port)
+
+	def describe_port(self, port):
+		"""Returns a sentence naming who holds ``port`` and a free port nearby."""
+		owners = port_owners(port)
+		holder = "; ".join(owner.describe() for owner in owners) if owners else "another socket"
+		free = find_free_port(port + 1)
+		suggestion = f" Port {free} is free." if free else ""
+		return f"Port {port} is already in use by {holder}.{suggestion}"
 
 	def get_local_and_ip_addresses(self):
-		addresses = []
-		try:
-			local_ip = "127.0.0.1"
-			hostname = socket.gethostname()
-			ip_address = socket.gethostbyname(hostname)
-
-			addresses.append(f"http://{local_ip}:{self.port}")
-			if ip_address != local_ip:
-				addresses.append(f"http://{ip_address}:{self.port}")
-		except socket.error as e:
-			self.log_signal.emit(f"Error getting network addresses: {e}")
-		return addresses
-
-	def start(self, project_path, port, server_type_id):
+		"""Returns a URL for every local address the servers listen on, loopback first (cached, no DNS lookups)."""
+		return [address.url(self.port) for address in get_address_monitor().addresses() if address.family in LISTEN_FAMILIES]
+
+	def start(self, project_path, port, server_type_id, workers=None, cache=None):
+		"""Starts a backend; ``cache`` turns the Flask/Django HTTP cache on or off (None keeps the current setting)."""
 		self.stop() 
 		
 		if not self._is_port_available(port):
-			self.log_signal.emit(f"Error: Port {port} is already in use. Please choose another port.")
+			self.log_signal.emit(f"Error: {self.describe_port(port)}")
 			self.server_started.emit(False)
 			return False
 
 		self.port = port
 		self.server_type = server_type_id
 		self.project_path = project_path
+		self.workers = workers or DEFAULT_WORKERS
+		if cache is not None:
+			self.http_cache_enabled = cache
+		self.metrics.reset(self.name)
+		self.sampler.watch(self.name, self.process_roots, self._resource_alert)
 
 		self.log_signal.emit(f"Attempting to start server type: {SERVER_TYPES.get(server_type_id, server_type_id)} on port {port}")
 		
 		if server_type_id == "http.server":
-			self.log_signal.emit("Starting Static File Server (Python http.server)...")
+			self.log_signal.emit("Starting Static File Server (built-in asyncio engine)...")
 			try:
-				command = [
-					sys.executable,
-					'-m', 
-					'http.server',
-					str(port)
-				]
-				
-				self.django_process = subprocess.Popen( 
-					command,
-					cwd=project_path,
-					stdout=subprocess.PIPE,
-					stderr=subprocess.PIPE
+				# الخادم يعمل داخل نفس العملية، لذلك لا حاجة لتشغيل مفسر Python جديد
+				started_at = time.monotonic()
+				self.httpd = StaticServer(
+					project_path,
+					port,
+					log=lambda line: self.log_signal.emit(f"[SERVER]: {line}")
 				)
-				
-				# التحقق السريع
-				time.sleep(1)
-				if self.django_process.poll() is not None:
-					self.log_signal.emit(f"Static server process terminated immediately. Check Python installation.")
-					self.server_started.emit(False)
-					self.django_process = None
-					return False
-
-				threading.Thread(target=self._monitor_django_logs, daemon=True).start() 
+				self.httpd.on_request = self._record_request
+				self.httpd.start()
+				self.log_signal.emit(f"Server ready in {(time.monotonic() - started_at) * 1000:.0f} ms")
 				self.log_signal.emit(f"Static File Server running at http://0.0.0.0:{port}")
 				self.server_started.emit(True)
 				return True
 			except Exception as e:
-				self.log_signal.emit(f"Failed to start http.server via subprocess: {e}")
-				self.django_process = None
+				self.log_signal.emit(f"Failed to start static file server: {e}")
+				self.httpd = None
 				self.server_started.emit(False)
 				return False
 
@@ -117,36 +183,34 @@ class WebServer(QObject):
 					self.log_signal.emit(f"Error: Could not find main Flask file (e.g., app.py) in {project_path}")
 					self.server_started.emit(False)
 					return False
-					
-				command = [
-					sys.executable,
-					'-m', 
-					'flask',
-					'run',
-					'--host', '0.0.0.0', 
-					'--port', str(port)
-				]
+
+				def command(host, backend_port):
+					command = [
+						sys.executable,
+						'-m', 
+						'flask',
+						'run',
+						'--host', host, 
+						'--port', str(backend_port)
+					]
+					if self.auto_reload:
+						command.append('--no-reload')
+					return command
 				
-				env = os.environ.copy()
+				env = self._python_env()
 				env['FLASK_APP'] = os.path.basename(flask_file) 
 
-				self.django_process = subprocess.Popen(
-					command,
-					cwd=project_path,
-					stdout=subprocess.PIPE,
-					stderr=subprocess.PIPE,
-					env=env 
-				)
-				
-				time.sleep(1)
-				if self.django_process.poll() is not None:
-					self.log_signal.emit(f"Flask process terminated immediately. Check dependencies (pip install flask) or code errors.")
+				backend_port = self._start_backend(command, env, port, server_type_id)
+				if backend_port is None:
+					self.log_signal.emit(f"Flask process did not become ready. Check dependencies (pip install flask) or code errors.")
 					self.server_started.emit(False)
-					self.django_process = None
+					return False
+				if backend_port != port and not self._start_front(port, backend_port, server_type_id):
+					self.stop() # يوقف الخادم الخلفي ويعلن فشل التشغيل
 					return False
 
-				threading.Thread(target=self._monitor_django_logs, daemon=True).start()
 				self.log_signal.emit(f"Flask Server running at http://0.0.0.0:{port}")
+				self._start_watcher()
 				self.server_started.emit(True)
 				return True
 			except Exception as e:
@@ -155,32 +219,83 @@ class WebServer(QObject):
 				self.server_started.emit(False)
 				return False
 
+		elif server_type_id == "flask_prefork":
+			self.log_signal.emit(f"Starting Flask Application with the prefork WSGI server ({self.workers} workers)...")
+			try:
+				flask_file = os.path.join(project_path, 'app.py') 
+				if not os.path.exists(flask_file):
+					self.log_signal.emit(f"Error: Could not find main Flask file (e.g., app.py) in {project_path}")
+					self.server_started.emit(False)
+					return False
+
+				self.django_process = self._spawn_prefork(project_path, server_type_id)
+				if self.django_process is None:
+					self.log_signal.emit(f"WSGI server did not become ready. Check dependencies (pip install flask) or code errors.")
+					self.server_started.emit(False)
+					return False
+
+				self.log_signal.emit(f"Flask (prefork WSGI) Server running at http://0.0.0.0:{port}")
+				self._start_watcher()
+				self.server_started.emit(True)
+				return True
+			except Exception as e:
+				self.log_signal.emit(f"Failed to start prefork WSGI server: {e}")
+				self.django_process = None
+				self.server_started.emit(False)
+				return False
+
+		elif server_type_id == "flask_warm":
+			self.log_signal.emit(f"Starting Flask Application in a warm threaded WSGI host ({WSGI_THREADS} threads)...")
+			try:
+				flask_file = os.path.join(project_path, 'app.py') 
+				if not os.path.exists(flask_file):
+					self.log_signal.emit(f"Error: Could not find main Flask file (e.g., app.py) in {project_path}")
+					self.server_started.emit(False)
+					return False
+
+				self.django_process = self._spawn_prefork(project_path, server_type_id)
+				if self.django_process is None:
+					self.log_signal.emit(f"WSGI host did not become ready. Check dependencies (pip install flask) or code errors.")
+					self.server_started.emit(False)
+					return False
+
+				self.log_signal.emit(f"Flask (warm WSGI host) Server running at http://0.0.0.0:{port}")
+				self._start_watcher()
+				self.server_started.emit(True)
+				return True
+			except Exception as e:
+				self.log_signal.emit(f"Failed to start the warm WSGI host: {e}")
+				self.django_process = None
+				self.server_started.emit(False)
+				return False
+
 		elif server_type_id == "django":
 			self.log_signal.emit(f"Starting Django Application in '{self._get_project_name(project_path)}'...")
 			try:
-				command = [
-					sys.executable,
-					'manage.py', 
-					'runserver', 
-					f'0.0.0.0:{port}'
-				]
-				
-				self.django_process = subprocess.Popen(
-					command,
-					cwd=project_path,
-					stdout=subprocess.PIPE,
-					stderr=subprocess.PIPE
-				)
-				
-				time.sleep(1)
-				if self.django_process.poll() is not None:
-					self.log_signal.emit(f"Django process terminated immediately. Check dependencies (pip install django) or code errors.")
+				mounts = static_mounts(project_path) if DJANGO_SERVE_STATIC else []
+
+				def command(host, backend_port):
+					command = [
+						sys.executable,
+						'manage.py', 
+						'runserver', 
+						f'{host}:{backend_port}'
+					]
+					if self.auto_reload:
+						command.append('--noreload')
+					return command
+
+				backend_port = self._start_backend(command, self._python_env(), port, server_type_id, mounts)
+				if backend_port is None:
+					self.log_signal.emit(f"Django process did not become ready. Check dependencies (pip install django) or code errors.")
 					self.server_started.emit(False)
-					self.django_process = None
+					return False
+				if backend_port != port and not self._start_front(port, backend_port, server_type_id, mounts):
+					self.stop() # يوقف الخادم الخلفي ويعلن فشل التشغيل
 					return False
 
-				threading.Thread(target=self._monitor_django_logs, daemon=True).start()
 				self.log_signal.emit(f"Django Server running at http://0.0.0.0:{port}")
+				self._start_watcher()
 				self.server_started.emit(True)
 				return True
 			except FileNotFoundError:
@@ -194,9 +309,44 @@ class WebServer(QObject):
 				self.server_started.emit(False)
 				return False
 
+		elif server_type_id == "django_asgi":
+			self.log_signal.emit(f"Starting Django Application '{self._get_project_name(project_path)}' in ASGI mode ({self.workers} workers)...")
+			try:
+				if find_django_asgi_app(project_path) is None:
+					self.log_signal.emit(f"Error: Could not find the project's asgi.py in {project_path}")
+					self.server_started.emit(False)
+					return False
+
+				# لا نستخدم runserver، لذلك لا يوجد autoreloader يراقب الملفات
+				self.django_process = self._spawn_prefork(project_path, server_type_id)
+				if self.django_process is None:
+					self.log_signal.emit(f"ASGI server did not become ready. Check dependencies (pip install django) or code errors.")
+					self.server_started.emit(False)
+					return False
+
+				self.log_signal.emit(f"Django (ASGI) Server running at http://0.0.0.0:{port}")
+				self._start_watcher()
+				self.server_started.emit(True)
+				return True
+			except Exception as e:
+				self.log_signal.emit(f"Failed to start Django ASGI server: {e}")
+				self.django_process = None
+				self.server_started.emit(False)
+				return False
+
 		elif server_type_id == "php_server": 
 			self.log_signal.emit("Starting PHP Built-in Server...")
 			success = self._run_php_server(port, project_path)
+			if success:
+				self._start_watcher()
+			self.server_started.emit(success)
+			return success
+
+		elif server_type_id == "php_fastcgi":
+			self.log_signal.emit(f"Starting PHP FastCGI gateway with {self.workers} php-cgi workers...")
+			success = self._run_php_fastcgi(port, project_path)
+			if success:
+				self._start_watcher()
 			self.server_started.emit(success)
 			return success
 
@@ -205,6 +355,330 @@ class WebServer(QObject):
 			self.server_started.emit(False)
 			return False
 
+	def _backend_address(self, port, server_type_id, mounts=()):
+		"""Returns (host, port) for the backend process: an internal loopback port when a front server takes the public one."""
+		if mounts or self._uses_http_cache(server_type_id):
+			return "127.0.0.1", ephemeral_port()
+		return "0.0.0.0", port
+
+	def _uses_http_cache(self, server_type_id):
+		return self.http_cache_enabled and server_type_id in HTTP_CACHE_TYPES
+
+	def _start_backend(self, command, env, port, server_type_id, mounts=()):
+		"""Starts ``flask run``/``runserver`` and waits until it serves; returns the port it listens on, or None.
+
+		``command(host, port)`` builds the command line. These servers cannot
+		adopt a listening socket, so an internal port is free only when it is
+		picked; if another process binds it first, the backend exits and is
+		started again on a new port.
+		"""
+		for _ in range(BACKEND_PORT_ATTEMPTS):
+			host, backend_port = self._backend_address(port, server_type_id, mounts)
+			self.django_process = subprocess.Popen(
+				command(host, backend_port),
+				cwd=self.project_path,
+				stdout=subprocess.PIPE,
+				stderr=subprocess.PIPE,
+				env=env
+			)
+			
+			self._monitor_django_logs(self.django_process)
+
+			if self._await_ready(self.django_process, backend_port, server_type_id):
+				return backend_port
+			self.django_process = None
+			if backend_port == port or is_port_free(backend_port, host):
+				return None # فشل لا علاقة له بالمنفذ
+			self.log_signal.emit(f"Internal port {backend_port} was taken by another process; retrying on a new port...")
+		return None
+
+	def _start_front(self, port, backend_port, server_type_id, mounts=()):
+		"""Puts the HTTP cache and/or static mounts on the public port in front of the backend; returns success."""
+		if self._uses_http_cache(server_type_id):
+			disk = None
+			if HTTP_CACHE_DIR:
+				try:
+					disk = DiskTier(HTTP_CACHE_DIR, self.name)
+				except OSError as e:
+					self.log_signal.emit(f"HTTP cache disk tier disabled: {e}")
+			self.http_cache = HttpCache(disk=disk)
+		route = Route(self.name, ("127.0.0.1", backend_port), cache=self.http_cache)
+		if mounts:
+			# runserver لا يرى طلبات الملفات الثابتة أبداً، فنسجلها كلها هنا
+			self.httpd = DjangoGateway(
+				self.project_path, port, route, mounts,
+				log=lambda line: self.log_signal.emit(f"[SERVER]: {line}"),
+				proxy_log=self._cache_log
+			)
+			self.httpd.on_request = self._record_request
+		else:
+			self.httpd = FrontProxy(port, [route], log=self._cache_log)
+			self.httpd.on_request = lambda name, *request: self._record_request(*request)
+		try:
+			self.httpd.start()
+		except OSError as e:
+			self.log_signal.emit(f"Failed to listen on port {port}: {e}")
+			self.httpd = None
+			if self.http_cache is not None:
+				self.http_cache.close()
+				self.http_cache = None
+			return False
+		self.backend_port = backend_port
+		for mount in mounts:
+			self.log_signal.emit(f"Serving {mount.prefix} directly from {', '.join(mount.directories)}")
+		if self.http_cache is not None:
+			self.log_signal.emit(f"HTTP cache on port {port} in front of 127.0.0.1:{backend_port}")
+		else:
+			self.log_signal.emit(f"Dynamic requests go to 127.0.0.1:{backend_port}")
+		return True
+
+	def _cache_log(self, line):
+		# الطلبات التي تصل إلى الخادم الخلفي يسجلها هو بنفسه، فنسجل هنا ما خدمته الذاكرة فقط
+		if line.endswith(("(HIT)", "(REVALIDATED)")):
+			self.log_signal.emit(f"[SERVER]: {line}")
+
+	def _await_ready(self, process, port, server_type_id, ready_fd=None):
+		"""Waits until the backend accepts connections (or writes its ready pipe); stops it on timeout."""
+		timeout = READY_TIMEOUTS.get(server_type_id, DEFAULT_READY_TIMEOUT)
+		if ready_fd is not None:
+			result = wait_for_ready_fd(ready_fd, process, timeout)
+		else:
+			result = wait_until_ready(
+				port,
+				process=process,
+				health_path=HEALTH_PATHS.get(server_type_id),
+				timeout=timeout
+			)
+		if result.ready:
+			detail = f" ({result.reason})" if result.reason else ""
+			self.log_signal.emit(f"Server ready in {result.elapsed * 1000:.0f} ms{detail}")
+			return True
+
+		self.log_signal.emit(f"Server not ready after {result.elapsed:.2f} s: {result.reason}")
+		if not result.exited:
+			# العملية ما زالت تعمل لكنها لا تستجيب، لذلك نوقفها
+			try:
+				process.terminate()
+				process.wait(timeout=5)
+			except Exception:
+				process.kill()
+		return False
+
+	def _spawn_prefork(self, project_path, server_type_id):
+		"""Starts one prefork server generation on the manager-owned listening socket.
+
+		Returns the process once it reports ready, or None.
+		"""
+		module, app = PREFORK_MODULES[server_type_id]
+		if self.listen_socket is None:
+			self.listen_socket = bind_socket("0.0.0.0", self.port)
+		fd = self.listen_socket.fileno()
+		ready_r, ready_w = os.pipe()
+		command = [
+			sys.executable,
+			'-m',
+			module,
+			'--app', app,
+			'--host', '0.0.0.0',
+			'--port', str(self.port),
+			'--fd', str(fd),
+			'--ready-fd', str(ready_w)
+		]
+		pass_fds = [fd, ready_w]
+		control = host_end = None
+		if server_type_id == "flask_warm":
+			# قناة أوامر إعادة التحميل إلى المضيف الدافئ (يخرج المضيف عند إغلاقها)
+			control, host_end = socket.socketpair()
+			command += ['--threads', str(WSGI_THREADS), '--control-fd', str(host_end.fileno())]
+			pass_fds.append(host_end.fileno())
+		else:
+			command += ['--workers', str(self.workers)]
+		try:
+			process = subprocess.Popen(
+				command,
+				cwd=project_path,
+				stdout=subprocess.PIPE,
+				stderr=subprocess.PIPE,
+				env=self._python_env(),
+				pass_fds=pass_fds
+			)
+		except Exception:
+			os.close(ready_r)
+			if control is not None:
+				control.close()
+			if self.django_process is None:
+				self._close_listen_socket()
+			raise
+		finally:
+			os.close(ready_w)
+			if host_end is not None:
+				host_end.close()
+		process.control = control
+
+		self._monitor_django_logs(process)
+		if not self._await_ready(process, self.port, server_type_id, ready_fd=ready_r):
+			self._close_control(process)
+			# أثناء إعادة التحميل يبقى المقبس مفتوحاً لأن الجيل القديم ما زال يخدم عليه
+			if self.django_process is None:
+				self._close_listen_socket()
+			return None
+		return process
+
+	@staticmethod
+	def _close_control(process):
+		control = getattr(process, "control", None)
+		if control is not None:
+			control.close()
+			process.control = None
+
+	def _reload_warm_host(self):
+		"""Asks the warm WSGI host to re-import the project's modules.
+
+		Returns the host's answer (True/False), or None when the host cannot
+		be reached and a new host has to be started instead.
+		"""
+		control = getattr(self.django_process, "control", None)
+		if control is None:
+			return None
+		self.log_signal.emit("Reloading: re-importing the project's modules in the warm host...")
+		try:
+			control.settimeout(READY_TIMEOUTS.get(self.server_type, DEFAULT_READY_TIMEOUT))
+			control.sendall(b"reload\n")
+			reply = b""
+			while not reply.endswith(b"\n"):
+				data = control.recv(4096)
+				if not data:
+					break
+				reply += data
+		except OSError as e:
+			self.log_signal.emit(f"Warm host did not answer: {e}")
+			return None
+		if not reply.endswith(b"\n"):
+			return None
+		status, _, detail = reply.decode("utf-8", "replace").strip().partition(" ")
+		if status == "ok":
+			self.log_signal.emit(f"Reload complete in {detail} ms; the interpreter and libraries stayed loaded.")
+			return True
+		self.log_signal.emit(f"Reload failed ({detail}); the previous code keeps serving.")
+		return False
+
+	def _close_listen_socket(self):
+		if self.listen_socket is not None:
+			self.listen_socket.close()
+			self.listen_socket = None
+
+	def reload(self):
+		"""Replaces the running backend with a fresh generation; returns success.
+
+		Prefork servers get the manager-owned socket, so the port never closes:
+		the new generation starts accepting before the old one is told to drain
+		and exit. The FastCGI gateway swaps in a new php-cgi pool the same way,
+		the warm Flask host re-imports only the project's modules in place,
+		and the static engine only drops its caches. runserver, flask run and
+		php -S cannot adopt a socket, so they fall back to stop/start.
+		"""
+		if not self.is_running():
+			self.log_signal.emit("Reload skipped: no server is running.")
+			return False
+
+		if self.server_type == "flask_warm":
+			reloaded = self._reload_warm_host()
+			if reloaded is not None:
+				return reloaded
+
+		if self.server_type in PREFORK_MODULES:
+			self.log_signal.emit("Reloading: starting a new worker generation on the same socket...")
+			old = self.django_process
+			try:
+				new = self._spawn_prefork(self.project_path, self.server_type)
+			except Exception as e:
+				self.log_signal.emit(f"Reload failed: {e}")
+				new = None
+			if new is None:
+				self.log_signal.emit("Reload failed; the previous generation keeps serving.")
+				return False
+			self.django_process = new
+			threading.Thread(target=self._retire, args=(old,), daemon=True).start()
+			self.log_signal.emit("Reload complete; draining the previous generation.")
+			return True
+
+		if self.server_type == "php_fastcgi":
+			return self._reload_php_fastcgi()
+
+		if self.server_type == "http.server":
+			self.httpd.loop.call_soon_threadsafe(self.httpd.cache.clear)
+			self.log_signal.emit("Reload complete; static file cache cleared.")
+			return True
+
+		self.log_signal.emit(f"'{self.server_type}' cannot hand over its socket; restarting.")
+		return self.start(self.project_path, self.port, self.server_type, self.workers, self.http_cache_enabled)
+
+	def _start_watcher(self):
+		"""Watches the project folder so source edits trigger reload() (not used by the static engine, which watches itself)."""
+		if not self.auto_reload:
+			return
+		try:
+			self.watcher = ProjectWatcher(self.project_path, self._on_project_change)
+		except OSError as e:
+			self.log_signal.emit(f"File watching disabled: {e}")
+			return
+		self.watcher.start()
+
+	def _stop_watcher(self):
+		if self.watcher is not None:
+			self.watcher.stop()
+			self.watcher = None
+
+	def _on_project_change(self, kind, paths):
+		"""Runs on the watcher thread after a debounced burst of changes."""
+		self.files_changed.emit(paths)
+		if self.http_cache is not None and self.httpd is not None:
+			# القوالب والملفات الأخرى قد تغير أي صفحة، فنفرغ الذاكرة كلها
+			self.httpd.loop.call_soon_threadsafe(self.http_cache.clear)
+		# PHP (المدمج و php-cgi) يعيد قراءة السكربتات مع كل طلب، فلا حاجة لإعادة تشغيله
+		if self.server_type == "php_fastcgi":
+			if not any(os.path.basename(p) in PHP_CONFIG_FILES for p in paths):
+				return
+		elif kind != CHANGE_CODE or self.server_type == "php_server":
+			return
+		names = ", ".join(os.path.relpath(p, self.project_path) for p in paths[:3])
+		more = f" and {len(paths) - 3} more" if len(paths) > 3 else ""
+		self.log_signal.emit(f"Detected changes in {names}{more}; reloading...")
+		self.reload()
+
+	def _retire(self, process):
+		"""Asks an old generation to finish in-flight requests and exit."""
+		self._close_control(process)
+		try:
+			process.terminate()
+			process.wait(timeout=RETIRE_TIMEOUT)
+		except Exception:
+			process.kill()
+
+	def _reload_php_fastcgi(self):
+		"""Starts a new php-cgi pool, points the gateway at it and retires the old pool once idle."""
+		self.log_signal.emit(f"Reloading: starting {self.workers} new php-cgi workers...")
+		try:
+			processes, socket_paths, socket_dir = start_php_cgi_pool(self.project_path, self.workers)
+		except FileNotFoundError:
+			self.log_signal.emit("Reload failed: 'php-cgi' command not found.")
+			return False
+		for process in processes:
+			self._register_php_cgi(process)
+		error = wait_for_sockets(processes, socket_paths)
+		if error:
+			self.log_signal.emit(f"Reload failed: {error}; the previous pool keeps serving.")
+			self._stop_php_cgi_pool(processes, socket_dir)
+			return False
+
+		with self._php_lock:
+			old_processes, old_socket_dir = self.php_cgi_processes, self.php_socket_dir
+			self.php_cgi_processes, self.php_socket_dir = processes, socket_dir
+		self.httpd.replace_pool(socket_paths)
+		self._stop_php_cgi_pool(old_processes, old_socket_dir)
+		self.log_signal.emit("Reload complete; php-cgi pool replaced.")
+		return True
+
 	def _run_php_server(self, port, doc_root):
 		"""Runs the PHP built-in server in a subprocess and monitors its output."""
 		try:
@@ -218,27 +692,28 @@ class WebServer(QObject):
 				# "router.php"  # <--- تأكد من إزالة هذا العنصر أو وضعه كتعليق
 			]
 
+			env = os.environ.copy()
+			if self.workers > 1:
+				# PHP >= 7.4 يوزع الطلبات على عدة عمليات بدلاً من طلب واحد في كل مرة
+				env["PHP_CLI_SERVER_WORKERS"] = str(self.workers)
+
 			self.php_process = subprocess.Popen(
 				command,
 				cwd=doc_root,
 				stdout=subprocess.PIPE,
 				stderr=subprocess.PIPE,
-				text=True,
-				bufsize=1
+				env=env
 			)
 
-			
-			time.sleep(2)
-			if self.php_process.poll() is not None:
-				self.log_signal.emit(f"PHP process terminated immediately. Check PHP installation (php -v) or port conflict.")
+			self._monitor_php_logs(self.php_process)
+
+			if not self._await_ready(self.php_process, port, "php_server"):
+				self.log_signal.emit(f"PHP process did not become ready. Check PHP installation (php -v) or port conflict.")
 				self.php_process = None
 				return False
 
 			self.log_signal.emit(f"PHP Server running at http://{host}:{port}")
 			self.log_signal.emit(f"Document Root: {doc_root}")
-			
-			self.server_thread = threading.Thread(target=self._monitor_php_logs, daemon=True)
-			self.server_thread.start()
 
 		except FileNotFoundError:
 			self.log_signal.emit("Error: 'php' command not found. Please ensure PHP CLI is installed and in your system's PATH.")
@@ -251,77 +726,168 @@ class WebServer(QObject):
 
 		return True
 
-	def _monitor_php_logs(self):
-		"""Monitors stdout and stderr for the PHP server process."""
-		# FIX: استخدام مرجع محلي لتجنب سباق الشروط (Race Condition)
-		process = self.php_process 
-		if process is None:
-			return
-
+	def _run_php_fastcgi(self, port, doc_root):
+		"""Starts a pool of php-cgi processes and the in-process FastCGI gateway in front of them."""
 		try:
-			if process.stdout:
-				for line in iter(process.stdout.readline, ''):
-					if line:
-						self.log_signal.emit(f"[PHP]: {line.strip()}")
+			self.php_cgi_processes, socket_paths, self.php_socket_dir = start_php_cgi_pool(doc_root, self.workers)
+			for process in self.php_cgi_processes:
+				self._register_php_cgi(process)
+
+			error = wait_for_sockets(self.php_cgi_processes, socket_paths)
+			if error:
+				self.log_signal.emit(f"php-cgi pool did not become ready: {error}")
+				self._stop_php_cgi_pool()
+				return False
 
-			if process.stderr:
-				for line in iter(process.stderr.readline, ''):
-					if line:
-						self.log_signal.emit(f"[PHP-LOG]: {line.strip()}")
+			self.httpd = FastCGIGateway(
+				doc_root,
+				port,
+				socket_paths,
+				log=lambda line: self.log_signal.emit(f"[SERVER]: {line}"),
+				php_log=lambda line: self.log_signal.emit(f"[PHP-LOG]: {line}")
+			)
+			self.httpd.on_request = self._record_request
+			self.httpd.start()
 
+			self.log_signal.emit(f"PHP FastCGI Server running at http://0.0.0.0:{port}")
+			self.log_signal.emit(f"Document Root: {doc_root}")
+			return True
+		except FileNotFoundError:
+			self.log_signal.emit("Error: 'php-cgi' command not found. Please install the PHP CGI binary (php-cgi).")
+			self._stop_php_cgi_pool()
+			return False
 		except Exception as e:
-			self.log_signal.emit(f"[PHP Monitor Error]: {e}")
-		finally:
-			if process:
-				process.wait()
-				if process.stdout:
-					process.stdout.close()
-				if process.stderr:
-					process.stderr.close()
-			
-			self.log_signal.emit("PHP process terminated.")
-			
-			# FIX: شرط إضافي قبل تعيين المتغير العام لـ None
-			if self.php_process is process:
-				self.php_process = None
-			
-	def _monitor_django_logs(self):
-		"""Monitors stdout and stderr for Django/Flask/Static process."""
-		# FIX: استخدام مرجع محلي لتجنب سباق الشروط (Race Condition)
-		process = self.django_process
-		if process is None:
-			return
-			
-		try:
-			if process.stdout:
-				for line in process.stdout:
-					self.log_signal.emit(f"[SERVER]: {line.decode().strip()}")
-			if process.stderr:
-				for line in process.stderr:
-					self.log_signal.emit(f"[SERVER-ERR]: {line.decode().strip()}")
-		except Exception as e:
-			self.log_signal.emit(f"[Monitor Error]: {e}")
-		finally:
-			if process:
-				process.wait()
-				# التأكد من وجود stdout/stderr قبل الإغلاق
-				if process.stdout: 
-					process.stdout.close()
-				if process.stderr:
-					process.stderr.close()
-				self.log_signal.emit("Python Server Process terminated.")
-				
-				# FIX: شرط إضافي قبل تعيين المتغير العام لـ None
-				if self.django_process is process: 
-					self.django_process = None
+			self.log_signal.emit(f"Failed to start PHP FastCGI server: {e}")
+			self.httpd = None
+			self._stop_php_cgi_pool()
+			return False
+
+	def _register_php_cgi(self, process):
+		process.started_at = time.monotonic()
+		self.log_pump.register(process, self.log_signal.emit, labels=("[PHP-CGI]", "[PHP-LOG]"), on_exit=self._on_php_cgi_exit)
+
+	def _on_php_cgi_exit(self, process):
+		"""Replaces a php-cgi worker of the current pool that died; its socket path stays the same."""
+		process.wait()
+		with self._php_lock:
+			# عمليات أوقفناها نحن (إيقاف أو إعادة تحميل) لم تعد في القائمة
+			if process not in self.php_cgi_processes:
+				return
+			index = self.php_cgi_processes.index(process)
+			if time.monotonic() - process.started_at < PHP_CGI_MIN_UPTIME:
+				self.log_signal.emit(f"php-cgi worker exited with code {process.returncode} right after starting; not restarting it.")
+				return
+			self.log_signal.emit(f"php-cgi worker (pid {process.pid}) exited with code {process.returncode}; starting a replacement.")
+			try:
+				replacement = spawn_php_cgi(self.project_path, process.socket_path)
+			except OSError as e:
+				self.log_signal.emit(f"Could not restart php-cgi: {e}")
+				return
+			self.php_cgi_processes[index] = replacement
+		self._register_php_cgi(replacement)
+
+	def _stop_php_cgi_pool(self, processes=None, socket_dir=None):
+		"""Terminates php-cgi workers (the current pool by default) and removes their socket directory."""
+		if processes is None:
+			with self._php_lock:
+				processes, socket_dir = self.php_cgi_processes, self.php_socket_dir
+				self.php_cgi_processes, self.php_socket_dir = [], None
+		for process in processes:
+			try:
+				process.terminate()
+				process.wait(timeout=5)
+			except Exception:
+				process.kill()
+		if socket_dir:
+			shutil.rmtree(socket_dir, ignore_errors=True)
+
+	def process_roots(self):
+		"""Returns [(pid, include children)] for the processes serving this backend."""
+		roots = []
+		# المحرك المدمج يعمل داخل عمليتنا، لذلك تشمل أرقامه الواجهة أو الخدمة أيضاً
+		if self.httpd is not None:
+			roots.append((os.getpid(), False))
+		for process in [self.django_process, self.php_process] + self.php_cgi_processes:
+			if process is not None and process.poll() is None:
+				roots.append((process.pid, True))
+		return roots
+
+	def _resource_alert(self, message):
+		self.log_signal.emit(f"[{self.name}] {message}")
+
+	def _record_request(self, method, path, status, size, seconds):
+		"""Called by the in-process engines with a directly measured latency."""
+		self.metrics.record(self.name, method, path, status, size, seconds)
+
+	def _process_log(self, line):
+		"""Log sink for backend processes: counts access-log lines, then forwards them."""
+		if self.backend_port is None:
+			# خلف الخادم الأمامي يُقاس كل طلب مباشرة
+			self.metrics.observe_log_line(self.name, line)
+		self.log_signal.emit(line)
+
+	def _monitor_php_logs(self, process):
+		"""Hands the PHP server's stdout/stderr to the shared log pump."""
+		self.log_pump.register(
+			process,
+			self._process_log,
+			labels=("[PHP]", "[PHP-LOG]"),
+			on_exit=self._on_php_exit
+		)
+
+	def _on_php_exit(self, process):
+		"""Called by the log pump once both pipes of the PHP process are closed."""
+		process.wait()
+		self.log_signal.emit("PHP process terminated.")
+
+		# FIX: شرط إضافي قبل تعيين المتغير العام لـ None
+		if self.php_process is process:
+			self.php_process = None
+
+	def _monitor_django_logs(self, process):
+		"""Hands the Django/Flask/Static process's stdout/stderr to the shared log pump."""
+		self.log_pump.register(
+			process,
+			self._process_log,
+			labels=("[SERVER]", "[SERVER-ERR]"),
+			on_exit=self._on_django_exit
+		)
+
+	def _on_django_exit(self, process):
+		"""Called by the log pump once both pipes of the Python server process are closed."""
+		process.wait()
+		self.log_signal.emit("Python Server Process terminated.")
+
+		# FIX: شرط إضافي قبل تعيين المتغير العام لـ None
+		if self.django_process is process:
+			self.django_process = None
 
 	def stop(self):
 		"""Stops the currently running web server."""
+		self._stop_watcher()
+		self.sampler.unwatch(self.name)
 		self.server_started.emit(False) 
 
-		# 1. إيقاف عملية Static/Django/Flask
+		# 0. إيقاف الخادم المدمج (الملفات الثابتة أو بوابة FastCGI)
+		if self.httpd:
+			self.log_signal.emit("Stopping built-in server...")
+			self.httpd.stop()
+			self.httpd = None
+			self.log_signal.emit("Built-in server stopped.")
+		if self.http_cache is not None:
+			self.http_cache.close()
+			self.http_cache = None
+		self.backend_port = None
+
+		# عمليات php-cgi تُوقف بعد البوابة التي تستخدمها
+		if self.php_cgi_processes:
+			self.log_signal.emit("Stopping php-cgi workers...")
+			self._stop_php_cgi_pool()
+
+		# 1. إيقاف عملية Django/Flask
 		if self.django_process:
 			self.log_signal.emit("Stopping Python Server Process...")
+			self._close_control(self.django_process)
 			try:
 				self.django_process.terminate()
 				self.django_process.wait(timeout=5)
@@ -329,6 +895,7 @@ class WebServer(QObject):
 				self.django_process.kill()
 			self.django_process = None # يتم تعيينه لـ None لتجنب رؤية عملية قديمة في start()
 			self.log_signal.emit("Python Server Process stopped.")
+		self._close_listen_socket()
 			
 		# 2. إيقاف عملية PHP
 		if self.php_process:
@@ -343,50 +910,19 @@ class WebServer(QObject):
 			
 		self.log_signal.emit("Server stopped successfully")
 		
-	# أضف هذه الدالة داخل كلاس WebServer في ملف web_server.py
 	def kill_port_process(self, port):
-		try:
-			# أمر لينكس لقتل العملية التي تشغل منفذ معين
-			subprocess.run(["fuser", "-k", f"{port}/tcp"], check=True)
-			self.log_signal.emit(f"Successfully cleared port {port}.")
-			return True
-		except subprocess.CalledProcessError:
-			self.log_signal.emit(f"No active process found on port {port} or permission denied.")
+		"""Terminates the processes listening on ``port`` (found through /proc, not fuser)."""
+		killed, failed = kill_port_owners(port)
+		for owner in killed:
+			self.log_signal.emit(f"Stopped {owner.describe()}.")
+		for owner in failed:
+			if owner.pid == os.getpid():
+				self.log_signal.emit(f"Port {port} belongs to this server; use Stop Server instead.")
+			else:
+				self.log_signal.emit(f"WARNING: cannot stop {owner.describe()} (permission denied).")
+		if not killed and not failed:
+			self.log_signal.emit(f"No process is listening on port {port}.")
 			return False
-
-# Workers for QThreads (دوال مساعدة لـ PyQt5)
-class ServerStarter(QObject):
-	finished = pyqtSignal(bool)
-	error = pyqtSignal(str)
-
-	def __init__(self, server_instance, project_path, port, server_type_id):
-		super().__init__()
-		self.server_instance = server_instance
-		self.project_path = project_path
-		self.port = port
-		self.server_type_id = server_type_id
-
-	def start_server(self):
-		try:
-			success = self.server_instance.start(self.project_path, self.port, self.server_type_id)
-			self.finished.emit(success)
-		except Exception as e:
-			self.error.emit(f"Failed to start server: {e}")
-			self.finished.emit(False)
-
-class ServerStopper(QObject):
-	finished = pyqtSignal()
-	error = pyqtSignal(str)
-
-	def __init__(self, server_instance):
-		super().__init__()
-		self.server_instance = server_instance
-
-	def stop_server(self):
-		try:
-			self.server_instance.stop()
-			self.finished.emit()
-		except Exception as e:
-			self.error.emit(f"Failed to stop server: {e}")
-			self.finished.emit()
-
+		if killed and not failed:
+			self.log_signal.emit(f"Successfully cleared port {port}.")
+		return not failed
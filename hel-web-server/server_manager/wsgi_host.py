@@ -0,0 +1,107 @@
+# server_manager/wsgi_host.py
+"""Warm, single-process threaded WSGI host with in-place code reloads.
+
+Run as ``python -m server_manager.wsgi_host --app app:app --fd N`` from
+the project folder; the manager uses it for the warm Flask mode. The
+application is served from one bounded thread pool (see WorkerServer).
+
+With ``--control-fd`` the host reads commands from a socket the manager
+holds. ``reload`` drops only the project's own modules from sys.modules
+and imports the application again, so the interpreter, Flask and every
+other library stay loaded; the answer is ``ok <ms>`` or ``error <reason>``.
+New requests go to the new application while running ones finish on the
+old one, and if the new code fails to import the old application keeps
+serving. The host exits when the manager closes the control socket.
+"""
+import argparse
+import importlib
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+
+from .config import WSGI_THREADS
+from .prefork import bind_socket
+from .wsgi_server import WorkerServer, load_app
+
+# وحدات المكتبات المثبتة داخل مجلد المشروع (بيئة افتراضية) لا يُعاد تحميلها
+LIBRARY_DIRS = ("site-packages", "dist-packages")
+
+
+def project_modules(root):
+	"""Names of the imported modules whose source file lives in the project (outside installed libraries)."""
+	root = os.path.realpath(root) + os.sep
+	names = []
+	for name, module in list(sys.modules.items()):
+		path = getattr(module, "__file__", None)
+		if not path or name == "__main__" or name.split(".")[0] == __package__:
+			continue
+		path = os.path.realpath(path)
+		if path.startswith(root) and not any(part in LIBRARY_DIRS for part in path[len(root):].split(os.sep)):
+			names.append(name)
+	return names
+
+
+def reload_app(spec, root):
+	"""Forgets the project's modules and imports the application again; raises if the new code fails."""
+	for name in project_modules(root):
+		del sys.modules[name]
+	importlib.invalidate_caches()
+	return load_app(spec)
+
+
+def serve_control(conn, server, spec, root):
+	"""Answers the manager's commands until it closes the socket, then stops the server."""
+	with conn, conn.makefile("rb") as commands:
+		for line in commands:
+			command = line.strip()
+			if command == b"reload":
+				started = time.monotonic()
+				try:
+					app = reload_app(spec, root)
+				except BaseException as e:
+					traceback.print_exc()
+					reply = f"error {type(e).__name__}: {e}"
+				else:
+					server.app = app
+					reply = f"ok {(time.monotonic() - started) * 1000:.1f}"
+			elif command == b"ping":
+				reply = "ok"
+			else:
+				reply = f"error unknown command {command.decode(errors='replace')!r}"
+			sys.stderr.flush()
+			conn.sendall(reply.replace("\n", " ").encode() + b"\n")
+	# المدير أغلق القناة (أو انتهى): ننهي الطلبات الجارية ونخرج
+	server.stopping.set()
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Warm threaded WSGI host used by Hel-Web-Server")
+	parser.add_argument("--app", default="app:app", help="module:attribute of the WSGI application")
+	parser.add_argument("--host", default="0.0.0.0")
+	parser.add_argument("--port", type=int, default=8000)
+	parser.add_argument("--threads", type=int, default=WSGI_THREADS)
+	parser.add_argument("--fd", type=int, default=None, help="inherited listening socket")
+	parser.add_argument("--ready-fd", type=int, default=None, help="pipe written to once the application is serving")
+	parser.add_argument("--control-fd", type=int, default=None, help="socket the manager sends reload commands on")
+	args = parser.parse_args(argv)
+
+	# لا PR_SET_PDEATHSIG هنا: الإشارة مرتبطة بالخيط الذي شغّل العملية وليس بالمدير،
+	# والواجهة تشغّل الخوادم من خيوط قصيرة العمر. نهاية قناة التحكم تكفي لمعرفة موت المدير.
+	sock = bind_socket(args.host, args.port, fd=args.fd)
+	app = load_app(args.app)
+	server = WorkerServer(sock, app, args.threads, multiprocess=False)
+	if args.control_fd is not None:
+		control = socket.socket(fileno=args.control_fd)
+		threading.Thread(target=serve_control, args=(control, server, args.app, os.getcwd()), name="wsgi-control", daemon=True).start()
+	if args.ready_fd is not None:
+		os.write(args.ready_fd, b"1")
+		os.close(args.ready_fd)
+	server.serve_forever()
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
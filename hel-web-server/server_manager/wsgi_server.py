@@ -0,0 +1,351 @@
+# server_manager/wsgi_server.py
+"""Prefork, thread-pooled HTTP/1.1 WSGI server.
+
+Run as ``python -m server_manager.wsgi_server --app app:app`` from the
+project folder; the manager uses it for the production Flask mode.
+"""
+import argparse
+import importlib
+import io
+import os
+import queue
+import selectors
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import unquote_to_bytes
+
+from .config import DEFAULT_WORKERS, WSGI_THREADS
+from .http_util import BadRequest, PayloadTooLarge, MAX_BODY_BYTES
+from .prefork import PreforkMaster
+
+KEEPALIVE_TIMEOUT = 5
+SERVER_SOFTWARE = "Hel-Web-Server-WSGI"
+
+
+def load_app(spec):
+	"""Imports ``module:attribute`` from the current directory."""
+	module_name, _, attr = spec.partition(":")
+	if os.getcwd() not in sys.path:
+		sys.path.insert(0, os.getcwd())
+	module = importlib.import_module(module_name)
+	return getattr(module, attr or "app")
+
+
+class WSGIRequestHandler(BaseHTTPRequestHandler):
+	"""Runs one WSGI request per parsed HTTP request; keeps HTTP/1.1 connections alive."""
+	protocol_version = "HTTP/1.1"
+	server_version = SERVER_SOFTWARE
+	timeout = KEEPALIVE_TIMEOUT
+
+	def handle_one_request(self):
+		try:
+			self.raw_requestline = self.rfile.readline(65537)
+		except (socket.timeout, ConnectionError):
+			self.close_connection = True
+			return
+		if len(self.raw_requestline) > 65536:
+			self.send_error(414)
+			return
+		if not self.raw_requestline:
+			self.close_connection = True
+			return
+		if not self.parse_request():
+			return
+		self.run_wsgi()
+		self.wfile.flush()
+
+	def make_environ(self):
+		path, _, query = self.path.partition("?")
+		environ = {
+			"REQUEST_METHOD": self.command,
+			"SCRIPT_NAME": "",
+			# حسب PEP 3333: المسار بعد فك الترميز، كبايتات مفسرة بـ latin-1
+			"PATH_INFO": unquote_to_bytes(path or "/").decode("latin-1"),
+			"QUERY_STRING": query,
+			"SERVER_NAME": self.server.server_name,
+			"SERVER_PORT": str(self.server.server_port),
+			"SERVER_PROTOCOL": self.request_version,
+			"REMOTE_ADDR": self.client_address[0],
+			"REMOTE_PORT": str(self.client_address[1]),
+			"SERVER_SOFTWARE": SERVER_SOFTWARE,
+			"wsgi.version": (1, 0),
+			"wsgi.url_scheme": "http",
+			"wsgi.errors": sys.stderr,
+			"wsgi.multithread": True,
+			"wsgi.multiprocess": self.server.multiprocess,
+			"wsgi.run_once": False,
+		}
+
+		for name, value in self.headers.items():
+			key = name.upper().replace("-", "_")
+			if key == "CONTENT_TYPE" or key == "CONTENT_LENGTH":
+				environ[key] = value
+			else:
+				key = "HTTP_" + key
+				if key in environ:
+					environ[key] += "," + value
+				else:
+					environ[key] = value
+
+		length = self.headers.get("Content-Length")
+		if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+			body = self._read_chunked()
+			environ["CONTENT_LENGTH"] = str(len(body))
+			environ["wsgi.input"] = io.BytesIO(body)
+		elif length and length.isdigit():
+			if int(length) > MAX_BODY_BYTES:
+				raise PayloadTooLarge(f"request body larger than {MAX_BODY_BYTES} bytes")
+			environ["wsgi.input"] = io.BytesIO(self.rfile.read(int(length)))
+		else:
+			environ["wsgi.input"] = io.BytesIO(b"")
+		return environ
+
+	def _read_chunked(self):
+		"""Reads a chunked body; raises BadRequest or PayloadTooLarge (MAX_BODY_BYTES)."""
+		chunks, total = [], 0
+		while True:
+			try:
+				size = int(self.rfile.readline(1024).split(b";", 1)[0].strip(), 16)
+			except ValueError:
+				raise BadRequest("invalid chunk size")
+			if size == 0:
+				while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+					pass
+				return b"".join(chunks)
+			total += size
+			if total > MAX_BODY_BYTES:
+				raise PayloadTooLarge(f"request body larger than {MAX_BODY_BYTES} bytes")
+			chunk = self.rfile.read(size)
+			if len(chunk) < size:
+				raise BadRequest("truncated chunk")
+			chunks.append(chunk)
+			self.rfile.readline()
+
+	def run_wsgi(self):
+		try:
+			environ = self.make_environ()
+		except (BadRequest, socket.timeout, ConnectionError) as e:
+			# بقية الجسم ما زالت في الاتصال (أو لم تصل)، فلا يمكن قراءة طلب تالٍ منه
+			self.close_connection = True
+			if isinstance(e, BadRequest):
+				self.send_error(413 if isinstance(e, PayloadTooLarge) else 400)
+			return
+		state = {"status": None, "headers": None, "sent": False, "chunked": False}
+
+		def start_response(status, headers, exc_info=None):
+			if exc_info and state["sent"]:
+				raise exc_info[1].with_traceback(exc_info[2])
+			state["status"] = status
+			state["headers"] = headers
+			return write
+
+		def send_head():
+			code, _, reason = state["status"].partition(" ")
+			self.send_response(int(code), reason)
+			names = set()
+			for name, value in state["headers"]:
+				self.send_header(name, value)
+				names.add(name.lower())
+			if "content-length" not in names:
+				if self.request_version == "HTTP/1.1" and int(code) >= 200 and int(code) not in (204, 304):
+					self.send_header("Transfer-Encoding", "chunked")
+					state["chunked"] = True
+				else:
+					self.close_connection = True
+			if self.close_connection:
+				self.send_header("Connection", "close")
+			self.end_headers()
+			state["sent"] = True
+
+		def write(data):
+			if not state["sent"]:
+				send_head()
+			if not data or self.command == "HEAD":
+				return
+			if state["chunked"]:
+				self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+			else:
+				self.wfile.write(data)
+
+		try:
+			# يُقرأ مع كل طلب: المضيف الدافئ قد يبدّل التطبيق بعد إعادة التحميل
+			result = self.server.app(environ, start_response)
+			try:
+				for data in result:
+					write(data)
+				if not state["sent"]:
+					send_head()
+				if state["chunked"] and self.command != "HEAD":
+					self.wfile.write(b"0\r\n\r\n")
+			finally:
+				if hasattr(result, "close"):
+					result.close()
+		except (ConnectionError, socket.timeout):
+			self.close_connection = True
+		except Exception:
+			traceback.print_exc()
+			self.close_connection = True
+			if not state["sent"]:
+				self.send_error(500)
+
+
+class WorkerServer:
+	"""One worker: accepts on the shared socket and handles requests in a thread pool.
+
+	A thread only holds a connection while a request is being handled.
+	Idle keep-alive connections wait in a selector on the accepting thread
+	and go back to the pool when their next request arrives, so a few
+	slow or idle clients cannot use up every thread.
+	"""
+
+	def __init__(self, sock, app, threads, multiprocess=True):
+		self.socket = sock
+		self.app = app
+		self.multiprocess = multiprocess
+		host, port = sock.getsockname()[:2]
+		# لا نستخدم getfqdn() لتجنب استعلامات DNS البطيئة
+		self.server_name = host if host not in ("0.0.0.0", "") else "localhost"
+		self.server_port = port
+		self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi")
+		self.stopping = threading.Event()
+		self._returned = queue.SimpleQueue() # اتصالات أنهت طلبها وتعود إلى الانتظار
+		self._wake_r, self._wake_w = socket.socketpair()
+		self._wake_r.setblocking(False)
+		self._wake_w.setblocking(False)
+
+	def _open(self, conn, address):
+		"""Sets up a request handler for a new connection without serving anything yet."""
+		handler = WSGIRequestHandler.__new__(WSGIRequestHandler)
+		handler.request, handler.client_address, handler.server = conn, address, self
+		handler.setup()
+		return handler
+
+	@staticmethod
+	def _close(handler):
+		try:
+			handler.finish()
+		except OSError:
+			pass
+		try:
+			handler.connection.shutdown(socket.SHUT_WR)
+		except OSError:
+			pass
+		handler.connection.close()
+
+	@staticmethod
+	def _has_buffered_request(handler):
+		"""True if the next (pipelined) request is already readable without waiting."""
+		conn = handler.connection
+		conn.setblocking(False)
+		try:
+			return bool(handler.rfile.peek(1))
+		except OSError:
+			return False
+		finally:
+			conn.settimeout(KEEPALIVE_TIMEOUT)
+
+	def _serve(self, handler):
+		"""Handles the requests that are ready on one connection, then hands it back to the selector."""
+		try:
+			while True:
+				handler.close_connection = True
+				handler.handle_one_request()
+				handler.wfile.flush()
+				if handler.close_connection or self.stopping.is_set():
+					self._close(handler)
+					return
+				# طلب تالٍ موجود في ذاكرة القراءة لن يظهر للـ selector
+				if not self._has_buffered_request(handler):
+					break
+		except Exception:
+			self._close(handler)
+			return
+		self._returned.put(handler)
+		try:
+			self._wake_w.send(b"\0")
+		except OSError:
+			pass # القناة ممتلئة: الخيط الرئيسي مستيقظ أصلاً
+
+	def serve_forever(self):
+		def graceful(signum, frame):
+			# نتوقف عن قبول اتصالات جديدة ونكمل الطلبات الجارية.
+			# لا نستخدم shutdown() لأن المقبس قد يكون مشتركاً مع عمليات أخرى.
+			self.stopping.set()
+
+		signal.signal(signal.SIGTERM, graceful)
+		self.socket.setblocking(False)
+		selector = selectors.DefaultSelector()
+		selector.register(self.socket, selectors.EVENT_READ)
+		selector.register(self._wake_r, selectors.EVENT_READ)
+		idle = {} # handler -> وقت آخر طلب
+		while not self.stopping.is_set():
+			for key, _ in selector.select(timeout=1.0):
+				if key.fileobj is self.socket:
+					try:
+						conn, address = self.socket.accept()
+					except (BlockingIOError, InterruptedError):
+						continue # عامل آخر سبقنا إلى الاتصال
+					conn.settimeout(KEEPALIVE_TIMEOUT)
+					conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+					self.pool.submit(self._serve, self._open(conn, address))
+				elif key.fileobj is self._wake_r:
+					try:
+						self._wake_r.recv(4096)
+					except BlockingIOError:
+						pass
+					while True:
+						try:
+							handler = self._returned.get_nowait()
+						except queue.Empty:
+							break
+						idle[handler] = time.monotonic()
+						selector.register(handler.connection, selectors.EVENT_READ, handler)
+				else:
+					# الطلب التالي وصل: يعود الاتصال إلى خيط من المجموعة
+					handler = key.data
+					selector.unregister(handler.connection)
+					del idle[handler]
+					self.pool.submit(self._serve, handler)
+			deadline = time.monotonic() - KEEPALIVE_TIMEOUT
+			for handler in [h for h, since in idle.items() if since < deadline]:
+				selector.unregister(handler.connection)
+				del idle[handler]
+				self._close(handler)
+		selector.close()
+		self.socket.close()
+		for handler in idle:
+			self._close(handler)
+		self.pool.shutdown(wait=True)
+		while not self._returned.empty():
+			self._close(self._returned.get_nowait())
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Prefork WSGI server used by Hel-Web-Server")
+	parser.add_argument("--app", default="app:app", help="module:attribute of the WSGI application")
+	parser.add_argument("--host", default="0.0.0.0")
+	parser.add_argument("--port", type=int, default=8000)
+	parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+	parser.add_argument("--threads", type=int, default=WSGI_THREADS)
+	parser.add_argument("--fd", type=int, default=None, help="inherited listening socket")
+	parser.add_argument("--ready-fd", type=int, default=None, help="pipe written to once the workers are running")
+	args = parser.parse_args(argv)
+
+	# التحميل المسبق في العملية الرئيسية: الأخطاء تظهر مبكراً والعمال يشاركون الذاكرة بعد fork
+	app = load_app(args.app)
+
+	def worker_main(sock, index):
+		WorkerServer(sock, app, args.threads, multiprocess=args.workers > 1).serve_forever()
+
+	master = PreforkMaster(args.host, args.port, args.workers, worker_main, fd=args.fd, name="wsgi", ready_fd=args.ready_fd)
+	return master.run()
+
+
+if __name__ == "__main__":
+	sys.exit(main())
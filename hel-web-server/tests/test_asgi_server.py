@@ -0,0 +1,129 @@
+# tests/test_asgi_server.py
+"""The prefork ASGI server, run as its own process the way WebServer starts it."""
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from server_manager.asgi_server import find_django_asgi_app
+from server_manager.http_util import MAX_BODY_BYTES
+from server_manager.ports import ephemeral_port
+from server_manager.readiness import wait_until_ready
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APP = '''async def application(scope, receive, send):
+	message = await receive()
+	body = message["body"]
+	path = scope["path"]
+	if path == "/boom":
+		raise RuntimeError("boom")
+	if path == "/stream":
+		await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+		for part in (b"one ", b"two ", b"three"):
+			await send({"type": "http.response.body", "body": part, "more_body": True})
+		await send({"type": "http.response.body", "body": b""})
+		return
+	reply = f"{scope['method']} {path} {scope['query_string'].decode()} {len(body)}".encode()
+	await send({"type": "http.response.start", "status": 200, "headers": [(b"content-length", str(len(reply)).encode())]})
+	await send({"type": "http.response.body", "body": reply})
+'''
+
+
+def raw_request(port, data):
+	with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+		sock.sendall(data)
+		reply = b""
+		while True:
+			chunk = sock.recv(65536)
+			if not chunk:
+				return reply
+			reply += chunk
+
+
+class ASGIServerTest(unittest.TestCase):
+
+	def setUp(self):
+		self.project = tempfile.TemporaryDirectory()
+		self.addCleanup(self.project.cleanup)
+		with open(os.path.join(self.project.name, "app.py"), "w") as f:
+			f.write(APP)
+		self.port = ephemeral_port()
+		self.process = subprocess.Popen(
+			[sys.executable, "-m", "server_manager.asgi_server", "--app", "app:application",
+				"--host", "127.0.0.1", "--port", str(self.port), "--workers", "1"],
+			cwd=self.project.name,
+			env=dict(os.environ, PYTHONPATH=PACKAGE_ROOT),
+			stdout=subprocess.DEVNULL,
+			stderr=subprocess.DEVNULL,
+		)
+		self.addCleanup(self.stop)
+		result = wait_until_ready(self.port, process=self.process, timeout=10)
+		self.assertTrue(result.ready, result.reason)
+
+	def stop(self):
+		if self.process.poll() is None:
+			self.process.send_signal(signal.SIGTERM)
+			try:
+				self.process.wait(timeout=10)
+			except subprocess.TimeoutExpired:
+				self.process.kill()
+				self.process.wait()
+
+	def test_requests_on_one_connection(self):
+		connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+		connection.request("GET", "/items?page=2")
+		self.assertEqual(connection.getresponse().read(), b"GET /items page=2 0")
+		connection.request("POST", "/upload", body=b"x" * 200000)
+		self.assertEqual(connection.getresponse().read(), b"POST /upload  200000")
+		connection.request("POST", "/upload", body=iter([b"ab", b"cde"]), encode_chunked=True)
+		self.assertEqual(connection.getresponse().read(), b"POST /upload  5")
+		connection.close()
+
+	def test_response_without_length_is_chunked(self):
+		connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+		connection.request("GET", "/stream")
+		response = connection.getresponse()
+		self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+		self.assertEqual(response.read(), b"one two three")
+		connection.close()
+
+	def test_http10_response_without_length_closes_the_connection(self):
+		reply = raw_request(self.port, b"GET /stream HTTP/1.0\r\n\r\n")
+		head, _, body = reply.partition(b"\r\n\r\n")
+		self.assertIn(b"Connection: close", head)
+		self.assertEqual(body, b"one two three")
+
+	def test_application_error_is_500(self):
+		reply = raw_request(self.port, b"GET /boom HTTP/1.1\r\nHost: x\r\n\r\n")
+		self.assertTrue(reply.startswith(b"HTTP/1.1 500 "), reply[:40])
+
+	def test_oversized_body_is_413(self):
+		reply = raw_request(self.port, f"POST / HTTP/1.1\r\nHost: x\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode())
+		self.assertTrue(reply.startswith(b"HTTP/1.1 413 "), reply[:40])
+
+
+class FindDjangoAppTest(unittest.TestCase):
+
+	def test_settings_module_from_manage_py(self):
+		with tempfile.TemporaryDirectory() as project:
+			os.makedirs(os.path.join(project, "mysite"))
+			open(os.path.join(project, "mysite", "asgi.py"), "w").close()
+			with open(os.path.join(project, "manage.py"), "w") as f:
+				f.write("os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')\n")
+			self.assertEqual(find_django_asgi_app(project), "mysite.asgi:application")
+
+	def test_fallback_and_missing(self):
+		with tempfile.TemporaryDirectory() as project:
+			self.assertIsNone(find_django_asgi_app(project))
+			os.makedirs(os.path.join(project, "web"))
+			open(os.path.join(project, "web", "asgi.py"), "w").close()
+			self.assertEqual(find_django_asgi_app(project), "web.asgi:application")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,81 @@
+# tests/test_django_static.py
+"""Static mounts and request forwarding of the Django gateway."""
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from server_manager.django_static import DjangoGateway, static_mounts
+from server_manager.front_proxy import Route
+from server_manager.http_cache import HttpCache
+from server_manager.ports import ephemeral_port
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+	"""A stand-in for runserver answering every GET with a cacheable page."""
+	protocol_version = "HTTP/1.1"
+
+	def do_GET(self):
+		body = b"page"
+		self.send_response(200)
+		self.send_header("Cache-Control", "public, max-age=60")
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, *args):
+		pass
+
+
+class StaticMountsTest(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.project = os.path.join(self.tmp.name, "project")
+		os.makedirs(os.path.join(self.tmp.name, "collected", "css"))
+		with open(os.path.join(self.tmp.name, "collected", "css", "site.css"), "wb") as f:
+			f.write(b"body {}")
+		os.mkdir(self.project)
+		# STATIC_ROOT رابط رمزي إلى المجلد الفعلي
+		os.symlink(os.path.join(self.tmp.name, "collected"), os.path.join(self.project, "static"))
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def test_symlinked_and_relative_directories_are_resolved(self):
+		mounts = static_mounts(self.project, {"STATIC_URL": "/static/", "STATIC_ROOT": "static"})
+		self.assertEqual(mounts[0].directories, [os.path.realpath(os.path.join(self.tmp.name, "collected"))])
+		gateway = DjangoGateway(self.project, 0, Route("app", ("127.0.0.1", 9)), mounts)
+		self.assertEqual(
+			gateway.translate_path("/static/css/site.css"),
+			os.path.realpath(os.path.join(self.tmp.name, "collected", "css", "site.css"))
+		)
+		self.assertIsNone(gateway.translate_path("/static/../project/x"))
+
+	def test_forwarded_cache_hits_reach_proxy_log(self):
+		backend = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+		threading.Thread(target=backend.serve_forever, daemon=True).start()
+		lines = []
+		route = Route("app", backend.server_address, cache=HttpCache())
+		mounts = static_mounts(self.project, {"STATIC_URL": "/static/", "STATIC_ROOT": "static"})
+		gateway = DjangoGateway(self.project, ephemeral_port(), route, mounts, host="127.0.0.1", proxy_log=lines.append)
+		gateway.start()
+		try:
+			connection = http.client.HTTPConnection("127.0.0.1", gateway.port, timeout=5)
+			for _ in range(2):
+				connection.request("GET", "/page")
+				self.assertEqual(connection.getresponse().read(), b"page")
+			connection.close()
+		finally:
+			gateway.stop()
+			backend.shutdown()
+			backend.server_close()
+		self.assertEqual(len(lines), 2)
+		self.assertTrue(lines[0].endswith("-> app (MISS)"), lines[0])
+		self.assertTrue(lines[1].endswith("-> app (HIT)"), lines[1])
+
+
+if __name__ == "__main__":
+	unittest.main()
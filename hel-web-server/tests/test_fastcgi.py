@@ -0,0 +1,187 @@
+# tests/test_fastcgi.py
+"""The CGI response head that php-cgi writes to FCGI_STDOUT, and relaying it to clients."""
+import http.client
+import os
+import socket
+import struct
+import tempfile
+import threading
+import unittest
+
+from server_manager.fastcgi import (
+	FCGI_END_REQUEST, FCGI_PARAMS, FCGI_STDERR, FCGI_STDIN, FCGI_STDOUT, FastCGIGateway,
+	_HEADER, _record, parse_cgi_response
+)
+from server_manager.ports import ephemeral_port
+
+
+class ParseCgiResponseTest(unittest.TestCase):
+
+	def test_defaults(self):
+		status, headers, body = parse_cgi_response(b"X-Powered-By: PHP\r\n\r\n<p>hi</p>")
+		self.assertEqual(status, 200)
+		self.assertEqual(headers, [("X-Powered-By", "PHP"), ("Content-Type", "text/html; charset=UTF-8")])
+		self.assertEqual(body, b"<p>hi</p>")
+
+	def test_status_header(self):
+		status, headers, body = parse_cgi_response(b"Status: 404 Not Found\r\nContent-type: text/plain\r\n\r\nmissing")
+		self.assertEqual(status, 404)
+		# Status لا يُرسل للعميل كترويسة، ونوع المحتوى الموجود لا يُستبدل
+		self.assertEqual(headers, [("Content-type", "text/plain")])
+		self.assertEqual(body, b"missing")
+
+	def test_bare_lf_separator(self):
+		status, headers, body = parse_cgi_response(b"Status: 302\nLocation: /next\n\nbody\r\n\r\nmore")
+		self.assertEqual(status, 302)
+		self.assertIn(("Location", "/next"), headers)
+		self.assertEqual(body, b"body\r\n\r\nmore")
+
+	def test_head_without_body(self):
+		status, headers, body = parse_cgi_response(b"Status: 204 No Content\r\n")
+		self.assertEqual(status, 204)
+		self.assertEqual(body, b"")
+
+	def test_malformed_status(self):
+		for value in (b"", b"   ", b"abc", b"20x OK", b"799 Custom", b"99"):
+			with self.subTest(value=value):
+				with self.assertRaises(ValueError):
+					parse_cgi_response(b"Status: " + value + b"\r\n\r\nbody")
+
+
+def _decode_params(data):
+	params, i = {}, 0
+	while i < len(data):
+		lengths = []
+		for _ in range(2):
+			if data[i] < 128:
+				lengths.append(data[i])
+				i += 1
+			else:
+				lengths.append(struct.unpack("!I", data[i:i + 4])[0] & 0x7fffffff)
+				i += 4
+		name, value = data[i:i + lengths[0]], data[i + lengths[0]:i + lengths[0] + lengths[1]]
+		params[name.decode()] = value.decode()
+		i += lengths[0] + lengths[1]
+	return params
+
+
+class FakePhpCgi:
+	"""A FastCGI responder on a Unix socket that answers with canned STDOUT records per script name."""
+
+	def __init__(self, path, outputs):
+		self.outputs = outputs
+		self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		self.sock.bind(path)
+		self.sock.listen()
+		threading.Thread(target=self._serve, daemon=True).start()
+
+	def _serve(self):
+		while True:
+			try:
+				conn, _ = self.sock.accept()
+			except OSError:
+				return
+			with conn, conn.makefile("rb") as f:
+				while True:
+					params, stdin_done = b"", False
+					while not stdin_done:
+						header = f.read(_HEADER.size)
+						if len(header) < _HEADER.size:
+							break
+						_, record_type, _, length, padding = _HEADER.unpack(header)
+						content = f.read(length + padding)[:length]
+						if record_type == FCGI_PARAMS:
+							params += content
+						stdin_done = record_type == FCGI_STDIN and not content
+					if not stdin_done:
+						break
+					script = os.path.basename(_decode_params(params)["SCRIPT_FILENAME"])
+					records = [_record(FCGI_STDERR, b"PHP Notice: served " + script.encode() + b"\n")]
+					records += [_record(FCGI_STDOUT, part) for part in self.outputs[script]]
+					records.append(_record(FCGI_STDOUT))
+					records.append(_record(FCGI_END_REQUEST, b"\0" * 8))
+					for record in records:
+						conn.sendall(record)
+
+	def close(self):
+		self.sock.close()
+
+
+class GatewayStreamingTest(unittest.TestCase):
+
+	BIG = b"x" * 200000
+
+	def setUp(self):
+		self.root = tempfile.TemporaryDirectory()
+		outputs = {
+			"small.php": [b"Content-Type: text/plain\r\n\r\nhello"],
+			"empty.php": [b"Status: 204 No Content\r\n"],
+			# مخرجات طويلة دون Content-Length (مثل صفحة تستخدم flush())
+			"big.php": [b"Content-Type: text/plain\r\n\r\n"] + [self.BIG[i:i + 50000] for i in range(0, len(self.BIG), 50000)],
+			"sized.php": [b"Content-Length: 200000\r\n", b"\r\n"] + [self.BIG[i:i + 50000] for i in range(0, len(self.BIG), 50000)],
+		}
+		for name in outputs:
+			open(os.path.join(self.root.name, name), "w").close()
+		self.socket_path = os.path.join(self.root.name, "php.sock")
+		self.php = FakePhpCgi(self.socket_path, outputs)
+		self.php_log = []
+		self.gateway = FastCGIGateway(self.root.name, ephemeral_port(), [self.socket_path], host="127.0.0.1", php_log=self.php_log.append)
+		self.gateway.start()
+
+	def tearDown(self):
+		self.gateway.stop()
+		self.php.close()
+		self.root.cleanup()
+
+	def get(self, connection, path, method="GET"):
+		connection.request(method, path)
+		response = connection.getresponse()
+		return response, response.read()
+
+	def test_output_without_length_is_chunked(self):
+		connection = http.client.HTTPConnection("127.0.0.1", self.gateway.port, timeout=5)
+		response, body = self.get(connection, "/big.php")
+		self.assertEqual(body, self.BIG)
+		self.assertEqual(response.getheader("Transfer-Encoding"), "chunked")
+		self.assertIsNone(response.getheader("Content-Length"))
+		# عملية php-cgi الوحيدة عادت إلى المجموعة والاتصال ما زال صالحاً
+		response, body = self.get(connection, "/small.php")
+		self.assertEqual(body, b"hello")
+		connection.close()
+		self.assertIn("PHP Notice: served big.php", self.php_log)
+
+	def test_http10_client_gets_a_close_delimited_body(self):
+		with socket.create_connection(("127.0.0.1", self.gateway.port), timeout=5) as sock:
+			sock.sendall(b"GET /big.php HTTP/1.0\r\nConnection: keep-alive\r\n\r\n")
+			reply = b""
+			while True:
+				data = sock.recv(65536)
+				if not data:
+					break
+				reply += data
+		head, _, body = reply.partition(b"\r\n\r\n")
+		self.assertIn(b"Connection: close", head)
+		self.assertNotIn(b"chunked", head)
+		self.assertEqual(body, self.BIG)
+
+	def test_head_only_output(self):
+		connection = http.client.HTTPConnection("127.0.0.1", self.gateway.port, timeout=5)
+		response, body = self.get(connection, "/empty.php")
+		self.assertEqual(response.status, 204)
+		self.assertEqual(body, b"")
+		connection.close()
+
+	def test_php_content_length_is_kept(self):
+		connection = http.client.HTTPConnection("127.0.0.1", self.gateway.port, timeout=5)
+		response, body = self.get(connection, "/sized.php")
+		self.assertEqual(response.getheader("Content-Length"), "200000")
+		self.assertIsNone(response.getheader("Transfer-Encoding"))
+		self.assertEqual(body, self.BIG)
+		response, body = self.get(connection, "/big.php", method="HEAD")
+		self.assertEqual(body, b"")
+		self.assertEqual(self.get(connection, "/small.php")[1], b"hello")
+		connection.close()
+
+
+if __name__ == "__main__":
+	unittest.main()
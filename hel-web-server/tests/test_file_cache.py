@@ -0,0 +1,44 @@
+# tests/test_file_cache.py
+"""Eviction in the static engine's file cache."""
+import os
+import tempfile
+import unittest
+
+from server_manager.file_cache import FileCache
+
+
+class FileCacheTest(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.TemporaryDirectory()
+
+	def tearDown(self):
+		self.root.cleanup()
+
+	def file(self, name, size):
+		path = os.path.join(self.root.name, name)
+		with open(path, "wb") as f:
+			f.write(b"x" * size)
+		return path
+
+	def test_byte_limit_evicts_least_recently_used(self):
+		cache = FileCache(max_bytes=250, max_file_bytes=100)
+		for name in ("a", "b", "c"):
+			cache.load("/" + name, self.file(name, 100), "text/plain")
+		self.assertIsNone(cache.get("/a"))
+		self.assertIsNotNone(cache.get("/b"))
+		self.assertIsNotNone(cache.get("/c"))
+
+	def test_metadata_only_entries_are_capped_by_count(self):
+		# ملفات أكبر من الحد الفردي لا تضيف بايتات، فالعدد وحده يحدّها
+		cache = FileCache(max_bytes=1000, max_file_bytes=10, max_entries=3)
+		for i in range(5):
+			cache.load(f"/{i}", self.file(str(i), 100), "text/plain")
+		self.assertEqual(len(cache._entries), 3)
+		self.assertIsNone(cache.get("/0"))
+		self.assertIsNone(cache.get("/1"))
+		self.assertIsNotNone(cache.get("/4"))
+
+
+if __name__ == "__main__":
+	unittest.main()
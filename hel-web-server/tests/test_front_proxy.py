@@ -0,0 +1,304 @@
+# tests/test_front_proxy.py
+"""Request routing and upstream request heads of the virtual-host front proxy."""
+import hashlib
+import http.client
+import socket
+import socketserver
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from server_manager.front_proxy import FrontProxy, Route
+from server_manager.http_cache import HttpCache
+from server_manager.http_util import MAX_BODY_BYTES, Request
+from server_manager.ports import ephemeral_port
+
+PEER = ("192.0.2.7", 40000)
+
+
+def make_request(target="/", method="GET", **headers):
+	return Request(method, target, "HTTP/1.1", [(name.replace("_", "-"), value) for name, value in headers.items()])
+
+
+def request_line(proxy, route, request, by_prefix=True):
+	return proxy._upstream_head(route, request, PEER, by_prefix).split(b"\r\n", 1)[0].decode("latin-1")
+
+
+class MatchTest(unittest.TestCase):
+
+	def setUp(self):
+		self.site = Route("site", ("127.0.0.1", 9001), hosts=["site.localhost"])
+		self.api = Route("api", ("127.0.0.1", 9002), prefix="/api")
+		self.v2 = Route("v2", ("127.0.0.1", 9003), prefix="/api/v2/")
+		self.proxy = FrontProxy(0, [self.site, self.api, self.v2])
+
+	def match(self, target, host="localhost"):
+		route, by_prefix = self.proxy.match(make_request(target, Host=host))
+		return (route.name if route else None), by_prefix
+
+	def test_host_wins_over_prefix(self):
+		self.assertEqual(self.match("/api/x", "Site.Localhost:8080"), ("site", False))
+
+	def test_longest_prefix_on_segment_boundaries(self):
+		self.assertEqual(self.match("/api"), ("api", True))
+		self.assertEqual(self.match("/api/v2/users?x=1"), ("v2", True))
+		self.assertEqual(self.match("/api/v2"), ("v2", True))
+		self.assertEqual(self.match("/apiary"), (None, False))
+
+	def test_default_route_takes_the_rest(self):
+		self.proxy.routes.append(Route("default", ("127.0.0.1", 9004)))
+		self.assertEqual(self.match("/apiary"), ("default", False))
+		self.assertEqual(self.match("/", "other.localhost"), ("default", False))
+
+
+class StripPrefixTest(unittest.TestCase):
+
+	def setUp(self):
+		self.route = Route("app", ("127.0.0.1", 9000), prefix="/my app", strip_prefix=True)
+		self.proxy = FrontProxy(0, [self.route])
+
+	def test_prefix_is_removed_from_the_decoded_path(self):
+		# البادئة تطابق المسار بعد فك ترميز %20، فلا يجوز قصّ الهدف الخام بطولها
+		self.assertEqual(request_line(self.proxy, self.route, make_request("/my%20app/x?q=1")), "GET /x?q=1 HTTP/1.1")
+
+	def test_bare_prefix_becomes_root(self):
+		self.assertEqual(request_line(self.proxy, self.route, make_request("/my%20app")), "GET / HTTP/1.1")
+		self.assertEqual(request_line(self.proxy, self.route, make_request("/my%20app?x=1")), "GET /?x=1 HTTP/1.1")
+
+	def test_rest_of_the_path_stays_encoded(self):
+		self.assertEqual(request_line(self.proxy, self.route, make_request("/my%20app/a%3Fb%25c")), "GET /a%3Fb%25c HTTP/1.1")
+
+	def test_target_is_untouched_without_strip_or_host_match(self):
+		self.assertEqual(request_line(self.proxy, self.route, make_request("/my%20app/x"), by_prefix=False), "GET /my%20app/x HTTP/1.1")
+		kept = Route("app", ("127.0.0.1", 9000), prefix="/my app")
+		self.assertEqual(request_line(self.proxy, kept, make_request("/my%20app/x")), "GET /my%20app/x HTTP/1.1")
+
+
+class ErrorPageTest(unittest.TestCase):
+
+	def test_message_is_escaped(self):
+		proxy = FrontProxy(ephemeral_port(), [Route("<i>app</i>", ("127.0.0.1", ephemeral_port()))], host="127.0.0.1")
+		proxy.start()
+		try:
+			connection = http.client.HTTPConnection("127.0.0.1", proxy.port, timeout=5)
+			connection.request("GET", "/")
+			response = connection.getresponse()
+			body = response.read()
+			connection.close()
+		finally:
+			proxy.stop()
+		self.assertEqual(response.status, 502)
+		self.assertIn(b"Backend &#x27;&lt;i&gt;app&lt;/i&gt;&#x27; unavailable", body)
+		self.assertNotIn(b"<i>", body)
+
+
+class _EchoHandler(BaseHTTPRequestHandler):
+	"""Answers with the method, path, body size and body digest it received."""
+	protocol_version = "HTTP/1.1"
+
+	def do_POST(self):
+		body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+		if self.headers.get("Transfer-Encoding") == "chunked":
+			body = b""
+			while True:
+				size = int(self.rfile.readline().split(b";")[0], 16)
+				if not size:
+					self.rfile.readline()
+					break
+				body += self.rfile.read(size)
+				self.rfile.readline()
+		reply = f"{self.command} {self.path} {len(body)} {hashlib.sha1(body).hexdigest()}".encode()
+		self.send_response(200)
+		self.send_header("Content-Length", str(len(reply)))
+		self.end_headers()
+		self.wfile.write(reply)
+
+	do_GET = do_PUT = do_POST
+
+	def log_message(self, *args):
+		pass
+
+
+class ProxyRequestBodyTest(unittest.TestCase):
+
+	def setUp(self):
+		self.backend = ThreadingHTTPServer(("127.0.0.1", 0), _EchoHandler)
+		threading.Thread(target=self.backend.serve_forever, daemon=True).start()
+		self.proxy = FrontProxy(ephemeral_port(), [Route("app", self.backend.server_address)], host="127.0.0.1")
+		self.proxy.start()
+
+	def tearDown(self):
+		self.proxy.stop()
+		self.backend.shutdown()
+		self.backend.server_close()
+
+	def post(self, connection, body, **kwargs):
+		connection.request("POST", "/upload", body=body, **kwargs)
+		return connection.getresponse().read().decode()
+
+	def test_small_and_large_bodies_are_forwarded(self):
+		connection = http.client.HTTPConnection("127.0.0.1", self.proxy.port, timeout=10)
+		for size in (0, 100, 3 * 1024 * 1024):
+			body = bytes(range(256)) * (size // 256)
+			with self.subTest(size=size):
+				self.assertEqual(self.post(connection, body), f"POST /upload {len(body)} {hashlib.sha1(body).hexdigest()}")
+		connection.close()
+
+	def test_chunked_body_is_forwarded(self):
+		connection = http.client.HTTPConnection("127.0.0.1", self.proxy.port, timeout=10)
+		chunks = [b"a" * 70000, b"b" * 5, b"c" * 100000]
+		body = b"".join(chunks)
+		self.assertEqual(self.post(connection, iter(chunks), encode_chunked=True), f"POST /upload {len(body)} {hashlib.sha1(body).hexdigest()}")
+		# الاتصال يبقى صالحاً للطلب التالي
+		self.assertEqual(self.post(connection, b"xyz"), f"POST /upload 3 {hashlib.sha1(b'xyz').hexdigest()}")
+		connection.close()
+
+	def test_oversized_body_is_refused(self):
+		with socket.create_connection(("127.0.0.1", self.proxy.port), timeout=5) as sock:
+			sock.sendall(f"POST / HTTP/1.1\r\nHost: x\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode())
+			reply = sock.recv(4096)
+		self.assertTrue(reply.startswith(b"HTTP/1.1 413 "), reply[:40])
+
+
+class _OneShotHandler(socketserver.StreamRequestHandler):
+	"""Answers the first request of each connection, then drops the connection on the next one.
+
+	This is what a backend closing an idle keep-alive connection looks like
+	to a proxy that has just reused it.
+	"""
+
+	def handle(self):
+		for index in range(2):
+			head = b""
+			while not head.endswith(b"\r\n\r\n"):
+				line = self.rfile.readline()
+				if not line:
+					return
+				head += line
+			method = head.split(b" ", 1)[0].decode()
+			length = 0
+			for line in head.split(b"\r\n"):
+				if line.lower().startswith(b"content-length:"):
+					length = int(line.split(b":", 1)[1])
+			self.rfile.read(length)
+			self.server.received.append(method)
+			if index:
+				return
+			self.wfile.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+	daemon_threads = True
+
+
+class _CountingHandler(BaseHTTPRequestHandler):
+	"""A slow backend with a cacheable answer that counts the requests reaching it."""
+	protocol_version = "HTTP/1.1"
+
+	def do_GET(self):
+		self.server.received.append(self.path)
+		time.sleep(0.3)
+		self.send_response(200)
+		self.send_header("Cache-Control", "public, max-age=60")
+		self.send_header("Content-Length", "4")
+		self.end_headers()
+		self.wfile.write(b"page")
+
+	def log_message(self, *args):
+		pass
+
+
+class _CustomStatusHandler(BaseHTTPRequestHandler):
+	"""A backend answering with a status code that HTTPStatus does not know."""
+	protocol_version = "HTTP/1.1"
+
+	def do_GET(self):
+		self.server.received.append(self.path)
+		self.send_response(599, "Custom")
+		self.send_header("Content-Length", "4")
+		self.end_headers()
+		self.wfile.write(b"nope")
+
+	def log_message(self, *args):
+		pass
+
+
+class _ProxyTestCase(unittest.TestCase):
+	"""Runs a FrontProxy in front of a threaded test backend."""
+
+	def start(self, backend, cache=None):
+		self.backend = backend
+		self.backend.received = []
+		threading.Thread(target=self.backend.serve_forever, daemon=True).start()
+		self.addCleanup(self.backend.server_close)
+		self.addCleanup(self.backend.shutdown)
+		self.route = Route("app", self.backend.server_address, cache=cache)
+		self.proxy = FrontProxy(ephemeral_port(), [self.route], host="127.0.0.1")
+		self.proxy.start()
+		self.addCleanup(self.proxy.stop)
+
+	def request(self, method, path, body=None):
+		connection = http.client.HTTPConnection("127.0.0.1", self.proxy.port, timeout=5)
+		try:
+			connection.request(method, path, body=body)
+			response = connection.getresponse()
+			return response.status, response.read()
+		finally:
+			connection.close()
+
+
+class RetryTest(_ProxyTestCase):
+
+	def setUp(self):
+		self.start(_TCPServer(("127.0.0.1", 0), _OneShotHandler))
+
+	def test_idempotent_request_is_retried_on_a_fresh_connection(self):
+		self.assertEqual(self.request("GET", "/"), (200, b"ok"))
+		self.assertEqual(self.request("PUT", "/", b"x"), (200, b"ok"))
+		self.assertEqual(self.backend.received, ["GET", "PUT", "PUT"])
+
+	def test_non_idempotent_request_is_not_replayed(self):
+		self.assertEqual(self.request("GET", "/"), (200, b"ok"))
+		# الخادم الخلفي استلم POST قبل انقطاع الاتصال، فإعادته قد تنفذه مرتين
+		status, _ = self.request("POST", "/", b"x")
+		self.assertEqual(status, 502)
+		self.assertEqual(self.backend.received, ["GET", "POST"])
+
+
+class CustomStatusTest(_ProxyTestCase):
+
+	def setUp(self):
+		self.start(ThreadingHTTPServer(("127.0.0.1", 0), _CustomStatusHandler))
+
+	def test_unknown_status_is_relayed_and_connection_reused(self):
+		connection = http.client.HTTPConnection("127.0.0.1", self.proxy.port, timeout=5)
+		for _ in range(2):
+			connection.request("GET", "/odd")
+			response = connection.getresponse()
+			self.assertEqual((response.status, response.reason, response.read()), (599, "Unknown Status", b"nope"))
+		connection.close()
+		self.assertEqual(self.backend.received, ["/odd", "/odd"])
+		# الاتصال بالخادم الخلفي أُعيد إلى المجمع بعد الرد الأول
+		self.assertEqual(self.proxy.pools[self.route.upstream].reused, 1)
+
+
+class CollapseTest(_ProxyTestCase):
+
+	def setUp(self):
+		self.cache = HttpCache()
+		self.start(ThreadingHTTPServer(("127.0.0.1", 0), _CountingHandler), cache=self.cache)
+
+	def test_concurrent_misses_share_one_backend_request(self):
+		with ThreadPoolExecutor(max_workers=5) as pool:
+			results = list(pool.map(lambda _: self.request("GET", "/page"), range(5)))
+		self.assertEqual(results, [(200, b"page")] * 5)
+		self.assertEqual(self.backend.received, ["/page"])
+		self.assertEqual(self.cache.misses, 1)
+		self.assertEqual(self.cache.collapsed + self.cache.hits, 4)
+		self.assertGreater(self.cache.collapsed, 0)
+
+
+if __name__ == "__main__":
+	unittest.main()
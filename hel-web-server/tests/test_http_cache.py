@@ -0,0 +1,140 @@
+# tests/test_http_cache.py
+"""Storage and freshness rules of the shared HTTP cache (RFC 9111)."""
+import unittest
+
+from server_manager.http_cache import (
+	CachedResponse, HttpCache, freshness_lifetime, parse_cache_control, storable
+)
+from server_manager.http_util import Request, http_date
+
+
+def make_request(target="/", **headers):
+	return Request("GET", target, "HTTP/1.1", [(name.replace("_", "-"), value) for name, value in headers.items()])
+
+
+def check(status=200, request=None, **headers):
+	lowered = {name.replace("_", "-"): value for name, value in headers.items()}
+	directives = parse_cache_control(lowered.get("cache-control"))
+	return storable(request or make_request(), status, lowered, directives)
+
+
+class ParseCacheControlTest(unittest.TestCase):
+
+	def test_directives(self):
+		self.assertEqual(
+			parse_cache_control('Public, max-age=60, s-maxage="120", no-cache'),
+			{"public": True, "max-age": "60", "s-maxage": "120", "no-cache": True}
+		)
+
+	def test_empty(self):
+		self.assertEqual(parse_cache_control(None), {})
+		self.assertEqual(parse_cache_control(" , "), {})
+
+
+class FreshnessTest(unittest.TestCase):
+
+	def lifetime(self, **headers):
+		lowered = {name.replace("_", "-"): value for name, value in headers.items()}
+		return freshness_lifetime(lowered, parse_cache_control(lowered.get("cache-control")))
+
+	def test_s_maxage_wins_over_max_age(self):
+		self.assertEqual(self.lifetime(cache_control="max-age=10, s-maxage=100"), 100)
+
+	def test_max_age_wins_over_expires(self):
+		self.assertEqual(self.lifetime(cache_control="max-age=10", expires=http_date(0)), 10)
+
+	def test_invalid_max_age(self):
+		self.assertEqual(self.lifetime(cache_control="max-age=soon"), 0)
+		self.assertEqual(self.lifetime(cache_control="max-age=-5"), 0)
+
+	def test_expires_relative_to_date(self):
+		self.assertEqual(self.lifetime(date=http_date(1000000), expires=http_date(1000300)), 300)
+		self.assertEqual(self.lifetime(date=http_date(1000300), expires=http_date(1000000)), 0)
+
+	def test_invalid_expires_is_stale(self):
+		self.assertEqual(self.lifetime(expires="0"), 0)
+
+	def test_no_explicit_lifetime(self):
+		self.assertIsNone(self.lifetime(etag='"a"'))
+
+	def test_no_cache_entry_is_never_fresh(self):
+		entry = CachedResponse(200, [("Cache-Control", "no-cache, max-age=60")], b"", stored_at=0)
+		self.assertEqual(entry.lifetime, 60)
+		self.assertFalse(entry.is_fresh(now=1))
+
+	def test_age_header_counts_against_lifetime(self):
+		entry = CachedResponse(200, [("Cache-Control", "max-age=60"), ("Age", "50")], b"", stored_at=0)
+		self.assertTrue(entry.is_fresh(now=5))
+		self.assertFalse(entry.is_fresh(now=10))
+
+
+class StorableTest(unittest.TestCase):
+
+	def test_explicit_lifetime_or_validator(self):
+		self.assertTrue(check(cache_control="max-age=60"))
+		self.assertTrue(check(etag='"v1"'))
+		self.assertTrue(check(last_modified=http_date(0)))
+		self.assertFalse(check())
+		self.assertFalse(check(cache_control="max-age=0"))
+
+	def test_status(self):
+		self.assertTrue(check(404, cache_control="max-age=60"))
+		self.assertFalse(check(302, cache_control="max-age=60"))
+		self.assertFalse(check(500, cache_control="max-age=60"))
+
+	def test_forbidden_by_response(self):
+		self.assertFalse(check(cache_control="no-store, max-age=60"))
+		self.assertFalse(check(cache_control="private, max-age=60"))
+		self.assertFalse(check(cache_control="max-age=60", set_cookie="id=1"))
+
+	def test_vary_star(self):
+		self.assertFalse(check(cache_control="max-age=60", vary=" * "))
+		self.assertTrue(check(cache_control="max-age=60", vary="Accept-Encoding"))
+
+	def test_authorized_request_needs_public(self):
+		request = make_request(authorization="Basic dTpw")
+		self.assertFalse(check(request=request, cache_control="max-age=60"))
+		self.assertTrue(check(request=request, cache_control="public, max-age=60"))
+		self.assertTrue(check(request=request, cache_control="s-maxage=60"))
+
+
+class VaryKeyTest(unittest.TestCase):
+
+	def setUp(self):
+		self.cache = HttpCache(max_bytes=1 << 20, max_object_bytes=1 << 16)
+
+	def store(self, request, vary=()):
+		entry = CachedResponse(200, [("Cache-Control", "max-age=60")], b"body", vary=vary)
+		primary = self.cache.primary_key(request)
+		return self.cache.store(None, primary, request, entry)
+
+	def test_primary_key_includes_host(self):
+		self.assertEqual(self.cache.primary_key(make_request("/a?b=1", host="Example.COM")), "example.com/a?b=1")
+
+	def test_without_vary_only_the_url_matters(self):
+		key = self.store(make_request("/page", host="h", accept_language="en"))
+		other = make_request("/page", host="h", accept_language="ar")
+		self.assertEqual(self.cache.key(self.cache.primary_key(other), other), key)
+
+	def test_vary_separates_variants(self):
+		english = make_request("/page", host="h", accept_language="en")
+		arabic = make_request("/page", host="h", accept_language="ar")
+		key = self.store(english, vary=("accept-language",))
+		self.assertEqual(key, ("h/page", "en"))
+		self.assertNotEqual(self.cache.key("h/page", arabic), key)
+		self.assertNotEqual(self.store(arabic, vary=("accept-language",)), key)
+		self.assertEqual(self.cache.stats()["entries"], 2)
+
+	def test_vary_normalizes_whitespace(self):
+		key = self.store(make_request("/", host="h", accept_encoding="gzip,  br"), vary=("accept-encoding",))
+		self.assertEqual(self.cache.key("h/", make_request("/", host="h", accept_encoding=" gzip, br ")), key)
+
+	def test_oversized_response_is_not_stored(self):
+		cache = HttpCache(max_bytes=1 << 20, max_object_bytes=2)
+		request = make_request("/", host="h")
+		entry = CachedResponse(200, [("Cache-Control", "max-age=60")], b"body")
+		self.assertIsNone(cache.store(None, cache.primary_key(request), request, entry))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,48 @@
+# tests/test_http_util.py
+"""Range header parsing for the static servers (RFC 9110 section 14.2)."""
+import unittest
+
+from server_manager.http_util import MAX_RANGES, parse_range
+
+
+class ParseRangeTest(unittest.TestCase):
+
+	def test_single_range(self):
+		self.assertEqual(parse_range("bytes=0-99", 1000), [(0, 99)])
+		self.assertEqual(parse_range("bytes=500-", 1000), [(500, 999)])
+
+	def test_end_past_size_is_clamped(self):
+		self.assertEqual(parse_range("bytes=900-5000", 1000), [(900, 999)])
+
+	def test_suffix_range(self):
+		self.assertEqual(parse_range("bytes=-100", 1000), [(900, 999)])
+		# لاحقة أطول من الملف تعني الملف كاملاً
+		self.assertEqual(parse_range("bytes=-5000", 1000), [(0, 999)])
+
+	def test_unsatisfiable(self):
+		self.assertEqual(parse_range("bytes=1000-", 1000), [])
+		self.assertEqual(parse_range("bytes=2000-3000", 1000), [])
+		self.assertEqual(parse_range("bytes=-0", 1000), [])
+		self.assertEqual(parse_range("bytes=-10", 0), [])
+
+	def test_multiple_ranges_are_sorted_and_merged(self):
+		self.assertEqual(parse_range("bytes=500-599, 0-99", 1000), [(0, 99), (500, 599)])
+		# المتداخلة والمتجاورة تُدمج في مقطع واحد
+		self.assertEqual(parse_range("bytes=0-99,50-149,150-199", 1000), [(0, 199)])
+		self.assertEqual(parse_range("bytes=0-9,-10", 1000), [(0, 9), (990, 999)])
+
+	def test_unsatisfiable_parts_are_dropped(self):
+		self.assertEqual(parse_range("bytes=0-9,5000-6000", 1000), [(0, 9)])
+
+	def test_invalid_headers_are_ignored(self):
+		for header in ("items=0-9", "bytes=", "bytes=abc", "bytes=9-0", "bytes=1-x", "bytes=-x", "bytes=0-9,,", "bytes=-"):
+			with self.subTest(header=header):
+				self.assertIsNone(parse_range(header, 1000))
+
+	def test_too_many_ranges_are_ignored(self):
+		header = "bytes=" + ",".join(f"{i * 10}-{i * 10 + 1}" for i in range(MAX_RANGES + 1))
+		self.assertIsNone(parse_range(header, 10000))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,151 @@
+# tests/test_log_index.py
+"""The inverted log index and live filters must agree with a plain scan."""
+import unittest
+
+from server_manager.log_buffer import LEVEL_ERROR, LEVEL_INFO, LEVEL_WARNING, LogBuffer
+from server_manager.log_index import LiveFilter, LogIndex, LogQuery, parse_tags
+
+LINES = [
+	"[site] [SERVER]: GET /index.html 200",
+	"[site] [SERVER-ERR]: Traceback (most recent call last):",
+	"[api] [SERVER]: GET /users 200",
+	"[api] [SERVER-ERR]: Warning: slow query on users",
+	"[site] Server stopped",
+	"[api] [SERVER]: POST /users 201",
+]
+
+
+def scan(log_buffer, query):
+	result = []
+	for seq in range(log_buffer.first_seq, log_buffer.next_seq):
+		record = log_buffer.get(seq)
+		if record is not None and query.match(record[1], record[2]):
+			result.append(seq)
+	return result
+
+
+class LogBufferTest(unittest.TestCase):
+
+	def test_bounds_follow_wraparound_and_clear(self):
+		buffer = LogBuffer(capacity=4)
+		self.assertEqual(buffer.bounds(), (0, 0))
+		for i in range(6):
+			buffer.append(f"line {i}")
+		self.assertEqual(buffer.bounds(), (2, 6))
+		self.assertIsNone(buffer.get(1))
+		self.assertEqual(buffer.get(5)[2], "line 5")
+		buffer.clear()
+		self.assertEqual(buffer.bounds(), (6, 6))
+		self.assertIsNone(buffer.get(5))
+		self.assertEqual(len(buffer), 0)
+
+
+class LogIndexTest(unittest.TestCase):
+
+	def setUp(self):
+		self.buffer = LogBuffer(capacity=64)
+		for line in LINES:
+			self.buffer.append(line)
+		self.index = LogIndex(self.buffer)
+		self.index.update()
+
+	def assertAgrees(self, query):
+		expected = scan(self.buffer, query)
+		candidates = self.index.candidates(query)
+		self.assertEqual(candidates, sorted(candidates))
+		self.assertTrue(set(expected) <= set(candidates), f"{expected} not in {candidates}")
+		self.assertEqual(LiveFilter(self.index, query).seqs, expected)
+		return expected
+
+	def test_parse_tags(self):
+		self.assertEqual(parse_tags(LINES[1]), ("site", "SERVER-ERR"))
+		self.assertEqual(parse_tags("[SERVER]: hello"), ("", "SERVER"))
+		self.assertEqual(parse_tags(LINES[4]), ("site", ""))
+		self.assertEqual(parse_tags("plain text"), ("", ""))
+
+	def test_empty_query_returns_everything(self):
+		self.assertEqual(self.index.candidates(LogQuery()), list(range(len(LINES))))
+
+	def test_text_matches_inside_tokens(self):
+		self.assertEqual(self.assertAgrees(LogQuery("user")), [2, 3, 5])
+		self.assertEqual(self.assertAgrees(LogQuery("GET /users")), [2])
+		self.assertEqual(self.assertAgrees(LogQuery("nothing-here")), [])
+
+	def test_facets(self):
+		self.assertEqual(self.assertAgrees(LogQuery(backend="api")), [2, 3, 5])
+		self.assertEqual(self.assertAgrees(LogQuery(streams={"SERVER-ERR"})), [1, 3])
+		self.assertEqual(self.assertAgrees(LogQuery(min_level=LEVEL_WARNING)), [1, 3])
+		self.assertEqual(self.assertAgrees(LogQuery(min_level=LEVEL_ERROR)), [1])
+		self.assertEqual(self.assertAgrees(LogQuery("users", backend="api", streams={"SERVER"})), [2, 5])
+
+	def test_regex(self):
+		self.assertEqual(self.assertAgrees(LogQuery(r"(GET|POST) /users", regex=True)), [2, 5])
+
+	def test_start(self):
+		self.assertEqual(self.index.candidates(LogQuery(backend="api"), start=3), [3, 5])
+
+	def test_evicted_lines_are_trimmed(self):
+		small = LogBuffer(capacity=4)
+		index = LogIndex(small)
+		for i in range(10):
+			small.append(f"[old{i}] line {i}" if i < 6 else f"[new] line {i}")
+			index.update()
+		self.assertEqual(index.candidates(LogQuery("line")), [6, 7, 8, 9])
+		self.assertNotIn("old0", index.backends)
+		self.assertEqual(index.backends, {"new"})
+
+
+class LiveFilterTest(unittest.TestCase):
+
+	def setUp(self):
+		self.buffer = LogBuffer(capacity=64)
+		for line in LINES:
+			self.buffer.append(line)
+		self.index = LogIndex(self.buffer)
+
+	def test_refinement_narrows_current_results(self):
+		live = LiveFilter(self.index, LogQuery("user"))
+		self.assertEqual(live.seqs, [2, 3, 5])
+		refined = LogQuery("users 20")
+		self.assertTrue(refined.refines(live.query))
+		live.set_query(refined)
+		self.assertEqual(live.seqs, [2, 5])
+		self.assertEqual(live.seqs, scan(self.buffer, refined))
+
+	def test_refinement_picks_up_unchecked_lines(self):
+		live = LiveFilter(self.index, LogQuery("user"))
+		self.buffer.append("[api] [SERVER]: GET /users/7 200")
+		# سطر لم يفحصه poll() بعد يجب أن يظهر بعد التضييق
+		live.set_query(LogQuery("users"))
+		self.assertEqual(live.seqs, [2, 3, 5, 6])
+
+	def test_widening_rebuilds(self):
+		live = LiveFilter(self.index, LogQuery("users", min_level=LEVEL_WARNING))
+		self.assertEqual(live.seqs, [3])
+		wider = LogQuery("users", min_level=LEVEL_INFO)
+		self.assertFalse(wider.refines(live.query))
+		live.set_query(wider)
+		self.assertEqual(live.seqs, [2, 3, 5])
+
+	def test_regex_never_refines(self):
+		self.assertFalse(LogQuery("users", regex=True).refines(LogQuery("user")))
+		self.assertFalse(LogQuery("users").refines(LogQuery("user", regex=True)))
+		self.assertFalse(LogQuery("users", backend="api").refines(LogQuery("user")))
+
+	def test_refresh_applies_evictions_and_new_lines(self):
+		small = LogBuffer(capacity=4)
+		for line in LINES[:4]:
+			small.append(line)
+		live = LiveFilter(LogIndex(small), LogQuery(backend="api"))
+		self.assertEqual(live.seqs, [2, 3])
+		small.append(LINES[4])
+		small.append(LINES[5])
+		self.assertEqual(live.refresh(), (0, 1))
+		self.assertEqual(live.seqs, [2, 3, 5])
+		small.append("[api] [SERVER]: GET / 200")
+		self.assertEqual(live.refresh(), (1, 1))
+		self.assertEqual(live.seqs, [3, 5, 6])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,83 @@
+# tests/test_log_pump.py
+"""Reading child process output through the shared log pump."""
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from server_manager.log_pump import MAX_LINE_CHARS, LogPump
+
+
+def spawn(code):
+	return subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+class LogPumpTest(unittest.TestCase):
+
+	def run_pump(self, pump, code, sink=None):
+		"""Pumps a child's output; returns (lines, exited process)."""
+		lines, exited = [], threading.Event()
+		process = spawn(code)
+		self.addCleanup(process.wait)
+		pump.register(process, sink or lines.append, on_exit=lambda p: exited.set())
+		self.assertTrue(exited.wait(10))
+		process.wait()
+		return lines, process
+
+	def test_both_pipes_keep_their_order_and_exit_is_reported(self):
+		code = (
+			"import sys\n"
+			"for i in range(2000):\n"
+			"\tprint(f'out {i}')\n"
+			"\tprint(f'err {i}', file=sys.stderr)\n"
+			"raise SystemExit(4)\n"
+		)
+		exits = []
+		lines, exited = [], threading.Event()
+		process = spawn(code)
+		self.addCleanup(process.wait)
+		LogPump().register(process, lines.append, on_exit=lambda p: (exits.append(p.wait()), exited.set()))
+		self.assertTrue(exited.wait(10))
+		self.assertEqual(exits, [4])
+		self.assertEqual([line for line in lines if line.startswith("[SERVER]:")], [f"[SERVER]: out {i}" for i in range(2000)])
+		self.assertEqual([line for line in lines if line.startswith("[SERVER-ERR]:")], [f"[SERVER-ERR]: err {i}" for i in range(2000)])
+		self.assertEqual(len(lines), 4000)
+
+	def test_flood_beyond_the_queue_limit_is_dropped_and_reported(self):
+		pump = LogPump(queue_limit=5)
+		release, lines = threading.Event(), []
+
+		def slow_sink(line):
+			# المستهلك متوقف حتى يقرأ المضخ كل المخرجات
+			release.wait(10)
+			lines.append(line)
+
+		process = spawn("for i in range(1000): print(i)")
+		self.addCleanup(process.wait)
+		exited = threading.Event()
+		pump.register(process, slow_sink, on_exit=lambda p: exited.set())
+		process.wait()
+		# ننتظر حتى يقرأ المضخ المخرجات كلها (سطر عند المستهلك، والباقي في الطابور أو مسقط)
+		deadline = time.monotonic() + 10
+		while pump.dropped + pump._queued < 999 and time.monotonic() < deadline:
+			time.sleep(0.01)
+		release.set()
+		self.assertTrue(exited.wait(10))
+
+		notices = [line for line in lines if line.startswith("[log-pump]")]
+		self.assertEqual(len(notices), 1)
+		dropped = int(notices[0].split()[1])
+		self.assertEqual(dropped, pump.dropped)
+		self.assertEqual(len(lines) - 1 + dropped, 1000)
+		# السطر الأول وصل، والأسطر المسقطة هي التي جاءت بعد امتلاء الطابور
+		self.assertEqual(lines[0], "[SERVER]: 0")
+		self.assertEqual(len(lines), 1 + 5 + 1)
+
+	def test_output_without_newlines_is_split(self):
+		lines, _ = self.run_pump(LogPump(), f"import sys; sys.stdout.write('x' * {MAX_LINE_CHARS * 2 + 10})")
+		self.assertEqual([len(line) for line in lines], [len("[SERVER]: ") + n for n in (MAX_LINE_CHARS, MAX_LINE_CHARS, 10)])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,84 @@
+# tests/test_log_store.py
+"""Writing, querying and pruning the persistent log store."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from server_manager import log_store
+from server_manager.log_buffer import LEVEL_ERROR, LEVEL_INFO, LEVEL_WARNING
+from server_manager.log_store import LogStore
+
+RECORDS = [
+	(1000.0, LEVEL_INFO, "site", "GET / 200"),
+	(1001.0, LEVEL_ERROR, "site", "Traceback (most recent call last):"),
+	(1002.0, LEVEL_INFO, "api", "GET /users 200"),
+	(1003.0, LEVEL_WARNING, "api", "Warning: slow query"),
+	(1004.0, LEVEL_INFO, "site", "GET /about 200"),
+	(1005.0, LEVEL_ERROR, "api", "Failed to connect to database"),
+]
+
+
+class LogStoreTest(unittest.TestCase):
+
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.addCleanup(self.tmp.cleanup)
+		# كتل صغيرة: كل سطرين تقريباً في كتلة مستقلة
+		self.store = LogStore(self.tmp.name, block_bytes=100)
+		for timestamp, level, backend, text in RECORDS:
+			self.store.append(backend, text, timestamp, level)
+
+	def texts(self, **filters):
+		return [record[3] for record in self.store.query(**filters)]
+
+	def test_everything_in_time_order(self):
+		self.assertEqual([tuple(record) for record in self.store.query()], RECORDS)
+		self.assertEqual(self.store.backends(), ["api", "site"])
+
+	def test_filters(self):
+		self.assertEqual(self.texts(since=1002, until=1004), ["GET /users 200", "Warning: slow query", "GET /about 200"])
+		self.assertEqual(self.texts(backends=["site"], min_level=LEVEL_WARNING), ["Traceback (most recent call last):"])
+		self.assertEqual(self.texts(contains="GET /"), ["GET / 200", "GET /users 200", "GET /about 200"])
+		self.assertEqual(self.texts(backends=["missing"]), [])
+
+	def test_limit_returns_the_newest_matches(self):
+		self.assertEqual(self.texts(limit=2), ["GET /about 200", "Failed to connect to database"])
+		self.assertEqual(self.texts(backends=["site"], limit=2), ["Traceback (most recent call last):", "GET /about 200"])
+
+	def test_only_matching_blocks_are_read(self):
+		self.store.flush()
+		with mock.patch.object(log_store, "read_block", wraps=log_store.read_block) as read_block:
+			self.assertEqual(self.texts(since=1005), ["Failed to connect to database"])
+		self.assertEqual(read_block.call_count, 1)
+
+	def test_damaged_block_is_skipped(self):
+		self.store.flush()
+		segment = self.store.segments()[0]
+		with open(segment, "r+b") as f:
+			f.seek(8)
+			f.write(b"\xff" * 8)
+		# الكتلة الأولى تالفة، والباقي يُقرأ كالمعتاد
+		self.assertEqual(self.texts()[-1], "Failed to connect to database")
+		self.assertLess(len(self.texts()), len(RECORDS))
+
+
+class LogStorePruneTest(unittest.TestCase):
+
+	def test_oldest_segments_go_first_and_the_active_one_stays(self):
+		with tempfile.TemporaryDirectory() as directory:
+			store = LogStore(directory, block_bytes=1, segment_bytes=1, max_bytes=200)
+			for i in range(20):
+				store.append("site", f"line {i} " + "x" * 50, 1000.0 + i)
+				store.flush()
+			segments = store.segments()
+			self.assertLess(len(segments), 20)
+			self.assertLessEqual(sum(os.path.getsize(path) for path in segments[:-1]), 200)
+			texts = [record[3] for record in store.query()]
+			self.assertEqual(texts[-1], "line 19 " + "x" * 50)
+			self.assertNotIn("line 0 " + "x" * 50, texts)
+			self.assertEqual(len(segments), len([n for n in os.listdir(directory) if n.endswith(".idx")]))
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,102 @@
+# tests/test_metrics.py
+"""Latency histogram, access-line parsing and the per-backend metrics registry."""
+import unittest
+
+from server_manager.metrics import (
+	MAX_PATHS, OTHER_PATH, Histogram, MetricsRegistry, RateCounter, parse_access_line
+)
+
+
+class HistogramTest(unittest.TestCase):
+
+	def test_small_values_are_exact(self):
+		histogram = Histogram()
+		for value in range(1, 32):
+			histogram.record(value)
+		self.assertEqual(histogram.percentile(50), 16)
+		self.assertEqual(histogram.percentile(100), 31)
+
+	def test_relative_error_is_bounded(self):
+		# من ميكروثانية إلى ساعة كاملة
+		value = 1
+		while value <= 3_600_000_000:
+			histogram = Histogram()
+			histogram.record(value)
+			histogram.record(value * 4) # يمنع قص النتيجة إلى القيمة العظمى
+			with self.subTest(value=value):
+				reported = histogram.percentile(50)
+				self.assertGreaterEqual(reported, value)
+				self.assertLessEqual(reported, value * 1.0625)
+			value = value * 3 + 7
+
+	def test_percentiles(self):
+		histogram = Histogram()
+		for value in range(1, 1001):
+			histogram.record(value * 1000)
+		for p, expected in ((50, 500_000), (95, 950_000), (99, 990_000)):
+			with self.subTest(p=p):
+				self.assertAlmostEqual(histogram.percentile(p), expected, delta=expected * 0.0625)
+		self.assertEqual(histogram.percentile(100), 1_000_000)
+		self.assertEqual(histogram.max, 1_000_000)
+
+	def test_empty_and_negative(self):
+		histogram = Histogram()
+		self.assertEqual(histogram.percentile(99), 0)
+		histogram.record(-5)
+		self.assertEqual((histogram.total, histogram.max, histogram.percentile(50)), (1, 0, 0))
+
+
+class RateCounterTest(unittest.TestCase):
+
+	def test_counts_full_seconds_in_the_window(self):
+		counter = RateCounter()
+		for second in range(100, 110):
+			for _ in range(3):
+				counter.add(second + 0.5)
+		counter.add(110.2) # الثانية الحالية لم تكتمل بعد
+		self.assertEqual(counter.rate(110.5), 3)
+		self.assertEqual(counter.rate(110.5, window=20), 1.5)
+
+
+class ParseAccessLineTest(unittest.TestCase):
+
+	def test_common_log_format(self):
+		line = '127.0.0.1 - - [18/Oct/2026 15:10:04] "GET /users?id=1 HTTP/1.1" 200 1234'
+		self.assertEqual(parse_access_line(line), ("GET", "/users", 200, 1234))
+		self.assertEqual(parse_access_line('"POST /login HTTP/1.0" 302 -'), ("POST", "/login", 302, 0))
+
+	def test_php_builtin_server(self):
+		line = "[Sat Oct 18 15:10:04 2026] 127.0.0.1:54321 [404]: GET /missing.php?x=1"
+		self.assertEqual(parse_access_line(line), ("GET", "/missing.php", 404, 0))
+
+	def test_other_lines(self):
+		self.assertIsNone(parse_access_line("Watching for file changes with StatReloader"))
+
+
+class MetricsRegistryTest(unittest.TestCase):
+
+	def test_totals_and_paths(self):
+		registry = MetricsRegistry()
+		registry.record("site", "GET", "/", 200, 100, seconds=0.002, now=1000)
+		registry.record("site", "GET", "/", 404, 50, now=1000)
+		self.assertTrue(registry.observe_log_line("site", '"GET /a HTTP/1.1" 200 10'))
+		self.assertFalse(registry.observe_log_line("site", "Server started"))
+		site = registry.snapshot()["backends"]["site"]
+		self.assertEqual((site["requests"], site["bytes"], site["timed"]), (3, 160, 1))
+		self.assertEqual(site["statuses"], {"200": 2, "404": 1})
+		self.assertEqual(site["paths"]["/"]["requests"], 2)
+		self.assertAlmostEqual(site["p50_ms"], 2, delta=0.125)
+
+	def test_paths_beyond_the_limit_are_grouped(self):
+		registry = MetricsRegistry()
+		for i in range(MAX_PATHS + 5):
+			registry.record("api", "GET", f"/item/{i}", 200)
+		paths = registry.snapshot()["backends"]["api"]["paths"]
+		self.assertEqual(len(paths), MAX_PATHS + 1)
+		self.assertEqual(paths[OTHER_PATH]["requests"], 5)
+		registry.reset("api")
+		self.assertEqual(registry.snapshot()["backends"], {})
+
+
+if __name__ == "__main__":
+	unittest.main()
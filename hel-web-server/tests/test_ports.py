@@ -0,0 +1,103 @@
+# tests/test_ports.py
+"""Port ownership read from /proc and free-port searches."""
+import os
+import socket
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from server_manager import ports
+from server_manager.ports import (
+	SocketIndex, _decode_address, bound_ports, ephemeral_port, find_free_port, is_port_free, kill_port_owners,
+	port_owners
+)
+
+LISTENER = """
+import socket, sys, time
+s = socket.socket()
+s.bind(("127.0.0.1", 0))
+s.listen()
+print(s.getsockname()[1], flush=True)
+time.sleep(60)
+"""
+
+
+def listener():
+	sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+	# مثل خوادمنا: SO_REUSEADDR يسمح بإعادة الربط فوق اتصالات TIME_WAIT
+	sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+	sock.bind(("127.0.0.1", 0))
+	sock.listen()
+	return sock
+
+
+class DecodeAddressTest(unittest.TestCase):
+
+	def test_ipv4_and_ipv6(self):
+		self.assertEqual(_decode_address("0100007F", socket.AF_INET), "127.0.0.1")
+		self.assertEqual(_decode_address("00000000000000000000000001000000", socket.AF_INET6), "::1")
+
+
+@unittest.skipUnless(os.path.exists("/proc/net/tcp"), "needs Linux /proc")
+class PortOwnershipTest(unittest.TestCase):
+
+	def setUp(self):
+		# فهرس جديد لكل اختبار، فلا يمنع فاصل إعادة المسح اكتشاف المقابس الجديدة
+		patcher = mock.patch.object(ports, "_index", SocketIndex())
+		patcher.start()
+		self.addCleanup(patcher.stop)
+
+	def test_listening_socket_is_bound_and_owned_by_us(self):
+		with listener() as sock:
+			port = sock.getsockname()[1]
+			self.assertIn(port, bound_ports())
+			self.assertFalse(is_port_free(port, "127.0.0.1"))
+			owners = port_owners(port)
+			self.assertEqual([owner.pid for owner in owners], [os.getpid()])
+			self.assertEqual(owners[0].address, "127.0.0.1")
+		self.assertEqual(port_owners(port), [])
+
+	def test_connections_do_not_hold_a_port(self):
+		with listener() as server:
+			client = socket.create_connection(server.getsockname())
+			accepted, _ = server.accept()
+			client_port = client.getsockname()[1]
+			self.assertNotIn(client_port, bound_ports())
+			# يغلق الخادم أولاً فيبقى منفذه في TIME_WAIT
+			port = server.getsockname()[1]
+			accepted.close()
+			client.close()
+		self.assertNotIn(port, bound_ports())
+		self.assertTrue(is_port_free(port, "127.0.0.1"))
+
+	def test_find_free_port_skips_bound_and_excluded_ports(self):
+		with listener() as sock:
+			port = sock.getsockname()[1]
+			found = find_free_port(port, span=10, host="127.0.0.1", exclude={port + 1})
+			self.assertNotIn(found, (port, port + 1))
+			self.assertTrue(port < found < port + 10)
+		self.assertIsNone(find_free_port(port, span=1, host="127.0.0.1", exclude={port}))
+
+	def test_ephemeral_port_can_be_bound(self):
+		self.assertTrue(is_port_free(ephemeral_port(), "127.0.0.1"))
+
+	def test_kill_port_owners(self):
+		process = subprocess.Popen([sys.executable, "-c", LISTENER], stdout=subprocess.PIPE, text=True)
+		self.addCleanup(process.wait)
+		self.addCleanup(process.kill)
+		port = int(process.stdout.readline())
+		killed, failed = kill_port_owners(port, timeout=2)
+		self.assertEqual([owner.pid for owner in killed], [process.pid])
+		self.assertEqual(failed, [])
+		self.assertIsNotNone(process.wait(timeout=5))
+
+	def test_own_process_is_never_signalled(self):
+		with listener() as sock:
+			killed, failed = kill_port_owners(sock.getsockname()[1], timeout=0)
+		self.assertEqual(killed, [])
+		self.assertEqual([owner.pid for owner in failed], [os.getpid()])
+
+
+if __name__ == "__main__":
+	unittest.main()
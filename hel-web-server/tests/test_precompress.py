@@ -0,0 +1,99 @@
+# tests/test_precompress.py
+"""Variant lifetime in the on-disk precompression cache."""
+import os
+import tempfile
+import time
+import unittest
+
+from server_manager.precompress import PrecompressStore
+
+
+def write(path, data):
+	with open(path, "wb") as f:
+		f.write(data)
+
+
+def cached_files(cache_dir):
+	return sorted(
+		name
+		for bucket in os.listdir(cache_dir)
+		for name in os.listdir(os.path.join(cache_dir, bucket))
+	)
+
+
+class PrecompressStoreTest(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.TemporaryDirectory()
+		self.cache = tempfile.TemporaryDirectory()
+		self.store = PrecompressStore(self.root.name, cache_dir=self.cache.name, log=lambda message: None)
+		self.store.encodings = ("gzip",)
+
+	def tearDown(self):
+		self.root.cleanup()
+		self.cache.cleanup()
+
+	def source(self, name, text):
+		path = os.path.join(self.root.name, name)
+		write(path, (text * 2000).encode())
+		return path
+
+	def test_deleted_source_drops_its_variants(self):
+		path = self.source("app.js", "var a = 1;\n")
+		self.store._compress(path)
+		self.assertEqual(len(cached_files(self.cache.name)), 1)
+		os.remove(path)
+		self.store._compress(path)
+		self.assertEqual(cached_files(self.cache.name), [])
+
+	def test_changed_source_replaces_its_variant(self):
+		path = self.source("app.js", "var a = 1;\n")
+		self.store._compress(path)
+		before = cached_files(self.cache.name)
+		write(path, b"var b = 2;\n" * 3000)
+		self.store._compress(path)
+		after = cached_files(self.cache.name)
+		self.assertEqual(len(after), 1)
+		self.assertNotEqual(before, after)
+
+	def test_shared_contents_are_kept_while_still_used(self):
+		first = self.source("a.css", "body { color: red; }\n")
+		second = self.source("b.css", "body { color: red; }\n")
+		self.store._compress(first)
+		self.store._compress(second)
+		os.remove(first)
+		self.store._compress(first)
+		self.assertEqual(len(cached_files(self.cache.name)), 1)
+		self.assertIsNotNone(self.store.lookup(second, os.stat(second).st_mtime_ns, os.path.getsize(second), "gzip"))
+
+	def test_prune_removes_oldest_unused_variants(self):
+		# نسخ يتيمة من مشاريع أخرى، الأقدم أولاً
+		stale = []
+		for i, name in enumerate(("aa", "bb", "cc")):
+			bucket = os.path.join(self.cache.name, name)
+			os.mkdir(bucket)
+			target = os.path.join(bucket, name * 32 + ".gz")
+			write(target, b"x" * 1000)
+			os.utime(target, ns=(time.time_ns() - (10 - i) * 10**9,) * 2)
+			stale.append(name * 32 + ".gz")
+		path = self.source("app.js", "var a = 1;\n")
+		self.store._compress(path)
+		used = os.path.getsize(self.store._sources[path].variants["gzip"].path)
+
+		self.store.max_bytes = used + 1500
+		self.store._prune()
+		left = cached_files(self.cache.name)
+		self.assertNotIn(stale[0], left)
+		self.assertNotIn(stale[1], left)
+		self.assertIn(stale[2], left)
+		self.assertEqual(len(left), 2)
+		self.assertFalse(os.path.exists(os.path.join(self.cache.name, "aa")))
+
+		# النسخة المستخدمة حالياً لا تُحذف حتى لو تجاوزت الحد وحدها
+		self.store.max_bytes = 0
+		self.store._prune()
+		self.assertEqual(len(cached_files(self.cache.name)), 1)
+
+
+if __name__ == "__main__":
+	unittest.main()
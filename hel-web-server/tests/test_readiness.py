@@ -0,0 +1,104 @@
+# tests/test_readiness.py
+"""Probing backends until they accept connections or answer HTTP."""
+import os
+import socket
+import subprocess
+import sys
+import threading
+import unittest
+
+from server_manager.ports import ephemeral_port
+from server_manager.readiness import wait_for_ready_fd, wait_until_ready
+
+
+class _Listener:
+	"""A local listening socket whose accepted connections get ``reply`` and are closed."""
+
+	def __init__(self, reply=b""):
+		self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		self.sock.bind(("127.0.0.1", 0))
+		self.sock.listen()
+		self.port = self.sock.getsockname()[1]
+		self.reply = reply
+		threading.Thread(target=self._serve, daemon=True).start()
+
+	def _serve(self):
+		while True:
+			try:
+				conn, _ = self.sock.accept()
+			except OSError:
+				return
+			with conn:
+				if self.reply:
+					conn.recv(4096)
+					conn.sendall(self.reply)
+
+	def close(self):
+		self.sock.close()
+
+
+class WaitUntilReadyTest(unittest.TestCase):
+
+	def listener(self, reply=b""):
+		listener = _Listener(reply)
+		self.addCleanup(listener.close)
+		return listener
+
+	def test_open_port_is_ready(self):
+		result = wait_until_ready(self.listener().port, timeout=2)
+		self.assertTrue(result.ready)
+		self.assertLess(result.elapsed, 1)
+
+	def test_any_http_answer_is_ready(self):
+		listener = self.listener(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n")
+		result = wait_until_ready(listener.port, health_path="/health", timeout=2)
+		self.assertTrue(result.ready)
+		self.assertEqual(result.reason, "GET /health -> 503")
+
+	def test_port_closing_without_answer_times_out(self):
+		# يقبل الاتصال ثم يغلقه دون رد HTTP
+		result = wait_until_ready(self.listener().port, health_path="/", timeout=0.5)
+		self.assertFalse(result.ready)
+		# إغلاق قبل قراءة الطلب قد يصل كـ RST بدلاً من نهاية عادية
+		self.assertIn(result.reason.split(":")[0], ("timed out", "health check failed"))
+		self.assertGreaterEqual(result.elapsed, 0.5)
+
+	def test_closed_port_times_out(self):
+		result = wait_until_ready(ephemeral_port(), timeout=0.3)
+		self.assertFalse(result.ready)
+		self.assertEqual(result.reason, "port not accepting connections")
+
+	def test_exited_process_fails_fast(self):
+		process = subprocess.Popen([sys.executable, "-c", "raise SystemExit(3)"])
+		process.wait()
+		result = wait_until_ready(ephemeral_port(), process=process, timeout=5)
+		self.assertFalse(result.ready)
+		self.assertEqual(result.exit_code, 3)
+		self.assertLess(result.elapsed, 1)
+
+
+class WaitForReadyFdTest(unittest.TestCase):
+
+	def test_byte_on_pipe_is_ready(self):
+		read_fd, write_fd = os.pipe()
+		os.write(write_fd, b"1")
+		os.close(write_fd)
+		self.assertTrue(wait_for_ready_fd(read_fd, timeout=1).ready)
+
+	def test_closed_pipe_is_not_ready(self):
+		read_fd, write_fd = os.pipe()
+		os.close(write_fd)
+		result = wait_for_ready_fd(read_fd, timeout=1)
+		self.assertFalse(result.ready)
+		self.assertIn("ready pipe closed", result.reason)
+
+	def test_silent_pipe_times_out(self):
+		read_fd, write_fd = os.pipe()
+		self.addCleanup(os.close, write_fd)
+		result = wait_for_ready_fd(read_fd, timeout=0.2)
+		self.assertFalse(result.ready)
+		self.assertEqual(result.reason, "timed out")
+
+
+if __name__ == "__main__":
+	unittest.main()
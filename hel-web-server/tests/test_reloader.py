@@ -0,0 +1,95 @@
+# tests/test_reloader.py
+"""The inotify project watcher behind automatic reloads."""
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from server_manager.config import RELOAD_DEBOUNCE, RELOAD_MAX_DELAY
+from server_manager.reloader import CHANGE_CODE, CHANGE_STATIC, ProjectWatcher, classify
+
+
+def write(path, data):
+	with open(path, "w") as f:
+		f.write(data)
+
+
+def open_fds():
+	return len(os.listdir("/proc/self/fd"))
+
+
+@unittest.skipUnless(os.path.isdir("/proc/self/fd"), "needs Linux /proc")
+class ProjectWatcherTest(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.TemporaryDirectory()
+		self.addCleanup(self.root.cleanup)
+
+	def test_stop_without_start_closes_descriptors(self):
+		before = open_fds()
+		for _ in range(3):
+			ProjectWatcher(self.root.name, lambda kind, paths: None).stop()
+		self.assertEqual(open_fds(), before)
+
+	def test_stop_after_start_closes_descriptors(self):
+		before = open_fds()
+		watcher = ProjectWatcher(self.root.name, lambda kind, paths: None)
+		watcher.start()
+		watcher.stop()
+		watcher.stop()
+		self.assertEqual(open_fds(), before)
+
+	def watch(self):
+		"""Starts a watcher on the temp tree; returns (reported bursts, event set on the first one)."""
+		calls, changed = [], threading.Event()
+
+		def on_change(kind, paths):
+			calls.append((kind, [os.path.basename(path) for path in paths]))
+			changed.set()
+
+		watcher = ProjectWatcher(self.root.name, on_change)
+		watcher.start()
+		self.addCleanup(watcher.stop)
+		return calls, changed
+
+	def test_burst_of_writes_is_one_reload(self):
+		calls, changed = self.watch()
+		app, style = os.path.join(self.root.name, "app.py"), os.path.join(self.root.name, "style.css")
+		# فاصل أقصر من مهلة الهدوء بين كل كتابة وأخرى
+		for i in range(10):
+			write(app if i % 2 else style, str(i))
+			time.sleep(RELOAD_DEBOUNCE / 5)
+		self.assertTrue(changed.wait(5))
+		time.sleep(RELOAD_DEBOUNCE * 3)
+		self.assertEqual(calls, [(CHANGE_CODE, ["app.py", "style.css"])])
+
+	def test_static_changes_and_editor_noise(self):
+		calls, changed = self.watch()
+		write(os.path.join(self.root.name, ".app.py.swp"), "x")
+		write(os.path.join(self.root.name, "index.html"), "<p>")
+		self.assertTrue(changed.wait(5))
+		time.sleep(RELOAD_DEBOUNCE * 3)
+		self.assertEqual(calls, [(CHANGE_STATIC, ["index.html"])])
+
+	def test_continuous_writes_reload_after_max_delay(self):
+		calls, changed = self.watch()
+		app = os.path.join(self.root.name, "app.py")
+		started = time.monotonic()
+		while not changed.is_set() and time.monotonic() - started < RELOAD_MAX_DELAY * 3:
+			write(app, str(time.monotonic()))
+			time.sleep(RELOAD_DEBOUNCE / 3)
+		self.assertTrue(changed.is_set())
+		self.assertLess(time.monotonic() - started, RELOAD_MAX_DELAY + 0.5)
+
+
+class ClassifyTest(unittest.TestCase):
+
+	def test_code_static_and_noise(self):
+		code, other = classify(["/p/app.py", "/p/index.php", "/p/a.css", "/p/a.py~", "/p/4913", "/p/.#app.py", "/p/x.tmp"])
+		self.assertEqual(code, ["/p/app.py", "/p/index.php"])
+		self.assertEqual(other, ["/p/a.css"])
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,107 @@
+# tests/test_static_server.py
+"""Requests against the in-process asyncio static file engine."""
+import http.client
+import os
+import socket
+import tempfile
+import unittest
+
+from server_manager.http_util import MAX_BODY_BYTES
+from server_manager.ports import ephemeral_port
+from server_manager.static_server import StaticServer
+
+
+class StaticServerTest(unittest.TestCase):
+
+	def setUp(self):
+		self.root = tempfile.TemporaryDirectory()
+		with open(os.path.join(self.root.name, "index.html"), "wb") as f:
+			f.write(b"<h1>home</h1>")
+		os.mkdir(os.path.join(self.root.name, "docs"))
+		with open(os.path.join(self.root.name, "docs", "a.txt"), "wb") as f:
+			f.write(b"0123456789")
+		self.server = StaticServer(self.root.name, ephemeral_port(), host="127.0.0.1")
+		self.server.start()
+
+	def tearDown(self):
+		self.server.stop()
+		self.root.cleanup()
+
+	def connect(self):
+		return http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+
+	def get(self, path, method="GET", headers=None, body=None):
+		connection = self.connect()
+		connection.request(method, path, body=body, headers=headers or {})
+		response = connection.getresponse()
+		data = response.read()
+		connection.close()
+		return response, data
+
+	def test_file_and_index(self):
+		response, data = self.get("/docs/a.txt")
+		self.assertEqual(response.status, 200)
+		self.assertEqual(data, b"0123456789")
+		self.assertEqual(response.getheader("Content-Type"), "text/plain; charset=utf-8")
+		response, data = self.get("/")
+		self.assertEqual(data, b"<h1>home</h1>")
+
+	def test_directory_without_slash_redirects(self):
+		response, _ = self.get("/docs?x=1")
+		self.assertEqual(response.status, 301)
+		self.assertEqual(response.getheader("Location"), "/docs/?x=1")
+
+	def test_listing_and_missing_file(self):
+		os.remove(os.path.join(self.root.name, "index.html"))
+		response, data = self.get("/")
+		self.assertEqual(response.status, 200)
+		self.assertIn(b'href="docs/"', data)
+		self.assertEqual(self.get("/missing.txt")[0].status, 404)
+		self.assertEqual(self.get("/../etc/passwd")[0].status, 404)
+
+	def test_head_has_no_body(self):
+		response, data = self.get("/docs/a.txt", method="HEAD")
+		self.assertEqual(response.getheader("Content-Length"), "10")
+		self.assertEqual(data, b"")
+
+	def test_conditional_get(self):
+		etag = self.get("/docs/a.txt")[0].getheader("ETag")
+		response, data = self.get("/docs/a.txt", headers={"If-None-Match": etag})
+		self.assertEqual(response.status, 304)
+		self.assertEqual(data, b"")
+
+	def test_range(self):
+		response, data = self.get("/docs/a.txt", headers={"Range": "bytes=2-4"})
+		self.assertEqual(response.status, 206)
+		self.assertEqual(data, b"234")
+		self.assertEqual(response.getheader("Content-Range"), "bytes 2-4/10")
+
+	def test_other_methods_are_not_allowed(self):
+		response, _ = self.get("/docs/a.txt", method="POST", body=b"x" * 1000)
+		self.assertEqual(response.status, 405)
+		self.assertEqual(response.getheader("Allow"), "GET, HEAD")
+
+	def test_body_is_dropped_and_connection_stays_usable(self):
+		connection = self.connect()
+		connection.request("GET", "/docs/a.txt", body=b"y" * 200000, headers={"Content-Type": "text/plain"})
+		response = connection.getresponse()
+		self.assertEqual(response.read(), b"0123456789")
+		connection.request("GET", "/docs/a.txt")
+		self.assertEqual(connection.getresponse().read(), b"0123456789")
+		connection.close()
+
+	def test_oversized_body_is_refused_without_reading_it(self):
+		with socket.create_connection(("127.0.0.1", self.server.port), timeout=5) as sock:
+			sock.sendall(f"GET /docs/a.txt HTTP/1.1\r\nHost: x\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode())
+			reply = b""
+			while True:
+				data = sock.recv(4096)
+				if not data:
+					break
+				reply += data
+		self.assertTrue(reply.startswith(b"HTTP/1.1 413 "), reply[:40])
+		self.assertIn(b"Connection: close", reply)
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,51 @@
+# tests/test_wsgi_host.py
+"""The warm WSGI host must outlive the thread that started it."""
+import os
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+from unittest import mock
+
+from server_manager.ports import ephemeral_port
+from server_manager.web_server import WebServer
+
+APP = '''def app(environ, start_response):
+	start_response("200 OK", [("Content-Type", "text/plain")])
+	return [b"warm"]
+'''
+
+
+class WarmHostFromThreadTest(unittest.TestCase):
+
+	def setUp(self):
+		self.project = tempfile.TemporaryDirectory()
+		with open(os.path.join(self.project.name, "app.py"), "w") as f:
+			f.write(APP)
+		# لا نكتب سجلات الاختبار في أرشيف المستخدم (~/.local/state)
+		patcher = mock.patch("server_manager.web_server.LOG_STORE_ENABLED", False)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+		self.server = WebServer()
+		self.port = ephemeral_port()
+
+	def tearDown(self):
+		self.server.stop()
+		self.project.cleanup()
+
+	def test_survives_short_lived_starter_thread(self):
+		result = []
+		# الواجهة والمشرف يشغلان الخادم من خيط ينتهي فور عودة start
+		starter = threading.Thread(target=lambda: result.append(self.server.start(self.project.name, self.port, "flask_warm")))
+		starter.start()
+		starter.join()
+		self.assertEqual(result, [True])
+		time.sleep(0.5)
+		self.assertIsNone(self.server.django_process.poll())
+		with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/", timeout=5) as response:
+			self.assertEqual(response.read(), b"warm")
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,140 @@
+# tests/test_wsgi_server.py
+"""The prefork WSGI server, run as its own process the way WebServer starts it."""
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from server_manager.http_util import MAX_BODY_BYTES
+from server_manager.ports import ephemeral_port
+from server_manager.readiness import wait_until_ready
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APP = '''import os
+
+def app(environ, start_response):
+	body = environ["wsgi.input"].read()
+	reply = f"{environ['REQUEST_METHOD']} {environ['PATH_INFO']} {len(body)}".encode()
+	start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", str(len(reply))), ("X-Pid", str(os.getpid()))])
+	return [reply]
+'''
+
+
+def raw_request(port, data):
+	with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+		sock.sendall(data)
+		reply = b""
+		while True:
+			chunk = sock.recv(65536)
+			if not chunk:
+				return reply
+			reply += chunk
+
+
+class PreforkWSGITest(unittest.TestCase):
+
+	def setUp(self):
+		self.project = tempfile.TemporaryDirectory()
+		self.addCleanup(self.project.cleanup)
+		with open(os.path.join(self.project.name, "app.py"), "w") as f:
+			f.write(APP)
+		self.port = ephemeral_port()
+		self.process = subprocess.Popen(
+			[sys.executable, "-m", "server_manager.wsgi_server", "--app", "app:app",
+				"--host", "127.0.0.1", "--port", str(self.port), "--workers", "2"],
+			cwd=self.project.name,
+			env=dict(os.environ, PYTHONPATH=PACKAGE_ROOT),
+			stdout=subprocess.DEVNULL,
+			stderr=subprocess.DEVNULL,
+		)
+		self.addCleanup(self.stop)
+		result = wait_until_ready(self.port, process=self.process, timeout=10)
+		self.assertTrue(result.ready, result.reason)
+
+	def stop(self):
+		if self.process.poll() is None:
+			self.process.send_signal(signal.SIGTERM)
+			try:
+				self.process.wait(timeout=10)
+			except subprocess.TimeoutExpired:
+				self.process.kill()
+				self.process.wait()
+
+	def request(self, connection, method="GET", path="/", body=None, **kwargs):
+		connection.request(method, path, body=body, **kwargs)
+		response = connection.getresponse()
+		return response.read().decode(), int(response.getheader("X-Pid"))
+
+	def connect(self):
+		return http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+
+	def test_keep_alive_and_request_bodies(self):
+		connection = self.connect()
+		text, pid = self.request(connection, path="/hello")
+		self.assertEqual(text, "GET /hello 0")
+		text, same = self.request(connection, "POST", "/upload", b"x" * 100000)
+		self.assertEqual((text, same), ("POST /upload 100000", pid))
+		text, same = self.request(connection, "POST", "/chunked", iter([b"a" * 10, b"b" * 5]), encode_chunked=True)
+		self.assertEqual((text, same), ("POST /chunked 15", pid))
+		connection.close()
+
+	def test_oversized_body_is_413(self):
+		for framing in (f"Content-Length: {MAX_BODY_BYTES + 1}\r\n\r\n", f"Transfer-Encoding: chunked\r\n\r\n{MAX_BODY_BYTES + 1:x}\r\n"):
+			with self.subTest(framing=framing.split(":")[0]):
+				reply = raw_request(self.port, f"POST / HTTP/1.1\r\nHost: x\r\n{framing}".encode())
+				self.assertTrue(reply.startswith(b"HTTP/1.1 413 "), reply[:40])
+				self.assertIn(b"Connection: close", reply)
+
+	def test_malformed_chunk_size_is_400(self):
+		for body in (b"zz\r\nabc\r\n0\r\n\r\n", b"5\r\nab"):
+			with self.subTest(body=body):
+				with socket.create_connection(("127.0.0.1", self.port), timeout=5) as sock:
+					sock.sendall(b"POST / HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n" + body)
+					# الجسم المبتور لا يكتمل أبداً: نغلق جهة الإرسال ليصل الخادم إلى نهايته
+					sock.shutdown(socket.SHUT_WR)
+					reply = sock.recv(65536)
+				self.assertTrue(reply.startswith(b"HTTP/1.1 400 "), reply[:40])
+
+	def worker_pids(self, until, timeout=10):
+		"""Opens new connections until ``until(pids)`` holds; returns the pids seen."""
+		pids = set()
+		deadline = time.monotonic() + timeout
+		while not until(pids) and time.monotonic() < deadline:
+			try:
+				connection = self.connect()
+				pids.add(self.request(connection)[1])
+				connection.close()
+			except OSError:
+				time.sleep(0.05)
+		return pids
+
+	def test_connections_spread_over_the_workers(self):
+		# SO_REUSEPORT يوزع الاتصالات الجديدة بين العاملين
+		pids = self.worker_pids(lambda pids: len(pids) == 2)
+		self.assertEqual(len(pids), 2)
+		self.assertNotIn(self.process.pid, pids)
+
+	def test_crashed_worker_is_respawned(self):
+		workers = self.worker_pids(lambda pids: len(pids) == 2)
+		victim = min(workers)
+		os.kill(victim, signal.SIGKILL)
+		# العامل البديل يظهر بعد مهلة RESPAWN_BACKOFF
+		pids = self.worker_pids(lambda pids: pids - workers)
+		self.assertTrue(pids - workers)
+		self.assertIsNone(self.process.poll())
+
+	def test_sigterm_stops_master_and_workers(self):
+		self.process.send_signal(signal.SIGTERM)
+		self.assertEqual(self.process.wait(timeout=10), 0)
+		with self.assertRaises(OSError):
+			self.connect().request("GET", "/")
+
+
+if __name__ == "__main__":
+	unittest.main()